@@ -0,0 +1,79 @@
+"""学習統計ロールアップテーブル追加
+
+Revision ID: 003_stat_rollups
+Revises: 002_phase2_4
+Create Date: 2026-10-17
+
+追加テーブル: stat_rollups（daily_stats の週次・月次集計）
+既存の daily_stats は読み取り時に集計され、次回の更新時に行が作成される。
+"""
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from alembic import op
+
+# revision identifiers
+revision = "003_stat_rollups"
+down_revision = "002_phase2_4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # === stat_rollups テーブル (週次・月次ロールアップ) ===
+    op.create_table(
+        "stat_rollups",
+        sa.Column("id", postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column(
+            "user_id",
+            postgresql.UUID(as_uuid=True),
+            sa.ForeignKey("users.id"),
+            nullable=False,
+            index=True,
+        ),
+        sa.Column(
+            "period_type",
+            sa.String(10),
+            nullable=False,
+            comment="集計期間: week, month",
+        ),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("practice_minutes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column(
+            "sessions_completed", sa.Integer(), nullable=False, server_default="0"
+        ),
+        sa.Column(
+            "reviews_completed", sa.Integer(), nullable=False, server_default="0"
+        ),
+        sa.Column(
+            "new_expressions_learned", sa.Integer(), nullable=False, server_default="0"
+        ),
+        sa.Column("active_days", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("grammar_accuracy_avg", sa.Float(), nullable=True),
+        sa.Column("grammar_accuracy_max", sa.Float(), nullable=True),
+        sa.Column("pronunciation_avg", sa.Float(), nullable=True),
+        sa.Column("listening_speed_max", sa.Float(), nullable=True),
+        sa.Column(
+            "days",
+            postgresql.JSONB(),
+            nullable=False,
+            server_default=sa.text("'{}'::jsonb"),
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.text("now()"),
+        ),
+        sa.UniqueConstraint(
+            "user_id",
+            "period_type",
+            "period_start",
+            name="uq_stat_rollups_user_period",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("stat_rollups")
@@ -0,0 +1,46 @@
+"""会話セッションのローリング要約カラム追加
+
+Revision ID: 004_conversation_summary
+Revises: 003_stat_rollups
+Create Date: 2026-10-17
+
+追加カラム: conversation_sessions.context_summary, summarized_message_count
+既存セッションは要約なし（0件畳み込み済み）として扱われ、次回のメッセージ送信時に要約される。
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = "004_conversation_summary"
+down_revision = "003_stat_rollups"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "conversation_sessions",
+        sa.Column(
+            "context_summary",
+            sa.Text(),
+            nullable=True,
+            comment="直近ターン以前のメッセージのローリング要約",
+        ),
+    )
+    op.add_column(
+        "conversation_sessions",
+        sa.Column(
+            "summarized_message_count",
+            sa.Integer(),
+            nullable=False,
+            server_default="0",
+            comment="要約に畳み込み済みのメッセージ数",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("conversation_sessions", "summarized_message_count")
+    op.drop_column("conversation_sessions", "context_summary")
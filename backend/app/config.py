@@ -52,12 +52,34 @@ class Settings(BaseSettings):
     # Azure Speech
     azure_speech_key: str = ""
     azure_speech_region: str = "eastus2"
+    # 共有クライアント: 同時リクエスト数の上限・タイムアウト・トークン更新間隔（有効期限10分）
+    azure_speech_max_concurrency: int = 16
+    azure_speech_timeout_seconds: float = 60.0
+    azure_speech_token_refresh_seconds: float = 540.0
+    # 5xx・接続エラーが連続した場合に一定時間呼び出しを遮断する
+    azure_speech_circuit_breaker_threshold: int = 5
+    azure_speech_circuit_breaker_timeout: float = 30.0
+    # 合成済みTTS音声のキャッシュ（SSMLと出力形式のハッシュをキーにディスクへ保存、LRUで削除）
+    tts_cache_enabled: bool = True
+    tts_cache_dir: str = "/tmp/fluentedge-tts-cache"
+    tts_cache_max_bytes: int = 536870912  # 512MB
+    # 環境音（電話・ビデオ通話・オフィス等）をクリーンなWAVへの後処理で再現する（無効時はSSMLで合成）
+    tts_environment_effects_enabled: bool = True
+    # 範囲内の話速は1.0倍の音声を時間伸縮して作る（範囲外・無効時はSSMLの rate で合成）
+    tts_time_stretch_enabled: bool = True
+    tts_time_stretch_min_speed: float = 0.5
+    tts_time_stretch_max_speed: float = 1.5
 
     # Auth (JWT)
     jwt_secret_key: str = "change-this-to-a-random-secret-key-in-production"
     jwt_algorithm: str = "HS256"
     jwt_expiry_hours: int = 24
 
+    # 認証プリンシパルキャッシュ（Redis + プロセス内LRU）
+    principal_cache_ttl_seconds: int = 60
+    principal_cache_local_ttl_seconds: float = 5.0
+    principal_cache_local_max_entries: int = 10000
+
     # Stripe (Phase 3: サブスクリプション決済)
     stripe_secret_key: str = ""
     stripe_webhook_secret: str = ""
@@ -96,7 +118,111 @@ class Settings(BaseSettings):
     llm_circuit_breaker_threshold: int = 5
     llm_circuit_breaker_timeout: float = 60.0
     llm_retry_max: int = 3
-    llm_rate_limit_rpm: int = 60
+    llm_rate_limit_rpm: int = 60  # クラスタ全体（共有状態有効時）
+    # ブレーカー・レートリミットをRedisでワーカー間共有（Redis未接続時はワーカー単位）
+    llm_shared_resilience_enabled: bool = True
+    # リトライ待機の上限（Retry-After の指定がこれを超える場合は待たずにフォールバック）
+    llm_retry_max_delay_seconds: float = 30.0
+
+    # プロバイダー別の適応的同時実行数（ワーカー単位。429で半減、成功で徐々に拡大）
+    llm_adaptive_concurrency_enabled: bool = True
+    llm_adaptive_concurrency_initial: int = 8
+    llm_adaptive_concurrency_min: int = 1
+    llm_adaptive_concurrency_max: int = 32
+
+    # リクエスト期限（X-Request-Deadline ヘッダーと既定値の早い方。LLMのリトライ・
+    # フォールバック・HTTPタイムアウトは残り時間内で行う。gunicorn の timeout より短くする）
+    request_deadline_seconds: float = 90.0  # 0で期限なし
+    # エンドポイント別の既定値（"パス接頭辞=秒" のカンマ区切り、最長一致）
+    # ストリーミング応答は逐次返すため、/api/talk/message の短い期限を継承させない
+    request_deadline_overrides: str = (
+        "/api/talk/message=45,/api/talk/message/stream=90,/api/talk/start=45"
+    )
+
+    @property
+    def request_deadline_overrides_map(self) -> dict[str, float]:
+        """エンドポイント別の期限を辞書で返す"""
+        overrides: dict[str, float] = {}
+        for item in self.request_deadline_overrides.split(","):
+            prefix, sep, seconds = item.partition("=")
+            if sep and prefix.strip():
+                overrides[prefix.strip()] = float(seconds)
+        return overrides
+
+    # LLMヘッジリクエスト（先頭プロバイダーが遅い場合に次のプロバイダーへ重複送信）
+    llm_hedge_enabled: bool = False
+    llm_hedge_percentile: float = 0.95
+    llm_hedge_max_extra_ratio: float = 0.05  # 追加呼び出しの上限（リクエスト数比）
+    llm_hedge_min_samples: int = 20
+
+    # LLMプロバイダーのスコアリング（priority, cheapest_within_slo, fastest）
+    llm_routing_objective: str = "priority"
+    llm_routing_latency_slo_seconds: float = 10.0
+    llm_routing_max_error_rate: float = 0.5
+    # 劣化したプロバイダーの観測が半減する秒数（経過後に再び試行される）
+    llm_routing_recovery_half_life_seconds: float = 60.0
+
+    # LLMアドミッション制御（ワーカー単位の同時実行数と優先度別の待ち行列）
+    llm_admission_enabled: bool = True
+    llm_admission_max_concurrency: int = 32
+    llm_admission_interactive_concurrency: int = 32
+    llm_admission_standard_concurrency: int = 24
+    llm_admission_background_concurrency: int = 8
+    # background の受付待ちがこの秒数を超えたらフォールバック応答へ切り替える（0で無制限）
+    llm_admission_background_max_wait_seconds: float = 2.0
+
+    # LLMリクエストの合流（同時に実行中の同一リクエストで上流呼び出しを共有）
+    llm_coalescing_enabled: bool = True
+    llm_coalescing_lock_ttl_seconds: int = 30  # 他ワーカーの結果を待つ最大時間
+    llm_coalescing_result_ttl_seconds: int = 5
+
+    # LLM HTTP接続プール（プロバイダーのベースURLごとに共有）
+    llm_http2_enabled: bool = True
+    llm_http_max_connections: int = 100
+    llm_http_max_keepalive_connections: int = 20
+    llm_http_keepalive_expiry: float = 30.0
+
+    # LLM応答キャッシュ（生成系エンドポイントの chat_json をユーザー横断で再利用）
+    llm_response_cache_enabled: bool = True
+    llm_response_cache_ttl_seconds: int = 3600
+    llm_response_cache_max_entries: int = 5000
+    llm_response_cache_max_value_bytes: int = 65536
+
+    # プロバイダー側プロンプトキャッシュ（SystemPrompt の静的部分に cache_control を付与）
+    llm_prompt_cache_enabled: bool = True
+
+    # API利用ログのバッチ書き込み
+    usage_log_batch_size: int = 200
+    usage_log_flush_interval: float = 2.0
+    usage_log_max_queue_size: int = 10000
+
+    # LLM利用クォータ（プラン別月間上限、Redisカウンター）
+    quota_enabled: bool = True
+    quota_reconcile_interval_seconds: float = 300.0
+
+    # コンテンツプール（事前生成エクササイズ + バックグラウンド補充）
+    content_pool_enabled: bool = True
+    content_pool_low_water: int = 20
+    content_pool_high_water: int = 60
+    content_pool_batch_size: int = 10
+    content_pool_max_calls_per_refill: int = 5
+    content_pool_refill_interval_seconds: float = 30.0
+    content_pool_lock_seconds: int = 300
+    content_pool_max_pools: int = 500  # 超過分は最終利用時刻の古い順に破棄
+    content_pool_idle_seconds: int = 7 * 24 * 3600  # この期間使われないプールを破棄
+    content_pool_seen_ttl_seconds: int = 30 * 24 * 3600
+
+    # 会話コンテキスト（直近ターンは原文、それ以前はローリング要約に畳み込む）
+    talk_context_recent_turns: int = 6
+    # 会話履歴の推定トークン上限（システムプロンプト除く）
+    talk_context_max_tokens: int = 3000
+    # 未要約の古いターンがこの数に達したら要約
+    talk_context_summary_trigger_turns: int = 4
+    talk_context_summary_max_tokens: int = 400
+
+    # アクティブな会話セッション状態のRedisキャッシュ（アイドル時間経過で破棄）
+    talk_session_cache_enabled: bool = True
+    talk_session_cache_idle_seconds: int = 1800
 
     model_config = {"env_file": "../.env", "extra": "ignore"}
 
@@ -3,7 +3,7 @@
 import uuid
 from datetime import UTC, datetime
 
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jose import JWTError, jwt
 from sqlalchemy import select
@@ -11,11 +11,22 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import settings
 from app.database import get_db
+from app.llm.usage import set_usage_user
 from app.models.user import User
+from app.principal_cache import principal_cache
+from app.schemas.auth import CurrentUser
 
 # Bearer トークン取得スキーム
 security = HTTPBearer()
 
+# 認証済みプリンシパルとして読み込むカラム（リレーション・履歴はロードしない）
+PRINCIPAL_COLUMNS = (
+    User.id,
+    User.target_level,
+    User.native_language,
+    User.subscription_plan,
+)
+
 
 def decode_access_token(token: str) -> dict:
     """JWTトークンをデコードしてペイロードを返す"""
@@ -34,12 +45,43 @@ def decode_access_token(token: str) -> dict:
         )
 
 
+def get_token_claims(request: Request, token: str) -> dict:
+    """リクエスト内で一度だけJWTをデコードし、結果を request.state で共有する
+
+    ミドルウェア（レート制限）と依存関係（認証）で同じトークンを二重にデコードしない。
+    """
+    cached = getattr(request.state, "token_claims", None)
+    if isinstance(cached, tuple) and cached[0] == token:
+        return cached[1]
+
+    payload = decode_access_token(token)
+    request.state.token_claims = (token, payload)
+    return payload
+
+
+def peek_token_claims(request: Request) -> dict | None:
+    """AuthorizationヘッダーのJWTクレームを取得（無効・未指定時はNone）"""
+    auth_header = request.headers.get("Authorization", "")
+    if not auth_header.startswith("Bearer "):
+        return None
+    try:
+        return get_token_claims(request, auth_header[7:])
+    except HTTPException:
+        return None
+
+
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db),
-) -> User:
-    """Authorizationヘッダーからユーザーを取得する依存関係"""
-    payload = decode_access_token(credentials.credentials)
+) -> CurrentUser:
+    """Authorizationヘッダーから認証済みプリンシパルを取得する依存関係
+
+    ユーザーの学習履歴量に関わらず、PRINCIPAL_COLUMNS のみを1クエリで読み込む。
+    結果は (sub, iat) 単位で principal_cache に保持し、ヒット時はDBを参照しない。
+    認証したユーザーはLLM使用量の記録・クォータ判定の対象として set_usage_user() に設定する。
+    """
+    payload = get_token_claims(request, credentials.credentials)
 
     user_id_str: str | None = payload.get("sub")
     if user_id_str is None:
@@ -67,14 +109,23 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    iat = payload.get("iat")
+    principal = await principal_cache.get(user_id, iat)
+    if principal is not None:
+        set_usage_user(principal.id, principal.subscription_plan)
+        return principal
+
+    result = await db.execute(select(*PRINCIPAL_COLUMNS).where(User.id == user_id))
+    row = result.one_or_none()
 
-    if user is None:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="ユーザーが見つかりません",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    return user
+    principal = CurrentUser.model_validate(row)
+    await principal_cache.set(user_id, iat, principal)
+    set_usage_user(principal.id, principal.subscription_plan)
+    return principal
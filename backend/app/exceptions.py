@@ -73,6 +73,17 @@ class RateLimitError(AppError):
         super().__init__(message, "RATE_LIMIT_ERROR", 429, details)
 
 
+class QuotaExceededError(AppError):
+    """プランの月間利用上限超過"""
+
+    def __init__(
+        self,
+        message: str = "今月のAI利用上限に達しました",
+        details: dict | None = None,
+    ):
+        super().__init__(message, "QUOTA_EXCEEDED", 429, details)
+
+
 class LLMProviderError(AppError):
     """LLMプロバイダーエラー"""
 
@@ -112,6 +123,30 @@ class LLMRateLimitError(LLMProviderError):
         self.status_code = 429
 
 
+class LLMOverloadedError(AppError):
+    """LLM呼び出しの受付待ちが期限を超過（優先度の低いリクエストを打ち切り）"""
+
+    def __init__(self, priority: str, waited_seconds: float):
+        super().__init__(
+            "LLMが混み合っているため処理を打ち切りました",
+            "LLM_OVERLOADED",
+            503,
+            {"priority": priority, "waited_seconds": round(waited_seconds, 3)},
+        )
+
+
+class DeadlineExceededError(AppError):
+    """リクエストの期限（X-Request-Deadline・エンドポイント既定値）を超過"""
+
+    def __init__(self, operation: str = "", overrun_seconds: float = 0.0):
+        super().__init__(
+            "リクエストの処理期限を超過しました",
+            "DEADLINE_EXCEEDED",
+            504,
+            {"operation": operation, "overrun_seconds": round(overrun_seconds, 3)},
+        )
+
+
 class ExternalServiceError(AppError):
     """外部サービスエラー (Stripe, Azure Speech等)"""
 
@@ -124,3 +159,16 @@ class ExternalServiceError(AppError):
         details = details or {}
         details["service"] = service
         super().__init__(message, "EXTERNAL_SERVICE_ERROR", 502, details)
+
+
+class SpeechServiceUnavailableError(ExternalServiceError):
+    """Azure Speech の連続障害により呼び出しを遮断中"""
+
+    def __init__(self, region: str = ""):
+        super().__init__(
+            "azure_speech",
+            "音声サービスが一時的に利用できません",
+            {"region": region},
+        )
+        self.error_code = "SPEECH_SERVICE_UNAVAILABLE"
+        self.status_code = 503
@@ -0,0 +1,242 @@
+"""LLM呼び出しのアドミッション制御 - 優先度クラスごとの同時実行数制限と待ち行列
+
+ワーカー内の LLM 呼び出しを優先度クラスに分け、全体とクラスごとの同時実行数を制限する。
+上限に達している場合は待ち行列に入り、枠が空くたびに優先度の高いクラスから順に、
+同じクラス内では到着順（FIFO）に受け付ける。
+
+優先度クラス:
+    interactive: ユーザーが応答を待っている会話（talk.send_message など）
+    standard: 既定値。練習問題の生成など
+    background: 推奨事項・日次メニューなど、フォールバック応答で代替できる生成
+
+待ち時間が max_wait_seconds を超えたクラスのリクエストは LLMOverloadedError で打ち切る。
+呼び出し元は既存の _build_fallback_* 応答へ切り替える。
+リクエストの期限（deadline モジュール）が先に来る場合は DeadlineExceededError で打ち切る。
+
+優先度は llm_priority() で ContextVar に設定し、LLMService が呼び出し時に参照する。
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager, suppress
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from app.config import settings
+from app.exceptions import DeadlineExceededError, LLMOverloadedError
+from app.llm.deadline import bound_timeout, remaining_time
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_STANDARD = "standard"
+PRIORITY_BACKGROUND = "background"
+# 受付順（先頭ほど優先）
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_STANDARD, PRIORITY_BACKGROUND)
+
+_current_priority: ContextVar[str] = ContextVar(
+    "llm_priority", default=PRIORITY_STANDARD
+)
+
+
+@contextmanager
+def llm_priority(priority: str) -> Iterator[None]:
+    """ブロック内のLLM呼び出しの優先度クラスを設定する"""
+    if priority not in PRIORITIES:
+        raise ValueError(
+            f"不明なLLM優先度: '{priority}'. 利用可能: {', '.join(PRIORITIES)}"
+        )
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def get_llm_priority() -> str:
+    """現在のLLM呼び出しの優先度クラスを取得"""
+    return _current_priority.get()
+
+
+@dataclass
+class PriorityClass:
+    """優先度クラスの設定と状態"""
+
+    name: str
+    max_concurrency: int
+    max_wait_seconds: float | None = None  # None は打ち切らない
+    in_flight: int = 0
+    admitted: int = 0
+    shed: int = 0
+    waiters: deque[asyncio.Future] = field(default_factory=deque)
+    wait_samples: deque[float] = field(default_factory=lambda: deque(maxlen=500))
+
+
+class AdmissionController:
+    """アドミッション制御 - 優先度付きの公平な待ち行列"""
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        classes: list[PriorityClass],
+        enabled: bool = True,
+    ):
+        """
+        Args:
+            max_concurrency: ワーカー全体の同時実行数の上限
+            classes: 優先度クラス（PRIORITIES の順で受け付ける）
+            enabled: False の場合は制限せずに通す
+        """
+        self.max_concurrency = max_concurrency
+        self.enabled = enabled
+        self._classes = {c.name: c for c in classes}
+        self._order = [
+            self._classes[name] for name in PRIORITIES if name in self._classes
+        ]
+        self._in_flight = 0
+
+    @asynccontextmanager
+    async def admit(self, priority: str | None = None) -> AsyncIterator[None]:
+        """
+        同時実行の枠を確保してブロックを実行する
+
+        Args:
+            priority: 優先度クラス（未指定時は llm_priority() の設定値）
+
+        Raises:
+            LLMOverloadedError: 待ち時間がクラスの max_wait_seconds を超過した場合
+            DeadlineExceededError: 受け付け前にリクエストの期限を超過した場合
+        """
+        if not self.enabled:
+            yield
+            return
+
+        cls = self._classes.get(priority or get_llm_priority())
+        if cls is None:
+            cls = self._classes[PRIORITY_STANDARD]
+
+        start = time.monotonic()
+        waiter = asyncio.get_running_loop().create_future()
+        cls.waiters.append(waiter)
+        self._dispatch()
+
+        if not waiter.done():
+            try:
+                await asyncio.wait(
+                    {waiter}, timeout=bound_timeout(cls.max_wait_seconds)
+                )
+            except asyncio.CancelledError:
+                self._abandon(cls, waiter)
+                raise
+            if not waiter.done():
+                self._abandon(cls, waiter)
+                cls.shed += 1
+                waited = time.monotonic() - start
+                remaining = remaining_time()
+                if remaining is not None and remaining <= 0:
+                    logger.warning(
+                        "LLM受付待ち中に期限超過: priority=%s, waited=%.2fs",
+                        cls.name,
+                        waited,
+                    )
+                    raise DeadlineExceededError("llm_admission", -remaining)
+                logger.warning(
+                    "LLM受付待ちが期限超過のため打ち切り: priority=%s, waited=%.2fs",
+                    cls.name,
+                    waited,
+                )
+                raise LLMOverloadedError(cls.name, waited)
+
+        cls.admitted += 1
+        cls.wait_samples.append(time.monotonic() - start)
+        try:
+            yield
+        finally:
+            self._release(cls)
+
+    def _dispatch(self) -> None:
+        """空いている枠を優先度順・到着順に待ち行列へ割り当てる"""
+        for cls in self._order:
+            while (
+                cls.waiters
+                and self._in_flight < self.max_concurrency
+                and cls.in_flight < cls.max_concurrency
+            ):
+                waiter = cls.waiters.popleft()
+                if waiter.done():
+                    continue
+                cls.in_flight += 1
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    def _release(self, cls: PriorityClass) -> None:
+        cls.in_flight -= 1
+        self._in_flight -= 1
+        self._dispatch()
+
+    def _abandon(self, cls: PriorityClass, waiter: asyncio.Future) -> None:
+        """待機をやめたリクエストを待ち行列から外す（割り当て済みの枠は返却）"""
+        if waiter.done() and not waiter.cancelled():
+            self._release(cls)
+            return
+        waiter.cancel()
+        with suppress(ValueError):
+            cls.waiters.remove(waiter)
+
+    def get_stats(self) -> dict:
+        """クラスごとの実行数・待ち行列長・受付待ち時間（ヘルスチェック・調査用）"""
+        classes = {}
+        for cls in self._order:
+            samples = sorted(cls.wait_samples)
+            classes[cls.name] = {
+                "in_flight": cls.in_flight,
+                "queued": len(cls.waiters),
+                "max_concurrency": cls.max_concurrency,
+                "max_wait_ms": cls.max_wait_seconds * 1000
+                if cls.max_wait_seconds is not None
+                else None,
+                "admitted": cls.admitted,
+                "shed": cls.shed,
+                "queue_wait_avg_ms": round(sum(samples) / len(samples) * 1000, 1)
+                if samples
+                else 0.0,
+                "queue_wait_p95_ms": round(
+                    samples[min(len(samples) - 1, int(len(samples) * 0.95))] * 1000, 1
+                )
+                if samples
+                else 0.0,
+            }
+        return {
+            "enabled": self.enabled,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "classes": classes,
+        }
+
+
+def _build_admission_controller() -> AdmissionController:
+    background_wait = settings.llm_admission_background_max_wait_seconds
+    return AdmissionController(
+        max_concurrency=settings.llm_admission_max_concurrency,
+        classes=[
+            PriorityClass(
+                PRIORITY_INTERACTIVE, settings.llm_admission_interactive_concurrency
+            ),
+            PriorityClass(
+                PRIORITY_STANDARD, settings.llm_admission_standard_concurrency
+            ),
+            PriorityClass(
+                PRIORITY_BACKGROUND,
+                settings.llm_admission_background_concurrency,
+                max_wait_seconds=background_wait if background_wait > 0 else None,
+            ),
+        ],
+        enabled=settings.llm_admission_enabled,
+    )
+
+
+# シングルトンインスタンス
+admission_controller = _build_admission_controller()
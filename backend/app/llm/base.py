@@ -4,6 +4,12 @@ import json
 import logging
 import re
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator
+
+from app.config import settings
+from app.llm.errors import LLMResponseParseError, LLMStreamError
+from app.llm.prompt_cache import SystemPrompt
+from app.llm.usage import report_usage
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +19,9 @@ class LLMProvider(ABC):
 
     全てのLLMプロバイダー（Azure Foundry, Anthropic Direct, Bedrock, Vertex, OpenAI互換）は
     このクラスを継承し、共通インターフェースを実装する。
+
+    system に SystemPrompt を渡した場合、各プロバイダーは静的プレフィックスを
+    プロンプトキャッシュの対象として送信する（prompt_cache モジュール参照）。
     """
 
     @property
@@ -74,10 +83,38 @@ class LLMProvider(ABC):
         """メッセージを送信してレスポンスとトークン使用量を返す
 
         Returns:
-            {"text": str, "input_tokens": int, "output_tokens": int, "model": str}
+            {"text": str, "input_tokens": int, "output_tokens": int, "model": str,
+             "cached_input_tokens": int, "cache_creation_input_tokens": int}
+
+            cached_input_tokens はプロンプトキャッシュから読み込まれた入力トークン数、
+            cache_creation_input_tokens はキャッシュへ書き込まれた入力トークン数
+            （cache_control ブレークポイントを使う Anthropic 系のみ）。
         """
         ...
 
+    async def chat_stream(
+        self,
+        messages: list[dict],
+        model: str = "haiku",
+        max_tokens: int = 2048,
+        system: str | None = None,
+    ) -> AsyncIterator[str]:
+        """メッセージを送信してテキスト応答を逐次取得（ストリーミング）
+
+        デフォルト実装は chat() の完了結果を1チャンクとして返す。
+        ストリーミングAPIを持つプロバイダーはこのメソッドをオーバーライドする。
+
+        Args:
+            messages: メッセージリスト（role/content形式）
+            model: モデルエイリアス（"sonnet", "haiku"）またはフルモデルID
+            max_tokens: 最大出力トークン数
+            system: システムプロンプト
+
+        Yields:
+            LLMの応答テキストの断片（到着順）
+        """
+        yield await self.chat(messages, model, max_tokens, system)
+
     async def health_check(self) -> bool:
         """プロバイダーの健全性チェック
 
@@ -93,6 +130,16 @@ class LLMProvider(ABC):
             logger.warning("ヘルスチェック失敗: provider=%s", self.name)
             return False
 
+    @staticmethod
+    def _report_usage(usage: dict, model: str) -> None:
+        """トークン使用量をルーターの使用量キャプチャへ報告
+
+        Args:
+            usage: {"input_tokens": int, "output_tokens": int}
+            model: 実際に使用したモデルID
+        """
+        report_usage(usage["input_tokens"], usage["output_tokens"], model)
+
     @staticmethod
     def _parse_json_response(raw: str) -> dict:
         """LLMの生テキストからJSONをパース
@@ -107,7 +154,7 @@ class LLMProvider(ABC):
             パース済みJSONオブジェクト
 
         Raises:
-            ValueError: JSONパースに失敗した場合
+            LLMResponseParseError: JSONパースに失敗した場合（ValueError のサブクラス）
         """
         text = raw.strip()
 
@@ -129,7 +176,36 @@ class LLMProvider(ABC):
             return json.loads(text)
         except json.JSONDecodeError as e:
             logger.error("JSONパースエラー: %s\n生テキスト: %s", e, raw[:500])
-            raise ValueError(f"LLM応答のJSONパースに失敗: {e}") from e
+            raise LLMResponseParseError(f"LLM応答のJSONパースに失敗: {e}") from e
+
+    @staticmethod
+    def _build_anthropic_system(system: str) -> str | list[dict]:
+        """Anthropic Messages API の system フィールドを構築
+
+        SystemPrompt の場合は静的部分の末尾に cache_control ブレークポイントを付けた
+        ブロック配列にする（静的部分がプロンプトキャッシュの対象になる）。
+
+        Args:
+            system: システムプロンプト
+
+        Returns:
+            system フィールドの値（文字列またはテキストブロック配列）
+        """
+        if (
+            not isinstance(system, SystemPrompt)
+            or not settings.llm_prompt_cache_enabled
+        ):
+            return system
+        blocks = [
+            {
+                "type": "text",
+                "text": system.static,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        if system.dynamic:
+            blocks.append({"type": "text", "text": system.dynamic})
+        return blocks
 
     @staticmethod
     def _extract_text_from_anthropic_response(data: dict) -> str:
@@ -162,3 +238,107 @@ class LLMProvider(ABC):
             "input_tokens": usage.get("input_tokens", 0),
             "output_tokens": usage.get("output_tokens", 0),
         }
+
+    @staticmethod
+    def _extract_cache_usage_from_anthropic_response(data: dict) -> dict:
+        """Anthropic Messages APIのレスポンスからプロンプトキャッシュの使用量を抽出
+
+        Args:
+            data: APIレスポンスのJSONデータ
+
+        Returns:
+            {"cached_input_tokens": int, "cache_creation_input_tokens": int}
+        """
+        usage = data.get("usage", {})
+        return {
+            "cached_input_tokens": usage.get("cache_read_input_tokens") or 0,
+            "cache_creation_input_tokens": usage.get("cache_creation_input_tokens")
+            or 0,
+        }
+
+    @staticmethod
+    def _extract_cache_usage_from_openai_response(data: dict) -> dict:
+        """OpenAI形式のレスポンスから自動プレフィックスキャッシュの使用量を抽出
+
+        Args:
+            data: APIレスポンスのJSONデータ
+
+        Returns:
+            {"cached_input_tokens": int, "cache_creation_input_tokens": int}
+        """
+        details = data.get("usage", {}).get("prompt_tokens_details") or {}
+        return {
+            "cached_input_tokens": details.get("cached_tokens") or 0,
+            "cache_creation_input_tokens": 0,
+        }
+
+    @staticmethod
+    async def _iter_sse_data(response) -> AsyncIterator[str]:
+        """Server-Sent Events レスポンスから data: 行のペイロードを順に返す
+
+        OpenAI形式の終端マーカー "[DONE]" を受信した時点で終了する。
+
+        Args:
+            response: ストリーミング中の httpx.Response
+
+        Yields:
+            各イベントの data フィールド（JSON文字列）
+        """
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:") :].strip()
+            if data == "[DONE]":
+                return
+            if data:
+                yield data
+
+    @staticmethod
+    def _extract_text_from_anthropic_stream_event(event: dict) -> str:
+        """Anthropic Messages API のストリーミングイベントからテキスト断片を抽出
+
+        Args:
+            event: content_block_delta などのストリーミングイベント
+
+        Returns:
+            テキスト断片（テキスト以外のイベントは空文字）
+
+        Raises:
+            LLMStreamError: error イベントを受信した場合（ValueError のサブクラス）
+        """
+        event_type = event.get("type")
+        if event_type == "error":
+            error = event.get("error", {})
+            raise LLMStreamError(
+                f"ストリーミング中にエラーを受信: {error.get('type', '')} "
+                f"{error.get('message', '')}",
+                error.get("type", ""),
+            )
+        if event_type != "content_block_delta":
+            return ""
+        delta = event.get("delta", {})
+        if delta.get("type") != "text_delta":
+            return ""
+        return delta.get("text", "")
+
+    @staticmethod
+    def _update_usage_from_anthropic_stream_event(event: dict, usage: dict) -> None:
+        """Anthropic Messages API のストリーミングイベントからトークン使用量を更新
+
+        message_start で入力トークン数が、message_delta で出力トークン数（累計）が
+        通知される。
+
+        Args:
+            event: ストリーミングイベント
+            usage: 更新する {"input_tokens": int, "output_tokens": int}
+        """
+        event_type = event.get("type")
+        if event_type == "message_start":
+            reported = event.get("message", {}).get("usage") or {}
+        elif event_type == "message_delta":
+            reported = event.get("usage") or {}
+        else:
+            return
+        for key in ("input_tokens", "output_tokens"):
+            if reported.get(key) is not None:
+                usage[key] = reported[key]
@@ -0,0 +1,223 @@
+"""LLMリクエストの合流（single-flight） - 同時に実行中の同一リクエストで上流呼び出しを共有
+
+同一の (method, model, system, messages, max_tokens) の呼び出しが同時に実行されている間、
+上流のLLM呼び出しは1回だけ行い、その結果を全ての呼び出し元で共有する。
+応答キャッシュ（response_cache）とは異なり、結果は完了後に保持しない。
+
+合流の範囲:
+    ワーカー内: 実行中のリクエストを asyncio.Future で待ち合わせる
+    ワーカー間: Redis の SET NX ロックを取得したワーカーが呼び出し（リーダー）、
+        他のワーカーは Pub/Sub チャネルで結果を受け取る。購読前に完了した場合に備え、
+        結果は短いTTLで結果キーにも保存する
+
+リーダーの呼び出しが失敗した場合（クォータ超過などユーザー固有の失敗を含む）や
+結果を待つ間にロックの期限が切れた場合、待機していた呼び出し元はそれぞれ自身で呼び出す。
+Redis未接続時はワーカー内の合流のみ行う。
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import uuid
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from typing import Any
+
+from app.config import settings
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llm:sf"
+
+
+class RequestCoalescer:
+    """同一LLMリクエストの合流"""
+
+    def __init__(
+        self,
+        enabled: bool | None = None,
+        lock_ttl_seconds: int | None = None,
+        result_ttl_seconds: int | None = None,
+    ):
+        """
+        Args:
+            enabled: 合流の有効/無効
+            lock_ttl_seconds: ワーカー間ロックのTTL（他ワーカーの結果を待つ最大時間）
+            result_ttl_seconds: 購読前に完了した結果を受け取るための結果キーのTTL
+        """
+        self.enabled = settings.llm_coalescing_enabled if enabled is None else enabled
+        self.lock_ttl_seconds = (
+            lock_ttl_seconds or settings.llm_coalescing_lock_ttl_seconds
+        )
+        self.result_ttl_seconds = (
+            result_ttl_seconds or settings.llm_coalescing_result_ttl_seconds
+        )
+        # key -> (成功したか, 結果)
+        self._inflight: dict[str, asyncio.Future[tuple[bool, Any]]] = {}
+        self.stats = {
+            "leaders": 0,
+            "local_followers": 0,
+            "remote_followers": 0,
+            "fallbacks": 0,
+        }
+
+    @staticmethod
+    def make_key(
+        method: str,
+        messages: list[dict],
+        model: str,
+        max_tokens: int,
+        system: str | None,
+    ) -> str:
+        """リクエストから合流キーを生成（応答形式が異なる method は区別する）"""
+        payload = {
+            "method": method,
+            "system": system,
+            "messages": messages,
+            "model": model,
+            "max_tokens": max_tokens,
+        }
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        同一キーの実行中リクエストがあれば合流し、なければ呼び出す
+
+        Args:
+            key: make_key() で生成した合流キー
+            call: 上流のLLM呼び出し（結果はJSONシリアライズ可能であること）
+
+        Returns:
+            呼び出し結果（合流した場合はリーダーの結果のコピー）
+        """
+        if not self.enabled:
+            return await call()
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["local_followers"] += 1
+            ok, value = await asyncio.shield(inflight)
+            if ok:
+                return copy.deepcopy(value)
+            self.stats["fallbacks"] += 1
+            return await call()
+
+        future: asyncio.Future[tuple[bool, Any]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._inflight[key] = future
+        try:
+            value = await self._run_across_workers(key, call)
+        except BaseException:
+            future.set_result((False, None))
+            raise
+        else:
+            future.set_result((True, value))
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _run_across_workers(
+        self, key: str, call: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """ワーカー間ロックを取得できれば呼び出し、取得できなければ結果を待つ"""
+        redis_client = get_redis()
+        if redis_client is None:
+            self.stats["leaders"] += 1
+            return await call()
+
+        lock_key = f"{KEY_PREFIX}:lock:{key}"
+        token = uuid.uuid4().hex
+        try:
+            acquired = await redis_client.set(
+                lock_key, token, nx=True, ex=self.lock_ttl_seconds
+            )
+        except Exception as e:
+            logger.warning("LLMリクエスト合流ロックの取得失敗: %s", e)
+            acquired = True
+            redis_client = None
+
+        if acquired:
+            self.stats["leaders"] += 1
+            try:
+                value = await call()
+            except BaseException:
+                if redis_client is not None:
+                    await self._publish(redis_client, key, token, None)
+                raise
+            if redis_client is not None:
+                await self._publish(redis_client, key, token, {"value": value})
+            return value
+
+        self.stats["remote_followers"] += 1
+        result = await self._wait_for_result(redis_client, key)
+        if result is not None:
+            return result["value"]
+        self.stats["fallbacks"] += 1
+        return await call()
+
+    async def _publish(
+        self,
+        redis_client,
+        key: str,
+        token: str,
+        result: dict | None,
+    ) -> None:
+        """結果（失敗時は None）を待機中のワーカーへ通知し、ロックを解放する"""
+        raw = json.dumps(result, ensure_ascii=False)
+        lock_key = f"{KEY_PREFIX}:lock:{key}"
+        try:
+            if result is not None:
+                await redis_client.set(
+                    f"{KEY_PREFIX}:result:{key}", raw, ex=self.result_ttl_seconds
+                )
+            await redis_client.publish(f"{KEY_PREFIX}:channel:{key}", raw)
+            if await redis_client.get(lock_key) == token:
+                await redis_client.delete(lock_key)
+        except Exception as e:
+            logger.warning("LLMリクエスト合流結果の通知失敗: %s", e)
+
+    async def _wait_for_result(self, redis_client, key: str) -> dict | None:
+        """他ワーカーの結果を待つ（失敗通知・タイムアウト時は None）"""
+        channel = f"{KEY_PREFIX}:channel:{key}"
+        pubsub = redis_client.pubsub()
+        try:
+            await pubsub.subscribe(channel)
+            # 購読前にリーダーが完了している場合は結果キーから取得
+            raw = await redis_client.get(f"{KEY_PREFIX}:result:{key}")
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.lock_ttl_seconds
+            while raw is None:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    logger.warning("LLMリクエスト合流の結果待ちがタイムアウト")
+                    return None
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=remaining
+                )
+                if message is not None and message["type"] == "message":
+                    raw = message["data"]
+            return json.loads(raw)
+        except Exception as e:
+            logger.warning("LLMリクエスト合流の結果待ち失敗: %s", e)
+            return None
+        finally:
+            with suppress(Exception):
+                await pubsub.unsubscribe(channel)
+                await pubsub.aclose()
+
+    def get_stats(self) -> dict:
+        """合流の統計（ヘルスチェック・調査用）"""
+        return {
+            "enabled": self.enabled,
+            "in_flight": len(self._inflight),
+            **self.stats,
+        }
+
+
+# シングルトンインスタンス
+request_coalescer = RequestCoalescer()
@@ -77,13 +77,7 @@ def estimate_cost(
             "output_tokens": int,
         }
     """
-    # モデルエイリアスの正規化（フルIDからエイリアスへの変換を試行）
-    model_alias = _normalize_model_alias(model)
-
-    pricing = PRICING_TABLE.get(
-        (provider, model_alias),
-        DEFAULT_PRICING,
-    )
+    pricing = get_pricing(provider, model)
 
     input_cost = (input_tokens / 1_000_000) * pricing.input_price_per_m
     output_cost = (output_tokens / 1_000_000) * pricing.output_price_per_m
@@ -111,6 +105,18 @@ def estimate_cost(
     return result
 
 
+def get_pricing(provider: str, model: str) -> ModelPricing:
+    """プロバイダー×モデルの料金を取得（テーブルにない場合はデフォルト料金）
+
+    Args:
+        provider: プロバイダー名
+        model: モデルエイリアスまたはフルID
+    """
+    # モデルエイリアスの正規化（フルIDからエイリアスへの変換を試行）
+    model_alias = _normalize_model_alias(model)
+    return PRICING_TABLE.get((provider, model_alias), DEFAULT_PRICING)
+
+
 def _normalize_model_alias(model: str) -> str:
     """フルモデルIDをエイリアスに正規化
 
@@ -0,0 +1,144 @@
+"""リクエスト期限（デッドライン）の伝播
+
+クライアントが応答を待てる期限をリクエスト単位で ContextVar に保持し、
+LLM呼び出しのリトライ・バックオフ・フォールバック・プロバイダーのHTTPタイムアウトが
+残り時間の範囲内で動作するようにする。期限を過ぎた呼び出しはクライアントが既に
+応答を待っていないため、上流へのリクエストを続けずに DeadlineExceededError で打ち切る。
+
+期限は DeadlineMiddleware が X-Request-Deadline ヘッダー（Unixエポックミリ秒）と
+エンドポイントごとの既定値のうち早い方で設定する。asyncio タスクは作成時の
+コンテキストを引き継ぐため、リクエスト内で並行実行するタスクにも同じ期限が適用される。
+レスポンス返却後も続くバックグラウンド処理は detached_from_deadline() で期限を外す。
+
+使用例:
+    with request_deadline(30):
+        async with deadline_scope():
+            await provider.chat(...)
+"""
+
+import asyncio
+import math
+import time
+from collections.abc import AsyncIterator, Iterator
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+
+import httpx
+
+from app.exceptions import DeadlineExceededError
+
+# 期限（time.monotonic() 基準の絶対時刻）。None は期限なし
+_deadline: ContextVar[float | None] = ContextVar("request_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float | None) -> Iterator[None]:
+    """ブロック内の期限を「現在から seconds 秒後」に設定する
+
+    外側で既に期限が設定されている場合は早い方を採用する（期限は延長されない）。
+    seconds が None の場合は外側の期限をそのまま使う。
+    """
+    current = _deadline.get()
+    if seconds is not None:
+        candidate = time.monotonic() + seconds
+        if current is None or candidate < current:
+            current = candidate
+    token = _deadline.set(current)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+@contextmanager
+def detached_from_deadline() -> Iterator[None]:
+    """リクエストの期限を外す（応答後も続くバックグラウンド処理用）"""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> float | None:
+    """期限までの残り秒数（期限なしの場合は None、超過時は0以下）"""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline(operation: str = "") -> None:
+    """期限を過ぎていれば DeadlineExceededError を送出"""
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceededError(operation, -remaining)
+
+
+def bound_timeout(timeout: float | None) -> float | None:
+    """タイムアウト秒数を期限までの残り時間で切り詰める"""
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    remaining = max(remaining, 0.0)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+def bound_httpx_timeout(timeout: httpx.Timeout) -> httpx.Timeout:
+    """httpx のタイムアウト（接続・読み込み・書き込み・プール）を残り時間で切り詰める"""
+    if remaining_time() is None:
+        return timeout
+    return httpx.Timeout(
+        connect=bound_timeout(timeout.connect),
+        read=bound_timeout(timeout.read),
+        write=bound_timeout(timeout.write),
+        pool=bound_timeout(timeout.pool),
+    )
+
+
+@asynccontextmanager
+async def deadline_scope(operation: str = "") -> AsyncIterator[None]:
+    """ブロックを期限で打ち切る（期限なしの場合は何もしない）
+
+    期限超過でブロックをキャンセルした場合は DeadlineExceededError を送出する。
+
+    Raises:
+        DeadlineExceededError: 開始時点で期限を過ぎている、または実行中に期限に達した場合
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        yield
+        return
+
+    check_deadline(operation)
+    timeout = asyncio.timeout(remaining)
+    try:
+        async with timeout:
+            yield
+    except TimeoutError as e:
+        if not timeout.expired():
+            # ブロック内部で発生したタイムアウト（期限によるキャンセルではない）
+            raise
+        raise DeadlineExceededError(operation, max(-remaining_time(), 0.0)) from e
+
+
+def parse_deadline_header(value: str | None, now: float | None = None) -> float | None:
+    """X-Request-Deadline ヘッダー（Unixエポックミリ秒）を残り秒数に変換
+
+    Args:
+        value: ヘッダー値
+        now: 現在のUnix時刻（秒）。未指定時は time.time()
+
+    Returns:
+        期限までの残り秒数（超過時は0以下）。ヘッダーがない・不正な場合は None
+    """
+    if not value:
+        return None
+    try:
+        deadline_ms = float(value)
+    except ValueError:
+        return None
+    if not math.isfinite(deadline_ms):
+        return None
+    current = time.time() if now is None else now
+    return deadline_ms / 1000 - current
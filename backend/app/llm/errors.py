@@ -0,0 +1,220 @@
+"""LLMプロバイダーのエラー分類
+
+プロバイダー呼び出しで発生した例外を「再試行可能」「再試行不可」「レート制限」に分類し、
+サーバーが指定した待機時間（Retry-After）を取り出す。RetryPolicy は再試行不可の
+エラーを即座に送出し、レート制限ではサーバー指定の待機時間より早く再試行しない。
+AdaptiveConcurrencyLimiter はレート制限を受けた時点でプロバイダーの同時実行数を絞る。
+
+分類の基準:
+    httpx.HTTPStatusError（Azure Foundry / Anthropic / Vertex / OpenAI互換）
+        429 はレート制限、408・409・425・5xx・529 は再試行可能、その他の4xxは再試行不可
+    botocore の ClientError（Bedrock、エラーコードで判定）
+        ThrottlingException 等はレート制限、ValidationException 等は再試行不可
+    通信エラー・タイムアウト
+        再試行可能
+    LLMResponseParseError（JSONパース失敗）・ストリームの invalid_request_error 等
+        再試行不可
+    その他の例外
+        再試行可能（従来どおり）
+
+再試行不可のエラーのうち、認証・権限・デプロイ未検出（401・403・404 等）は
+プロバイダー固有の問題（provider_fault）として扱い、LLMRouter は別プロバイダーへ
+フォールバックする。それ以外（入力不正・パース失敗）はリクエスト自体の問題
+（request_error）で、どのプロバイダーに送っても解消しないためフォールバックせず、
+サーキットブレーカー・スコアにも反映しない。
+"""
+
+import email.utils
+import logging
+import math
+import time
+from dataclasses import dataclass
+from datetime import UTC
+
+import httpx
+
+from app.exceptions import DeadlineExceededError, LLMRateLimitError
+
+logger = logging.getLogger(__name__)
+
+# エラー分類
+RETRYABLE = "retryable"
+NON_RETRYABLE = "non_retryable"
+RATE_LIMITED = "rate_limited"
+
+# 一時的な障害を示すHTTPステータス（529 は Anthropic の overloaded_error）
+_RETRYABLE_STATUS = frozenset({408, 409, 425, 500, 502, 503, 504, 529})
+# プロバイダー固有の設定・認証の問題を示すHTTPステータス
+_PROVIDER_FAULT_STATUS = frozenset({401, 403, 404})
+
+# Bedrock（botocore ClientError）のエラーコード
+_BEDROCK_RATE_LIMITED = frozenset(
+    {"ThrottlingException", "TooManyRequestsException", "ServiceQuotaExceededException"}
+)
+_BEDROCK_NON_RETRYABLE = frozenset(
+    {
+        "ValidationException",
+        "AccessDeniedException",
+        "ResourceNotFoundException",
+        "UnrecognizedClientException",
+        "ExpiredTokenException",
+    }
+)
+_BEDROCK_PROVIDER_FAULT = frozenset(
+    {
+        "AccessDeniedException",
+        "ResourceNotFoundException",
+        "UnrecognizedClientException",
+        "ExpiredTokenException",
+    }
+)
+
+# Anthropic ストリーミングの error イベントの種類
+_STREAM_RATE_LIMITED = frozenset({"rate_limit_error"})
+_STREAM_RETRYABLE = frozenset({"overloaded_error", "api_error", "timeout_error"})
+_STREAM_PROVIDER_FAULT = frozenset(
+    {"authentication_error", "permission_error", "not_found_error"}
+)
+
+
+class LLMResponseParseError(ValueError):
+    """LLM応答のJSONパース失敗（同じリクエストを再送しても解消しない）"""
+
+
+class LLMStreamError(ValueError):
+    """ストリーミング中にプロバイダーから error イベントを受信"""
+
+    def __init__(self, message: str, error_type: str = ""):
+        super().__init__(message)
+        self.error_type = error_type
+
+
+@dataclass(frozen=True)
+class ErrorClassification:
+    """例外の分類結果"""
+
+    kind: str
+    # サーバーが指定した再試行までの待機秒数（指定なしは None）
+    retry_after: float | None = None
+    status_code: int | None = None
+    # 認証・権限・デプロイ未検出など、そのプロバイダー固有の問題か
+    provider_fault: bool = False
+
+    @property
+    def retryable(self) -> bool:
+        return self.kind != NON_RETRYABLE
+
+    @property
+    def request_error(self) -> bool:
+        """リクエスト自体の問題で、別プロバイダーへ送っても解消しないか"""
+        return self.kind == NON_RETRYABLE and not self.provider_fault
+
+    @property
+    def rate_limited(self) -> bool:
+        return self.kind == RATE_LIMITED
+
+
+def classify_error(exc: BaseException) -> ErrorClassification:
+    """プロバイダー呼び出しの例外を分類"""
+    if isinstance(exc, DeadlineExceededError):
+        return ErrorClassification(NON_RETRYABLE, status_code=exc.status_code)
+    if isinstance(exc, LLMRateLimitError):
+        return ErrorClassification(RATE_LIMITED, status_code=exc.status_code)
+    if isinstance(exc, httpx.HTTPStatusError):
+        return _classify_status(exc.response.status_code, exc.response.headers)
+    if isinstance(exc, httpx.TransportError):
+        return ErrorClassification(RETRYABLE)
+    if isinstance(exc, LLMResponseParseError):
+        return ErrorClassification(NON_RETRYABLE)
+    if isinstance(exc, LLMStreamError):
+        if exc.error_type in _STREAM_RATE_LIMITED:
+            return ErrorClassification(RATE_LIMITED)
+        if exc.error_type in _STREAM_RETRYABLE:
+            return ErrorClassification(RETRYABLE)
+        return ErrorClassification(
+            NON_RETRYABLE, provider_fault=exc.error_type in _STREAM_PROVIDER_FAULT
+        )
+
+    bedrock_error = _bedrock_error(exc)
+    if bedrock_error is not None:
+        return bedrock_error
+    return ErrorClassification(RETRYABLE)
+
+
+def _classify_status(status_code: int, headers: httpx.Headers) -> ErrorClassification:
+    retry_after = parse_retry_after(headers)
+    if status_code == 429:
+        return ErrorClassification(RATE_LIMITED, retry_after, status_code)
+    if status_code in _RETRYABLE_STATUS or status_code >= 500:
+        return ErrorClassification(RETRYABLE, retry_after, status_code)
+    return ErrorClassification(
+        NON_RETRYABLE,
+        status_code=status_code,
+        provider_fault=status_code in _PROVIDER_FAULT_STATUS,
+    )
+
+
+def _bedrock_error(exc: BaseException) -> ErrorClassification | None:
+    """botocore の ClientError を分類（boto3 はオプショナルのため属性で判定）"""
+    response = getattr(exc, "response", None)
+    if not isinstance(response, dict) or "Error" not in response:
+        return None
+    code = response["Error"].get("Code", "")
+    metadata = response.get("ResponseMetadata", {})
+    status_code = metadata.get("HTTPStatusCode")
+    retry_after = parse_retry_after(metadata.get("HTTPHeaders", {}))
+    if code in _BEDROCK_RATE_LIMITED or status_code == 429:
+        return ErrorClassification(RATE_LIMITED, retry_after, status_code)
+    if code in _BEDROCK_NON_RETRYABLE:
+        return ErrorClassification(
+            NON_RETRYABLE,
+            status_code=status_code,
+            provider_fault=code in _BEDROCK_PROVIDER_FAULT,
+        )
+    return ErrorClassification(RETRYABLE, retry_after, status_code)
+
+
+def parse_retry_after(headers, now: float | None = None) -> float | None:
+    """レスポンスヘッダーから再試行までの待機秒数を取得
+
+    retry-after-ms（Azure OpenAI / OpenAI互換、ミリ秒）を優先し、
+    なければ Retry-After（秒数またはHTTP日付）を使う。
+
+    Args:
+        headers: レスポンスヘッダー（大文字小文字を区別しないマッピング、または小文字キーの辞書）
+        now: 現在のUnix時刻（秒）。未指定時は time.time()
+
+    Returns:
+        待機秒数（0以上）。ヘッダーがない・不正な場合は None
+    """
+    value = headers.get("retry-after-ms")
+    if value is not None:
+        seconds = _parse_number(value)
+        if seconds is not None:
+            return seconds / 1000
+
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    seconds = _parse_number(value)
+    if seconds is not None:
+        return seconds
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        logger.debug("不正な Retry-After ヘッダー: %s", value)
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    current = time.time() if now is None else now
+    return max(retry_at.timestamp() - current, 0.0)
+
+
+def _parse_number(value: str) -> float | None:
+    try:
+        number = float(value)
+    except ValueError:
+        return None
+    if not math.isfinite(number) or number < 0:
+        return None
+    return number
@@ -0,0 +1,102 @@
+"""LLMプロバイダー用の共有HTTPコネクションプール
+
+プロバイダーのベースURLごとに keep-alive / HTTP/2 対応の httpx.AsyncClient を1つ保持し、
+リクエストごとの TCP+TLS ハンドシェイクを排除する。
+クライアントは main.lifespan で初期化・クローズされる（プロセス単位で共有）。
+
+使用例:
+    from app.llm.http_pool import get_http_client
+
+    client = get_http_client("https://api.anthropic.com")
+    response = await client.post(url, headers=headers, json=body, timeout=timeout)
+"""
+
+import logging
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# オプショナルインポート: h2（HTTP/2サポート）
+try:
+    import h2  # noqa: F401
+
+    HAS_H2 = True
+except ImportError:
+    HAS_H2 = False
+
+# ベースURL（scheme://host[:port]） -> 共有クライアント
+_clients: dict[str, httpx.AsyncClient] = {}
+
+
+def _pool_key(url: str) -> str:
+    """URLからプールのキー（scheme://netloc）を抽出"""
+    parts = urlsplit(url)
+    if not parts.scheme or not parts.netloc:
+        return url.rstrip("/")
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _build_limits() -> httpx.Limits:
+    """設定からコネクションプールの上限を構築"""
+    return httpx.Limits(
+        max_connections=settings.llm_http_max_connections,
+        max_keepalive_connections=settings.llm_http_max_keepalive_connections,
+        keepalive_expiry=settings.llm_http_keepalive_expiry,
+    )
+
+
+def _create_client() -> httpx.AsyncClient:
+    """プール設定付きの AsyncClient を生成"""
+    http2 = settings.llm_http2_enabled and HAS_H2
+    if settings.llm_http2_enabled and not HAS_H2:
+        logger.warning("h2 が未インストールのため HTTP/1.1 で接続します")
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=_build_limits(),
+        timeout=httpx.Timeout(60.0, connect=10.0),
+    )
+
+
+def init_http_clients() -> None:
+    """共有プールを初期化（クライアント自体はベースURLごとに初回利用時に生成）"""
+    _clients.clear()
+    logger.info(
+        "LLM HTTPプール初期化: http2=%s max_connections=%d keepalive=%d",
+        settings.llm_http2_enabled and HAS_H2,
+        settings.llm_http_max_connections,
+        settings.llm_http_max_keepalive_connections,
+    )
+
+
+def get_http_client(base_url: str) -> httpx.AsyncClient:
+    """ベースURLに対応する共有クライアントを取得（未作成・クローズ済みなら生成）
+
+    Args:
+        base_url: プロバイダーのベースURL（パスは無視され scheme://host 単位で共有）
+
+    Returns:
+        共有 httpx.AsyncClient
+    """
+    key = _pool_key(base_url)
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = _create_client()
+        _clients[key] = client
+        logger.debug("LLM HTTPクライアント生成: %s", key)
+    return client
+
+
+async def close_http_clients() -> None:
+    """全ての共有クライアントをクローズ"""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning("LLM HTTPクライアントのクローズ失敗: %s", e)
@@ -0,0 +1,36 @@
+"""プロバイダー側プロンプトキャッシュ - 静的プレフィックスと動的サフィックスに分割したシステムプロンプト
+
+長いシステムプロンプトのうち、呼び出しごとに変わらない部分（指示・出力形式・ルール）を
+静的プレフィックス、ユーザーやセッションごとに変わる部分を動的サフィックスとして保持する。
+
+SystemPrompt は str のサブクラスで、文字列としては「静的部分 + 動的部分」の順に連結される。
+既存の system: str を受け取るコード（応答キャッシュのキー生成・ログ等）はそのまま動作する。
+
+プロバイダーごとの扱い:
+    Anthropic / Bedrock / Vertex: 静的部分の末尾に cache_control ブレークポイントを付けた
+        system ブロック配列として送信する（LLMProvider._build_anthropic_system）
+    Azure OpenAI / OpenAI互換: 自動プレフィックスキャッシュ（1024トークン以上の共通プレフィックス）。
+        静的部分を常に先頭に置くことで、同じビルダーからのリクエスト間でプレフィックスが一致する
+
+キャッシュされた入力トークン数は get_usage_info() の cached_input_tokens で返される。
+
+使用例:
+    return SystemPrompt(static=INSTRUCTIONS, dynamic=f"## User Profile\\n- Level: {level}")
+"""
+
+
+class SystemPrompt(str):
+    """静的プレフィックスと動的サフィックスを持つシステムプロンプト"""
+
+    static: str
+    dynamic: str
+
+    def __new__(cls, static: str, dynamic: str = "") -> "SystemPrompt":
+        text = f"{static}\n\n{dynamic}" if dynamic else static
+        prompt = super().__new__(cls, text)
+        prompt.static = static
+        prompt.dynamic = dynamic
+        return prompt
+
+    def __getnewargs__(self) -> tuple[str, str]:
+        return (self.static, self.dynamic)
@@ -8,6 +8,8 @@ boto3はオプショナルインポート（ImportError時にわかりやすい
 
 import json
 import logging
+import threading
+from collections.abc import AsyncIterator, Iterator
 from typing import Any
 
 from app.config import settings
@@ -83,7 +85,7 @@ class AWSBedrockProvider(LLMProvider):
             "messages": messages,
         }
         if system:
-            body["system"] = system
+            body["system"] = self._build_anthropic_system(system)
         return body
 
     def _invoke_model(
@@ -110,6 +112,32 @@ class AWSBedrockProvider(LLMProvider):
         response_body = json.loads(response["body"].read())
         return response_body
 
+    def _iter_model_stream(
+        self,
+        messages: list[dict],
+        model: str,
+        max_tokens: int,
+        system: str | None,
+    ) -> Iterator[dict]:
+        """Bedrock invoke_model_with_response_stream を同期呼び出しし、イベントを順に返す
+
+        各チャンクはAnthropic Messages APIのストリーミングイベント形式。
+        """
+        resolved_model = self._resolve_model(model)
+        body = self._build_bedrock_body(messages, model, max_tokens, system)
+
+        response = self.client.invoke_model_with_response_stream(
+            modelId=resolved_model,
+            contentType="application/json",
+            accept="application/json",
+            body=json.dumps(body),
+        )
+
+        for event in response["body"]:
+            chunk = event.get("chunk")
+            if chunk:
+                yield json.loads(chunk["bytes"])
+
     async def chat(
         self,
         messages: list[dict],
@@ -126,8 +154,63 @@ class AWSBedrockProvider(LLMProvider):
         data = await asyncio.to_thread(
             self._invoke_model, messages, model, max_tokens, system
         )
+        self._report_usage(
+            self._extract_usage_from_anthropic_response(data),
+            self._resolve_model(model),
+        )
         return self._extract_text_from_anthropic_response(data)
 
+    async def chat_stream(
+        self,
+        messages: list[dict],
+        model: str = "haiku",
+        max_tokens: int = 2048,
+        system: str | None = None,
+    ) -> AsyncIterator[str]:
+        """Bedrockにメッセージを送信してテキスト応答を逐次取得
+
+        boto3のイベントストリームは同期のため、ワーカースレッドで読み出して
+        asyncio.Queue 経由でイベントループに受け渡す。
+        """
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
+
+        def _produce() -> None:
+            try:
+                for event in self._iter_model_stream(
+                    messages, model, max_tokens, system
+                ):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+
+        loop.run_in_executor(None, _produce)
+        usage = {"input_tokens": 0, "output_tokens": 0}
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                self._update_usage_from_anthropic_stream_event(item, usage)
+                text = self._extract_text_from_anthropic_stream_event(item)
+                if text:
+                    yield text
+        finally:
+            # 途中で読み出しを打ち切った場合もスレッドを早期終了させ、
+            # 受信済みの使用量を報告する
+            stop.set()
+            self._report_usage(usage, self._resolve_model(model))
+
     async def chat_json(
         self,
         messages: list[dict],
@@ -155,10 +238,12 @@ class AWSBedrockProvider(LLMProvider):
 
         text = self._extract_text_from_anthropic_response(data)
         usage = self._extract_usage_from_anthropic_response(data)
+        self._report_usage(usage, self._resolve_model(model))
 
         return {
             "text": text,
             "input_tokens": usage["input_tokens"],
             "output_tokens": usage["output_tokens"],
             "model": self._resolve_model(model),
+            **self._extract_cache_usage_from_anthropic_response(data),
         }
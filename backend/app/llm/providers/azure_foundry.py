@@ -4,12 +4,16 @@ Azure OpenAI の GPT-5 シリーズモデルを呼び出す。
 httpxベース、{endpoint}/openai/deployments/{model}/chat/completions への POST。
 """
 
+import json
 import logging
+from collections.abc import AsyncIterator
 
 import httpx
 
 from app.config import settings
 from app.llm.base import LLMProvider
+from app.llm.deadline import bound_httpx_timeout
+from app.llm.http_pool import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -78,6 +82,14 @@ class AzureFoundryProvider(LLMProvider):
             return ""
         return choices[0].get("message", {}).get("content", "")
 
+    @staticmethod
+    def _extract_stream_delta(chunk: dict) -> str:
+        """OpenAI形式のストリーミングチャンクからテキスト断片を抽出"""
+        choices = chunk.get("choices", [])
+        if not choices:
+            return ""
+        return choices[0].get("delta", {}).get("content") or ""
+
     @staticmethod
     def _extract_usage(data: dict) -> dict:
         """OpenAI形式のレスポンスからトークン使用量を抽出"""
@@ -98,14 +110,54 @@ class AzureFoundryProvider(LLMProvider):
         deployment = self._resolve_model(model)
         body = self._build_body(messages, max_tokens, system)
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                self._build_url(deployment),
-                headers=self._build_headers(),
-                json=body,
+        client = get_http_client(self.endpoint)
+        response = await client.post(
+            self._build_url(deployment),
+            headers=self._build_headers(),
+            json=body,
+            timeout=bound_httpx_timeout(self.timeout),
+        )
+
+        if response.status_code != 200:
+            logger.error(
+                "Azure OpenAI API エラー: status=%d body=%s",
+                response.status_code,
+                response.text[:500],
             )
+            raise httpx.HTTPStatusError(
+                f"Azure OpenAI API returned {response.status_code}",
+                request=response.request,
+                response=response,
+            )
+
+        data = response.json()
+        self._report_usage(self._extract_usage(data), deployment)
+        return self._extract_text(data)
 
+    async def chat_stream(
+        self,
+        messages: list[dict],
+        model: str = "haiku",
+        max_tokens: int = 4096,
+        system: str | None = None,
+    ) -> AsyncIterator[str]:
+        """GPT-5にメッセージを送信してテキスト応答を逐次取得（SSE）"""
+        deployment = self._resolve_model(model)
+        body = self._build_body(messages, max_tokens, system)
+        body["stream"] = True
+        # 最終チャンクでトークン使用量を受け取る
+        body["stream_options"] = {"include_usage": True}
+
+        client = get_http_client(self.endpoint)
+        async with client.stream(
+            "POST",
+            self._build_url(deployment),
+            headers=self._build_headers(),
+            json=body,
+            timeout=bound_httpx_timeout(self.timeout),
+        ) as response:
             if response.status_code != 200:
+                await response.aread()
                 logger.error(
                     "Azure OpenAI API エラー: status=%d body=%s",
                     response.status_code,
@@ -117,8 +169,18 @@ class AzureFoundryProvider(LLMProvider):
                     response=response,
                 )
 
-            data = response.json()
-            return self._extract_text(data)
+            usage = {"input_tokens": 0, "output_tokens": 0}
+            try:
+                async for data in self._iter_sse_data(response):
+                    chunk = json.loads(data)
+                    if chunk.get("usage"):
+                        usage = self._extract_usage(chunk)
+                    text = self._extract_stream_delta(chunk)
+                    if text:
+                        yield text
+            finally:
+                # 途中で打ち切られた場合も受信済みの使用量を報告する
+                self._report_usage(usage, deployment)
 
     async def chat_json(
         self,
@@ -142,21 +204,24 @@ class AzureFoundryProvider(LLMProvider):
         deployment = self._resolve_model(model)
         body = self._build_body(messages, max_tokens, system)
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                self._build_url(deployment),
-                headers=self._build_headers(),
-                json=body,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            text = self._extract_text(data)
-            usage = self._extract_usage(data)
-
-            return {
-                "text": text,
-                "input_tokens": usage["input_tokens"],
-                "output_tokens": usage["output_tokens"],
-                "model": deployment,
-            }
+        client = get_http_client(self.endpoint)
+        response = await client.post(
+            self._build_url(deployment),
+            headers=self._build_headers(),
+            json=body,
+            timeout=bound_httpx_timeout(self.timeout),
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        text = self._extract_text(data)
+        usage = self._extract_usage(data)
+        self._report_usage(usage, deployment)
+
+        return {
+            "text": text,
+            "input_tokens": usage["input_tokens"],
+            "output_tokens": usage["output_tokens"],
+            "model": deployment,
+            **self._extract_cache_usage_from_openai_response(data),
+        }
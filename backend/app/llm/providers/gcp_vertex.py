@@ -7,12 +7,16 @@ httpx ベースで以下のエンドポイントに POST:
 google-auth でアクセストークン取得。オプショナルインポート。
 """
 
+import json
 import logging
+from collections.abc import AsyncIterator
 
 import httpx
 
 from app.config import settings
 from app.llm.base import LLMProvider
+from app.llm.deadline import bound_httpx_timeout
+from app.llm.http_pool import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -84,13 +88,14 @@ class GCPVertexProvider(LLMProvider):
         self._credentials.refresh(self._auth_request)
         return self._credentials.token
 
-    def _build_url(self, model: str) -> str:
-        """Vertex AI エンドポイントURLを構築"""
+    def _build_url(self, model: str, stream: bool = False) -> str:
+        """Vertex AI エンドポイントURLを構築（ストリーミング時は streamRawPredict）"""
         resolved_model = self._resolve_model(model)
+        method = "streamRawPredict" if stream else "rawPredict"
         return (
             f"https://{self.region}-aiplatform.googleapis.com/v1/"
             f"projects/{self.project_id}/locations/{self.region}/"
-            f"publishers/anthropic/models/{resolved_model}:rawPredict"
+            f"publishers/anthropic/models/{resolved_model}:{method}"
         )
 
     def _build_headers(self) -> dict:
@@ -117,7 +122,7 @@ class GCPVertexProvider(LLMProvider):
             "messages": messages,
         }
         if system:
-            body["system"] = system
+            body["system"] = self._build_anthropic_system(system)
         return body
 
     async def chat(
@@ -130,14 +135,56 @@ class GCPVertexProvider(LLMProvider):
         """Vertex AIにメッセージを送信してテキスト応答を取得"""
         body = self._build_body(messages, max_tokens, system)
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                self._build_url(model),
-                headers=self._build_headers(),
-                json=body,
+        url = self._build_url(model)
+        client = get_http_client(url)
+        response = await client.post(
+            url,
+            headers=self._build_headers(),
+            json=body,
+            timeout=bound_httpx_timeout(self.timeout),
+        )
+
+        if response.status_code != 200:
+            logger.error(
+                "Vertex AI API エラー: status=%d body=%s",
+                response.status_code,
+                response.text[:500],
+            )
+            raise httpx.HTTPStatusError(
+                f"Vertex AI API returned {response.status_code}",
+                request=response.request,
+                response=response,
             )
 
+        data = response.json()
+        self._report_usage(
+            self._extract_usage_from_anthropic_response(data),
+            self._resolve_model(model),
+        )
+        return self._extract_text_from_anthropic_response(data)
+
+    async def chat_stream(
+        self,
+        messages: list[dict],
+        model: str = "haiku",
+        max_tokens: int = 2048,
+        system: str | None = None,
+    ) -> AsyncIterator[str]:
+        """Vertex AIにメッセージを送信してテキスト応答を逐次取得（SSE）"""
+        body = self._build_body(messages, max_tokens, system)
+        body["stream"] = True
+
+        url = self._build_url(model, stream=True)
+        client = get_http_client(url)
+        async with client.stream(
+            "POST",
+            url,
+            headers=self._build_headers(),
+            json=body,
+            timeout=bound_httpx_timeout(self.timeout),
+        ) as response:
             if response.status_code != 200:
+                await response.aread()
                 logger.error(
                     "Vertex AI API エラー: status=%d body=%s",
                     response.status_code,
@@ -149,8 +196,17 @@ class GCPVertexProvider(LLMProvider):
                     response=response,
                 )
 
-            data = response.json()
-            return self._extract_text_from_anthropic_response(data)
+            usage = {"input_tokens": 0, "output_tokens": 0}
+            try:
+                async for data in self._iter_sse_data(response):
+                    event = json.loads(data)
+                    self._update_usage_from_anthropic_stream_event(event, usage)
+                    text = self._extract_text_from_anthropic_stream_event(event)
+                    if text:
+                        yield text
+            finally:
+                # 途中で打ち切られた場合も受信済みの使用量を報告する
+                self._report_usage(usage, self._resolve_model(model))
 
     async def chat_json(
         self,
@@ -173,21 +229,25 @@ class GCPVertexProvider(LLMProvider):
         """Vertex AIを呼び出し、レスポンスとトークン使用量を返す"""
         body = self._build_body(messages, max_tokens, system)
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                self._build_url(model),
-                headers=self._build_headers(),
-                json=body,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            text = self._extract_text_from_anthropic_response(data)
-            usage = self._extract_usage_from_anthropic_response(data)
-
-            return {
-                "text": text,
-                "input_tokens": usage["input_tokens"],
-                "output_tokens": usage["output_tokens"],
-                "model": self._resolve_model(model),
-            }
+        url = self._build_url(model)
+        client = get_http_client(url)
+        response = await client.post(
+            url,
+            headers=self._build_headers(),
+            json=body,
+            timeout=bound_httpx_timeout(self.timeout),
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        text = self._extract_text_from_anthropic_response(data)
+        usage = self._extract_usage_from_anthropic_response(data)
+        self._report_usage(usage, self._resolve_model(model))
+
+        return {
+            "text": text,
+            "input_tokens": usage["input_tokens"],
+            "output_tokens": usage["output_tokens"],
+            "model": self._resolve_model(model),
+            **self._extract_cache_usage_from_anthropic_response(data),
+        }
@@ -5,12 +5,16 @@ httpxで {base_url}/v1/chat/completions への POST。
 OpenAI形式のリクエスト/レスポンスを使用。
 """
 
+import json
 import logging
+from collections.abc import AsyncIterator
 
 import httpx
 
 from app.config import settings
 from app.llm.base import LLMProvider
+from app.llm.deadline import bound_httpx_timeout
+from app.llm.http_pool import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -96,6 +100,14 @@ class OpenAICompatibleProvider(LLMProvider):
             return ""
         return choices[0].get("message", {}).get("content", "")
 
+    @staticmethod
+    def _extract_delta_from_openai_chunk(chunk: dict) -> str:
+        """OpenAI形式のストリーミングチャンクからテキスト断片を抽出"""
+        choices = chunk.get("choices", [])
+        if not choices:
+            return ""
+        return choices[0].get("delta", {}).get("content") or ""
+
     @staticmethod
     def _extract_usage_from_openai_response(data: dict) -> dict:
         """OpenAI形式のレスポンスからトークン使用量を抽出"""
@@ -115,14 +127,55 @@ class OpenAICompatibleProvider(LLMProvider):
         """OpenAI互換APIにメッセージを送信してテキスト応答を取得"""
         body = self._build_body(messages, model, max_tokens, system)
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                self._build_url(),
-                headers=self._build_headers(),
-                json=body,
+        client = get_http_client(self.base_url)
+        response = await client.post(
+            self._build_url(),
+            headers=self._build_headers(),
+            json=body,
+            timeout=bound_httpx_timeout(self.timeout),
+        )
+
+        if response.status_code != 200:
+            logger.error(
+                "OpenAI互換 API エラー: status=%d body=%s",
+                response.status_code,
+                response.text[:500],
             )
+            raise httpx.HTTPStatusError(
+                f"OpenAI-compatible API returned {response.status_code}",
+                request=response.request,
+                response=response,
+            )
+
+        data = response.json()
+        self._report_usage(
+            self._extract_usage_from_openai_response(data), self._resolve_model(model)
+        )
+        return self._extract_text_from_openai_response(data)
 
+    async def chat_stream(
+        self,
+        messages: list[dict],
+        model: str = "haiku",
+        max_tokens: int = 2048,
+        system: str | None = None,
+    ) -> AsyncIterator[str]:
+        """OpenAI互換APIにメッセージを送信してテキスト応答を逐次取得（SSE）"""
+        body = self._build_body(messages, model, max_tokens, system)
+        body["stream"] = True
+        # 最終チャンクでトークン使用量を受け取る
+        body["stream_options"] = {"include_usage": True}
+
+        client = get_http_client(self.base_url)
+        async with client.stream(
+            "POST",
+            self._build_url(),
+            headers=self._build_headers(),
+            json=body,
+            timeout=bound_httpx_timeout(self.timeout),
+        ) as response:
             if response.status_code != 200:
+                await response.aread()
                 logger.error(
                     "OpenAI互換 API エラー: status=%d body=%s",
                     response.status_code,
@@ -134,8 +187,18 @@ class OpenAICompatibleProvider(LLMProvider):
                     response=response,
                 )
 
-            data = response.json()
-            return self._extract_text_from_openai_response(data)
+            usage = {"input_tokens": 0, "output_tokens": 0}
+            try:
+                async for data in self._iter_sse_data(response):
+                    chunk = json.loads(data)
+                    if chunk.get("usage"):
+                        usage = self._extract_usage_from_openai_response(chunk)
+                    text = self._extract_delta_from_openai_chunk(chunk)
+                    if text:
+                        yield text
+            finally:
+                # 途中で打ち切られた場合も受信済みの使用量を報告する
+                self._report_usage(usage, self._resolve_model(model))
 
     async def chat_json(
         self,
@@ -158,21 +221,24 @@ class OpenAICompatibleProvider(LLMProvider):
         """OpenAI互換APIを呼び出し、レスポンスとトークン使用量を返す"""
         body = self._build_body(messages, model, max_tokens, system)
 
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                self._build_url(),
-                headers=self._build_headers(),
-                json=body,
-            )
-            response.raise_for_status()
-            data = response.json()
-
-            text = self._extract_text_from_openai_response(data)
-            usage = self._extract_usage_from_openai_response(data)
-
-            return {
-                "text": text,
-                "input_tokens": usage["input_tokens"],
-                "output_tokens": usage["output_tokens"],
-                "model": self._resolve_model(model),
-            }
+        client = get_http_client(self.base_url)
+        response = await client.post(
+            self._build_url(),
+            headers=self._build_headers(),
+            json=body,
+            timeout=bound_httpx_timeout(self.timeout),
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        text = self._extract_text_from_openai_response(data)
+        usage = self._extract_usage_from_openai_response(data)
+        self._report_usage(usage, self._resolve_model(model))
+
+        return {
+            "text": text,
+            "input_tokens": usage["input_tokens"],
+            "output_tokens": usage["output_tokens"],
+            "model": self._resolve_model(model),
+            **self._extract_cache_usage_from_openai_response(data),
+        }
@@ -1,15 +1,23 @@
 """LLMプロバイダーのレジリエンス機能
 
-サーキットブレーカー、リトライポリシー、レートリミッターを提供する。
-全てインメモリ実装（Redis不要）。
+サーキットブレーカー、リトライポリシー、レートリミッター、ヘッジポリシー、
+適応的同時実行数リミッターを提供する。
+全てインメモリ実装（Redis不要）。ワーカー間で状態を共有する版は shared_resilience を参照。
 """
 
 import asyncio
 import logging
+import math
 import time
-from collections.abc import Callable
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
 from typing import Any, TypeVar
 
+from app.exceptions import DeadlineExceededError
+from app.llm.deadline import remaining_time
+from app.llm.errors import classify_error
+
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
@@ -86,6 +94,20 @@ class CircuitBreaker:
         # half_open: 試行許可（結果でclosed/openに遷移）
         return True
 
+    # --- 非同期インターフェース（ルーターが使用。共有状態の実装がオーバーライドする） ---
+
+    async def allow_request(self) -> bool:
+        """リクエストを実行可能か（can_execute の非同期版）"""
+        return self.can_execute()
+
+    async def on_success(self) -> None:
+        """成功を記録（record_success の非同期版）"""
+        self.record_success()
+
+    async def on_failure(self) -> None:
+        """失敗を記録（record_failure の非同期版）"""
+        self.record_failure()
+
     def __repr__(self) -> str:
         return (
             f"CircuitBreaker(state={self.state}, "
@@ -98,6 +120,12 @@ class RetryPolicy:
 
     失敗時に指数関数的に増加する待機時間でリトライする。
     ジッターを加えて thundering herd 問題を回避。
+    例外は errors.classify_error で分類し、再試行しても成功しないエラー
+    （400・401 等の4xx、JSONパース失敗）はリトライせずに即座に送出する。
+    サーバーが Retry-After で待機時間を指定した場合はその時間だけ待ってから再試行し、
+    指定が max_delay を超える場合はこのプロバイダーでの再試行を打ち切る。
+    リクエストの期限（deadline モジュール）までに次の試行を開始できない場合は
+    待機せずに最後の例外を送出する。期限超過の例外はリトライしない。
     """
 
     def __init__(
@@ -110,7 +138,8 @@ class RetryPolicy:
         Args:
             max_retries: 最大リトライ回数
             base_delay: 初回リトライの基本待機時間（秒）
-            max_delay: 最大待機時間（秒）
+            max_delay: 最大待機時間（秒）。サーバー指定の待機時間がこれを超える場合は
+                リトライしない
         """
         self.max_retries = max_retries
         self.base_delay = base_delay
@@ -133,33 +162,69 @@ class RetryPolicy:
             関数の戻り値
 
         Raises:
-            Exception: 全リトライ失敗後の最後の例外
+            Exception: 再試行不可のエラー、または全リトライ失敗後の最後の例外
         """
         last_exception: Exception | None = None
 
         for attempt in range(self.max_retries + 1):
             try:
                 return await func(*args, **kwargs)
+            except DeadlineExceededError:
+                raise
             except Exception as e:
                 last_exception = e
-                if attempt < self.max_retries:
-                    # Exponential backoff with jitter
-                    delay = min(
-                        self.base_delay * (2**attempt),
-                        self.max_delay,
+                error = classify_error(e)
+                if not error.retryable:
+                    logger.warning(
+                        "再試行不可のエラーのためリトライしない (status=%s): %s",
+                        error.status_code,
+                        str(e)[:200],
                     )
-                    # 簡易ジッター: 待機時間の50-100%をランダムに
-                    import random
-
-                    jittered_delay = delay * (0.5 + random.random() * 0.5)
+                    raise
+                if attempt < self.max_retries:
+                    if error.retry_after is not None:
+                        # サーバー指定の待機時間より早く再試行しない
+                        if error.retry_after > self.max_delay:
+                            logger.warning(
+                                "サーバー指定の待機時間が上限を超えるためリトライ打ち切り "
+                                "(Retry-After=%.1f秒 > %.1f秒): %s",
+                                error.retry_after,
+                                self.max_delay,
+                                str(e)[:200],
+                            )
+                            break
+                        delay = error.retry_after
+                    else:
+                        # Exponential backoff with jitter
+                        backoff = min(
+                            self.base_delay * (2**attempt),
+                            self.max_delay,
+                        )
+                        # 簡易ジッター: 待機時間の50-100%をランダムに
+                        import random
+
+                        delay = backoff * (0.5 + random.random() * 0.5)
+                    remaining = remaining_time()
+                    if remaining is not None and delay >= remaining:
+                        logger.warning(
+                            "期限までに再試行できないためリトライ打ち切り "
+                            "(%d/%d, 待機%.1f秒 > 残り%.1f秒): %s",
+                            attempt + 1,
+                            self.max_retries,
+                            delay,
+                            max(remaining, 0.0),
+                            str(e)[:200],
+                        )
+                        break
                     logger.warning(
-                        "リトライ %d/%d: %.1f秒後に再試行 (エラー: %s)",
+                        "リトライ %d/%d: %.1f秒後に再試行 (%s: %s)",
                         attempt + 1,
                         self.max_retries,
-                        jittered_delay,
+                        delay,
+                        error.kind,
                         str(e)[:200],
                     )
-                    await asyncio.sleep(jittered_delay)
+                    await asyncio.sleep(delay)
                 else:
                     logger.error(
                         "全リトライ失敗 (%d回): %s",
@@ -190,7 +255,11 @@ class RateLimiter:
         self._lock = asyncio.Lock()
 
     async def acquire(self) -> None:
-        """トークンを1つ取得（トークンがない場合は待機）"""
+        """トークンを1つ取得（トークンがない場合は待機）
+
+        ロック内ではトークンの予約（残量が負になることを許す）だけを行い、
+        補充待ちはロックの外で行う。待機中も他のコルーチンは後続の枠を予約できる。
+        """
         async with self._lock:
             now = time.monotonic()
             elapsed = now - self.last_refill_time
@@ -199,16 +268,181 @@ class RateLimiter:
                 self.tokens + elapsed * self.refill_rate,
             )
             self.last_refill_time = now
+            self.tokens -= 1.0
+            wait_time = -self.tokens / self.refill_rate if self.tokens < 0 else 0.0
 
-            if self.tokens < 1.0:
-                # トークン不足: 次のトークン補充まで待機
-                wait_time = (1.0 - self.tokens) / self.refill_rate
-                logger.debug("レートリミット: %.2f秒待機", wait_time)
-                await asyncio.sleep(wait_time)
-                self.tokens = 0.0
-                self.last_refill_time = time.monotonic()
-            else:
-                self.tokens -= 1.0
+        if wait_time > 0:
+            # トークン不足: 予約した枠の補充まで待機
+            logger.debug("レートリミット: %.2f秒待機", wait_time)
+            await asyncio.sleep(wait_time)
 
     def __repr__(self) -> str:
         return f"RateLimiter(rpm={self.requests_per_minute}, tokens={self.tokens:.1f})"
+
+
+class HedgePolicy:
+    """ヘッジポリシー - 応答の遅いプロバイダーへの重複リクエスト判定
+
+    プロバイダーごとの直近レイテンシからパーセンタイルを求め、
+    その時間内に応答がなければ次のプロバイダーへ同じリクエストを送る（ヘッジ）。
+
+    ヘッジ予算は token bucket 方式:
+        リクエストごとに max_extra_ratio トークンを積み、ヘッジ1回で1トークン消費する。
+        長期的な追加呼び出しはリクエスト数の max_extra_ratio 倍以下に抑えられる。
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        max_extra_ratio: float = 0.05,
+        min_samples: int = 20,
+        window_size: int = 200,
+        max_burst: float = 10.0,
+    ):
+        """
+        Args:
+            percentile: ヘッジを送るまでの待機時間とするレイテンシのパーセンタイル
+            max_extra_ratio: リクエスト数に対するヘッジ（追加呼び出し）の上限比率
+            min_samples: パーセンタイルを算出するのに必要な最小サンプル数
+            window_size: プロバイダーごとに保持する直近レイテンシの件数
+            max_burst: 予算トークンの上限（短時間に連続して送れるヘッジ数）
+        """
+        self.percentile = percentile
+        self.max_extra_ratio = max_extra_ratio
+        self.min_samples = min_samples
+        self.window_size = window_size
+        self.max_burst = max_burst
+        self.tokens = 0.0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._latencies: dict[str, deque[float]] = {}
+
+    def record_latency(self, provider_name: str, seconds: float) -> None:
+        """成功した呼び出しのレイテンシを記録"""
+        window = self._latencies.get(provider_name)
+        if window is None:
+            window = self._latencies[provider_name] = deque(maxlen=self.window_size)
+        window.append(seconds)
+
+    def hedge_delay(self, provider_name: str) -> float | None:
+        """ヘッジを送るまでの待機時間（サンプル不足の場合はNone = ヘッジしない）"""
+        window = self._latencies.get(provider_name)
+        if window is None or len(window) < self.min_samples:
+            return None
+        ordered = sorted(window)
+        index = min(len(ordered) - 1, math.ceil(self.percentile * len(ordered)) - 1)
+        return ordered[max(index, 0)]
+
+    def record_request(self) -> None:
+        """リクエスト1件分のヘッジ予算を積む"""
+        self.tokens = min(self.max_burst, self.tokens + self.max_extra_ratio)
+
+    def try_acquire(self) -> bool:
+        """ヘッジ予算を1回分消費（予算不足の場合はFalse）"""
+        # 浮動小数点の積算誤差で予算を取りこぼさないよう僅かに許容する
+        if self.tokens < 1.0 - 1e-9:
+            return False
+        self.tokens = max(0.0, self.tokens - 1.0)
+        self.hedges_sent += 1
+        return True
+
+    def record_win(self) -> None:
+        """ヘッジ側が先に応答したことを記録"""
+        self.hedges_won += 1
+
+    def __repr__(self) -> str:
+        return (
+            f"HedgePolicy(p{self.percentile * 100:.0f}, "
+            f"budget={self.max_extra_ratio:.0%}, "
+            f"sent={self.hedges_sent}, won={self.hedges_won})"
+        )
+
+
+class AdaptiveConcurrencyLimiter:
+    """適応的同時実行数リミッター - AIMD（加算増加・乗算減少）
+
+    プロバイダーごとの同時実行数の上限を、レート制限（429）を受けたら
+    decrease_factor 倍に縮め、成功するたびに 1/上限 ずつ広げる
+    （上限と同じ件数の成功でおよそ +1）。上限に達している間は枠が空くまで待機する。
+
+    上限を縮めた時点で実行中だったリクエストは古い上限で送信されたものなので、
+    それらが続けて429を受けても重ねて縮めない（1回の輻輳で上限が崩れるのを防ぐ）。
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        decrease_factor: float = 0.5,
+    ):
+        """
+        Args:
+            initial_limit: 初期の同時実行数上限
+            min_limit: 上限の下限
+            max_limit: 上限の上限
+            decrease_factor: レート制限を受けたときに上限に掛ける係数
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease_factor = decrease_factor
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.rate_limited_count = 0
+        self._epoch = 0
+        self._condition = asyncio.Condition()
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """同時実行枠を1つ確保してブロックを実行し、結果を上限に反映する
+
+        ブロックがレート制限のエラーで終了した場合は上限を縮め、
+        成功した場合は上限を広げる。その他のエラーでは上限を変えない。
+        """
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+            epoch = self._epoch
+
+        try:
+            yield
+        except Exception as e:
+            if classify_error(e).rate_limited:
+                self._on_rate_limited(epoch)
+            raise
+        else:
+            self._on_success()
+        finally:
+            async with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def _on_success(self) -> None:
+        self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def _on_rate_limited(self, epoch: int) -> None:
+        self.rate_limited_count += 1
+        if epoch != self._epoch:
+            return
+        self._epoch += 1
+        previous = self.limit
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        logger.warning(
+            "レート制限により同時実行数の上限を縮小: %.1f -> %.1f",
+            previous,
+            self.limit,
+        )
+
+    def get_stats(self) -> dict:
+        """現在の上限と実行中の件数"""
+        return {
+            "limit": int(self.limit),
+            "in_flight": self.in_flight,
+            "rate_limited": self.rate_limited_count,
+        }
+
+    def __repr__(self) -> str:
+        return (
+            f"AdaptiveConcurrencyLimiter(limit={self.limit:.1f}, "
+            f"in_flight={self.in_flight})"
+        )
@@ -0,0 +1,243 @@
+"""LLM応答キャッシュ - 決定的な生成系エンドポイント向けの chat_json キャッシュ
+
+同一の (system, messages, model, max_tokens) に対する応答をユーザー横断で再利用し、
+教材・エクササイズ生成の重複LLM呼び出しを削減する。
+キャッシュは呼び出し側でオプトイン（LLMService.chat_json の cache_namespace 指定）。
+
+バックエンド:
+    RedisCacheBackend: 本番用。TTL + エントリ数上限（古い順に追い出し）
+    LocalCacheBackend: プロセス内LRU。テストやRedisなし環境の差し替え用
+
+使用例:
+    result = await llm_service.chat_json(
+        messages=messages, system=system_prompt, cache_namespace="mogomogo_exercises"
+    )
+"""
+
+import hashlib
+import json
+import logging
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from app.config import settings
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llm_cache"
+INDEX_KEY = f"{KEY_PREFIX}:index"
+
+
+class CacheBackend(ABC):
+    """応答キャッシュのバックエンド抽象基底クラス"""
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None:
+        """キーに対応する値を取得（存在しない場合はNone）"""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        """TTL付きで値を保存"""
+
+
+class LocalCacheBackend(CacheBackend):
+    """プロセス内LRUバックエンド（TTL + エントリ数上限）"""
+
+    def __init__(self, max_entries: int = 1000):
+        self.max_entries = max_entries
+        # key -> (有効期限[monotonic], 値)
+        self._entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+
+    async def get(self, key: str) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        self._entries[key] = (time.monotonic() + ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class RedisCacheBackend(CacheBackend):
+    """Redisバックエンド（Redis未接続時はキャッシュなしとして動作）
+
+    各エントリはTTL付きで保存し、Sorted Set のインデックス（スコア=保存時刻）で
+    エントリ数を管理する。上限を超えた分は古い順に削除する。
+    """
+
+    def __init__(self, max_entries: int | None = None):
+        self.max_entries = max_entries or settings.llm_response_cache_max_entries
+
+    async def get(self, key: str) -> str | None:
+        redis_client = get_redis()
+        if redis_client is None:
+            return None
+        return await redis_client.get(key)
+
+    async def set(self, key: str, value: str, ttl_seconds: int) -> None:
+        redis_client = get_redis()
+        if redis_client is None:
+            return
+
+        pipe = redis_client.pipeline()
+        pipe.set(key, value, ex=ttl_seconds)
+        pipe.zadd(INDEX_KEY, {key: time.time()})
+        pipe.zcard(INDEX_KEY)
+        results = await pipe.execute()
+
+        overflow = results[-1] - self.max_entries
+        if overflow > 0:
+            evicted = await redis_client.zpopmin(INDEX_KEY, overflow)
+            evicted_keys = [member for member, _score in evicted]
+            if evicted_keys:
+                await redis_client.delete(*evicted_keys)
+
+
+@dataclass
+class CacheStats:
+    """キャッシュのヒット/ミス統計（namespace 別）"""
+
+    hits: dict[str, int] = field(default_factory=dict)
+    misses: dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+
+    def record(self, namespace: str, hit: bool) -> None:
+        counter = self.hits if hit else self.misses
+        counter[namespace] = counter.get(namespace, 0) + 1
+
+    def to_dict(self) -> dict:
+        namespaces = sorted(set(self.hits) | set(self.misses))
+        total_hits = sum(self.hits.values())
+        total = total_hits + sum(self.misses.values())
+        return {
+            "hits": total_hits,
+            "misses": total - total_hits,
+            "errors": self.errors,
+            "hit_rate": round(total_hits / total, 4) if total else 0.0,
+            "namespaces": {
+                ns: {"hits": self.hits.get(ns, 0), "misses": self.misses.get(ns, 0)}
+                for ns in namespaces
+            },
+        }
+
+
+class ResponseCache:
+    """chat_json 応答キャッシュ
+
+    キャッシュの読み書きに失敗してもLLM呼び出しは継続する（フェイルオープン）。
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None = None,
+        ttl_seconds: int | None = None,
+        max_value_bytes: int | None = None,
+        enabled: bool | None = None,
+    ):
+        """
+        Args:
+            backend: キャッシュバックエンド（未指定時は RedisCacheBackend）
+            ttl_seconds: エントリのデフォルトTTL（秒）
+            max_value_bytes: 保存する応答の最大サイズ（超過時は保存しない）
+            enabled: キャッシュの有効/無効
+        """
+        self.backend: CacheBackend = backend or RedisCacheBackend()
+        self.ttl_seconds = ttl_seconds or settings.llm_response_cache_ttl_seconds
+        self.max_value_bytes = (
+            max_value_bytes or settings.llm_response_cache_max_value_bytes
+        )
+        self.enabled = (
+            settings.llm_response_cache_enabled if enabled is None else enabled
+        )
+        self.stats = CacheStats()
+
+    @staticmethod
+    def make_key(
+        messages: list[dict],
+        model: str,
+        max_tokens: int,
+        system: str | None,
+    ) -> str:
+        """リクエストを正規化してキャッシュキーを生成
+
+        文字列の前後・連続空白の差異は同一視し、辞書はキー順でシリアライズする。
+        """
+        payload = {
+            "system": _normalize(system),
+            "messages": _normalize(messages),
+            "model": model,
+            "max_tokens": max_tokens,
+        }
+        raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        digest = hashlib.sha256(raw.encode()).hexdigest()
+        return f"{KEY_PREFIX}:{digest}"
+
+    async def get(self, key: str, namespace: str) -> dict | list | None:
+        """キャッシュ済み応答を取得（ミス・無効時はNone）"""
+        if not self.enabled:
+            return None
+
+        try:
+            raw = await self.backend.get(key)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning("LLM応答キャッシュ取得失敗: %s", e)
+            return None
+
+        self.stats.record(namespace, hit=raw is not None)
+        if raw is None:
+            logger.debug("LLM応答キャッシュミス: namespace=%s", namespace)
+            return None
+
+        logger.debug("LLM応答キャッシュヒット: namespace=%s", namespace)
+        return json.loads(raw)
+
+    async def set(
+        self,
+        key: str,
+        value: dict | list,
+        ttl_seconds: int | None = None,
+    ) -> None:
+        """応答をキャッシュに保存"""
+        if not self.enabled:
+            return
+
+        raw = json.dumps(value, ensure_ascii=False)
+        if len(raw.encode()) > self.max_value_bytes:
+            logger.debug("LLM応答がキャッシュ上限サイズを超えたため保存しません")
+            return
+
+        try:
+            await self.backend.set(key, raw, ttl_seconds or self.ttl_seconds)
+        except Exception as e:
+            self.stats.errors += 1
+            logger.warning("LLM応答キャッシュ保存失敗: %s", e)
+
+    def get_stats(self) -> dict:
+        """ヒット/ミス統計を返す"""
+        return self.stats.to_dict()
+
+
+def _normalize(value):
+    """キャッシュキー用にメッセージ構造を正規化"""
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_normalize(v) for v in value]
+    return value
@@ -3,14 +3,44 @@
 プライマリプロバイダーでリクエストを実行し、
 失敗時にフォールバックプロバイダーに自動切替する。
 サーキットブレーカーとリトライポリシーを統合。
+
+ヘッジポリシーを指定した場合、先頭プロバイダーが直近レイテンシの
+パーセンタイル以内に応答しなければ次のプロバイダーへ同じリクエストを送り、
+先に成功した応答を採用して残りをキャンセルする（ストリーミングは対象外）。
+
+スコアラーを指定した場合、プロバイダーの試行順はレイテンシ・エラー率・料金に基づき
+リクエストごとに決まる（scoring.ProviderScorer）。
+
+リクエストの期限（deadline モジュール）が設定されている場合、レートリミット待ち・
+リトライ・フォールバックは残り時間の範囲内でのみ行い、期限を過ぎた時点で
+DeadlineExceededError を送出して以降のプロバイダーを試行しない。
+
+同時実行数リミッターを指定した場合、プロバイダーごとの同時実行数を
+AIMD（レート制限で縮小・成功で拡大）で調整し、上限に達している間は枠が空くまで待つ。
+枠はリトライの試行ごとに確保する（ストリーミングは最初のチャンク受信まで）。
 """
 
+import asyncio
+import inspect
 import logging
-from collections.abc import Callable
-from typing import Any
+import time
+import uuid
+from collections.abc import AsyncIterator, Callable
+from typing import Any, NoReturn
 
+from app.exceptions import DeadlineExceededError
 from app.llm.base import LLMProvider
-from app.llm.resilience import CircuitBreaker, RateLimiter, RetryPolicy
+from app.llm.deadline import check_deadline, deadline_scope
+from app.llm.errors import classify_error
+from app.llm.resilience import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    HedgePolicy,
+    RateLimiter,
+    RetryPolicy,
+)
+from app.llm.scoring import ProviderScorer
+from app.llm.usage import UsageCapture, capture_usage, get_usage_user
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +61,13 @@ class LLMRouter:
         rate_limiter: RateLimiter | None = None,
         circuit_breaker_threshold: int = 5,
         circuit_breaker_timeout: float = 60.0,
+        circuit_breaker_factory: Callable[[str], CircuitBreaker] | None = None,
+        usage_callback: Callable[..., Any] | None = None,
+        hedge_policy: HedgePolicy | None = None,
+        scorer: ProviderScorer | None = None,
+        concurrency_limiter_factory: (
+            Callable[[str], AdaptiveConcurrencyLimiter] | None
+        ) = None,
     ):
         """
         Args:
@@ -40,20 +77,44 @@ class LLMRouter:
             rate_limiter: レートリミッター（Noneの場合はデフォルト設定）
             circuit_breaker_threshold: サーキットブレーカーの失敗閾値
             circuit_breaker_timeout: サーキットブレーカーの回復タイムアウト（秒）
+            circuit_breaker_factory: プロバイダー名からブレーカーを生成する関数
+                （Noneの場合はインメモリの CircuitBreaker）
+            usage_callback: 呼び出し成功ごとに使用量を受け取るコールバック（同期/非同期）
+                （user_id, provider, model, model_name, input_tokens, output_tokens）
+            hedge_policy: ヘッジポリシー（Noneの場合はヘッジしない）
+            scorer: プロバイダースコアラー（Noneの場合は設定順で試行）
+            concurrency_limiter_factory: プロバイダー名から同時実行数リミッターを
+                生成する関数（Noneの場合は同時実行数を制限しない）
         """
         self.primary = primary
         self.fallbacks = fallbacks or []
         self.retry_policy = retry_policy or RetryPolicy()
         self.rate_limiter = rate_limiter or RateLimiter()
+        self.usage_callback = usage_callback
+        self.hedge_policy = hedge_policy
+        self.scorer = scorer
 
         # 全プロバイダーにサーキットブレーカーを割り当て
         self.circuit_breakers: dict[str, CircuitBreaker] = {}
         all_providers = [primary] + self.fallbacks
         for provider in all_providers:
-            self.circuit_breakers[provider.name] = CircuitBreaker(
-                failure_threshold=circuit_breaker_threshold,
-                recovery_timeout=circuit_breaker_timeout,
-            )
+            if circuit_breaker_factory is not None:
+                self.circuit_breakers[provider.name] = circuit_breaker_factory(
+                    provider.name
+                )
+            else:
+                self.circuit_breakers[provider.name] = CircuitBreaker(
+                    failure_threshold=circuit_breaker_threshold,
+                    recovery_timeout=circuit_breaker_timeout,
+                )
+
+        # プロバイダーごとの同時実行数リミッター（AIMD）
+        self.concurrency_limiters: dict[str, AdaptiveConcurrencyLimiter] = {}
+        if concurrency_limiter_factory is not None:
+            for provider in all_providers:
+                self.concurrency_limiters[provider.name] = concurrency_limiter_factory(
+                    provider.name
+                )
 
         logger.info(
             "LLMRouter初期化: primary=%s, fallbacks=%s",
@@ -61,17 +122,18 @@ class LLMRouter:
             [p.name for p in self.fallbacks],
         )
 
-    def _get_ordered_providers(self) -> list[LLMProvider]:
+    async def _get_ordered_providers(self, model: str = "haiku") -> list[LLMProvider]:
         """実行可能なプロバイダーを優先順に返す
 
         サーキットブレーカーが開いているプロバイダーはスキップ。
+        スコアラーがある場合は目的関数に従って並べ替える。
         """
         all_providers = [self.primary] + self.fallbacks
         available = []
 
         for provider in all_providers:
             cb = self.circuit_breakers[provider.name]
-            if cb.can_execute():
+            if await cb.allow_request():
                 available.append(provider)
             else:
                 logger.debug(
@@ -87,9 +149,39 @@ class LLMRouter:
                 self.primary.name,
             )
             available = [self.primary]
+        elif self.scorer is not None:
+            available = self.scorer.order(available, model)
 
         return available
 
+    def get_provider_scores(self) -> dict:
+        """プロバイダーのスコアとサーキットブレーカー状態（調査用）"""
+        return {
+            "scores": self.scorer.get_scores() if self.scorer is not None else None,
+            "circuit_breakers": {
+                name: cb.state for name, cb in self.circuit_breakers.items()
+            },
+        }
+
+    def get_concurrency_stats(self) -> dict:
+        """プロバイダーごとの同時実行数の上限と実行中の件数"""
+        return {
+            name: limiter.get_stats()
+            for name, limiter in self.concurrency_limiters.items()
+        }
+
+    def _limited(self, provider: LLMProvider, func: Callable) -> Callable:
+        """試行ごとにプロバイダーの同時実行枠を確保する関数を返す（リミッターなしはそのまま）"""
+        limiter = self.concurrency_limiters.get(provider.name)
+        if limiter is None:
+            return func
+
+        async def _attempt(*args: Any, **kwargs: Any) -> Any:
+            async with limiter.slot():
+                return await func(*args, **kwargs)
+
+        return _attempt
+
     async def _execute_with_fallback(
         self,
         method_name: str,
@@ -107,48 +199,347 @@ class LLMRouter:
             メソッドの戻り値
 
         Raises:
-            ValueError: 全プロバイダーが失敗した場合
+            ValueError: 全プロバイダーが失敗した場合、またはリクエスト起因で失敗した場合
+            DeadlineExceededError: リクエストの期限を超過した場合
         """
-        providers = self._get_ordered_providers()
+        providers = await self._get_ordered_providers(kwargs.get("model", "haiku"))
         last_exception: Exception | None = None
+        attempted: set[str] = set()
 
-        for provider in providers:
-            cb = self.circuit_breakers[provider.name]
+        if self.hedge_policy is not None and len(providers) > 1:
+            try:
+                return await self._execute_hedged(
+                    providers[0], providers[1], attempted, method_name, args, kwargs
+                )
+            except DeadlineExceededError:
+                raise
+            except Exception as e:
+                if classify_error(e).request_error:
+                    self._raise_request_error(e)
+                last_exception = e
 
+        for provider in providers:
+            if provider.name in attempted:
+                continue
             try:
+                # 期限を過ぎていればフォールバックせずに打ち切る
+                check_deadline(f"{method_name} fallback")
+                result = await self._call_provider(provider, method_name, args, kwargs)
+            except DeadlineExceededError:
+                raise
+            except Exception as e:
+                if classify_error(e).request_error:
+                    # 入力不正・パース失敗は別プロバイダーへ送っても解消しない
+                    self._raise_request_error(e)
+                last_exception = e
+                # 次のフォールバックプロバイダーを試行
+                continue
+
+            if provider != self.primary:
+                logger.info(
+                    "フォールバック成功: %s -> %s",
+                    self.primary.name,
+                    provider.name,
+                )
+            return result
+
+        # 全プロバイダーが失敗
+        error_msg = (
+            f"全LLMプロバイダーが失敗しました "
+            f"(primary={self.primary.name}, "
+            f"fallbacks={[p.name for p in self.fallbacks]})"
+        )
+        logger.error(error_msg)
+        raise ValueError(error_msg) from last_exception
+
+    @staticmethod
+    def _raise_request_error(exc: Exception) -> NoReturn:
+        """リクエスト起因の失敗をフォールバックせずに送出（ValueError として呼び出し元へ）"""
+        if isinstance(exc, ValueError):
+            raise exc
+        raise ValueError(f"LLMリクエストが拒否されました: {str(exc)[:200]}") from exc
+
+    async def _call_provider(
+        self,
+        provider: LLMProvider,
+        method_name: str,
+        args: tuple,
+        kwargs: dict,
+    ) -> Any:
+        """1プロバイダーでリトライポリシー付きで実行し、結果をブレーカー・使用量に反映
+
+        Raises:
+            Exception: リトライ後も失敗した場合（キャンセル時・リクエスト起因の失敗は
+                失敗として記録しない）
+            DeadlineExceededError: リクエストの期限を超過した場合（失敗として記録しない）
+        """
+        cb = self.circuit_breakers[provider.name]
+        model = kwargs.get("model", "haiku")
+        try:
+            async with deadline_scope(f"{provider.name}.{method_name}"):
                 # レートリミット適用
                 await self.rate_limiter.acquire()
 
                 # リトライポリシー付きで実行
-                method: Callable = getattr(provider, method_name)
-                result = await self.retry_policy.execute(method, *args, **kwargs)
+                method = self._limited(provider, getattr(provider, method_name))
+                started = time.monotonic()
+                with capture_usage() as usage:
+                    result = await self.retry_policy.execute(method, *args, **kwargs)
+        except DeadlineExceededError:
+            # 期限切れはクライアント側の都合のため、ブレーカー・スコアには反映しない
+            logger.warning(
+                "期限超過のため打ち切り: %s (%s)", provider.name, method_name
+            )
+            raise
+        except Exception as e:
+            if classify_error(e).request_error:
+                # プロバイダーの障害ではないため、ブレーカー・スコアには反映しない
+                logger.warning(
+                    "リクエスト起因の失敗: %s (%s.%s) - %s",
+                    provider.name,
+                    method_name,
+                    type(e).__name__,
+                    str(e)[:200],
+                )
+                raise
+            await cb.on_failure()
+            if self.scorer is not None:
+                self.scorer.record_failure(provider.name, model)
+            logger.warning(
+                "プロバイダー失敗: %s (%s.%s) - %s",
+                provider.name,
+                method_name,
+                type(e).__name__,
+                str(e)[:200],
+            )
+            raise
 
-                # 成功 -> サーキットブレーカーリセット
-                cb.record_success()
+        # 成功 -> サーキットブレーカーリセット
+        await cb.on_success()
+        latency = time.monotonic() - started
+        if self.hedge_policy is not None:
+            self.hedge_policy.record_latency(provider.name, latency)
+        if self.scorer is not None:
+            self.scorer.record_success(provider.name, model, latency)
+        await self._record_usage(provider, model, usage)
+        return result
 
-                if provider != self.primary:
-                    logger.info(
-                        "フォールバック成功: %s -> %s",
-                        self.primary.name,
-                        provider.name,
-                    )
+    async def _execute_hedged(
+        self,
+        provider: LLMProvider,
+        hedge_provider: LLMProvider,
+        attempted: set[str],
+        method_name: str,
+        args: tuple,
+        kwargs: dict,
+    ) -> Any:
+        """先頭プロバイダーが遅い場合に次のプロバイダーへヘッジを送り、先に成功した方を返す
+
+        Args:
+            provider: 先頭プロバイダー
+            hedge_provider: ヘッジ先のプロバイダー
+            attempted: 試行したプロバイダー名を追加する集合（フォールバックで再試行しない）
+
+        Raises:
+            Exception: 試行した全プロバイダーが失敗した場合（最後の例外）
+        """
+        policy = self.hedge_policy
+        policy.record_request()
+        delay = policy.hedge_delay(provider.name)
+
+        attempted.add(provider.name)
+        primary_task = asyncio.create_task(
+            self._call_provider(provider, method_name, args, kwargs)
+        )
+        pending = {primary_task}
+        try:
+            if delay is None:
+                return await primary_task
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or not policy.try_acquire():
+                return await primary_task
+
+            logger.info(
+                "ヘッジ送信: %s が %.2f秒以内に応答せず %s へ重複リクエスト",
+                provider.name,
+                delay,
+                hedge_provider.name,
+            )
+            attempted.add(hedge_provider.name)
+            hedge_task = asyncio.create_task(
+                self._call_provider(hedge_provider, method_name, args, kwargs)
+            )
+            pending.add(hedge_task)
+
+            last_exception: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge_task:
+                            policy.record_win()
+                            logger.info(
+                                "ヘッジ成功: %s -> %s",
+                                provider.name,
+                                hedge_provider.name,
+                            )
+                        return task.result()
+                    last_exception = task.exception()
+                    if classify_error(last_exception).request_error:
+                        raise last_exception
+            raise last_exception
+        finally:
+            # 負けた（または呼び出し元がキャンセルされた）リクエストを打ち切る
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _record_usage(
+        self,
+        provider: LLMProvider,
+        model: str,
+        usage: UsageCapture,
+        user_id: uuid.UUID | None = None,
+    ) -> None:
+        """応答したプロバイダーの使用量をコールバックへ通知（失敗しても呼び出しは継続）
+
+        user_id を省略した場合は現在のリクエストの利用ユーザーとする。
+        """
+        if self.usage_callback is None:
+            return
+        try:
+            result = self.usage_callback(
+                user_id=user_id or get_usage_user(),
+                provider=provider.name,
+                model=model,
+                model_name=usage.model or model,
+                input_tokens=usage.input_tokens,
+                output_tokens=usage.output_tokens,
+            )
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.warning("使用量の記録に失敗: %s", e)
+
+    @staticmethod
+    async def _open_stream(
+        provider: LLMProvider,
+        **kwargs: Any,
+    ) -> tuple[AsyncIterator[str], str | None]:
+        """ストリームを開始し、最初のチャンクまで受信する
+
+        Returns:
+            (ストリーム, 最初のチャンク) - 応答が空の場合は最初のチャンクがNone
+        """
+        stream = provider.chat_stream(**kwargs)
+        try:
+            first_chunk = await anext(stream)
+        except StopAsyncIteration:
+            return stream, None
+        except BaseException:
+            await stream.aclose()
+            raise
+        return stream, first_chunk
 
-                return result
+    async def chat_stream(
+        self,
+        messages: list[dict],
+        model: str = "haiku",
+        max_tokens: int = 2048,
+        system: str | None = None,
+    ) -> AsyncIterator[str]:
+        """ストリーミング応答を返す（フォールバックは最初のチャンク受信前のみ）
+
+        最初のチャンクを受信した後にプロバイダーが失敗した場合、
+        既に送出済みの出力と混ざるため別プロバイダーへは切り替えずに例外を送出する。
+
+        Yields:
+            応答テキストの断片
+
+        Raises:
+            ValueError: 最初のチャンク受信前に全プロバイダーが失敗した場合、
+                またはリクエスト起因で失敗した場合
+            DeadlineExceededError: 最初のチャンク受信前にリクエストの期限を超過した場合
+        """
+        providers = await self._get_ordered_providers(model)
+        last_exception: Exception | None = None
+
+        # ストリームはクライアント切断時に別のコンテキストで閉じられる場合があるため、
+        # 利用ユーザーは開始時に確定し、使用量の集計はプロバイダーを進める間だけ設定する
+        user_id = get_usage_user()
+        for provider in providers:
+            cb = self.circuit_breakers[provider.name]
+            usage = UsageCapture()
 
+            try:
+                # 期限は最初のチャンクまでに適用（受信開始後の生成時間は応答長に依存する）
+                check_deadline("chat_stream fallback")
+                async with deadline_scope(f"{provider.name}.chat_stream"):
+                    await self.rate_limiter.acquire()
+                    with capture_usage(usage):
+                        stream, chunk = await self.retry_policy.execute(
+                            self._limited(provider, self._open_stream),
+                            provider,
+                            messages=messages,
+                            model=model,
+                            max_tokens=max_tokens,
+                            system=system,
+                        )
+            except DeadlineExceededError:
+                raise
             except Exception as e:
-                cb.record_failure()
+                if classify_error(e).request_error:
+                    logger.warning(
+                        "リクエスト起因の失敗: %s (chat_stream) - %s",
+                        provider.name,
+                        str(e)[:200],
+                    )
+                    self._raise_request_error(e)
+                await cb.on_failure()
+                if self.scorer is not None:
+                    self.scorer.record_failure(provider.name, model)
                 last_exception = e
                 logger.warning(
-                    "プロバイダー失敗: %s (%s.%s) - %s",
+                    "プロバイダー失敗: %s (chat_stream) - %s",
                     provider.name,
-                    method_name,
-                    type(e).__name__,
                     str(e)[:200],
                 )
-                # 次のフォールバックプロバイダーを試行
                 continue
 
-        # 全プロバイダーが失敗
+            if provider != self.primary:
+                logger.info(
+                    "フォールバック成功: %s -> %s",
+                    self.primary.name,
+                    provider.name,
+                )
+
+            try:
+                while chunk is not None:
+                    yield chunk
+                    with capture_usage(usage):
+                        chunk = await anext(stream, None)
+            except Exception as e:
+                if not classify_error(e).request_error:
+                    await cb.on_failure()
+                    if self.scorer is not None:
+                        self.scorer.record_failure(provider.name, model)
+                raise
+            finally:
+                # プロバイダーはストリームの終了時に使用量を報告するため、閉じてから記録する
+                # （途中で失敗・中断したストリームも受信済みの使用量を記録する）
+                with capture_usage(usage):
+                    await stream.aclose()
+                await self._record_usage(provider, model, usage, user_id)
+
+            await cb.on_success()
+            if self.scorer is not None:
+                # ストリームの所要時間は応答長に依存するためエラー率のみ反映
+                self.scorer.record_success(provider.name, model)
+            return
+
         error_msg = (
             f"全LLMプロバイダーが失敗しました "
             f"(primary={self.primary.name}, "
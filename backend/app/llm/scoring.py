@@ -0,0 +1,204 @@
+"""LLMプロバイダーのスコアリング - レイテンシ・エラー率・料金に基づく順序付け
+
+プロバイダー×モデルエイリアスごとに、成功時レイテンシの EWMA（平均と分散）と
+エラー率の EWMA を保持し、cost.PRICING_TABLE の料金と合わせてリクエストごとに
+試行順を決める。p95 レイテンシは EWMA の平均 + 1.645σ（正規分布近似）で推定する。
+
+目的関数（objective）:
+    priority: 設定順（primary -> fallbacks）を基本とし、劣化したプロバイダーを後ろに回す
+    cheapest_within_slo: p95 が SLO 以内かつエラー率が閾値以下のうち最も安いものを優先
+    fastest: p95 推定が最も小さいものを優先
+
+「劣化」は p95 推定が SLO 超過、またはエラー率が閾値超過の状態。
+サンプル不足のプロバイダーは劣化していないものとして扱う（探索のため）。
+
+観測値は最後の観測からの経過時間に応じて減衰する（半減期 recovery_half_life_seconds）。
+劣化したプロバイダーにはトラフィックが流れず観測が更新されないため、エラー率と
+観測の重みを時間で減衰させ、重みが min_samples を下回ったら再び探索対象に戻す。
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+
+from app.llm.base import LLMProvider
+from app.llm.cost import get_pricing
+
+logger = logging.getLogger(__name__)
+
+OBJECTIVES = ("priority", "cheapest_within_slo", "fastest")
+# 正規分布の95パーセンタイル点
+_Z_P95 = 1.645
+
+
+@dataclass
+class ProviderStats:
+    """プロバイダー×モデルの観測値（EWMA）"""
+
+    latency_mean: float | None = None
+    latency_var: float = 0.0
+    error_rate: float = 0.0
+    samples: int = 0
+    # 劣化判定に使う観測の重み（時間減衰する実効サンプル数）
+    weight: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def latency_p95(self) -> float | None:
+        if self.latency_mean is None:
+            return None
+        return self.latency_mean + _Z_P95 * math.sqrt(self.latency_var)
+
+
+class ProviderScorer:
+    """プロバイダースコアリング - リクエストごとの試行順を決定"""
+
+    def __init__(
+        self,
+        objective: str = "priority",
+        latency_slo_seconds: float = 10.0,
+        max_error_rate: float = 0.5,
+        alpha: float = 0.2,
+        min_samples: int = 5,
+        recovery_half_life_seconds: float = 60.0,
+    ):
+        """
+        Args:
+            objective: 目的関数（priority, cheapest_within_slo, fastest）
+            latency_slo_seconds: p95 レイテンシのSLO（秒）
+            max_error_rate: 劣化とみなすエラー率の閾値
+            alpha: EWMA の平滑化係数（大きいほど直近の観測を重視）
+            min_samples: 劣化判定に必要な最小観測数
+            recovery_half_life_seconds: 観測なしでエラー率・観測の重みが半減する秒数
+        """
+        if objective not in OBJECTIVES:
+            raise ValueError(
+                f"不明なルーティング目的関数: '{objective}'. 利用可能: {', '.join(OBJECTIVES)}"
+            )
+        self.objective = objective
+        self.latency_slo_seconds = latency_slo_seconds
+        self.max_error_rate = max_error_rate
+        self.alpha = alpha
+        self.min_samples = min_samples
+        self.recovery_half_life_seconds = recovery_half_life_seconds
+        self._stats: dict[tuple[str, str], ProviderStats] = {}
+
+    def _get(self, provider_name: str, model: str) -> ProviderStats:
+        key = (provider_name, model)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = ProviderStats()
+        return stats
+
+    def _decayed(self, stats: ProviderStats, now: float) -> tuple[float, float]:
+        """最後の観測からの経過時間で減衰させた (エラー率, 観測の重み)"""
+        elapsed = max(0.0, now - stats.updated_at)
+        factor = 0.5 ** (elapsed / self.recovery_half_life_seconds)
+        return stats.error_rate * factor, stats.weight * factor
+
+    def _observe(self, provider_name: str, model: str) -> ProviderStats:
+        """観測前に減衰を反映し、観測数・重みを加算する"""
+        stats = self._get(provider_name, model)
+        now = time.monotonic()
+        stats.error_rate, stats.weight = self._decayed(stats, now)
+        stats.weight += 1
+        stats.updated_at = now
+        stats.samples += 1
+        return stats
+
+    def record_success(
+        self, provider_name: str, model: str, latency: float | None = None
+    ) -> None:
+        """成功を記録（latency が None の場合はエラー率のみ更新）"""
+        stats = self._observe(provider_name, model)
+        stats.error_rate = (1 - self.alpha) * stats.error_rate
+        if latency is None:
+            return
+        if stats.latency_mean is None:
+            stats.latency_mean = latency
+            return
+        # 指数加重の平均・分散（West のインクリメンタル更新）
+        diff = latency - stats.latency_mean
+        increment = self.alpha * diff
+        stats.latency_mean += increment
+        stats.latency_var = (1 - self.alpha) * (stats.latency_var + diff * increment)
+
+    def record_failure(self, provider_name: str, model: str) -> None:
+        """失敗を記録"""
+        stats = self._observe(provider_name, model)
+        stats.error_rate = (1 - self.alpha) * stats.error_rate + self.alpha
+
+    def is_degraded(self, provider_name: str, model: str) -> bool:
+        """p95 が SLO 超過、またはエラー率が閾値超過か（減衰後の観測で判定）"""
+        stats = self._stats.get((provider_name, model))
+        if stats is None:
+            return False
+        error_rate, weight = self._decayed(stats, time.monotonic())
+        # 直前の観測からの僅かな減衰で判定が揺れないよう、実効サンプル数は四捨五入で比較
+        if round(weight) < self.min_samples:
+            return False
+        if error_rate > self.max_error_rate:
+            return True
+        p95 = stats.latency_p95
+        return p95 is not None and p95 > self.latency_slo_seconds
+
+    def order(self, providers: list[LLMProvider], model: str) -> list[LLMProvider]:
+        """目的関数に従ってプロバイダーを並べ替える（同点は元の順序を維持）
+
+        Args:
+            providers: 実行可能なプロバイダー（設定の優先順）
+            model: モデルエイリアス
+        """
+        priority = {p.name: i for i, p in enumerate(providers)}
+
+        def key(provider: LLMProvider) -> tuple:
+            degraded = self.is_degraded(provider.name, model)
+            if self.objective == "cheapest_within_slo":
+                pricing = get_pricing(provider.name, model)
+                price = pricing.input_price_per_m + pricing.output_price_per_m
+                return (degraded, price, priority[provider.name])
+            if self.objective == "fastest":
+                stats = self._stats.get((provider.name, model))
+                p95 = stats.latency_p95 if stats is not None else None
+                return (
+                    degraded,
+                    p95 if p95 is not None else self.latency_slo_seconds,
+                    priority[provider.name],
+                )
+            return (degraded, priority[provider.name])
+
+        ordered = sorted(providers, key=key)
+        if ordered[0] is not providers[0]:
+            logger.debug(
+                "プロバイダー順序変更 (%s, model=%s): %s",
+                self.objective,
+                model,
+                [p.name for p in ordered],
+            )
+        return ordered
+
+    def get_scores(self) -> dict:
+        """観測値と判定結果（ヘルスチェック・調査用）"""
+        scores: dict[str, dict] = {}
+        now = time.monotonic()
+        for (provider_name, model), stats in sorted(self._stats.items()):
+            error_rate, _ = self._decayed(stats, now)
+            pricing = get_pricing(provider_name, model)
+            p95 = stats.latency_p95
+            scores.setdefault(provider_name, {})[model] = {
+                "latency_ewma_ms": round(stats.latency_mean * 1000, 1)
+                if stats.latency_mean is not None
+                else None,
+                "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                "error_rate": round(error_rate, 3),
+                "samples": stats.samples,
+                "price_per_m_tokens": pricing.input_price_per_m
+                + pricing.output_price_per_m,
+                "degraded": self.is_degraded(provider_name, model),
+            }
+        return {
+            "objective": self.objective,
+            "latency_slo_ms": self.latency_slo_seconds * 1000,
+            "providers": scores,
+        }
@@ -5,12 +5,30 @@
 """
 
 import logging
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import aclosing, asynccontextmanager
+from functools import partial
+from typing import Any
 
 from app.config import settings
+from app.llm.admission import admission_controller
 from app.llm.base import LLMProvider
+from app.llm.coalescing import request_coalescer
+from app.llm.deadline import deadline_scope
 from app.llm.providers import PROVIDER_MAP
-from app.llm.resilience import RateLimiter, RetryPolicy
+from app.llm.response_cache import ResponseCache
+from app.llm.resilience import (
+    AdaptiveConcurrencyLimiter,
+    HedgePolicy,
+    RateLimiter,
+    RetryPolicy,
+)
 from app.llm.router import LLMRouter
+from app.llm.scoring import ProviderScorer
+from app.llm.shared_resilience import SharedCircuitBreaker, SharedRateLimiter
+from app.services.quota_service import quota_service
+from app.services.usage_recorder import usage_recorder
 
 logger = logging.getLogger(__name__)
 
@@ -26,6 +44,7 @@ class LLMService:
 
     def __init__(self):
         self.router = self._build_router()
+        self.response_cache = ResponseCache()
         logger.info("LLMService初期化完了")
 
     def _build_router(self) -> LLMRouter:
@@ -61,9 +80,42 @@ class LLMService:
         # レジリエンス設定
         retry_policy = RetryPolicy(
             max_retries=settings.llm_retry_max,
+            max_delay=settings.llm_retry_max_delay_seconds,
         )
-        rate_limiter = RateLimiter(
-            requests_per_minute=settings.llm_rate_limit_rpm,
+        # 共有状態（Redis）が有効な場合、Redis未接続時はインメモリにフォールバックする
+        if settings.llm_shared_resilience_enabled:
+            rate_limiter = SharedRateLimiter(
+                requests_per_minute=settings.llm_rate_limit_rpm,
+            )
+            circuit_breaker_factory = partial(
+                SharedCircuitBreaker,
+                failure_threshold=settings.llm_circuit_breaker_threshold,
+                recovery_timeout=settings.llm_circuit_breaker_timeout,
+            )
+        else:
+            rate_limiter = RateLimiter(
+                requests_per_minute=settings.llm_rate_limit_rpm,
+            )
+            circuit_breaker_factory = None
+        hedge_policy = (
+            HedgePolicy(
+                percentile=settings.llm_hedge_percentile,
+                max_extra_ratio=settings.llm_hedge_max_extra_ratio,
+                min_samples=settings.llm_hedge_min_samples,
+            )
+            if settings.llm_hedge_enabled
+            else None
+        )
+        concurrency_limiter_factory = (
+            (
+                lambda _name: AdaptiveConcurrencyLimiter(
+                    initial_limit=settings.llm_adaptive_concurrency_initial,
+                    min_limit=settings.llm_adaptive_concurrency_min,
+                    max_limit=settings.llm_adaptive_concurrency_max,
+                )
+            )
+            if settings.llm_adaptive_concurrency_enabled
+            else None
         )
 
         return LLMRouter(
@@ -73,8 +125,61 @@ class LLMService:
             rate_limiter=rate_limiter,
             circuit_breaker_threshold=settings.llm_circuit_breaker_threshold,
             circuit_breaker_timeout=settings.llm_circuit_breaker_timeout,
+            circuit_breaker_factory=circuit_breaker_factory,
+            usage_callback=self._record_usage,
+            hedge_policy=hedge_policy,
+            scorer=ProviderScorer(
+                objective=settings.llm_routing_objective,
+                latency_slo_seconds=settings.llm_routing_latency_slo_seconds,
+                max_error_rate=settings.llm_routing_max_error_rate,
+                recovery_half_life_seconds=settings.llm_routing_recovery_half_life_seconds,
+            ),
+            concurrency_limiter_factory=concurrency_limiter_factory,
+        )
+
+    @staticmethod
+    async def _record_usage(
+        user_id: uuid.UUID | None,
+        provider: str,
+        model: str,
+        model_name: str,
+        input_tokens: int,
+        output_tokens: int,
+    ) -> None:
+        """ルーターからの使用量通知をAPI利用ログとクォータカウンターへ反映"""
+        usage_recorder.record(
+            user_id, provider, model, model_name, input_tokens, output_tokens
+        )
+        await quota_service.record_usage(
+            user_id, provider, model, input_tokens, output_tokens
         )
 
+    @staticmethod
+    @asynccontextmanager
+    async def _quota_reservation() -> AsyncIterator[None]:
+        """呼び出し元ユーザーの月間クォータの枠を1回分確保する（失敗時は返却）
+
+        リクエストの合流より前に確保するため、合流して上流を呼ばないリクエストも
+        自分のユーザーの枠を消費し、上限到達時は合流せずに拒否される。
+        """
+        reservation = await quota_service.reserve()
+        try:
+            yield
+        except Exception:
+            await quota_service.release(reservation)
+            raise
+
+    @staticmethod
+    async def _admitted(call: Callable[[], Awaitable[Any]]) -> Any:
+        """受付（アドミッション制御）を待ってから上流を呼び出す"""
+        async with admission_controller.admit():
+            return await call()
+
+    async def _with_quota(self, call: Callable[[], Awaitable[Any]]) -> Any:
+        """月間クォータの枠を確保し、受付を待ってから呼び出す（合流しない呼び出し用）"""
+        async with self._quota_reservation():
+            return await self._admitted(call)
+
     @staticmethod
     def _create_provider(provider_name: str) -> LLMProvider:
         """プロバイダー名からプロバイダーインスタンスを生成
@@ -109,8 +214,38 @@ class LLMService:
         max_tokens: int = 2048,
         system: str | None = None,
     ) -> str:
-        """メッセージを送信してテキスト応答を取得"""
-        return await self.router.chat(messages, model, max_tokens, system)
+        """メッセージを送信してテキスト応答を取得
+
+        同時に実行中の同一リクエストとは上流の呼び出しを共有する。
+        合流先の結果待ちを含め、リクエストの期限を超えた場合は打ち切る。
+        """
+        key = request_coalescer.make_key("chat", messages, model, max_tokens, system)
+        async with deadline_scope("chat"), self._quota_reservation():
+            return await request_coalescer.run(
+                key,
+                lambda: self._admitted(
+                    lambda: self.router.chat(messages, model, max_tokens, system)
+                ),
+            )
+
+    async def chat_stream(
+        self,
+        messages: list[dict],
+        model: str = "haiku",
+        max_tokens: int = 2048,
+        system: str | None = None,
+    ) -> AsyncIterator[str]:
+        """メッセージを送信してテキスト応答を逐次取得（ストリーミング）"""
+        async with (
+            self._quota_reservation(),
+            admission_controller.admit(),
+            # 呼び出し元が読み出しを打ち切った場合もルーターのストリームを確実に閉じる
+            aclosing(
+                self.router.chat_stream(messages, model, max_tokens, system)
+            ) as stream,
+        ):
+            async for chunk in stream:
+                yield chunk
 
     async def chat_json(
         self,
@@ -118,9 +253,46 @@ class LLMService:
         model: str = "haiku",
         max_tokens: int = 2048,
         system: str | None = None,
+        cache_namespace: str | None = None,
+        cache_ttl: int | None = None,
     ) -> dict:
-        """メッセージを送信してJSON応答を取得・パース"""
-        return await self.router.chat_json(messages, model, max_tokens, system)
+        """メッセージを送信してJSON応答を取得・パース
+
+        Args:
+            cache_namespace: 指定時は応答キャッシュを利用（メトリクスの集計単位）。
+                ユーザー固有の情報を含まない決定的な生成リクエストでのみ指定する。
+            cache_ttl: キャッシュのTTL（秒）。未指定時は設定値
+
+        キャッシュミス時も、同時に実行中の同一リクエストとは上流の呼び出しを共有する。
+        """
+        coalescing_key = request_coalescer.make_key(
+            "chat_json", messages, model, max_tokens, system
+        )
+        if cache_namespace is None:
+            async with deadline_scope("chat_json"), self._quota_reservation():
+                return await request_coalescer.run(
+                    coalescing_key,
+                    lambda: self._admitted(
+                        lambda: self.router.chat_json(
+                            messages, model, max_tokens, system
+                        )
+                    ),
+                )
+
+        key = self.response_cache.make_key(messages, model, max_tokens, system)
+        cached = await self.response_cache.get(key, cache_namespace)
+        if cached is not None:
+            return cached
+
+        async def generate() -> dict:
+            result = await self._admitted(
+                lambda: self.router.chat_json(messages, model, max_tokens, system)
+            )
+            await self.response_cache.set(key, result, cache_ttl)
+            return result
+
+        async with deadline_scope("chat_json"), self._quota_reservation():
+            return await request_coalescer.run(coalescing_key, generate)
 
     async def get_usage_info(
         self,
@@ -130,7 +302,10 @@ class LLMService:
         system: str | None = None,
     ) -> dict:
         """メッセージを送信してレスポンスとトークン使用量を返す"""
-        return await self.router.get_usage_info(messages, model, max_tokens, system)
+        async with deadline_scope("get_usage_info"):
+            return await self._with_quota(
+                lambda: self.router.get_usage_info(messages, model, max_tokens, system)
+            )
 
 
 def get_llm_service() -> LLMService:
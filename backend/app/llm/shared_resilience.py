@@ -0,0 +1,177 @@
+"""LLMレジリエンス機能のクラスタ共有版 - Redisでワーカー間の状態を共有
+
+gunicorn の複数ワーカーが同じサーキットブレーカー状態とレートリミットを参照する。
+- SharedCircuitBreaker: 状態をRedisハッシュに保持し、あるワーカーが検知した障害を全ワーカーに反映
+- SharedRateLimiter: Luaスクリプトによるアトミックな token bucket（全ワーカー合計でrpmを守る）
+
+Redis未接続時・Redisエラー時は継承元のインメモリ実装にフォールバックする。
+"""
+
+import asyncio
+import logging
+import time
+
+from app.llm.resilience import CircuitBreaker, RateLimiter
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "llm"
+
+# token bucket（予約方式）: トークンが足りない場合も1つ予約し、補充までの待機秒数を返す
+# 時刻はRedisサーバーの TIME を使用し、ワーカー間の時計のずれの影響を受けない
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - 1
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+if tokens >= 0 then
+    return '0'
+end
+return tostring(-tokens / rate)
+"""
+
+
+class SharedCircuitBreaker(CircuitBreaker):
+    """Redis共有サーキットブレーカー
+
+    状態は ``llm:cb:{name}`` ハッシュ（state, failures, opened_at）に保持する。
+    open 状態で recovery_timeout が経過した後は、``llm:cb:{name}:probe`` を
+    SET NX で取得した1ワーカーのみが試行する（half_open）。
+    インスタンスの state / failure_count は直近に観測した共有状態を反映する。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 60.0,
+    ):
+        """
+        Args:
+            name: 共有キーに使う名前（プロバイダー名）
+            failure_threshold: オープン状態に遷移する連続失敗回数
+            recovery_timeout: オープン状態からハーフオープンに遷移するまでの秒数
+        """
+        super().__init__(failure_threshold, recovery_timeout)
+        self.name = name
+        self._key = f"{KEY_PREFIX}:cb:{name}"
+        self._probe_key = f"{self._key}:probe"
+        # 状態キーは障害が続かなければ自然に消える
+        self._ttl = max(int(recovery_timeout * 10), 600)
+
+    async def allow_request(self) -> bool:
+        redis_client = get_redis()
+        if redis_client is None:
+            return self.can_execute()
+        try:
+            state, failures, opened_at = await redis_client.hmget(
+                self._key, "state", "failures", "opened_at"
+            )
+            self.failure_count = int(failures or 0)
+            if state != "open":
+                self.state = "closed"
+                return True
+
+            self.state = "open"
+            if time.time() - float(opened_at or 0) < self.recovery_timeout:
+                return False
+            # 回復待ちが経過: 1ワーカーだけが試行する
+            acquired = await redis_client.set(
+                self._probe_key, "1", ex=max(int(self.recovery_timeout), 1), nx=True
+            )
+            if acquired:
+                self.state = "half_open"
+                logger.info("SharedCircuitBreaker(%s): ハーフオープン試行", self.name)
+            return bool(acquired)
+        except Exception as e:
+            logger.warning("共有サーキットブレーカー参照失敗（ローカルで判定）: %s", e)
+            return self.can_execute()
+
+    async def on_success(self) -> None:
+        self.record_success()
+        redis_client = get_redis()
+        if redis_client is None:
+            return
+        try:
+            pipe = redis_client.pipeline()
+            pipe.hset(self._key, mapping={"state": "closed", "failures": 0})
+            pipe.expire(self._key, self._ttl)
+            pipe.delete(self._probe_key)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("共有サーキットブレーカー更新失敗: %s", e)
+
+    async def on_failure(self) -> None:
+        redis_client = get_redis()
+        if redis_client is None:
+            self.record_failure()
+            return
+        try:
+            pipe = redis_client.pipeline()
+            pipe.hincrby(self._key, "failures", 1)
+            pipe.expire(self._key, self._ttl)
+            failures = (await pipe.execute())[0]
+            self.failure_count = failures
+            self.last_failure_time = time.monotonic()
+            if failures >= self.failure_threshold:
+                # half_open の試行失敗時も opened_at を更新して再度オープンにする
+                pipe = redis_client.pipeline()
+                pipe.hset(
+                    self._key, mapping={"state": "open", "opened_at": time.time()}
+                )
+                pipe.delete(self._probe_key)
+                await pipe.execute()
+                if self.state != "open":
+                    logger.warning(
+                        "SharedCircuitBreaker(%s): オープン状態に遷移 (連続失敗=%d)",
+                        self.name,
+                        failures,
+                    )
+                self.state = "open"
+        except Exception as e:
+            logger.warning("共有サーキットブレーカー更新失敗（ローカルに記録）: %s", e)
+            self.record_failure()
+
+
+class SharedRateLimiter(RateLimiter):
+    """Redis共有レートリミッター - 全ワーカー合計で requests_per_minute を守る"""
+
+    def __init__(self, requests_per_minute: int = 60, name: str = "default"):
+        """
+        Args:
+            requests_per_minute: クラスタ全体での1分あたりの最大リクエスト数
+            name: 共有キーに使う名前
+        """
+        super().__init__(requests_per_minute)
+        self._key = f"{KEY_PREFIX}:ratelimit:{name}"
+
+    async def acquire(self) -> None:
+        """トークンを1つ取得（共有バケットが空の場合は予約した順番まで待機）"""
+        redis_client = get_redis()
+        if redis_client is None:
+            await super().acquire()
+            return
+        try:
+            script = redis_client.register_script(TOKEN_BUCKET_LUA)
+            wait_time = float(
+                await script(keys=[self._key], args=[self.max_tokens, self.refill_rate])
+            )
+        except Exception as e:
+            logger.warning("共有レートリミット参照失敗（ローカルで制限）: %s", e)
+            await super().acquire()
+            return
+
+        if wait_time > 0:
+            logger.debug("共有レートリミット: %.2f秒待機", wait_time)
+            await asyncio.sleep(wait_time)
@@ -0,0 +1,73 @@
+"""LLMトークン使用量のキャプチャ
+
+プロバイダーは API 応答を受け取るたびに report_usage() でトークン数を報告し、
+ルーターは capture_usage() で1回の呼び出し分の使用量を集計する。
+ContextVar ベースのため、並行するリクエスト間で使用量が混ざらない。
+
+利用ユーザーと契約プランは認証依存関係（get_current_user）が set_usage_user() で設定する。
+"""
+
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+
+@dataclass
+class UsageCapture:
+    """1回のLLM呼び出しで消費したトークン数"""
+
+    input_tokens: int = 0
+    output_tokens: int = 0
+    model: str | None = None
+
+
+_current_capture: ContextVar[UsageCapture | None] = ContextVar(
+    "llm_usage_capture", default=None
+)
+_usage_user_id: ContextVar[uuid.UUID | None] = ContextVar(
+    "llm_usage_user_id", default=None
+)
+_usage_plan: ContextVar[str | None] = ContextVar("llm_usage_plan", default=None)
+
+
+def report_usage(input_tokens: int, output_tokens: int, model: str) -> None:
+    """プロバイダーからトークン使用量を報告（キャプチャ外では何もしない）"""
+    capture = _current_capture.get()
+    if capture is None:
+        return
+    capture.input_tokens += input_tokens
+    capture.output_tokens += output_tokens
+    capture.model = model
+
+
+@contextmanager
+def capture_usage(capture: UsageCapture | None = None) -> Iterator[UsageCapture]:
+    """ブロック内で報告されたトークン使用量を集計する
+
+    Args:
+        capture: 集計先（ストリームのように複数のブロックにまたがって集計する場合に渡す）
+    """
+    capture = capture or UsageCapture()
+    token = _current_capture.set(capture)
+    try:
+        yield capture
+    finally:
+        _current_capture.reset(token)
+
+
+def set_usage_user(user_id: uuid.UUID | None, plan: str | None = None) -> None:
+    """現在のリクエストの利用ユーザーと契約プランを設定"""
+    _usage_user_id.set(user_id)
+    _usage_plan.set(plan)
+
+
+def get_usage_user() -> uuid.UUID | None:
+    """現在のリクエストの利用ユーザーを取得（バックグラウンド処理ではNone）"""
+    return _usage_user_id.get()
+
+
+def get_usage_plan() -> str | None:
+    """現在のリクエストの利用ユーザーの契約プランを取得"""
+    return _usage_plan.get()
@@ -1,3 +1,5 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
@@ -6,12 +8,18 @@ from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
 from app.database import engine
 from app.keyvault import load_secrets_from_keyvault
+from app.llm.http_pool import close_http_clients, init_http_clients
 from app.logging_config import setup_logging
+from app.middleware.deadline import DeadlineMiddleware
 from app.middleware.error_handler import register_error_handlers
 from app.middleware.logging_middleware import RequestLoggingMiddleware
 from app.middleware.rate_limiter import RateLimitMiddleware
 from app.middleware.security_headers import SecurityHeadersMiddleware
 from app.redis_client import close_redis, init_redis
+from app.services.content_pool import content_pool_service
+from app.services.quota_service import quota_service
+from app.services.speech_client import speech_client
+from app.services.usage_recorder import usage_recorder
 from app.monitoring import init_monitoring
 from app.routers import (
     analytics,
@@ -40,7 +48,28 @@ async def lifespan(app: FastAPI):
     setup_logging()
     init_monitoring()
     await init_redis()
+    init_http_clients()
+    speech_client.start()
+    usage_recorder.start()
+    quota_reconciler = (
+        asyncio.create_task(quota_service.run_reconciler())
+        if settings.quota_enabled
+        else None
+    )
+    pool_worker = (
+        asyncio.create_task(content_pool_service.run_worker())
+        if settings.content_pool_enabled
+        else None
+    )
     yield
+    for task in (pool_worker, quota_reconciler):
+        if task is not None:
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+    await usage_recorder.stop()
+    await close_http_clients()
+    await speech_client.close()
     await close_redis()
     await engine.dispose()
 
@@ -57,8 +86,15 @@ app.add_middleware(
     allow_origins=settings.cors_origins_list,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type", "X-Request-ID", "Accept"],
+    allow_headers=[
+        "Authorization",
+        "Content-Type",
+        "X-Request-ID",
+        "X-Request-Deadline",
+        "Accept",
+    ],
 )
+app.add_middleware(DeadlineMiddleware)
 app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(RateLimitMiddleware)
 app.add_middleware(RequestLoggingMiddleware)
@@ -0,0 +1,59 @@
+"""リクエスト期限ミドルウェア - X-Request-Deadline とエンドポイント既定値から期限を設定
+
+クライアントは X-Request-Deadline ヘッダーに応答を待てる期限（Unixエポックミリ秒）を指定できる。
+ヘッダーがない場合、またはヘッダーの期限がエンドポイントの既定値より遅い場合は既定値を使う。
+到着時点で期限を過ぎているリクエストは処理せずに 504 を返す。
+
+設定した期限は app.llm.deadline の ContextVar を通じて LLM 呼び出しに伝播する。
+"""
+
+import structlog
+from fastapi.responses import JSONResponse
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+
+from app.config import settings
+from app.exceptions import DeadlineExceededError
+from app.llm.deadline import parse_deadline_header, request_deadline
+
+logger = structlog.get_logger()
+
+DEADLINE_HEADER = "X-Request-Deadline"
+
+
+def default_deadline_for(path: str) -> float | None:
+    """パスに対応する既定の期限（秒）を返す（最長一致、0以下は期限なし）"""
+    seconds = settings.request_deadline_seconds
+    matched = ""
+    for prefix, override in settings.request_deadline_overrides_map.items():
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            matched, seconds = prefix, override
+    return seconds if seconds > 0 else None
+
+
+class DeadlineMiddleware(BaseHTTPMiddleware):
+    """リクエストごとの処理期限を設定"""
+
+    async def dispatch(self, request: Request, call_next):
+        budget = default_deadline_for(request.url.path)
+
+        client_budget = parse_deadline_header(request.headers.get(DEADLINE_HEADER))
+        if client_budget is not None:
+            if client_budget <= 0:
+                # クライアントは既に応答を待っていない
+                exc = DeadlineExceededError("request", -client_budget)
+                logger.warning("request_deadline_already_passed", details=exc.details)
+                return JSONResponse(
+                    status_code=exc.status_code,
+                    content={
+                        "error": {
+                            "code": exc.error_code,
+                            "message": exc.message,
+                            "details": exc.details,
+                        }
+                    },
+                )
+            budget = client_budget if budget is None else min(budget, client_budget)
+
+        with request_deadline(budget):
+            return await call_next(request)
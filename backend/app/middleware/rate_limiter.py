@@ -13,6 +13,7 @@ from starlette.requests import Request
 from starlette.responses import Response
 
 from app.config import settings
+from app.dependencies import peek_token_claims
 from app.redis_client import get_redis
 
 logger = structlog.get_logger()
@@ -74,23 +75,14 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         return response
 
     def _identify_client(self, request: Request) -> tuple[str, int]:
-        """クライアント識別キーとレート制限値を決定"""
-        auth_header = request.headers.get("Authorization", "")
-        if auth_header.startswith("Bearer "):
-            try:
-                from jose import jwt as jose_jwt
-
-                token = auth_header[7:]
-                payload = jose_jwt.decode(
-                    token,
-                    settings.jwt_secret_key,
-                    algorithms=[settings.jwt_algorithm],
-                    options={"verify_exp": False},
-                )
-                user_id = payload.get("sub", "unknown")
-                return f"rate:user:{user_id}", settings.rate_limit_authenticated
-            except Exception:
-                pass
+        """クライアント識別キーとレート制限値を決定
+
+        デコード済みクレームは request.state に保持され、認証依存関係で再利用される。
+        """
+        payload = peek_token_claims(request)
+        if payload is not None:
+            user_id = payload.get("sub", "unknown")
+            return f"rate:user:{user_id}", settings.rate_limit_authenticated
 
         client_ip = request.client.host if request.client else "unknown"
         return f"rate:ip:{client_ip}", settings.rate_limit_unauthenticated
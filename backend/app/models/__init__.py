@@ -7,7 +7,7 @@ from app.models.conversation import ConversationMessage, ConversationSession
 from app.models.pattern import PatternMastery
 from app.models.review import ReviewItem
 from app.models.sound_pattern import SoundPatternMastery
-from app.models.stats import DailyStat
+from app.models.stats import DailyStat, StatRollup
 from app.models.subscription import Subscription
 from app.models.user import User
 
@@ -17,6 +17,7 @@ __all__ = [
     "ConversationMessage",
     "ReviewItem",
     "DailyStat",
+    "StatRollup",
     "ApiUsageLog",
     "PatternMastery",
     "SoundPatternMastery",
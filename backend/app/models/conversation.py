@@ -34,6 +34,12 @@ class ConversationSession(Base):
     api_tokens_used: Mapped[int | None] = mapped_column(
         Integer, nullable=True, default=0
     )
+    # 古いターンのローリング要約（直近ターン以前のメッセージを畳み込んだもの）
+    context_summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # 要約に畳み込み済みのメッセージ数（user/assistant のみ、作成順の先頭から）
+    summarized_message_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
@@ -43,7 +49,7 @@ class ConversationSession(Base):
     messages: Mapped[list["ConversationMessage"]] = relationship(
         "ConversationMessage",
         back_populates="session",
-        lazy="selectin",
+        lazy="raise",
         cascade="all, delete-orphan",
         order_by="ConversationMessage.created_at",
     )
@@ -1,9 +1,18 @@
-"""学習統計モデル - 日次パフォーマンスデータの蓄積"""
+"""学習統計モデル - 日次パフォーマンスデータの蓄積と週次・月次ロールアップ"""
 
 import uuid
-from datetime import date
+from datetime import date, datetime
 
-from sqlalchemy import Date, Float, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy import (
+    DateTime,
+    Date,
+    Float,
+    ForeignKey,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -42,3 +51,56 @@ class DailyStat(Base):
 
     def __repr__(self) -> str:
         return f"<DailyStat user={self.user_id} date={self.date}>"
+
+
+class StatRollup(Base):
+    """期間集計テーブル - 日次統計の週次（月曜起点）・月次ロールアップ
+
+    curriculum_service.update_curriculum が日次統計を書き込む際に増分更新され、
+    レポートは期間ごとに1行を読むだけで集計値を得られる。
+    days には期間内の日別スナップショット（ISO日付 -> 日次統計の値）を保持する。
+    """
+
+    __tablename__ = "stat_rollups"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id",
+            "period_type",
+            "period_start",
+            name="uq_stat_rollups_user_period",
+        ),
+    )
+
+    id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False, index=True
+    )
+    period_type: Mapped[str] = mapped_column(
+        String(10), nullable=False, comment="集計期間: week, month"
+    )
+    period_start: Mapped[date] = mapped_column(Date, nullable=False)
+    practice_minutes: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sessions_completed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    reviews_completed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    new_expressions_learned: Mapped[int] = mapped_column(
+        Integer, default=0, nullable=False
+    )
+    active_days: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    grammar_accuracy_avg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    grammar_accuracy_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    pronunciation_avg: Mapped[float | None] = mapped_column(Float, nullable=True)
+    listening_speed_max: Mapped[float | None] = mapped_column(Float, nullable=True)
+    days: Mapped[dict] = mapped_column(JSONB, default=dict, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
+
+    def __repr__(self) -> str:
+        return (
+            f"<StatRollup user={self.user_id} {self.period_type}={self.period_start}>"
+        )
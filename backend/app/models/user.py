@@ -48,21 +48,21 @@ class User(Base):
         nullable=False,
     )
 
-    # リレーション
+    # リレーション（履歴が大きいため暗黙ロードは禁止し、必要な箇所で明示的にロードする）
     conversation_sessions: Mapped[list["ConversationSession"]] = relationship(
-        "ConversationSession", back_populates="user", lazy="selectin"
+        "ConversationSession", back_populates="user", lazy="raise"
     )
     review_items: Mapped[list["ReviewItem"]] = relationship(
-        "ReviewItem", back_populates="user", lazy="selectin"
+        "ReviewItem", back_populates="user", lazy="raise"
     )
     daily_stats: Mapped[list["DailyStat"]] = relationship(
-        "DailyStat", back_populates="user", lazy="selectin"
+        "DailyStat", back_populates="user", lazy="raise"
     )
     api_usage_logs: Mapped[list["ApiUsageLog"]] = relationship(
-        "ApiUsageLog", back_populates="user", lazy="selectin"
+        "ApiUsageLog", back_populates="user", lazy="raise"
     )
     subscription: Mapped["Subscription | None"] = relationship(
-        "Subscription", back_populates="user", uselist=False, lazy="selectin"
+        "Subscription", back_populates="user", uselist=False, lazy="raise"
     )
 
     def __repr__(self) -> str:
@@ -0,0 +1,147 @@
+"""認証プリンシパルキャッシュ - get_current_user のDB参照を省略する2段キャッシュ
+
+1段目: プロセス内LRU（短TTL、ワーカー間で無効化は伝播しないため数秒のみ保持）
+2段目: Redis（全ワーカー共有、ユーザー単位で無効化可能）
+
+キーはトークンの sub（ユーザーID）と iat（発行時刻）。
+プロフィール・サブスクリプション変更時は invalidate_user() でユーザーの全エントリを削除する。
+Redis未接続時はプロセス内LRUのみで動作する。
+"""
+
+import time
+import uuid
+from collections import OrderedDict
+
+import structlog
+
+from app.config import settings
+from app.redis_client import get_redis
+from app.schemas.auth import CurrentUser
+
+logger = structlog.get_logger()
+
+KEY_PREFIX = "principal"
+
+
+class PrincipalCache:
+    """認証済みプリンシパルのプロセス内LRU + Redisキャッシュ"""
+
+    def __init__(
+        self,
+        ttl_seconds: int | None = None,
+        local_ttl_seconds: float | None = None,
+        local_max_entries: int | None = None,
+    ):
+        """
+        Args:
+            ttl_seconds: RedisエントリのTTL（秒）
+            local_ttl_seconds: プロセス内LRUエントリのTTL（秒）
+            local_max_entries: プロセス内LRUの最大エントリ数
+        """
+        self.ttl_seconds = ttl_seconds or settings.principal_cache_ttl_seconds
+        self.local_ttl_seconds = (
+            local_ttl_seconds or settings.principal_cache_local_ttl_seconds
+        )
+        self.local_max_entries = (
+            local_max_entries or settings.principal_cache_local_max_entries
+        )
+        # (user_id, iat) -> (有効期限[monotonic], プリンシパル)
+        self._local: OrderedDict[tuple[str, str], tuple[float, CurrentUser]] = (
+            OrderedDict()
+        )
+
+    @staticmethod
+    def _redis_key(user_id: str, iat: str) -> str:
+        return f"{KEY_PREFIX}:{user_id}:{iat}"
+
+    @staticmethod
+    def _index_key(user_id: str) -> str:
+        """ユーザーごとのキャッシュキー集合（無効化用）"""
+        return f"{KEY_PREFIX}:index:{user_id}"
+
+    async def get(
+        self, user_id: uuid.UUID, iat: int | float | None
+    ) -> CurrentUser | None:
+        """キャッシュからプリンシパルを取得（ミス時はNone）"""
+        key = (str(user_id), str(iat))
+
+        entry = self._local.get(key)
+        if entry is not None:
+            expires_at, principal = entry
+            if expires_at > time.monotonic():
+                self._local.move_to_end(key)
+                return principal
+            del self._local[key]
+
+        redis_client = get_redis()
+        if redis_client is None:
+            return None
+
+        try:
+            raw = await redis_client.get(self._redis_key(*key))
+        except Exception as e:
+            logger.warning("principal_cache_get_failed", error=str(e))
+            return None
+        if raw is None:
+            return None
+
+        principal = CurrentUser.model_validate_json(raw)
+        self._set_local(key, principal)
+        return principal
+
+    async def set(
+        self,
+        user_id: uuid.UUID,
+        iat: int | float | None,
+        principal: CurrentUser,
+    ) -> None:
+        """プリンシパルをキャッシュに保存"""
+        key = (str(user_id), str(iat))
+        self._set_local(key, principal)
+
+        redis_client = get_redis()
+        if redis_client is None:
+            return
+
+        try:
+            redis_key = self._redis_key(*key)
+            index_key = self._index_key(key[0])
+            pipe = redis_client.pipeline()
+            pipe.set(redis_key, principal.model_dump_json(), ex=self.ttl_seconds)
+            pipe.sadd(index_key, redis_key)
+            pipe.expire(index_key, self.ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("principal_cache_set_failed", error=str(e))
+
+    async def invalidate_user(self, user_id: uuid.UUID) -> None:
+        """ユーザーの全キャッシュエントリを削除（プロフィール・プラン変更時に呼ぶ）"""
+        user_key = str(user_id)
+        for key in [k for k in self._local if k[0] == user_key]:
+            del self._local[key]
+
+        redis_client = get_redis()
+        if redis_client is None:
+            return
+
+        try:
+            index_key = self._index_key(user_key)
+            keys = await redis_client.smembers(index_key)
+            await redis_client.delete(index_key, *keys)
+            logger.info("principal_cache_invalidated", user_id=user_key)
+        except Exception as e:
+            logger.warning("principal_cache_invalidate_failed", error=str(e))
+
+    def clear_local(self) -> None:
+        """プロセス内LRUを全削除"""
+        self._local.clear()
+
+    def _set_local(self, key: tuple[str, str], principal: CurrentUser) -> None:
+        self._local[key] = (time.monotonic() + self.local_ttl_seconds, principal)
+        self._local.move_to_end(key)
+        while len(self._local) > self.local_max_entries:
+            self._local.popitem(last=False)
+
+
+# シングルトンインスタンス
+principal_cache = PrincipalCache()
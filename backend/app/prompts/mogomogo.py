@@ -2,8 +2,12 @@
 
 リスニング力を伸ばすための音声変化パターン（リンキング、リダクション、
 フラッピング、削除、弱形）の練習問題生成・評価用プロンプト。
+
+生成プロンプトは共通指示を静的プレフィックス、対象レベルとパターン例を動的サフィックスとする
+SystemPrompt を返す（プロバイダー側プロンプトキャッシュ用）。
 """
 
+from app.llm.prompt_cache import SystemPrompt
 
 # --- 音声変化パターンデータベース ---
 
@@ -675,10 +679,46 @@ SOUND_PATTERN_DATABASE: dict = {
 }
 
 
+# エクササイズ生成の共通指示（プロンプトキャッシュの静的プレフィックス）
+MOGOMOGO_GENERATION_INSTRUCTIONS = """You are a Connected Speech exercise generator for FluentEdge AI's "Mogomogo English" module.
+Your task is to create listening exercises that help Japanese learners recognize natural English sound changes.
+The target level and the sound change patterns to focus on are given in the Request section below.
+
+## Exercise Design Rules
+
+1. Each exercise must clearly demonstrate ONE primary sound change pattern
+2. Include the full sentence context (not just the changed phrase)
+3. Provide accurate IPA for both the formal and natural pronunciations
+4. The practice_sentence should be a natural business English sentence containing the pattern
+5. Explanations should be clear and helpful for Japanese speakers
+6. audio_text is the sentence to be read aloud with the sound change applied
+
+## Output Format
+Return ONLY a JSON array:
+[
+    {
+        "exercise_id": "unique-id",
+        "pattern_type": "linking|reduction|flapping|deletion|weak_form",
+        "audio_text": "The sentence with the sound change",
+        "ipa_original": "/formal IPA/",
+        "ipa_modified": "/natural IPA/",
+        "explanation": "Clear explanation of the sound change for Japanese learners",
+        "practice_sentence": "A practice sentence containing this pattern",
+        "difficulty": "the target CEFR level"
+    }
+]
+
+## Rules
+- Generate exactly the requested number of exercises
+- Use business English context where possible
+- Explanations should reference how this differs from Japanese phonology
+- Return ONLY valid JSON, no markdown formatting"""
+
+
 def build_mogomogo_generation_prompt(
     pattern_types: list[str],
     level: str = "B2",
-) -> str:
+) -> SystemPrompt:
     """
     もごもごエクササイズ生成用のシステムプロンプトを構築
 
@@ -687,7 +727,7 @@ def build_mogomogo_generation_prompt(
         level: ユーザーのCEFRレベル
 
     Returns:
-        システムプロンプト文字列
+        システムプロンプト（共通指示 + 対象レベル・パターン）
     """
     # パターンごとの例を集約
     pattern_sections = []
@@ -716,45 +756,16 @@ def build_mogomogo_generation_prompt(
 
     guidance = level_guidance.get(level, level_guidance["B2"])
 
-    return f"""You are a Connected Speech exercise generator for FluentEdge AI's "Mogomogo English" module.
-Your task is to create listening exercises that help Japanese learners recognize natural English sound changes.
+    request = f"""## Request
 
-## Target Level: CEFR {level}
+### Target Level: CEFR {level}
 {guidance}
 
-## Sound Change Patterns to Focus On
+### Sound Change Patterns to Focus On
 
-{patterns_block}
-
-## Exercise Design Rules
-
-1. Each exercise must clearly demonstrate ONE primary sound change pattern
-2. Include the full sentence context (not just the changed phrase)
-3. Provide accurate IPA for both the formal and natural pronunciations
-4. The practice_sentence should be a natural business English sentence containing the pattern
-5. Explanations should be clear and helpful for Japanese speakers
-6. audio_text is the sentence to be read aloud with the sound change applied
-
-## Output Format
-Return ONLY a JSON array:
-[
-    {{
-        "exercise_id": "unique-id",
-        "pattern_type": "linking|reduction|flapping|deletion|weak_form",
-        "audio_text": "The sentence with the sound change",
-        "ipa_original": "/formal IPA/",
-        "ipa_modified": "/natural IPA/",
-        "explanation": "Clear explanation of the sound change for Japanese learners",
-        "practice_sentence": "A practice sentence containing this pattern",
-        "difficulty": "{level}"
-    }}
-]
+{patterns_block}"""
 
-## Rules
-- Generate exactly the requested number of exercises
-- Use business English context where possible
-- Explanations should reference how this differs from Japanese phonology
-- Return ONLY valid JSON, no markdown formatting"""
+    return SystemPrompt(MOGOMOGO_GENERATION_INSTRUCTIONS, request)
 
 
 def build_dictation_check_prompt() -> str:
@@ -2,14 +2,62 @@
 
 ビジネス英語パターンの生成・評価用プロンプトと
 初期パターンデータベース（200+パターン）。
+
+生成プロンプトは共通指示を静的プレフィックス、カテゴリ・レベル・弱点を動的サフィックスとする
+SystemPrompt を返す（プロバイダー側プロンプトキャッシュ用）。
 """
 
+from app.llm.prompt_cache import SystemPrompt
+
+# エクササイズ生成の共通指示（プロンプトキャッシュの静的プレフィックス）
+PATTERN_GENERATION_INSTRUCTIONS = """You are a Business English pattern drill generator for FluentEdge AI.
+
+## Task
+Generate pattern practice exercises for Japanese business professionals learning English.
+Each exercise should focus on a specific business English pattern or expression.
+The target level, category, and the user's weak areas are given in the Request section below.
+
+## Exercise Design
+
+### Types of Exercises
+1. **Fill-in-the-blank**: Provide a sentence with a blank for the key pattern element
+2. **Complete the pattern**: Provide a pattern template and ask user to create a full sentence
+3. **Transform**: Provide a casual version and ask for the business-appropriate version
+
+### Requirements
+- Each exercise must focus on a practical, high-frequency business pattern
+- Include natural Japanese translations as hints
+- Patterns should be immediately usable in real business situations
+- Vary between formal and semi-formal registers
+- Progress from simpler to more complex patterns within the set
+
+## Output Format
+Return ONLY a JSON array of exercises:
+[
+    {
+        "pattern_id": "cat-001",
+        "pattern_template": "I would like to ___ the meeting.",
+        "example_sentence": "I would like to adjourn the meeting until tomorrow.",
+        "japanese_hint": "会議を___したいのですが。（例：明日まで延期）",
+        "category": "the requested category",
+        "difficulty": "the target CEFR level",
+        "fill_in_blank": true
+    }
+]
+
+## Rules
+- Generate exactly the number of exercises requested
+- pattern_id format: category abbreviation + 3-digit number (e.g., "mtg-001")
+- Each pattern should be distinct and commonly used in business
+- Japanese hints should clarify meaning without giving away the English answer
+- Return ONLY valid JSON, no markdown formatting"""
+
 
 def build_pattern_generation_prompt(
     category: str,
     level: str = "B2",
     weak_patterns: list[str] | None = None,
-) -> str:
+) -> SystemPrompt:
     """
     パターン練習エクササイズ生成用のシステムプロンプトを構築
 
@@ -19,7 +67,7 @@ def build_pattern_generation_prompt(
         weak_patterns: ユーザーの弱点パターンリスト
 
     Returns:
-        システムプロンプト文字列
+        システムプロンプト（共通指示 + カテゴリ・レベル・弱点）
     """
     category_guidance = {
         "meeting": "Focus on meeting facilitation, agenda management, decision making, and action item assignment.",
@@ -36,57 +84,19 @@ def build_pattern_generation_prompt(
     if weak_patterns:
         patterns_str = ", ".join(weak_patterns)
         weak_pattern_note = f"""
-## User's Weak Areas
+### User's Weak Areas
 The user has struggled with these patterns recently: {patterns_str}
 Please include exercises that specifically target these weak areas to reinforce learning.
 """
 
-    return f"""You are a Business English pattern drill generator for FluentEdge AI.
-
-## Task
-Generate pattern practice exercises for Japanese business professionals learning English.
-Each exercise should focus on a specific business English pattern or expression.
+    request = f"""## Request
 
-## Target Level: CEFR {level}
-## Category: {category}
+### Target Level: CEFR {level}
+### Category: {category}
 {guidance}
+{weak_pattern_note}"""
 
-{weak_pattern_note}
-
-## Exercise Design
-
-### Types of Exercises
-1. **Fill-in-the-blank**: Provide a sentence with a blank for the key pattern element
-2. **Complete the pattern**: Provide a pattern template and ask user to create a full sentence
-3. **Transform**: Provide a casual version and ask for the business-appropriate version
-
-### Requirements
-- Each exercise must focus on a practical, high-frequency business pattern
-- Include natural Japanese translations as hints
-- Patterns should be immediately usable in real business situations
-- Vary between formal and semi-formal registers
-- Progress from simpler to more complex patterns within the set
-
-## Output Format
-Return ONLY a JSON array of exercises:
-[
-    {{
-        "pattern_id": "cat-001",
-        "pattern_template": "I would like to ___ the meeting.",
-        "example_sentence": "I would like to adjourn the meeting until tomorrow.",
-        "japanese_hint": "会議を___したいのですが。（例：明日まで延期）",
-        "category": "{category}",
-        "difficulty": "{level}",
-        "fill_in_blank": true
-    }}
-]
-
-## Rules
-- Generate exactly the number of exercises requested
-- pattern_id format: category abbreviation + 3-digit number (e.g., "mtg-001")
-- Each pattern should be distinct and commonly used in business
-- Japanese hints should clarify meaning without giving away the English answer
-- Return ONLY valid JSON, no markdown formatting"""
+    return SystemPrompt(PATTERN_GENERATION_INSTRUCTIONS, request.rstrip())
 
 
 def build_pattern_check_prompt() -> str:
@@ -12,7 +12,7 @@ from app.dependencies import get_current_user
 from app.models.conversation import ConversationSession
 from app.models.review import ReviewItem
 from app.models.stats import DailyStat
-from app.models.user import User
+from app.schemas.auth import CurrentUser
 
 router = APIRouter()
 
@@ -33,7 +33,7 @@ class DashboardResponse(BaseModel):
 
 @router.get("/dashboard", response_model=DashboardResponse)
 async def get_dashboard(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -10,7 +10,6 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
 from app.schemas.analytics import (
     DailyMenu,
     FocusArea,
@@ -20,6 +19,7 @@ from app.schemas.analytics import (
     SkillBreakdown,
     WeeklyReport,
 )
+from app.schemas.auth import CurrentUser
 from app.services.analytics_service import analytics_service
 from app.services.curriculum_service import curriculum_service
 
@@ -28,7 +28,7 @@ router = APIRouter()
 
 @router.get("/weekly-report", response_model=WeeklyReport)
 async def get_weekly_report(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -45,7 +45,7 @@ async def get_weekly_report(
 
 @router.get("/monthly-report", response_model=MonthlyReport)
 async def get_monthly_report(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -62,7 +62,7 @@ async def get_monthly_report(
 
 @router.get("/skills", response_model=SkillBreakdown)
 async def get_skill_breakdown(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -79,7 +79,7 @@ async def get_skill_breakdown(
 
 @router.get("/pronunciation-progress", response_model=PronunciationProgress)
 async def get_pronunciation_progress(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -96,7 +96,7 @@ async def get_pronunciation_progress(
 
 @router.get("/recommendations", response_model=list[Recommendation])
 async def get_recommendations(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -111,7 +111,7 @@ async def get_recommendations(
 
 @router.get("/daily-menu", response_model=DailyMenu)
 async def get_daily_menu(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -130,7 +130,7 @@ async def get_daily_menu(
 
 @router.get("/focus-areas", response_model=list[FocusArea])
 async def get_focus_areas(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -13,7 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.review import ReviewItem
-from app.models.user import User
+from app.schemas.auth import CurrentUser
 from app.schemas.comprehension import (
     ComprehensionAnswerRequest,
     ComprehensionHistory,
@@ -31,7 +31,7 @@ router = APIRouter()
 
 @router.get("/material", response_model=ComprehensionMaterial)
 async def generate_listening_material(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     topic: str = Query(
         default="Quarterly business review presentation",
         description="リスニング素材のトピック",
@@ -88,7 +88,7 @@ async def generate_listening_material(
 
 @router.get("/material/questions", response_model=list[ComprehensionQuestion])
 async def generate_questions(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     text: str = Query(description="理解度テストの対象テキスト"),
     count: int = Query(default=5, ge=1, le=10, description="問題数"),
 ):
@@ -106,7 +106,7 @@ async def generate_questions(
 
 @router.get("/topics", response_model=list[dict])
 async def get_available_topics(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     利用可能なビジネストピック一覧を取得
@@ -120,7 +120,7 @@ async def get_available_topics(
 @router.post("/answer", response_model=ComprehensionResult)
 async def check_answer(
     data: ComprehensionAnswerRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -162,7 +162,7 @@ async def check_answer(
 @router.post("/summary", response_model=SummaryResult)
 async def check_summary(
     data: SummaryCheckRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -210,7 +210,7 @@ async def check_summary(
 
 @router.get("/history", response_model=ComprehensionHistory)
 async def get_comprehension_history(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
     limit: int = Query(default=20, ge=1, le=100, description="取得件数"),
 ):
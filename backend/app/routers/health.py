@@ -46,6 +46,16 @@ async def detailed_health_check():
         "environment": settings.environment,
         "response_time_ms": elapsed_ms,
         "components": components,
+        "metrics": {
+            "llm_response_cache": _llm_response_cache_stats(),
+            "llm_routing": _llm_routing_scores(),
+            "llm_concurrency": _llm_concurrency_stats(),
+            "llm_admission": _llm_admission_stats(),
+            "llm_coalescing": _llm_coalescing_stats(),
+            "talk_session_cache": _talk_session_cache_stats(),
+            "tts_audio_cache": _tts_audio_cache_stats(),
+            "speech_client": _speech_client_stats(),
+        },
     }
 
 
@@ -125,5 +135,53 @@ async def _check_llm_provider() -> dict:
         }
 
 
+def _llm_response_cache_stats() -> dict:
+    from app.llm.service import get_llm_service
+
+    return get_llm_service().response_cache.get_stats()
+
+
+def _llm_routing_scores() -> dict:
+    from app.llm.service import get_llm_service
+
+    return get_llm_service().router.get_provider_scores()
+
+
+def _llm_concurrency_stats() -> dict:
+    from app.llm.service import get_llm_service
+
+    return get_llm_service().router.get_concurrency_stats()
+
+
+def _llm_admission_stats() -> dict:
+    from app.llm.admission import admission_controller
+
+    return admission_controller.get_stats()
+
+
+def _llm_coalescing_stats() -> dict:
+    from app.llm.coalescing import request_coalescer
+
+    return request_coalescer.get_stats()
+
+
+def _talk_session_cache_stats() -> dict:
+    from app.services.talk_session_cache import talk_session_cache
+
+    return talk_session_cache.get_stats()
+
+
+def _tts_audio_cache_stats() -> dict:
+    from app.services.tts_audio_cache import tts_audio_cache
+
+    return tts_audio_cache.get_stats()
+
+
+def _speech_client_stats() -> dict:
+    from app.services.speech_client import speech_client
+
+    return speech_client.get_stats()
+
+
 def _elapsed(start: float) -> float:
     return round((time.perf_counter() - start) * 1000, 2)
@@ -1,8 +1,12 @@
 """リスニング・シャドーイングルーター - 音声練習機能のAPI
 
 シャドーイング教材の生成、音声評価、TTS変換を提供。
+TTS音声は合成済みキャッシュのキーを ETag とし、Range リクエストに対応する。
+出力形式（WAV・MP3・Opus・WebM）は format パラメータまたは Accept ヘッダーで選択する。
 """
 
+from collections.abc import Awaitable, Callable
+
 from fastapi import (
     APIRouter,
     Depends,
@@ -10,30 +14,42 @@ from fastapi import (
     Form,
     HTTPException,
     Query,
+    Request,
     UploadFile,
     status,
 )
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.dependencies import get_current_user
+from app.exceptions import AppError
 from app.models.conversation import ConversationSession
-from app.models.user import User
+from app.schemas.auth import CurrentUser
 from app.schemas.listening import (
     ShadowingMaterial,
     ShadowingResult,
     TTSRequest,
 )
+from app.services.content_pool import content_pool_service, make_category
 from app.services.shadowing_service import shadowing_service
+from app.services.speech_service import (
+    DEFAULT_TTS_FORMAT,
+    TTS_FORMATS,
+    detect_tts_format,
+)
+from app.services.tts_audio_cache import is_cache_key, tts_audio_cache
 
 router = APIRouter()
 
+# 合成済み音声はキーが内容から決まるため不変として配信する
+TTS_CACHE_CONTROL = "private, max-age=31536000, immutable"
+
 
 @router.get("/shadowing/material", response_model=ShadowingMaterial)
 async def generate_shadowing_material(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     topic: str | None = Query(
         default=None,
         description="トピック: business_meeting, earnings_call, team_discussion, client_presentation, casual_networking",
@@ -92,6 +108,17 @@ async def generate_shadowing_material(
 
         topic = random.choice(valid_topics)
 
+    # 事前生成プールから提供し、なければ生成する
+    pooled = await content_pool_service.take(
+        "shadowing",
+        current_user.target_level,
+        make_category(topic, difficulty, accent, environment),
+        1,
+        current_user.id,
+    )
+    if pooled:
+        return pooled[0]
+
     material = await shadowing_service.generate_material(
         topic=topic,
         difficulty=difficulty,
@@ -108,7 +135,7 @@ async def evaluate_shadowing(
     audio: UploadFile = File(..., description="ユーザーの音声ファイル（WAV形式）"),
     reference_text: str = Form(..., description="リファレンステキスト"),
     speed: float = Form(default=1.0, ge=0.5, le=2.0, description="再生速度"),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -140,6 +167,9 @@ async def evaluate_shadowing(
         )
         return result
 
+    except AppError:
+        # 音声サービスの遮断（503）等はステータス・エラーコードをそのまま返す
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -149,7 +179,7 @@ async def evaluate_shadowing(
 
 @router.get("/shadowing/history")
 async def get_shadowing_history(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=20, ge=1, le=100),
@@ -186,43 +216,267 @@ async def get_shadowing_history(
 @router.post("/tts")
 async def text_to_speech(
     data: TTSRequest,
-    current_user: User = Depends(get_current_user),
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     テキストを音声に変換（Text-to-Speech）
 
     Azure TTSを使用して、指定されたテキストを
-    WAV形式の音声に変換して返す。
+    指定形式（既定は WAV）の音声に変換して返す。
     アクセント選択・環境音シミュレーションに対応。
+    合成済みの音声はキャッシュから返し、Content-Location に
+    Range・条件付きリクエストで取得できる音声URLを返す。
     """
+    params = _tts_params(data, request)
     try:
-        audio_bytes = await shadowing_service.generate_audio(
-            text=data.text,
-            speed=data.speed,
-            voice=data.voice,
-            accent=data.accent,
-            gender=data.gender,
-            environment=data.environment,
+        audio_bytes = await shadowing_service.generate_audio(**params)
+    except AppError:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"音声合成に失敗しました: {str(e)}",
         )
 
-        return Response(
-            content=audio_bytes,
-            media_type="audio/wav",
-            headers={
-                "Content-Disposition": "attachment; filename=tts_output.wav",
-            },
-        )
+    cache_key = shadowing_service.audio_cache_key(**params)
+    tts_format = TTS_FORMATS[params["audio_format"]]
+
+    async def _read(start: int, end: int | None) -> bytes:
+        return audio_bytes[start:] if end is None else audio_bytes[start : end + 1]
+
+    return await _audio_response(
+        request,
+        cache_key,
+        len(audio_bytes),
+        tts_format.media_type,
+        _read,
+        extra_headers={
+            "Content-Disposition": (
+                f"attachment; filename=tts_output.{tts_format.extension}"
+            ),
+            "Content-Location": f"{request.url.path}/audio/{cache_key}",
+            "Vary": "Accept",
+        },
+    )
+
+
+@router.post("/tts/stream")
+async def text_to_speech_stream(
+    data: TTSRequest,
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    テキストを音声に変換し、合成された順に返す（ストリーミング）
 
+    Azure のチャンク応答を全体の受信を待たずに転送するため、再生開始までの時間が短い。
+    MP3・Opus・WebM を指定すると転送量も小さくなる。
+    最初のチャンクを受信するまでに失敗した場合は 500 を返す。
+    """
+    params = _tts_params(data, request)
+    stream = shadowing_service.stream_audio(**params)
+    try:
+        first_chunk = await anext(stream, b"")
+    except AppError:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"音声合成に失敗しました: {str(e)}",
         )
 
+    async def _body():
+        try:
+            if first_chunk:
+                yield first_chunk
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        _body(),
+        media_type=TTS_FORMATS[params["audio_format"]].media_type,
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "Vary": "Accept",
+        },
+    )
+
+
+@router.get("/tts/audio/{cache_key}")
+async def get_tts_audio(
+    cache_key: str,
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """
+    合成済みのTTS音声を取得（POST /tts の Content-Location）
+
+    If-None-Match による 304 応答と Range による部分取得に対応する。
+    Range 指定時は要求された範囲だけを保存先から読み込む。
+    """
+    size = await tts_audio_cache.size(cache_key) if is_cache_key(cache_key) else None
+    if size is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="音声が見つかりません",
+        )
+
+    if _etag_matches(request.headers.get("if-none-match"), _etag(cache_key)):
+        return Response(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers={"ETag": _etag(cache_key), "Cache-Control": TTS_CACHE_CONTROL},
+        )
+
+    async def _read(start: int, end: int | None) -> bytes:
+        data = await tts_audio_cache.read(cache_key, start, end)
+        if data is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="音声が見つかりません",
+            )
+        return data
+
+    # キーは出力形式を含むハッシュのため、形式は音声の先頭バイトから判定する
+    media_type = TTS_FORMATS[detect_tts_format(await _read(0, 15))].media_type
+    return await _audio_response(request, cache_key, size, media_type, _read)
+
+
+def _tts_params(data: TTSRequest, request: Request) -> dict:
+    """TTSリクエストを音声生成の引数に変換（出力形式は Accept ヘッダーでも選択できる）"""
+    return {
+        "text": data.text,
+        "speed": data.speed,
+        "voice": data.voice,
+        "accent": data.accent,
+        "gender": data.gender,
+        "environment": data.environment,
+        "audio_format": data.format
+        or _negotiate_tts_format(request.headers.get("accept")),
+    }
+
+
+def _negotiate_tts_format(accept: str | None) -> str:
+    """Accept ヘッダーから出力形式を選ぶ（q値の高い順、対応形式がなければ wav）"""
+    if not accept:
+        return DEFAULT_TTS_FORMAT
+    by_media_type = {fmt.media_type: name for name, fmt in TTS_FORMATS.items()}
+    by_media_type["audio/opus"] = "opus"
+    by_media_type["audio/mp3"] = "mp3"
+
+    candidates: list[tuple[float, str]] = []
+    for item in accept.split(","):
+        media_type, *params = (part.strip() for part in item.split(";"))
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type.lower() in by_media_type and quality > 0:
+            candidates.append((quality, by_media_type[media_type.lower()]))
+
+    if not candidates:
+        return DEFAULT_TTS_FORMAT
+    # q値が同じ場合は記載順を優先する（sorted は安定ソート）
+    return sorted(candidates, key=lambda c: -c[0])[0][1]
+
+
+def _etag(cache_key: str) -> str:
+    return f'"{cache_key}"'
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    """If-None-Match ヘッダーが ETag に一致するか（弱い比較）"""
+    if not header:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def _parse_byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Range ヘッダー（単一範囲）を (開始, 終了) のバイト位置に変換（終了を含む）
+
+    ヘッダーがない・解釈できない・複数範囲の場合は None（全体を返す）。
+
+    Raises:
+        ValueError: 範囲が音声の長さを超えている場合（416）
+    """
+    if not header or not header.startswith("bytes="):
+        return None
+    spec = header[len("bytes=") :].strip()
+    if "," in spec:
+        return None
+    first, sep, last = spec.partition("-")
+    if not sep or not all(part.isdigit() for part in (first, last) if part):
+        return None
+    if not first:
+        if not last:
+            return None
+        # bytes=-N: 末尾 N バイト
+        length = int(last)
+        if length == 0 or size == 0:
+            raise ValueError("範囲外")
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and start > end:
+        return None
+    if start >= size:
+        raise ValueError("範囲外")
+    return start, min(end, size - 1)
+
+
+async def _audio_response(
+    request: Request,
+    cache_key: str,
+    size: int,
+    media_type: str,
+    read: Callable[[int, int | None], Awaitable[bytes]],
+    extra_headers: dict[str, str] | None = None,
+) -> Response:
+    """音声を ETag・Cache-Control 付きで返す（Range 指定時は 206 で部分応答）"""
+    etag = _etag(cache_key)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": TTS_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+        **(extra_headers or {}),
+    }
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = _parse_byte_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{size}"},
+            )
+
+    if byte_range is None:
+        return Response(
+            content=await read(0, None), media_type=media_type, headers=headers
+        )
+
+    start, end = byte_range
+    return Response(
+        content=await read(start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type=media_type,
+        headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}"},
+    )
+
 
 @router.get("/accents")
 async def list_accents(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """利用可能なアクセント一覧を取得"""
     from app.services.speech_service import speech_service
@@ -13,7 +13,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.sound_pattern import SoundPatternMastery
-from app.models.user import User
+from app.schemas.auth import CurrentUser
 from app.schemas.mogomogo import (
     DictationRequest,
     DictationResult,
@@ -22,6 +22,7 @@ from app.schemas.mogomogo import (
     MogomogoProgressItem,
     SoundPatternInfo,
 )
+from app.services.content_pool import content_pool_service
 from app.services.mogomogo_service import mogomogo_service
 
 router = APIRouter()
@@ -29,7 +30,7 @@ router = APIRouter()
 
 @router.get("/patterns", response_model=list[SoundPatternInfo])
 async def get_sound_patterns(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     利用可能な音声変化パターン種別を取得
@@ -42,7 +43,7 @@ async def get_sound_patterns(
 
 @router.get("/exercises", response_model=list[MogomogoExercise])
 async def generate_exercises(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     pattern_types: str = Query(
         default="linking,reduction",
         description="カンマ区切りのパターン種別 (linking,reduction,flapping,deletion,weak_form)",
@@ -61,18 +62,23 @@ async def generate_exercises(
     types_list = [t.strip() for t in pattern_types.split(",") if t.strip()]
     level = difficulty or current_user.target_level
 
-    exercises = await mogomogo_service.generate_exercises(
-        pattern_types=types_list,
-        user_level=level,
-        count=count,
+    # 事前生成プールから提供し、不足分のみ生成する
+    exercises = await content_pool_service.take(
+        "mogomogo", level, ",".join(sorted(types_list)), count, current_user.id
     )
+    if len(exercises) < count:
+        exercises += await mogomogo_service.generate_exercises(
+            pattern_types=types_list,
+            user_level=level,
+            count=count - len(exercises),
+        )
     return exercises
 
 
 @router.post("/dictation/check", response_model=DictationResult)
 async def check_dictation(
     data: DictationRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -118,7 +124,7 @@ async def check_dictation(
 
 @router.get("/progress", response_model=MogomogoProgress)
 async def get_progress(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -14,7 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.pattern import PatternMastery
-from app.models.user import User
+from app.schemas.auth import CurrentUser
 from app.schemas.pattern import (
     PatternCategory,
     PatternCheckRequest,
@@ -29,7 +29,7 @@ router = APIRouter()
 
 @router.get("/categories", response_model=list[PatternCategory])
 async def get_pattern_categories(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     パターンカテゴリ一覧を取得
@@ -41,7 +41,7 @@ async def get_pattern_categories(
 
 @router.get("/exercises", response_model=list[PatternExercise])
 async def get_pattern_exercises(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
     category: str | None = Query(
         default=None,
@@ -101,7 +101,7 @@ async def get_pattern_exercises(
 @router.post("/check", response_model=PatternCheckResult)
 async def check_pattern_answer(
     data: PatternCheckRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -130,7 +130,7 @@ async def check_pattern_answer(
 
 @router.get("/progress", response_model=list[PatternProgress])
 async def get_pattern_progress(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
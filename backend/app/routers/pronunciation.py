@@ -14,7 +14,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.sound_pattern import SoundPatternMastery
-from app.models.user import User
+from app.schemas.auth import CurrentUser
 from app.schemas.pronunciation import (
     JapaneseSpeakerPhoneme,
     PhonemeResult,
@@ -23,6 +23,7 @@ from app.schemas.pronunciation import (
     PronunciationProgressItem,
     ProsodyExercise,
 )
+from app.services.content_pool import content_pool_service, make_category
 from app.services.pronunciation_service import pronunciation_service
 
 router = APIRouter()
@@ -30,7 +31,7 @@ router = APIRouter()
 
 @router.get("/phonemes", response_model=list[JapaneseSpeakerPhoneme])
 async def get_japanese_speaker_phonemes(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     日本語話者に共通する発音問題の一覧を取得
@@ -43,7 +44,7 @@ async def get_japanese_speaker_phonemes(
 
 @router.get("/exercises", response_model=list[PronunciationExercise])
 async def generate_pronunciation_exercises(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     phonemes: str = Query(
         default="/r/-/l/",
         description="カンマ区切りの音素ペア (例: /r/-/l/,/θ/-/s/)",
@@ -63,12 +64,21 @@ async def generate_pronunciation_exercises(
     phonemes_list = [p.strip() for p in phonemes.split(",") if p.strip()]
     level = current_user.target_level
 
-    exercises = await pronunciation_service.generate_exercises(
-        target_phonemes=phonemes_list,
-        user_level=level,
-        count=count,
-        exercise_type=type,
+    # 事前生成プールから提供し、不足分のみ生成する
+    exercises = await content_pool_service.take(
+        "pronunciation",
+        level,
+        make_category(",".join(phonemes_list), type),
+        count,
+        current_user.id,
     )
+    if len(exercises) < count:
+        exercises += await pronunciation_service.generate_exercises(
+            target_phonemes=phonemes_list,
+            user_level=level,
+            count=count - len(exercises),
+            exercise_type=type,
+        )
     return exercises
 
 
@@ -78,7 +88,7 @@ async def evaluate_pronunciation(
     target_phoneme: str = Form(description="評価対象の音素 (例: /r/-/l/)"),
     reference_text: str = Form(description="参照テキスト（発話すべきテキスト）"),
     exercise_id: str | None = Form(default=None, description="エクササイズID"),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -110,7 +120,7 @@ async def evaluate_pronunciation(
 
 @router.get("/prosody/exercises", response_model=list[ProsodyExercise])
 async def get_prosody_exercises(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     pattern: str = Query(
         default="stress",
         description="パターン種別: stress, rhythm, intonation",
@@ -133,7 +143,7 @@ async def get_prosody_exercises(
 
 @router.get("/progress", response_model=PronunciationOverallProgress)
 async def get_pronunciation_progress(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
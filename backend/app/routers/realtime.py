@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.schemas.auth import CurrentUser
 from app.schemas.realtime import (
     ConversationMode,
     ConversationModeList,
@@ -24,7 +24,7 @@ router = APIRouter()
 @router.post("/session", response_model=RealtimeSessionConfig)
 async def create_realtime_session(
     data: RealtimeStartRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -70,7 +70,7 @@ async def create_realtime_session(
 
 @router.get("/modes", response_model=ConversationModeList)
 async def get_conversation_modes(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     利用可能な会話モード一覧を取得
@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.review import ReviewItem
-from app.models.user import User
+from app.schemas.auth import CurrentUser
 from app.schemas.review import (
     ReviewCompleteRequest,
     ReviewCompleteResponse,
@@ -22,7 +22,7 @@ router = APIRouter()
 
 @router.get("/due", response_model=list[ReviewItemResponse])
 async def get_due_items(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
     limit: int = Query(default=20, ge=1, le=100),
 ):
@@ -62,7 +62,7 @@ async def get_due_items(
 @router.post("/complete", response_model=ReviewCompleteResponse)
 async def complete_review(
     data: ReviewCompleteRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -8,8 +8,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.review import ReviewItem
-from app.models.user import User
+from app.schemas.auth import CurrentUser
 from app.schemas.speaking import FlashCheckRequest, FlashCheckResponse, FlashExercise
+from app.services.content_pool import content_pool_service, make_category
 from app.services.flash_service import flash_service
 
 router = APIRouter()
@@ -17,7 +18,7 @@ router = APIRouter()
 
 @router.get("/flash", response_model=list[FlashExercise])
 async def generate_flash_exercises(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
     count: int = Query(default=5, ge=1, le=20),
     focus: str | None = Query(
@@ -56,12 +57,24 @@ async def generate_flash_exercises(
     # 重複を除去して上位5件に絞る
     unique_weak = list(dict.fromkeys(weak_patterns))[:5]
 
-    exercises = await flash_service.generate_exercises(
-        level=current_user.target_level,
-        focus=focus,
-        weak_patterns=unique_weak if unique_weak else None,
-        count=count,
-    )
+    # 弱点パターンがない場合は事前生成プールから提供（弱点がある場合は個別生成）
+    exercises = []
+    if not unique_weak:
+        exercises = await content_pool_service.take(
+            "flash",
+            current_user.target_level,
+            make_category(focus),
+            count,
+            current_user.id,
+        )
+
+    if len(exercises) < count:
+        exercises += await flash_service.generate_exercises(
+            level=current_user.target_level,
+            focus=focus,
+            weak_patterns=unique_weak if unique_weak else None,
+            count=count - len(exercises),
+        )
 
     return exercises
 
@@ -69,7 +82,7 @@ async def generate_flash_exercises(
 @router.post("/flash/check", response_model=FlashCheckResponse)
 async def check_flash_answer(
     data: FlashCheckRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
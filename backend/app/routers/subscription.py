@@ -9,7 +9,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
 from app.dependencies import get_current_user
-from app.models.user import User
+from app.schemas.auth import CurrentUser
 from app.schemas.subscription import (
     CancelSubscriptionResponse,
     CheckoutSessionRequest,
@@ -24,7 +24,7 @@ router = APIRouter()
 
 @router.get("/plans", response_model=list[PlanInfo])
 async def get_plans(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     利用可能なプラン一覧を取得
@@ -38,7 +38,7 @@ async def get_plans(
 
 @router.get("/current", response_model=SubscriptionInfo)
 async def get_current_subscription(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -53,7 +53,7 @@ async def get_current_subscription(
 @router.post("/checkout", response_model=CheckoutSessionResponse)
 async def create_checkout_session(
     data: CheckoutSessionRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """
     Stripeチェックアウトセッションを作成
@@ -122,7 +122,7 @@ async def handle_stripe_webhook(
 
 @router.post("/cancel", response_model=CancelSubscriptionResponse)
 async def cancel_subscription(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -1,21 +1,28 @@
 """会話練習(Talk)ルーター - AIとの会話セッション管理"""
 
+import asyncio
+import json
 import uuid
+from collections.abc import AsyncIterator
+from contextlib import aclosing
 
+import structlog
 from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import async_session, get_db
 from app.dependencies import get_current_user
+from app.llm.admission import PRIORITY_INTERACTIVE, llm_priority
 from app.models.conversation import ConversationMessage, ConversationSession
-from app.models.user import User
 from app.prompts.conversation import build_conversation_system_prompt
 from app.prompts.scenarios import (
     get_all_scenario_ids,
     get_scenario,
     get_scenarios_for_mode,
 )
+from app.schemas.auth import CurrentUser
 from app.schemas.talk import (
     FeedbackData,
     SessionListResponse,
@@ -25,15 +32,18 @@ from app.schemas.talk import (
     TalkStartRequest,
 )
 from app.services.claude_service import claude_service
+from app.services.conversation_context import conversation_context_manager
 from app.services.feedback_service import feedback_service
+from app.services.talk_session_cache import TalkSessionState, talk_session_cache
 
 router = APIRouter()
+logger = structlog.get_logger()
 
 
 @router.post("/start", response_model=SessionResponse)
 async def start_session(
     data: TalkStartRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """会話セッションを開始し、AIの最初のメッセージを生成"""
@@ -79,12 +89,13 @@ async def start_session(
         }
     ]
 
-    ai_response = await claude_service.chat(
-        messages=opening_messages,
-        model="sonnet",
-        max_tokens=256,
-        system=system_prompt,
-    )
+    with llm_priority(PRIORITY_INTERACTIVE):
+        ai_response = await claude_service.chat(
+            messages=opening_messages,
+            model="sonnet",
+            max_tokens=256,
+            system=system_prompt,
+        )
 
     # AIメッセージをDBに保存
     ai_message = ConversationMessage(
@@ -97,6 +108,19 @@ async def start_session(
     await db.refresh(session)
     await db.refresh(ai_message)
 
+    # 最初のメッセージ送信からキャッシュを使えるようセッション状態を保存
+    state = TalkSessionState(
+        session_id=session.id,
+        user_id=current_user.id,
+        mode=session.mode,
+        scenario_description=session.scenario_description,
+        scenario=_extract_scenario_from_session(session),
+        summary=None,
+        history=[{"role": "assistant", "content": ai_response}],
+    )
+    _ensure_system_prompt(state, current_user)
+    await talk_session_cache.put(state)
+
     return SessionResponse(
         id=session.id,
         mode=session.mode,
@@ -117,84 +141,47 @@ async def start_session(
 @router.post("/message", response_model=TalkMessageResponse)
 async def send_message(
     data: TalkMessageRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """ユーザーメッセージを送信し、AIの応答とフィードバックを取得"""
 
-    # セッション存在確認
-    result = await db.execute(
-        select(ConversationSession).where(
-            ConversationSession.id == data.session_id,
-            ConversationSession.user_id == current_user.id,
-        )
-    )
-    session = result.scalar_one_or_none()
-    if session is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="セッションが見つかりません",
-        )
-
-    # ユーザーメッセージを保存
-    user_message = ConversationMessage(
-        session_id=session.id,
-        role="user",
-        content=data.content,
-    )
-    db.add(user_message)
-    await db.flush()
-
-    # 既存メッセージを取得して会話履歴を構築
-    msg_result = await db.execute(
-        select(ConversationMessage)
-        .where(ConversationMessage.session_id == session.id)
-        .order_by(ConversationMessage.created_at)
-    )
-    all_messages = msg_result.scalars().all()
-
-    # Claude API用のメッセージ履歴を構築
-    conversation_history = []
-    for msg in all_messages:
-        role = msg.role
-        # Claude APIは"user"と"assistant"のみ受け付ける
-        if role not in ("user", "assistant"):
-            continue
-        conversation_history.append({"role": role, "content": msg.content})
-
-    # シナリオを復元（scenario_descriptionからscenario_idを抽出）
-    scenario = _extract_scenario_from_session(session)
-
-    # システムプロンプトを構築
-    system_prompt = build_conversation_system_prompt(
-        mode=session.mode,
-        user_level=current_user.target_level,
-        scenario_description=session.scenario_description,
-        native_language=current_user.native_language,
-        scenario=scenario,
+    state, user_message = await _save_user_message(data, current_user, db)
+    context = conversation_context_manager.build(
+        system=state.system_prompt,
+        summary=state.summary,
+        messages=state.history,
     )
 
-    # AI応答を生成
-    ai_response = await claude_service.chat(
-        messages=conversation_history,
-        model="sonnet",
-        max_tokens=512,
-        system=system_prompt,
-    )
-
-    # 過去セッションから弱点履歴を取得
-    weakness_history = await _get_weakness_history(current_user.id, db)
-
-    # フィードバックを非同期的に生成（ユーザーの最新メッセージに対して）
-    feedback_data = await feedback_service.generate_feedback(
-        user_text=data.content,
-        conversation_context=[
-            {"role": m.role, "content": m.content} for m in all_messages[-6:]
-        ],
-        user_level=current_user.target_level,
-        mode=session.mode,
-        weakness_history=weakness_history,
-    )
+    # AI応答とフィードバック（弱点履歴の取得を含む）を並行して生成
+    # タスクは作成時のコンテキストを引き継ぐため、どちらも対話優先度で受け付けられる
+    with llm_priority(PRIORITY_INTERACTIVE):
+        reply_task = asyncio.create_task(
+            claude_service.chat(
+                messages=context.messages,
+                model="sonnet",
+                max_tokens=512,
+                system=context.system,
+            )
+        )
+        feedback_task = asyncio.create_task(
+            _generate_turn_feedback(
+                user_id=current_user.id,
+                user_text=data.content,
+                conversation_context=state.history[-6:],
+                user_level=current_user.target_level,
+                mode=state.mode,
+            )
+        )
+    try:
+        ai_response = await reply_task
+        feedback_data = await feedback_task
+    finally:
+        # 応答生成の失敗・リクエストの中断時は残りのタスクも打ち切り、終了を待つ
+        pending = [task for task in (reply_task, feedback_task) if not task.done()]
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
 
     # フィードバックをユーザーメッセージに保存
     user_message.feedback = feedback_data.model_dump()
@@ -202,7 +189,7 @@ async def send_message(
 
     # AIメッセージを保存
     ai_message = ConversationMessage(
-        session_id=session.id,
+        session_id=state.session_id,
         role="assistant",
         content=ai_response,
     )
@@ -210,6 +197,17 @@ async def send_message(
     await db.commit()
     await db.refresh(ai_message)
 
+    # コミット済みのターンをキャッシュに追記
+    await talk_session_cache.append(
+        state.session_id,
+        {"role": "user", "content": data.content},
+        {"role": "assistant", "content": ai_response},
+    )
+
+    # 古いターンの要約は応答返却後にバックグラウンドで生成
+    if context.needs_summary:
+        conversation_context_manager.schedule_summary(state.session_id)
+
     return TalkMessageResponse(
         id=ai_message.id,
         role=ai_message.role,
@@ -219,6 +217,122 @@ async def send_message(
     )
 
 
+@router.post("/message/stream")
+async def send_message_stream(
+    data: TalkMessageRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """ユーザーメッセージを送信し、AIの応答をServer-Sent Eventsで逐次返す
+
+    イベント:
+        delta: {"text": str} - AI応答テキストの断片
+        done: TalkMessageResponse - 保存済みのAIメッセージとフィードバック
+        error: {"message": str} - 応答生成に失敗した場合
+
+    ユーザーメッセージは AI 応答と同じトランザクションで保存する
+    （応答生成に失敗・中断した場合は保存しない）。
+    """
+
+    state = await _load_session_state(data.session_id, current_user, db)
+    state.history.append({"role": "user", "content": data.content})
+    context = conversation_context_manager.build(
+        system=state.system_prompt,
+        summary=state.summary,
+        messages=state.history,
+    )
+
+    session_id = state.session_id
+    session_mode = state.mode
+    user_id = current_user.id
+    user_level = current_user.target_level
+    feedback_context = state.history[-6:]
+
+    async def event_stream() -> AsyncIterator[str]:
+        # フィードバック生成は応答ストリーミングと並行して実行
+        with llm_priority(PRIORITY_INTERACTIVE):
+            feedback_task = asyncio.create_task(
+                _generate_turn_feedback(
+                    user_id=user_id,
+                    user_text=data.content,
+                    conversation_context=feedback_context,
+                    user_level=user_level,
+                    mode=session_mode,
+                )
+            )
+        try:
+            chunks: list[str] = []
+            try:
+                # 応答本文はルートハンドラーの外で生成されるため、ここで対話優先度を設定する
+                # クライアント切断時も LLM のストリームを閉じて使用量を記録させる
+                with llm_priority(PRIORITY_INTERACTIVE):
+                    async with aclosing(
+                        claude_service.chat_stream(
+                            messages=context.messages,
+                            model="sonnet",
+                            max_tokens=512,
+                            system=context.system,
+                        )
+                    ) as stream:
+                        async for chunk in stream:
+                            chunks.append(chunk)
+                            yield _sse_event("delta", {"text": chunk})
+            except Exception as e:
+                logger.error("talk_stream_failed", error=str(e)[:200])
+                yield _sse_event("error", {"message": "AI応答の生成に失敗しました"})
+                return
+
+            feedback_data = await feedback_task
+
+            # 依存関係のDBセッションは応答前に閉じるため、別セッションでターンを保存する
+            async with async_session() as stream_db:
+                stream_db.add(
+                    ConversationMessage(
+                        session_id=session_id,
+                        role="user",
+                        content=data.content,
+                        feedback=feedback_data.model_dump(),
+                    )
+                )
+                await stream_db.flush()
+                ai_message = ConversationMessage(
+                    session_id=session_id,
+                    role="assistant",
+                    content="".join(chunks),
+                )
+                stream_db.add(ai_message)
+                await stream_db.commit()
+                await stream_db.refresh(ai_message)
+
+            # コミット済みのターンをキャッシュに追記
+            await talk_session_cache.append(
+                session_id,
+                {"role": "user", "content": data.content},
+                {"role": "assistant", "content": ai_message.content},
+            )
+            if context.needs_summary:
+                conversation_context_manager.schedule_summary(session_id)
+
+            done = TalkMessageResponse(
+                id=ai_message.id,
+                role=ai_message.role,
+                content=ai_message.content,
+                feedback=feedback_data,
+                created_at=ai_message.created_at,
+            )
+            yield _sse_event("done", done.model_dump(mode="json"))
+        finally:
+            # クライアント切断・エラー時に未完了のフィードバック生成を中断
+            if not feedback_task.done():
+                feedback_task.cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/scenarios")
 async def list_scenarios(
     mode: str | None = Query(default=None, description="モードでフィルタ"),
@@ -242,7 +356,7 @@ async def list_scenarios(
 
 @router.get("/sessions", response_model=list[SessionListResponse])
 async def list_sessions(
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
     offset: int = Query(default=0, ge=0),
     limit: int = Query(default=20, ge=1, le=100),
@@ -272,7 +386,7 @@ async def list_sessions(
 @router.get("/sessions/{session_id}", response_model=SessionResponse)
 async def get_session(
     session_id: uuid.UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
     """セッション詳細（全メッセージ含む）を取得"""
@@ -323,6 +437,124 @@ async def get_session(
 # --- プライベートヘルパー ---
 
 
+def _sse_event(event: str, data: dict) -> str:
+    """Server-Sent Events 形式のイベント文字列を構築"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _save_user_message(
+    data: TalkMessageRequest,
+    current_user: CurrentUser,
+    db: AsyncSession,
+) -> tuple[TalkSessionState, ConversationMessage]:
+    """セッション状態を取得してユーザーメッセージを保存する
+
+    返すセッション状態の履歴には保存したユーザーメッセージまでが含まれる。
+    キャッシュへの追記は呼び出し側がコミット後に行う。
+    """
+    state = await _load_session_state(data.session_id, current_user, db)
+
+    # ユーザーメッセージを保存
+    user_message = ConversationMessage(
+        session_id=state.session_id,
+        role="user",
+        content=data.content,
+    )
+    db.add(user_message)
+    await db.flush()
+
+    state.history.append({"role": "user", "content": data.content})
+    return state, user_message
+
+
+async def _load_session_state(
+    session_id: uuid.UUID,
+    current_user: CurrentUser,
+    db: AsyncSession,
+) -> TalkSessionState:
+    """セッション状態をキャッシュから取得（ミス時はDBから構築してキャッシュに保存）"""
+    state = await talk_session_cache.get(session_id)
+    if state is not None and state.user_id == current_user.id:
+        if _ensure_system_prompt(state, current_user):
+            await talk_session_cache.set_system_prompt(
+                state.session_id, state.prompt_key, state.system_prompt
+            )
+        return state
+
+    # セッション存在確認
+    result = await db.execute(
+        select(ConversationSession).where(
+            ConversationSession.id == session_id,
+            ConversationSession.user_id == current_user.id,
+        )
+    )
+    session = result.scalar_one_or_none()
+    if session is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="セッションが見つかりません",
+        )
+
+    # 要約に畳み込み済みのメッセージを除いた会話履歴を取得
+    msg_result = await db.execute(
+        select(ConversationMessage)
+        .where(
+            ConversationMessage.session_id == session.id,
+            ConversationMessage.role.in_(("user", "assistant")),
+        )
+        .order_by(ConversationMessage.created_at)
+        .offset(session.summarized_message_count)
+    )
+
+    state = TalkSessionState(
+        session_id=session.id,
+        user_id=session.user_id,
+        mode=session.mode,
+        scenario_description=session.scenario_description,
+        scenario=_extract_scenario_from_session(session),
+        summary=session.context_summary,
+        history=_build_conversation_history(msg_result.scalars().all()),
+    )
+    _ensure_system_prompt(state, current_user)
+    await talk_session_cache.put(state)
+    return state
+
+
+def _build_conversation_history(
+    messages: list[ConversationMessage],
+) -> list[dict]:
+    """Claude API用のメッセージ履歴を構築"""
+    conversation_history = []
+    for msg in messages:
+        role = msg.role
+        # Claude APIは"user"と"assistant"のみ受け付ける
+        if role not in ("user", "assistant"):
+            continue
+        conversation_history.append({"role": role, "content": msg.content})
+    return conversation_history
+
+
+def _ensure_system_prompt(state: TalkSessionState, current_user: CurrentUser) -> bool:
+    """ユーザー設定に対応するシステムプロンプトをセッション状態に設定
+
+    Returns:
+        システムプロンプトを（再）構築した場合 True
+    """
+    prompt_key = f"{current_user.target_level}:{current_user.native_language}"
+    if state.system_prompt and state.prompt_key == prompt_key:
+        return False
+
+    state.system_prompt = build_conversation_system_prompt(
+        mode=state.mode,
+        user_level=current_user.target_level,
+        scenario_description=state.scenario_description,
+        native_language=current_user.native_language,
+        scenario=state.scenario,
+    )
+    state.prompt_key = prompt_key
+    return True
+
+
 def _extract_scenario_from_session(session: ConversationSession) -> dict | None:
     """セッションのscenario_descriptionからシナリオを復元"""
     desc = session.scenario_description
@@ -338,6 +570,34 @@ def _extract_scenario_from_session(session: ConversationSession) -> dict | None:
     return None
 
 
+async def _generate_turn_feedback(
+    user_id: uuid.UUID,
+    user_text: str,
+    conversation_context: list[dict],
+    user_level: str,
+    mode: str,
+) -> FeedbackData:
+    """弱点履歴を取得してフィードバックを生成（AI応答と並行実行される）
+
+    リクエストのDBセッションは他のタスクと共有せず、専用セッションで履歴を読む。
+    履歴取得に失敗しても弱点履歴なしでフィードバック生成を続行する。
+    """
+    try:
+        async with async_session() as history_db:
+            weakness_history = await _get_weakness_history(user_id, history_db)
+    except Exception as e:
+        logger.warning("weakness_history_failed", error=str(e)[:200])
+        weakness_history = []
+
+    return await feedback_service.generate_feedback(
+        user_text=user_text,
+        conversation_context=conversation_context,
+        user_level=user_level,
+        mode=mode,
+        weakness_history=weakness_history,
+    )
+
+
 async def _get_weakness_history(
     user_id: uuid.UUID,
     db: AsyncSession,
@@ -36,6 +36,21 @@ class UserResponse(BaseModel):
     model_config = {"from_attributes": True}
 
 
+class CurrentUser(BaseModel):
+    """認証済みプリンシパル - 各ルーターが参照するユーザー属性のみを保持
+
+    get_current_user はこの4カラムだけを読み込み、リレーションはロードしない。
+    プロフィール全体が必要な場合は User を明示的に取得すること。
+    """
+
+    id: uuid.UUID
+    target_level: str
+    native_language: str
+    subscription_plan: str
+
+    model_config = {"from_attributes": True, "frozen": True}
+
+
 class Token(BaseModel):
     """JWT トークンレスポンス"""
 
@@ -134,3 +134,8 @@ class TTSRequest(BaseModel):
         default="clean",
         description="環境音: clean, phone_call, video_call, office, cafe, conference_room",
     )
+    format: str | None = Field(
+        default=None,
+        pattern="^(wav|mp3|opus|webm)$",
+        description="出力形式: wav, mp3, opus, webm（未指定時は Accept ヘッダーで決定、既定は wav）",
+    )
@@ -2,6 +2,8 @@
 
 週次・月次レポート、スキル分析、発音進捗追跡、AI推奨事項の生成を行う。
 ユーザーの学習データを多角的に分析し、パーソナライズされたフィードバックを提供。
+
+期間集計は DailyStat を都度走査せず、週次・月次ロールアップ（StatRollup）を読む。
 """
 
 import logging
@@ -11,9 +13,11 @@ from uuid import UUID
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.exceptions import LLMOverloadedError
+from app.llm.admission import PRIORITY_BACKGROUND, llm_priority
 from app.models.review import ReviewItem
 from app.models.sound_pattern import SoundPatternMastery
-from app.models.stats import DailyStat
+from app.models.stats import DailyStat, StatRollup
 from app.prompts.analytics import build_recommendation_prompt
 from app.schemas.analytics import (
     Achievement,
@@ -39,6 +43,17 @@ from app.schemas.analytics import (
     WeeklyReport,
 )
 from app.services.claude_service import claude_service
+from app.services.stat_rollup_service import (
+    PERIOD_MONTH,
+    PERIOD_WEEK,
+    DaySummary,
+    covering_periods,
+    period_end,
+    period_start,
+    rollup_days,
+    stat_rollup_service,
+    window_days,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -63,38 +78,27 @@ class AnalyticsService:
         """
         today = date.today()
         # 今週の月曜日を起点
-        week_start = today - timedelta(days=today.weekday())
-        week_end = week_start + timedelta(days=6)
-
-        # 今週の日次統計を取得
-        current_stats = await self._get_daily_stats(user_id, week_start, week_end, db)
-
-        # 前週の統計を取得（比較用）
+        week_start = period_start(PERIOD_WEEK, today)
+        week_end = period_end(PERIOD_WEEK, week_start)
+        # 前週（比較用）
         prev_week_start = week_start - timedelta(days=7)
-        prev_week_end = week_start - timedelta(days=1)
-        prev_stats = await self._get_daily_stats(
-            user_id, prev_week_start, prev_week_end, db
-        )
 
-        # 今週の集計
-        total_minutes = sum(s.practice_minutes for s in current_stats)
-        total_sessions = sum(s.sessions_completed for s in current_stats)
-        total_reviews = sum(s.reviews_completed for s in current_stats)
-        new_expressions = sum(s.new_expressions_learned for s in current_stats)
-
-        grammar_scores = [
-            s.grammar_accuracy for s in current_stats if s.grammar_accuracy is not None
-        ]
-        avg_grammar = (
-            sum(grammar_scores) / len(grammar_scores) if grammar_scores else None
+        rollups = await stat_rollup_service.get_rollups(
+            user_id,
+            [(PERIOD_WEEK, week_start), (PERIOD_WEEK, prev_week_start)],
+            db,
         )
+        current = rollups[(PERIOD_WEEK, week_start)]
+        previous = rollups[(PERIOD_WEEK, prev_week_start)]
+        current_stats = rollup_days(current)
 
-        pron_scores = [
-            s.pronunciation_avg_score
-            for s in current_stats
-            if s.pronunciation_avg_score is not None
-        ]
-        avg_pronunciation = sum(pron_scores) / len(pron_scores) if pron_scores else None
+        # 今週の集計
+        total_minutes = current.practice_minutes
+        total_sessions = current.sessions_completed
+        total_reviews = current.reviews_completed
+        new_expressions = current.new_expressions_learned
+        avg_grammar = current.grammar_accuracy_avg
+        avg_pronunciation = current.pronunciation_avg
 
         # ストリーク計算
         streak_days = await self._calculate_streak(user_id, db)
@@ -114,13 +118,8 @@ class AnalyticsService:
         ]
 
         # 前週比較
-        prev_minutes = sum(s.practice_minutes for s in prev_stats)
-        prev_grammar = [
-            s.grammar_accuracy for s in prev_stats if s.grammar_accuracy is not None
-        ]
-        prev_avg_grammar = (
-            sum(prev_grammar) / len(prev_grammar) if prev_grammar else None
-        )
+        prev_minutes = previous.practice_minutes
+        prev_avg_grammar = previous.grammar_accuracy_avg
 
         improvement = {}
         if prev_minutes > 0:
@@ -170,35 +169,23 @@ class AnalyticsService:
             MonthlyReport: 月次レポート
         """
         today = date.today()
-        month_start = today.replace(day=1)
-        # 翌月初日の前日を月末とする
-        if month_start.month == 12:
-            month_end = date(month_start.year + 1, 1, 1) - timedelta(days=1)
-        else:
-            month_end = date(month_start.year, month_start.month + 1, 1) - timedelta(
-                days=1
-            )
-
-        stats = await self._get_daily_stats(user_id, month_start, month_end, db)
-
-        total_minutes = sum(s.practice_minutes for s in stats)
-        total_sessions = sum(s.sessions_completed for s in stats)
-        total_reviews = sum(s.reviews_completed for s in stats)
-        new_expressions = sum(s.new_expressions_learned for s in stats)
+        month_start = period_start(PERIOD_MONTH, today)
+        month_end = period_end(PERIOD_MONTH, month_start)
+        thirty_days_ago = today - timedelta(days=30)
 
-        grammar_scores = [
-            s.grammar_accuracy for s in stats if s.grammar_accuracy is not None
-        ]
-        avg_grammar = (
-            sum(grammar_scores) / len(grammar_scores) if grammar_scores else None
+        # 当月とスキルレーダー用の直近30日を覆う月次ロールアップを1クエリで取得
+        rollups = await stat_rollup_service.get_rollups(
+            user_id, covering_periods(PERIOD_MONTH, thirty_days_ago, today), db
         )
+        month = rollups[(PERIOD_MONTH, month_start)]
+        stats = rollup_days(month)
 
-        pron_scores = [
-            s.pronunciation_avg_score
-            for s in stats
-            if s.pronunciation_avg_score is not None
-        ]
-        avg_pronunciation = sum(pron_scores) / len(pron_scores) if pron_scores else None
+        total_minutes = month.practice_minutes
+        total_sessions = month.sessions_completed
+        total_reviews = month.reviews_completed
+        new_expressions = month.new_expressions_learned
+        avg_grammar = month.grammar_accuracy_avg
+        avg_pronunciation = month.pronunciation_avg
 
         # 月内最長ストリーク
         streak_best = self._calculate_best_streak_in_range(stats)
@@ -207,13 +194,17 @@ class AnalyticsService:
         weekly_trend = self._build_weekly_trend(stats, month_start)
 
         # スキルレーダーデータ
-        skill_radar = await self._build_skill_radar(user_id, db)
+        skill_radar = self._build_skill_radar(
+            window_days(list(rollups.values()), thirty_days_ago, today)
+        )
 
         # アチーブメント判定
-        achievements = self._evaluate_achievements(stats, total_minutes, total_sessions)
+        achievements = self._evaluate_achievements(
+            stats, total_minutes, total_sessions, month.grammar_accuracy_max
+        )
 
         # 強み・弱みの分析
-        strengths, weaknesses = self._analyze_strengths_weaknesses(stats)
+        strengths, weaknesses = self._analyze_strengths_weaknesses(month)
 
         # 推奨事項
         recommendations_text = []
@@ -268,7 +259,7 @@ class AnalyticsService:
         today = date.today()
         thirty_days_ago = today - timedelta(days=30)
 
-        stats = await self._get_daily_stats(user_id, thirty_days_ago, today, db)
+        stats = await self._get_recent_days(user_id, thirty_days_ago, today, db)
 
         # --- スピーキング ---
         response_times = [
@@ -365,27 +356,23 @@ class AnalyticsService:
         )
 
         # --- 語彙 ---
-        # 復習アイテムから語彙統計を計算
+        # 復習アイテムから語彙統計を計算（総数と直近7日分を1クエリで集計）
         vocab_result = await db.execute(
-            select(func.count(ReviewItem.id)).where(
-                ReviewItem.user_id == user_id,
-                ReviewItem.item_type.in_(
-                    ["vocabulary", "expression", "flash_translation"]
+            select(
+                func.count(ReviewItem.id),
+                func.count(ReviewItem.id).filter(
+                    ReviewItem.created_at >= datetime.now(UTC) - timedelta(days=7)
                 ),
-            )
-        )
-        total_vocab = vocab_result.scalar() or 0
-
-        recent_vocab_result = await db.execute(
-            select(func.count(ReviewItem.id)).where(
+            ).where(
                 ReviewItem.user_id == user_id,
                 ReviewItem.item_type.in_(
                     ["vocabulary", "expression", "flash_translation"]
                 ),
-                ReviewItem.created_at >= datetime.now(UTC) - timedelta(days=7),
             )
         )
-        new_this_week = recent_vocab_result.scalar() or 0
+        total_vocab, new_this_week = vocab_result.one()
+        total_vocab = total_vocab or 0
+        new_this_week = new_this_week or 0
 
         vocabulary = VocabularySkill(
             range=VocabularyRange(
@@ -430,7 +417,7 @@ class AnalyticsService:
         thirty_days_ago = today - timedelta(days=30)
 
         # 日次統計から発音スコアのトレンドを構築
-        stats = await self._get_daily_stats(user_id, thirty_days_ago, today, db)
+        stats = await self._get_recent_days(user_id, thirty_days_ago, today, db)
 
         overall_trend = [
             PhonemeTrend(date=s.date, score=s.pronunciation_avg_score)
@@ -475,7 +462,9 @@ class AnalyticsService:
         today = date.today()
         seven_days_ago = today - timedelta(days=7)
 
-        stats = await self._get_daily_stats(user_id, seven_days_ago, today, db)
+        stats = await self._get_recent_days(
+            user_id, seven_days_ago, today, db, PERIOD_WEEK
+        )
 
         # ユーザー統計のサマリーを構築
         total_minutes = sum(s.practice_minutes for s in stats)
@@ -535,12 +524,13 @@ class AnalyticsService:
         ]
 
         try:
-            result = await claude_service.chat_json(
-                messages=messages,
-                model="haiku",
-                max_tokens=2048,
-                system=system_prompt,
-            )
+            with llm_priority(PRIORITY_BACKGROUND):
+                result = await claude_service.chat_json(
+                    messages=messages,
+                    model="haiku",
+                    max_tokens=2048,
+                    system=system_prompt,
+                )
 
             recommendations_data = (
                 result
@@ -564,6 +554,9 @@ class AnalyticsService:
 
             return sorted(recommendations, key=lambda r: r.priority)
 
+        except LLMOverloadedError:
+            # 混雑時は生成を待たずにフォールバックを返す
+            return self._build_fallback_recommendations(user_stats, weak_areas)
         except Exception as e:
             logger.error("推奨事項生成エラー: %s", e)
             # フォールバック推奨事項
@@ -571,24 +564,19 @@ class AnalyticsService:
 
     # --- プライベートヘルパーメソッド ---
 
-    async def _get_daily_stats(
+    async def _get_recent_days(
         self,
         user_id: UUID,
         start_date: date,
         end_date: date,
         db: AsyncSession,
-    ) -> list[DailyStat]:
-        """指定期間の日次統計を取得"""
-        result = await db.execute(
-            select(DailyStat)
-            .where(
-                DailyStat.user_id == user_id,
-                DailyStat.date >= start_date,
-                DailyStat.date <= end_date,
-            )
-            .order_by(DailyStat.date.asc())
+        period_type: str = PERIOD_MONTH,
+    ) -> list[DaySummary]:
+        """指定期間の日別統計をロールアップから取得（期間を覆う行を1クエリで読む）"""
+        rollups = await stat_rollup_service.get_rollups(
+            user_id, covering_periods(period_type, start_date, end_date), db
         )
-        return list(result.scalars().all())
+        return window_days(list(rollups.values()), start_date, end_date)
 
     async def _calculate_streak(self, user_id: UUID, db: AsyncSession) -> int:
         """連続学習日数を計算"""
@@ -619,7 +607,7 @@ class AnalyticsService:
 
         return streak
 
-    def _calculate_best_streak_in_range(self, stats: list[DailyStat]) -> int:
+    def _calculate_best_streak_in_range(self, stats: list[DaySummary]) -> int:
         """期間内の最長ストリークを計算"""
         active_dates = sorted(s.date for s in stats if s.practice_minutes > 0)
         if not active_dates:
@@ -638,7 +626,7 @@ class AnalyticsService:
 
     def _build_weekly_trend(
         self,
-        stats: list[DailyStat],
+        stats: list[DaySummary],
         month_start: date,
     ) -> list[dict]:
         """月内の週ごとトレンドデータを構築"""
@@ -664,13 +652,8 @@ class AnalyticsService:
 
         return weeks
 
-    async def _build_skill_radar(self, user_id: UUID, db: AsyncSession) -> dict:
-        """スキルレーダーチャートデータを構築"""
-        today = date.today()
-        thirty_days_ago = today - timedelta(days=30)
-
-        stats = await self._get_daily_stats(user_id, thirty_days_ago, today, db)
-
+    def _build_skill_radar(self, stats: list[DaySummary]) -> dict:
+        """直近30日の日別統計からスキルレーダーチャートデータを構築"""
         grammar_scores = [
             s.grammar_accuracy for s in stats if s.grammar_accuracy is not None
         ]
@@ -696,9 +679,10 @@ class AnalyticsService:
 
     def _evaluate_achievements(
         self,
-        stats: list[DailyStat],
+        stats: list[DaySummary],
         total_minutes: int,
         total_sessions: int,
+        best_grammar: float | None,
     ) -> list[Achievement]:
         """月間アチーブメントを評価"""
         achievements = []
@@ -747,10 +731,7 @@ class AnalyticsService:
                 )
             )
 
-        grammar_scores = [
-            s.grammar_accuracy for s in stats if s.grammar_accuracy is not None
-        ]
-        if grammar_scores and max(grammar_scores) >= 0.95:
+        if best_grammar is not None and best_grammar >= 0.95:
             achievements.append(
                 Achievement(
                     title="Grammar Master",
@@ -763,37 +744,28 @@ class AnalyticsService:
 
     def _analyze_strengths_weaknesses(
         self,
-        stats: list[DailyStat],
+        rollup: StatRollup,
     ) -> tuple[list[str], list[str]]:
         """強み・弱みを分析"""
         strengths = []
         weaknesses = []
 
-        grammar_scores = [
-            s.grammar_accuracy for s in stats if s.grammar_accuracy is not None
-        ]
-        pron_scores = [
-            s.pronunciation_avg_score
-            for s in stats
-            if s.pronunciation_avg_score is not None
-        ]
-
-        if grammar_scores:
-            avg_grammar = sum(grammar_scores) / len(grammar_scores)
+        avg_grammar = rollup.grammar_accuracy_avg
+        if avg_grammar is not None:
             if avg_grammar >= 0.8:
                 strengths.append("Grammar accuracy")
             elif avg_grammar < 0.6:
                 weaknesses.append("Grammar accuracy")
 
-        if pron_scores:
-            avg_pron = sum(pron_scores) / len(pron_scores)
+        avg_pron = rollup.pronunciation_avg
+        if avg_pron is not None:
             if avg_pron >= 0.8:
                 strengths.append("Pronunciation")
             elif avg_pron < 0.6:
                 weaknesses.append("Pronunciation")
 
-        active_days = len([s for s in stats if s.practice_minutes > 0])
-        total_days = max(len(stats), 1)
+        active_days = rollup.active_days
+        total_days = max(len(rollup.days), 1)
         if active_days / total_days >= 0.7:
             strengths.append("Practice consistency")
         elif active_days / total_days < 0.3:
@@ -0,0 +1,371 @@
+"""TTS音声の後処理（NumPy） - 環境音シミュレーション・話速の変更
+
+AUDIO_ENVIRONMENTS の各環境（電話・ビデオ通話・オフィス・カフェ・会議室）を
+合成済みのクリーンな WAV（16bit PCM）への信号処理で再現する。環境ごとに SSML を変えて
+Azure で合成し直す代わりに、1回の合成（キャッシュ済みのクリーン音声）から全環境の
+音声を作れる。
+
+- phone_call: 300〜3400Hz の帯域制限 + μ-law（G.711 相当の8bit）圧伸 + 回線ノイズ
+- video_call: 7kHz 帯域制限 + 20ms フレーム単位のスペクトル量子化（コーデック歪み）
+  + パケットロス補間
+- office: 空調（ピンクノイズ）・キーボード音・遠くの会話を目標 SNR で混合
+- cafe: ざわめき（複数話者のバブル）・食器音・BGM 帯域のノイズを目標 SNR で混合
+- conference_room: 減衰する残響（インパルス応答との畳み込み）+ 小さな空調音
+
+time_stretch() は 1.0倍で合成した音声から音程を保ったまま別の話速の音声を作る（WSOLA）。
+
+処理はすべて int16 のサンプル配列全体に対するベクトル演算（FFT・畳み込み・
+フレーム単位の reshape）で行い、サンプルごとの Python ループは使わない。
+乱数は環境ごとに固定のシードを使うため、同じ入力からは常に同じ音声が得られる
+（キャッシュキー・ETag が内容と一致し続ける）。
+"""
+
+import io
+import wave
+import zlib
+from collections.abc import Callable
+
+import numpy as np
+
+# 処理内容を変えた場合に古い加工済み音声を参照しないためのバージョン
+EFFECTS_VERSION = "v1"
+
+_INT16_SCALE = 32767.0
+# 出力のピーク上限（クリップを避けるため、超える場合は全体を縮小する）
+_PEAK_LIMIT = 0.98
+# 信号電力（SNR の基準）を求めるフレーム長と、無音とみなすフレームのしきい値（最大比 dB）
+_POWER_FRAME_SECONDS = 0.02
+_SILENCE_DB = -40.0
+
+
+# --- WAV 入出力 ---
+
+
+def decode_wav(data: bytes) -> tuple[np.ndarray, int]:
+    """16bit PCM モノラルの WAV を int16 配列とサンプルレートに変換
+
+    Raises:
+        ValueError: WAV として読めない・16bit モノラル以外の場合
+    """
+    try:
+        with wave.open(io.BytesIO(data), "rb") as reader:
+            if reader.getsampwidth() != 2 or reader.getnchannels() != 1:
+                raise ValueError(
+                    "16bit モノラル以外の WAV は加工できません: "
+                    f"sampwidth={reader.getsampwidth()} channels={reader.getnchannels()}"
+                )
+            rate = reader.getframerate()
+            frames = reader.readframes(reader.getnframes())
+    except (wave.Error, EOFError) as e:
+        raise ValueError(f"WAV を読み込めません: {e}") from e
+    return np.frombuffer(frames, dtype="<i2").astype(np.int16), rate
+
+
+def encode_wav(samples: np.ndarray, rate: int) -> bytes:
+    """int16 配列を 16bit PCM モノラルの WAV に変換"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(rate)
+        writer.writeframes(samples.astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def to_float(samples: np.ndarray) -> np.ndarray:
+    """int16 → float64（-1.0〜1.0）"""
+    return samples.astype(np.float64) / _INT16_SCALE
+
+
+def to_int16(signal: np.ndarray) -> np.ndarray:
+    """float（-1.0〜1.0）→ int16（ピークが上限を超える場合は全体を縮小）"""
+    peak = float(np.max(np.abs(signal))) if signal.size else 0.0
+    if peak > _PEAK_LIMIT:
+        signal = signal * (_PEAK_LIMIT / peak)
+    return np.round(signal * _INT16_SCALE).astype(np.int16)
+
+
+# --- 基本処理 ---
+
+
+def band_limit(
+    signal: np.ndarray,
+    rate: int,
+    low_hz: float,
+    high_hz: float,
+    transition_hz: float = 100.0,
+) -> np.ndarray:
+    """FFT 領域で low_hz〜high_hz 以外の成分を除去（境界は transition_hz 幅で滑らかに減衰）"""
+    if signal.size == 0:
+        return signal
+    spectrum = np.fft.rfft(signal)
+    freqs = np.fft.rfftfreq(signal.size, d=1.0 / rate)
+    gain = np.clip((freqs - (low_hz - transition_hz)) / transition_hz, 0.0, 1.0)
+    gain *= np.clip(((high_hz + transition_hz) - freqs) / transition_hz, 0.0, 1.0)
+    return np.fft.irfft(spectrum * gain, n=signal.size)
+
+
+def mu_law(signal: np.ndarray, bits: int = 8, mu: float = 255.0) -> np.ndarray:
+    """μ-law で圧縮し bits ビットに量子化してから伸長する（G.711 の量子化歪み）"""
+    clipped = np.clip(signal, -1.0, 1.0)
+    compressed = np.sign(clipped) * np.log1p(mu * np.abs(clipped)) / np.log1p(mu)
+    levels = 2 ** (bits - 1) - 1
+    quantized = np.round(compressed * levels) / levels
+    return np.sign(quantized) * np.expm1(np.abs(quantized) * np.log1p(mu)) / mu
+
+
+def speech_power(signal: np.ndarray, rate: int) -> float:
+    """発話区間の平均電力（無音フレームを除く。SNR の基準に使う）"""
+    frame = max(1, int(rate * _POWER_FRAME_SECONDS))
+    usable = signal.size - signal.size % frame
+    if usable == 0:
+        return float(np.mean(signal**2)) if signal.size else 0.0
+    frame_power = np.mean(signal[:usable].reshape(-1, frame) ** 2, axis=1)
+    threshold = frame_power.max() * 10 ** (_SILENCE_DB / 10)
+    active = frame_power[frame_power > threshold]
+    return float(active.mean()) if active.size else 0.0
+
+
+def mix_at_snr(
+    signal: np.ndarray, noise: np.ndarray, rate: int, snr_db: float
+) -> np.ndarray:
+    """発話区間の電力に対して snr_db になるようノイズの音量を調整して加える"""
+    noise_power = float(np.mean(noise**2)) if noise.size else 0.0
+    power = speech_power(signal, rate)
+    if noise_power == 0.0 or power == 0.0:
+        return signal
+    gain = np.sqrt(power / (noise_power * 10 ** (snr_db / 10)))
+    return signal + noise * gain
+
+
+def pink_noise(size: int, rng: np.random.Generator) -> np.ndarray:
+    """1/f ノイズ（空調・環境音の背景）"""
+    spectrum = np.fft.rfft(rng.standard_normal(size))
+    scale = np.ones(spectrum.size)
+    scale[1:] = 1.0 / np.sqrt(np.arange(1, spectrum.size))
+    scale[0] = 0.0
+    return np.fft.irfft(spectrum * scale, n=size)
+
+
+def _fft_convolve(signal: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """FFT による畳み込み（出力は signal と同じ長さ）"""
+    n_fft = 1 << int(signal.size + kernel.size - 1).bit_length()
+    spectrum = np.fft.rfft(signal, n_fft) * np.fft.rfft(kernel, n_fft)
+    return np.fft.irfft(spectrum, n_fft)[: signal.size]
+
+
+def _impulse_events(
+    size: int,
+    rate: int,
+    per_second: float,
+    kernel: np.ndarray,
+    rng: np.random.Generator,
+) -> np.ndarray:
+    """ランダムな時刻の単発音（キーボード・食器音）を kernel の形で並べる"""
+    events = np.zeros(size)
+    count = rng.poisson(per_second * size / rate)
+    if count:
+        positions = rng.integers(0, size, count)
+        events[positions] = rng.uniform(0.3, 1.0, count)
+    return _fft_convolve(events, kernel)
+
+
+def _babble(size: int, rate: int, talkers: int, rng: np.random.Generator) -> np.ndarray:
+    """複数話者のざわめき（発話帯域のノイズを音節程度の周期で振幅変調して重ねる）"""
+    t = np.arange(size) / rate
+    rates = rng.uniform(3.0, 6.0, (talkers, 1))
+    phases = rng.uniform(0.0, 2 * np.pi, (talkers, 1))
+    envelopes = np.clip(np.sin(2 * np.pi * rates * t + phases), 0.0, None) ** 2
+    voices = rng.standard_normal((talkers, size)) * envelopes
+    return band_limit(voices.sum(axis=0), rate, 200.0, 3000.0, transition_hz=200.0)
+
+
+# --- 環境ごとの処理 ---
+
+
+def telephone(signal: np.ndarray, rate: int, rng: np.random.Generator) -> np.ndarray:
+    """電話回線: 帯域制限・μ-law 量子化・回線ノイズ"""
+    narrow = band_limit(signal, rate, 300.0, 3400.0)
+    hiss = band_limit(rng.standard_normal(signal.size), rate, 300.0, 3400.0)
+    return mu_law(mix_at_snr(narrow, hiss, rate, snr_db=35.0))
+
+
+def video_call(
+    signal: np.ndarray,
+    rate: int,
+    rng: np.random.Generator,
+    frame_seconds: float = 0.02,
+    floor_db: float = -30.0,
+    loss_rate: float = 0.02,
+) -> np.ndarray:
+    """ビデオ通話: 広帯域コーデック相当の帯域制限・フレーム単位の量子化・パケットロス
+
+    20ms のフレームごとに、最大成分から floor_db 以下の周波数成分を落とし振幅を粗く
+    量子化する（低ビットレートのコーデックで聞こえる「水中のような」歪み）。
+    loss_rate の割合のフレームは失われたものとして、直前の受信フレームを減衰させて繰り返す。
+    """
+    wide = band_limit(signal, rate, 80.0, 7000.0)
+    frame = max(1, int(rate * frame_seconds))
+    padded = np.pad(wide, (0, -wide.size % frame))
+    frames = padded.reshape(-1, frame)
+
+    spectrum = np.fft.rfft(frames, axis=1)
+    magnitude = np.abs(spectrum)
+    peak = magnitude.max(axis=1, keepdims=True)
+    step = np.where(peak > 0, peak / 16, 1.0)
+    quantized = np.round(magnitude / step) * step
+    quantized[magnitude < peak * 10 ** (floor_db / 20)] = 0.0
+    frames = np.fft.irfft(np.exp(1j * np.angle(spectrum)) * quantized, n=frame, axis=1)
+
+    lost = rng.random(frames.shape[0]) < loss_rate
+    lost[0] = False
+    if lost.any():
+        # 各フレームについて直前に受信できたフレームの番号
+        index = np.arange(frames.shape[0])
+        last_received = np.maximum.accumulate(np.where(lost, 0, index))
+        frames[lost] = frames[last_received[lost]] * 0.5
+    return frames.reshape(-1)[: signal.size]
+
+
+def office(signal: np.ndarray, rate: int, rng: np.random.Generator) -> np.ndarray:
+    """オフィス: 空調音・キーボード音・遠くの会話を SNR 20dB で混合"""
+    size = signal.size
+    t = np.arange(int(rate * 0.004)) / rate
+    click = rng.standard_normal(t.size) * np.exp(-t / 0.0008)
+    bed = (
+        band_limit(pink_noise(size, rng), rate, 40.0, 2000.0)
+        + 0.6 * _impulse_events(size, rate, 4.0, click, rng)
+        + 0.3 * _babble(size, rate, talkers=2, rng=rng)
+    )
+    return mix_at_snr(signal, bed, rate, snr_db=20.0)
+
+
+def cafe(signal: np.ndarray, rate: int, rng: np.random.Generator) -> np.ndarray:
+    """カフェ: ざわめき・食器音・BGM 帯域のノイズを SNR 12dB で混合"""
+    size = signal.size
+    t = np.arange(int(rate * 0.15)) / rate
+    clink = np.sin(2 * np.pi * rng.uniform(2500.0, 4500.0) * t) * np.exp(-t / 0.03)
+    bed = (
+        _babble(size, rate, talkers=6, rng=rng)
+        + 0.4 * _impulse_events(size, rate, 0.8, clink, rng)
+        + 0.5 * band_limit(pink_noise(size, rng), rate, 60.0, 5000.0)
+    )
+    return mix_at_snr(signal, bed, rate, snr_db=12.0)
+
+
+def conference_room(
+    signal: np.ndarray,
+    rate: int,
+    rng: np.random.Generator,
+    rt60_seconds: float = 0.4,
+    wet: float = 0.3,
+) -> np.ndarray:
+    """会議室: 残響時間 rt60_seconds の残響と小さな空調音"""
+    t = np.arange(int(rate * rt60_seconds)) / rate
+    # rt60_seconds で -60dB まで減衰するインパルス応答
+    impulse = rng.standard_normal(t.size) * np.exp(-6.9 * t / rt60_seconds)
+    impulse[0] = 0.0
+    impulse /= np.sqrt(np.sum(impulse**2)) or 1.0
+    reverberant = (1 - wet) * signal + wet * _fft_convolve(signal, impulse)
+    hum = band_limit(pink_noise(signal.size, rng), rate, 40.0, 1000.0)
+    return mix_at_snr(reverberant, hum, rate, snr_db=35.0)
+
+
+# 環境ID → 処理（clean は加工しない）
+ENVIRONMENT_EFFECTS: dict[
+    str, Callable[[np.ndarray, int, np.random.Generator], np.ndarray]
+] = {
+    "phone_call": telephone,
+    "video_call": video_call,
+    "office": office,
+    "cafe": cafe,
+    "conference_room": conference_room,
+}
+
+
+def supports_environment(environment: str) -> bool:
+    """後処理で再現できる環境か（clean は加工不要のため False）"""
+    return environment in ENVIRONMENT_EFFECTS
+
+
+def apply_environment(samples: np.ndarray, rate: int, environment: str) -> np.ndarray:
+    """int16 のクリーン音声に環境の処理を適用（未対応の環境はそのまま返す）"""
+    effect = ENVIRONMENT_EFFECTS.get(environment)
+    if effect is None or samples.size == 0:
+        return samples
+    rng = np.random.default_rng(zlib.crc32(environment.encode()))
+    return to_int16(effect(to_float(samples), rate, rng))
+
+
+def apply_environment_wav(data: bytes, environment: str) -> bytes:
+    """クリーンな WAV に環境の処理を適用した WAV を返す
+
+    Raises:
+        ValueError: 16bit モノラル PCM の WAV でない場合
+    """
+    samples, rate = decode_wav(data)
+    return encode_wav(apply_environment(samples, rate, environment), rate)
+
+
+# --- 話速の変更（時間伸縮） ---
+
+
+def time_stretch(
+    samples: np.ndarray,
+    rate: int,
+    speed: float,
+    frame_seconds: float = 0.03,
+    tolerance_seconds: float = 0.008,
+) -> np.ndarray:
+    """WSOLA で音程を保ったまま話速を speed 倍にする（長さは約 1/speed になる）
+
+    ハニング窓のフレームを半フレーム間隔で重ね合わせて出力する。各フレームの読み出し
+    位置は、本来の位置（出力位置 × speed）の前後 tolerance_seconds の範囲から、
+    直前のフレームの自然な続きと波形が最も揃う位置を選ぶ（位相のずれによる濁りを防ぐ）。
+    位置の探索はフレームごとに行うが、候補位置との相関は行列積でまとめて求め、
+    窓掛け・重ね合わせは全フレーム分を一度に計算する。
+    """
+    if speed == 1.0 or samples.size == 0:
+        return samples
+    signal = to_float(samples)
+    frame = max(4, int(rate * frame_seconds)) // 2 * 2
+    hop = frame // 2
+    tolerance = max(1, int(rate * tolerance_seconds))
+    analysis_hop = hop * speed
+    count = int(np.ceil(signal.size / analysis_hop)) + 1
+
+    # 探索範囲が端を越えないよう前後を無音で埋める
+    padded = np.pad(signal, (tolerance, frame + 2 * tolerance + hop))
+    nominal = tolerance + np.round(np.arange(count) * analysis_hop).astype(np.int64)
+    # 直前のフレームと重なる前半 hop サンプル分の波形（コピーせずビューで参照する）
+    segments = np.lib.stride_tricks.sliding_window_view(padded, hop)
+    positions = np.empty(count, dtype=np.int64)
+    positions[0] = nominal[0]
+    for k in range(1, count):
+        natural = segments[positions[k - 1] + hop]
+        start = nominal[k] - tolerance
+        candidates = segments[start : start + 2 * tolerance + 1]
+        positions[k] = start + int(np.argmax(candidates @ natural))
+
+    window = np.hanning(frame + 1)[:frame]
+    offsets = np.arange(frame)
+    frames = padded[positions[:, None] + offsets] * window
+    output_index = (np.arange(count) * hop)[:, None] + offsets
+    output = np.zeros(count * hop + frame)
+    weight = np.zeros_like(output)
+    np.add.at(output, output_index, frames)
+    np.add.at(weight, output_index, np.broadcast_to(window, frames.shape))
+    output /= np.maximum(weight, 1e-3)
+
+    length = int(round(signal.size / speed))
+    return to_int16(output[:length])
+
+
+def time_stretch_wav(data: bytes, speed: float) -> bytes:
+    """WAV の話速を speed 倍にした WAV を返す（音程は変えない）
+
+    Raises:
+        ValueError: 16bit モノラル PCM の WAV でない場合
+    """
+    samples, rate = decode_wav(data)
+    return encode_wav(time_stretch(samples, rate, speed), rate)
@@ -82,6 +82,7 @@ class ComprehensionService:
                 model="sonnet",
                 max_tokens=4096,
                 system=system_prompt,
+                cache_namespace="comprehension_material",
             )
 
             # 語彙データのパース
@@ -0,0 +1,555 @@
+"""コンテンツプールサービス - 事前生成エクササイズの提供とバックグラウンド補充
+
+(機能, レベル, カテゴリ) ごとに、スキーマ検証済みのエクササイズを Redis リストに事前生成しておき、
+リクエスト時はリストからの取り出しのみで応答する（LLM生成待ちを排除）。
+
+- 提供: LPOP による取り出し + ユーザーごとの既出コンテンツ除外
+- 補充: バックグラウンドワーカーが低水位を下回ったプールを高水位まで生成（バックグラウンド優先度）
+- 登録: プールはリクエストされた組み合わせが自動登録される（需要駆動）。
+  カテゴリは機能ごとの既知の値（音声変化パターン・音素ペア・トピック等）に正規化し、
+  それ以外の入力はプール化しない。一定期間使われないプールは登録解除して破棄する
+
+Redis未接続時やプールが不足する場合、呼び出し側は従来のLLM生成にフォールバックする。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from pydantic import BaseModel, ValidationError
+
+from app.config import settings
+from app.llm.admission import PRIORITY_BACKGROUND, llm_priority
+from app.prompts.accent_profiles import ACCENT_VOICES, AUDIO_ENVIRONMENTS
+from app.prompts.flash_translation import build_flash_generation_prompt
+from app.prompts.mogomogo import (
+    SOUND_PATTERN_DATABASE,
+    build_mogomogo_generation_prompt,
+)
+from app.prompts.pronunciation import (
+    JAPANESE_L1_INTERFERENCE,
+    build_pronunciation_exercise_prompt,
+)
+from app.prompts.shadowing import (
+    DIFFICULTY_GUIDANCE,
+    SHADOWING_TOPICS,
+    build_shadowing_material_prompt,
+)
+from app.redis_client import get_redis
+from app.schemas.listening import ShadowingMaterial
+from app.schemas.mogomogo import MogomogoExercise
+from app.schemas.pronunciation import PronunciationExercise
+from app.schemas.speaking import FlashExercise
+from app.services.claude_service import claude_service
+from app.services.shadowing_service import shadowing_service
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "content_pool"
+# 登録済みプール（プールキー -> 最終利用時刻の ZSET）
+REGISTRY_KEY = f"{KEY_PREFIX}:pools"
+CATEGORY_SEPARATOR = "|"
+EMPTY_PART = "-"
+# プール化するCEFRレベル（任意入力でプールが増殖しないように）
+POOL_LEVELS = {"A1", "A2", "B1", "B2", "C1", "C2"}
+PRONUNCIATION_EXERCISE_TYPES = {"minimal_pair", "tongue_twister", "sentence"}
+
+# ロックは取得時のトークンと一致する場合のみ解放する
+# （期限切れ後に他プロセスが取得したロックを消さないように）
+RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass(frozen=True)
+class PoolFeature:
+    """プール対象機能の定義
+
+    Attributes:
+        name: 機能名（プールキーに使用）
+        schema: 提供するエクササイズのスキーマ
+        generate: (level, category, count) を受け取り検証前のアイテムを生成する関数
+        normalize: カテゴリを正規化する関数（プール化しないカテゴリは None）
+    """
+
+    name: str
+    schema: type[BaseModel]
+    generate: Callable[[str, str, int], Awaitable[list[dict]]]
+    normalize: Callable[[str], str | None]
+
+
+def make_category(*parts: str | None) -> str:
+    """カテゴリ文字列を構築（None は空要素として扱う）"""
+    return CATEGORY_SEPARATOR.join(part or EMPTY_PART for part in parts)
+
+
+def split_category(category: str) -> list[str | None]:
+    """make_category の逆変換"""
+    return [
+        None if part == EMPTY_PART else part
+        for part in category.split(CATEGORY_SEPARATOR)
+    ]
+
+
+def pool_key(feature: str, level: str, category: str) -> str:
+    return f"{KEY_PREFIX}:{feature}:{level}:{category}"
+
+
+def _parse_pool_key(key: str) -> tuple[str, str, str]:
+    _, feature, level, category = key.split(":", 3)
+    return feature, level, category
+
+
+def _seen_key(user_id: uuid.UUID, feature: str) -> str:
+    return f"{KEY_PREFIX}:seen:{user_id}:{feature}"
+
+
+def _lock_key(key: str) -> str:
+    return f"{KEY_PREFIX}:lock:{key}"
+
+
+def content_hash(item: dict) -> str:
+    """既出判定用のコンテンツハッシュ（exercise_id を除く内容から算出）"""
+    body = {k: v for k, v in item.items() if k != "exercise_id"}
+    raw = json.dumps(body, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def _extract_items(result: dict | list) -> list[dict]:
+    items = result if isinstance(result, list) else result.get("exercises", [])
+    return [item for item in items if isinstance(item, dict)]
+
+
+# === 機能別のカテゴリ正規化（既知の値のみプール化する） ===
+
+
+def _split_parts(category: str, size: int) -> list[str | None] | None:
+    parts = split_category(category)
+    return parts if len(parts) == size else None
+
+
+def _normalize_known_set(value: str, known: dict | set) -> str | None:
+    """カンマ区切りの値を重複除去・ソートし、全て既知の値の場合のみ返す"""
+    values = sorted({v.strip() for v in value.split(",") if v.strip()})
+    if not values or any(v not in known for v in values):
+        return None
+    return ",".join(values)
+
+
+def _normalize_mogomogo(category: str) -> str | None:
+    return _normalize_known_set(category, SOUND_PATTERN_DATABASE)
+
+
+def _normalize_flash(category: str) -> str | None:
+    # フォーカスは自由入力のため、指定なし（一般的なビジネス英語）のみプール化する
+    parts = _split_parts(category, 1)
+    if parts is None or parts[0] is not None:
+        return None
+    return make_category(None)
+
+
+def _normalize_pronunciation(category: str) -> str | None:
+    parts = _split_parts(category, 2)
+    if parts is None:
+        return None
+    phonemes, exercise_type = parts
+    phonemes = _normalize_known_set(phonemes or "", JAPANESE_L1_INTERFERENCE)
+    if phonemes is None or (
+        exercise_type is not None and exercise_type not in PRONUNCIATION_EXERCISE_TYPES
+    ):
+        return None
+    return make_category(phonemes, exercise_type)
+
+
+def _normalize_shadowing(category: str) -> str | None:
+    parts = _split_parts(category, 4)
+    if parts is None:
+        return None
+    topic, difficulty, accent, environment = parts
+    if (
+        topic not in SHADOWING_TOPICS
+        or difficulty not in DIFFICULTY_GUIDANCE
+        or (accent is not None and accent not in ACCENT_VOICES)
+        or (environment is not None and environment not in AUDIO_ENVIRONMENTS)
+    ):
+        return None
+    return make_category(topic, difficulty, accent, environment)
+
+
+# === 機能別ジェネレーター（既存の build_*_prompt を使用） ===
+
+
+async def _generate_mogomogo(level: str, category: str, count: int) -> list[dict]:
+    pattern_types = [
+        pt for pt in category.split(",") if pt in SOUND_PATTERN_DATABASE
+    ] or ["linking", "reduction"]
+    result = await claude_service.chat_json(
+        messages=[
+            {
+                "role": "user",
+                "content": (
+                    f"Generate {count} connected speech exercises.\n"
+                    f"Pattern types to include: {', '.join(pattern_types)}\n"
+                    f"Target level: {level}\n\n"
+                    f"Return a JSON array of exercises."
+                ),
+            }
+        ],
+        model="haiku",
+        max_tokens=4096,
+        system=build_mogomogo_generation_prompt(pattern_types, level),
+    )
+    return [{"difficulty": level, **item} for item in _extract_items(result)]
+
+
+async def _generate_flash(level: str, category: str, count: int) -> list[dict]:
+    (focus,) = split_category(category)
+    focus_text = f"Focus area: {focus}" if focus else "General business English"
+    result = await claude_service.chat_json(
+        messages=[
+            {
+                "role": "user",
+                "content": (
+                    f"Generate {count} flash translation exercises.\n"
+                    f"Target level: {level}\n"
+                    f"{focus_text}\n\n"
+                    f"Return a JSON array of exercises."
+                ),
+            }
+        ],
+        model="haiku",
+        max_tokens=2048,
+        system=build_flash_generation_prompt(level),
+    )
+    return [{"difficulty": level, **item} for item in _extract_items(result)]
+
+
+async def _generate_pronunciation(level: str, category: str, count: int) -> list[dict]:
+    phonemes, exercise_type = split_category(category)
+    valid_phonemes = [
+        p for p in (phonemes or "").split(",") if p in JAPANESE_L1_INTERFERENCE
+    ] or ["/r/-/l/"]
+    type_filter = (
+        f"\nGenerate only '{exercise_type}' type exercises." if exercise_type else ""
+    )
+    result = await claude_service.chat_json(
+        messages=[
+            {
+                "role": "user",
+                "content": (
+                    f"Generate {count} pronunciation exercises.\n"
+                    f"Target phonemes: {', '.join(valid_phonemes)}\n"
+                    f"Target level: {level}"
+                    f"{type_filter}\n\n"
+                    f"Return a JSON array of exercises."
+                ),
+            }
+        ],
+        model="haiku",
+        max_tokens=4096,
+        system=build_pronunciation_exercise_prompt(valid_phonemes, level),
+    )
+    items = [{"difficulty": level, **item} for item in _extract_items(result)]
+    if exercise_type:
+        items = [i for i in items if i.get("exercise_type") == exercise_type]
+    return items
+
+
+async def _generate_shadowing(level: str, category: str, count: int) -> list[dict]:
+    topic, difficulty, accent, environment = split_category(category)
+    difficulty = difficulty or "intermediate"
+    result = await claude_service.chat_json(
+        messages=[
+            {
+                "role": "user",
+                "content": (
+                    f"Generate a shadowing material passage about '{topic}' "
+                    f"at {difficulty} difficulty level. "
+                    f"The user's CEFR level is {level}."
+                ),
+            }
+        ],
+        model="haiku",
+        max_tokens=1024,
+        system=build_shadowing_material_prompt(
+            topic=topic or "business_meeting",
+            difficulty=difficulty,
+            user_level=level,
+            accent=accent,
+            environment=environment or "clean",
+        ),
+    )
+    if not isinstance(result, dict) or not result.get("text"):
+        return []
+    return [shadowing_service.build_material(result, difficulty).model_dump()]
+
+
+FEATURES: dict[str, PoolFeature] = {
+    feature.name: feature
+    for feature in (
+        PoolFeature(
+            "mogomogo", MogomogoExercise, _generate_mogomogo, _normalize_mogomogo
+        ),
+        PoolFeature("flash", FlashExercise, _generate_flash, _normalize_flash),
+        PoolFeature(
+            "pronunciation",
+            PronunciationExercise,
+            _generate_pronunciation,
+            _normalize_pronunciation,
+        ),
+        PoolFeature(
+            "shadowing", ShadowingMaterial, _generate_shadowing, _normalize_shadowing
+        ),
+    )
+}
+
+
+class ContentPoolService:
+    """事前生成エクササイズプールの提供と補充"""
+
+    def __init__(
+        self,
+        low_water: int | None = None,
+        high_water: int | None = None,
+        batch_size: int | None = None,
+    ):
+        """
+        Args:
+            low_water: この件数を下回ったプールを補充対象とする
+            high_water: 補充時の目標件数
+            batch_size: 1回のLLM呼び出しで生成する件数
+        """
+        self.low_water = low_water or settings.content_pool_low_water
+        self.high_water = high_water or settings.content_pool_high_water
+        self.batch_size = batch_size or settings.content_pool_batch_size
+        self._refill_requested = asyncio.Event()
+
+    async def take(
+        self,
+        feature: str,
+        level: str,
+        category: str,
+        count: int,
+        user_id: uuid.UUID,
+    ) -> list[BaseModel]:
+        """プールからユーザー未出のエクササイズを最大 count 件取り出す
+
+        不足分は返さない（呼び出し側で従来生成する）。
+        Redis未接続時・エラー時・プール化しないレベルやカテゴリの場合は空リストを返す。
+        エラー時は取り出したアイテムをプールへ戻す（スキーマ検証に失敗したアイテムは破棄）。
+        """
+        redis_client = get_redis()
+        if redis_client is None or not settings.content_pool_enabled:
+            return []
+        spec = FEATURES[feature]
+        category = spec.normalize(category)
+        if level not in POOL_LEVELS or category is None:
+            return []
+
+        key = pool_key(feature, level, category)
+        seen_key = _seen_key(user_id, feature)
+
+        # 取り出したがまだ提供・返却していないアイテム（エラー時にプールへ戻す）
+        unserved: list[str] = []
+        try:
+            # 既出分を読み飛ばせるよう要求数の2倍まで取り出す
+            unserved = await redis_client.lpop(key, count * 2) or []
+
+            items: list[tuple[str, BaseModel]] = []
+            for raw in unserved:
+                try:
+                    items.append((raw, spec.schema.model_validate_json(raw)))
+                except ValidationError:
+                    logger.warning("コンテンツプールの不正なアイテムを破棄 (%s)", key)
+            unserved = [raw for raw, _ in items]
+
+            hashes = [content_hash(json.loads(raw)) for raw in unserved]
+            seen_flags = (
+                await redis_client.smismember(seen_key, hashes) if hashes else []
+            )
+
+            served: list[BaseModel] = []
+            served_hashes: list[str] = []
+            returned: list[str] = []
+            for (raw, item), item_hash, seen in zip(
+                items, hashes, seen_flags, strict=True
+            ):
+                if seen or len(served) >= count:
+                    returned.append(raw)
+                    continue
+                served.append(item)
+                served_hashes.append(item_hash)
+
+            pipe = redis_client.pipeline()
+            # 登録（登録済みなら最終利用時刻を更新）
+            pipe.zadd(REGISTRY_KEY, {key: time.time()})
+            if returned:
+                # 他ユーザー向けに末尾へ戻す
+                pipe.rpush(key, *returned)
+            if served_hashes:
+                pipe.sadd(seen_key, *served_hashes)
+                pipe.expire(seen_key, settings.content_pool_seen_ttl_seconds)
+            pipe.llen(key)
+            results = await pipe.execute()
+        except Exception as e:
+            logger.warning("コンテンツプール取得失敗 (%s): %s", key, e)
+            if unserved:
+                try:
+                    await redis_client.rpush(key, *unserved)
+                except Exception as push_error:
+                    logger.warning(
+                        "コンテンツプールへの返却失敗 (%s): %s", key, push_error
+                    )
+            return []
+
+        if results[-1] < self.low_water:
+            self._refill_requested.set()
+
+        logger.debug(
+            "コンテンツプール提供: %s served=%d/%d remaining=%d",
+            key,
+            len(served),
+            count,
+            results[-1],
+        )
+        return served
+
+    async def refill_pool(self, key: str) -> int:
+        """1つのプールを高水位まで補充（他プロセスが補充中ならスキップ）
+
+        Returns:
+            追加した件数
+        """
+        redis_client = get_redis()
+        if redis_client is None:
+            return 0
+
+        feature, level, category = _parse_pool_key(key)
+        spec = FEATURES.get(feature)
+        if spec is None:
+            await redis_client.zrem(REGISTRY_KEY, key)
+            return 0
+
+        size = await redis_client.llen(key)
+        if size >= self.low_water:
+            return 0
+
+        lock_key = _lock_key(key)
+        token = uuid.uuid4().hex
+        acquired = await redis_client.set(
+            lock_key, token, nx=True, ex=settings.content_pool_lock_seconds
+        )
+        if not acquired:
+            return 0
+
+        added = 0
+        try:
+            # 補充は対話リクエストの LLM 呼び出しより後に受け付ける
+            with llm_priority(PRIORITY_BACKGROUND):
+                for _ in range(settings.content_pool_max_calls_per_refill):
+                    if size + added >= self.high_water:
+                        break
+                    count = min(self.batch_size, self.high_water - size - added)
+                    items = await self._generate_validated(spec, level, category, count)
+                    if not items:
+                        break
+                    await redis_client.rpush(key, *items)
+                    added += len(items)
+        except Exception as e:
+            logger.warning("コンテンツプール補充失敗 (%s): %s", key, e)
+        finally:
+            try:
+                release = redis_client.register_script(RELEASE_LOCK_LUA)
+                await release(keys=[lock_key], args=[token])
+            except Exception as e:
+                logger.warning("コンテンツプールのロック解放失敗 (%s): %s", key, e)
+
+        if added:
+            logger.info(
+                "コンテンツプール補充: %s +%d (size=%d)", key, added, size + added
+            )
+        return added
+
+    async def refill_all(self) -> int:
+        """使われていないプールを破棄し、登録済みの全プールを補充"""
+        redis_client = get_redis()
+        if redis_client is None:
+            return 0
+
+        await self.evict_idle_pools()
+        total = 0
+        for key in await redis_client.zrange(REGISTRY_KEY, 0, -1):
+            total += await self.refill_pool(key)
+        return total
+
+    async def evict_idle_pools(self) -> int:
+        """一定期間使われていないプールと、上限を超えた古いプールを登録解除して破棄
+
+        Returns:
+            破棄したプール数
+        """
+        redis_client = get_redis()
+        if redis_client is None:
+            return 0
+
+        idle_before = time.time() - settings.content_pool_idle_seconds
+        pipe = redis_client.pipeline()
+        pipe.zrangebyscore(REGISTRY_KEY, "-inf", idle_before)
+        # 最終利用時刻の新しい順に content_pool_max_pools 件を残す
+        pipe.zrange(REGISTRY_KEY, 0, -(settings.content_pool_max_pools + 1))
+        idle, overflow = await pipe.execute()
+        evicted = sorted(set(idle) | set(overflow))
+        if not evicted:
+            return 0
+
+        pipe = redis_client.pipeline()
+        pipe.zrem(REGISTRY_KEY, *evicted)
+        pipe.delete(*evicted)
+        await pipe.execute()
+        logger.info("未使用のコンテンツプールを破棄: %d件", len(evicted))
+        return len(evicted)
+
+    async def run_worker(self) -> None:
+        """補充ワーカー（lifespan でタスクとして起動し、終了時にキャンセルする）"""
+        interval = settings.content_pool_refill_interval_seconds
+        logger.info("コンテンツプール補充ワーカー起動: interval=%.1fs", interval)
+        while True:
+            try:
+                await self.refill_all()
+            except Exception as e:
+                logger.error("コンテンツプール補充ワーカーエラー: %s", e)
+
+            self._refill_requested.clear()
+            try:
+                await asyncio.wait_for(self._refill_requested.wait(), timeout=interval)
+            except TimeoutError:
+                pass
+
+    @staticmethod
+    async def _generate_validated(
+        spec: PoolFeature, level: str, category: str, count: int
+    ) -> list[str]:
+        """生成結果をスキーマ検証し、シリアライズ済みアイテムを返す"""
+        valid: list[str] = []
+        for item in await spec.generate(level, category, count):
+            try:
+                exercise = spec.schema.model_validate(
+                    {**item, "exercise_id": str(uuid.uuid4())}
+                )
+            except ValidationError as e:
+                logger.debug("プールアイテムの検証失敗 (%s): %s", spec.name, e)
+                continue
+            valid.append(exercise.model_dump_json())
+        return valid
+
+
+# シングルトンインスタンス
+content_pool_service = ContentPoolService()
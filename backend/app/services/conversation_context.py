@@ -0,0 +1,277 @@
+"""会話コンテキスト管理 - トークン予算内での履歴構築とローリング要約
+
+会話練習(Talk)では毎ターン全履歴を送信すると、入力トークンがターン数に比例して増え続ける。
+このモジュールはメッセージごとのトークン数を推定し、次のように履歴を組み立てる:
+
+    1. 直近 K ターン（user + assistant の組）はそのまま送信する
+    2. それより古い未要約のメッセージは、予算に収まる範囲で新しい順に追加する
+    3. 未要約の古いターンが一定数たまったら、Haiku でローリング要約に畳み込む
+
+要約は応答生成のクリティカルパス外（レスポンス返却後のバックグラウンドタスク）で生成し、
+ConversationSession.context_summary に保存する。summarized_message_count には
+要約済みのメッセージ数（user/assistant のみ、作成順の先頭から）を記録し、
+次回以降は未要約の末尾だけを読み込む（要約の更新時はセッション状態キャッシュを破棄する）。
+要約はシステムプロンプトの動的部分に追加されるため、静的プレフィックスのプロンプトキャッシュは維持される。
+"""
+
+import asyncio
+import logging
+import math
+import uuid
+from dataclasses import dataclass
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.database import async_session
+from app.llm.admission import PRIORITY_BACKGROUND, llm_priority
+from app.llm.deadline import detached_from_deadline
+from app.llm.prompt_cache import SystemPrompt
+from app.models.conversation import ConversationMessage, ConversationSession
+from app.prompts.conversation import build_context_summary_prompt
+from app.services.claude_service import claude_service
+from app.services.talk_session_cache import talk_session_cache
+
+logger = logging.getLogger(__name__)
+
+# メッセージごとの固定オーバーヘッド（ロール・区切りトークン）
+MESSAGE_OVERHEAD_TOKENS = 4
+# 要約としてシステムプロンプトに追加するセクション見出し
+SUMMARY_HEADING = "## Earlier in This Conversation"
+
+
+def estimate_tokens(text: str) -> int:
+    """テキストのトークン数を推定（UTF-8で約4バイト/トークン）
+
+    英語は約4文字/トークン、日本語は1文字3バイトで約0.75トークン/文字となり、
+    主要モデルのトークナイザーとおおむね一致する。予算判定用の概算であり厳密値ではない。
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text.encode("utf-8")) / 4)
+
+
+def estimate_message_tokens(message: dict) -> int:
+    """1メッセージのトークン数を推定（本文 + ロール等のオーバーヘッド）"""
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _turn_starts(messages: list[dict]) -> list[int]:
+    """各ターンの開始位置（user メッセージのインデックス）を返す"""
+    return [i for i, m in enumerate(messages) if m["role"] == "user"]
+
+
+@dataclass
+class ConversationContext:
+    """LLMに送信する会話コンテキスト"""
+
+    system: str
+    messages: list[dict]
+    # 未要約の古いターンが要約のしきい値に達したか
+    needs_summary: bool
+    # 送信するメッセージの推定トークン数（システムプロンプト除く）
+    estimated_tokens: int
+
+
+class ConversationContextManager:
+    """トークン予算付きの会話履歴構築とローリング要約"""
+
+    def __init__(
+        self,
+        recent_turns: int = 6,
+        max_tokens: int = 3000,
+        summary_trigger_turns: int = 4,
+        summary_max_tokens: int = 400,
+    ):
+        self.recent_turns = max(1, recent_turns)
+        self.max_tokens = max_tokens
+        self.summary_trigger_turns = max(1, summary_trigger_turns)
+        self.summary_max_tokens = summary_max_tokens
+        # 実行中の要約タスク（セッションごとに1つ・GCによる中断を防ぐため参照を保持）
+        self._tasks: dict[uuid.UUID, asyncio.Task] = {}
+
+    def recent_start(self, messages: list[dict]) -> int:
+        """直近 K ターンの開始位置を返す（それより前が要約対象）"""
+        starts = _turn_starts(messages)
+        if len(starts) <= self.recent_turns:
+            return 0
+        return starts[-self.recent_turns]
+
+    def build(
+        self,
+        system: str,
+        summary: str | None,
+        messages: list[dict],
+    ) -> ConversationContext:
+        """未要約のメッセージ列からトークン予算内の会話コンテキストを構築
+
+        Args:
+            system: セッションのシステムプロンプト
+            summary: 要約済み部分のローリング要約
+            messages: 未要約のメッセージ（{"role", "content"}、作成順、user/assistant のみ）
+
+        Returns:
+            送信用の会話コンテキスト
+        """
+        start = self.recent_start(messages)
+        selected = list(messages[start:])
+        used = sum(estimate_message_tokens(m) for m in selected)
+
+        # 直近ターンだけで予算を超える場合は、最新の user メッセージを残して古いターンから削る
+        starts = _turn_starts(selected)
+        while used > self.max_tokens and len(starts) > 1:
+            dropped, selected = selected[: starts[1]], selected[starts[1] :]
+            used -= sum(estimate_message_tokens(m) for m in dropped)
+            starts = _turn_starts(selected)
+
+        # 予算に余裕があれば、古い未要約ターンを新しい順にターン単位で追加
+        older = messages[:start]
+        older_starts = _turn_starts(older)
+        end = len(older)
+        for turn_start in reversed(older_starts):
+            turn = older[turn_start:end]
+            cost = sum(estimate_message_tokens(m) for m in turn)
+            if used + cost > self.max_tokens:
+                break
+            selected = turn + selected
+            used += cost
+            end = turn_start
+
+        return ConversationContext(
+            system=self.with_summary(system, summary),
+            messages=selected,
+            needs_summary=len(older_starts) >= self.summary_trigger_turns,
+            estimated_tokens=used,
+        )
+
+    @staticmethod
+    def with_summary(system: str, summary: str | None) -> str:
+        """システムプロンプトの末尾（動的部分）に会話の要約を追加"""
+        if not summary:
+            return system
+        section = f"{SUMMARY_HEADING}\n{summary}"
+        if isinstance(system, SystemPrompt):
+            dynamic = f"{system.dynamic}\n\n{section}" if system.dynamic else section
+            return SystemPrompt(system.static, dynamic)
+        return f"{system}\n\n{section}"
+
+    def schedule_summary(self, session_id: uuid.UUID) -> None:
+        """バックグラウンドで要約を生成（同じセッションの要約が実行中なら何もしない）"""
+        task = self._tasks.get(session_id)
+        if task is not None and not task.done():
+            return
+        # 応答返却後に実行するため、リクエストの期限は引き継がない
+        with detached_from_deadline():
+            task = asyncio.create_task(self.summarize(session_id))
+        self._tasks[session_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(session_id, None))
+
+    async def wait_idle(self) -> None:
+        """実行中の要約タスクの完了を待つ（シャットダウン・テスト用）"""
+        while self._tasks:
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def summarize(self, session_id: uuid.UUID) -> bool:
+        """直近 K ターンより古い未要約メッセージをローリング要約に畳み込む
+
+        他のリクエストが同時に要約した場合は summarized_message_count の
+        楽観的ロックで検出し、結果を破棄する。
+
+        Returns:
+            要約を更新した場合 True
+        """
+        try:
+            async with async_session() as db:
+                session = await db.get(ConversationSession, session_id)
+                if session is None:
+                    return False
+                folded = session.summarized_message_count
+                previous_summary = session.context_summary
+
+                result = await db.execute(
+                    select(ConversationMessage.role, ConversationMessage.content)
+                    .where(
+                        ConversationMessage.session_id == session_id,
+                        ConversationMessage.role.in_(("user", "assistant")),
+                    )
+                    .order_by(ConversationMessage.created_at)
+                    .offset(folded)
+                )
+                messages = [
+                    {"role": role, "content": content} for role, content in result
+                ]
+
+            start = self.recent_start(messages)
+            if start == 0:
+                return False
+
+            with llm_priority(PRIORITY_BACKGROUND):
+                summary = await claude_service.chat(
+                    messages=[
+                        {
+                            "role": "user",
+                            "content": _build_summary_request(
+                                previous_summary, messages[:start]
+                            ),
+                        }
+                    ],
+                    model="haiku",
+                    max_tokens=self.summary_max_tokens,
+                    system=build_context_summary_prompt(),
+                )
+            summary = summary.strip()
+            if not summary:
+                return False
+
+            async with async_session() as db:
+                result = await db.execute(
+                    update(ConversationSession)
+                    .where(
+                        ConversationSession.id == session_id,
+                        ConversationSession.summarized_message_count == folded,
+                    )
+                    .values(
+                        context_summary=summary,
+                        summarized_message_count=folded + start,
+                    )
+                )
+                await db.commit()
+            if result.rowcount == 0:
+                logger.info("会話要約が競合したため破棄: session=%s", session_id)
+                return False
+
+            # キャッシュ中の履歴・要約は古くなるため、次のターンでDBから再構築させる
+            await talk_session_cache.invalidate(session_id)
+
+            logger.info(
+                "会話要約を更新: session=%s folded=%d total=%d",
+                session_id,
+                start,
+                folded + start,
+            )
+            return True
+        except Exception as e:
+            # 要約に失敗しても会話は継続できる（次のターンで再試行される）
+            logger.warning("会話要約の生成に失敗: session=%s error=%s", session_id, e)
+            return False
+
+
+def _build_summary_request(previous_summary: str | None, messages: list[dict]) -> str:
+    """要約モデルへの入力（現在の要約 + 畳み込むターン）を構築"""
+    transcript = "\n".join(
+        f"{'User' if m['role'] == 'user' else 'Assistant'}: {m['content']}"
+        for m in messages
+    )
+    return (
+        f"## Current Summary\n{previous_summary or '(none)'}\n\n"
+        f"## New Turns\n{transcript}"
+    )
+
+
+# シングルトンインスタンス
+conversation_context_manager = ConversationContextManager(
+    recent_turns=settings.talk_context_recent_turns,
+    max_tokens=settings.talk_context_max_tokens,
+    summary_trigger_turns=settings.talk_context_summary_trigger_turns,
+    summary_max_tokens=settings.talk_context_summary_max_tokens,
+)
@@ -12,6 +12,8 @@ from uuid import UUID
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.exceptions import LLMOverloadedError
+from app.llm.admission import PRIORITY_BACKGROUND, llm_priority
 from app.models.review import ReviewItem
 from app.models.sound_pattern import SoundPatternMastery
 from app.models.stats import DailyStat
@@ -22,6 +24,7 @@ from app.schemas.analytics import (
     FocusArea,
 )
 from app.services.claude_service import claude_service
+from app.services.stat_rollup_service import stat_rollup_service
 
 logger = logging.getLogger(__name__)
 
@@ -141,12 +144,13 @@ class CurriculumService:
         ]
 
         try:
-            result = await claude_service.chat_json(
-                messages=messages,
-                model="haiku",
-                max_tokens=2048,
-                system=system_prompt,
-            )
+            with llm_priority(PRIORITY_BACKGROUND):
+                result = await claude_service.chat_json(
+                    messages=messages,
+                    model="haiku",
+                    max_tokens=2048,
+                    system=system_prompt,
+                )
 
             activities = []
             for act in result.get("recommended_activities", []):
@@ -170,6 +174,9 @@ class CurriculumService:
                 estimated_minutes=int(result.get("estimated_minutes", 15)),
             )
 
+        except LLMOverloadedError:
+            # 混雑時は生成を待たずにフォールバックを返す
+            return self._build_fallback_menu(time_of_day, pending_reviews)
         except Exception as e:
             logger.error("日次メニュー生成エラー: %s", e)
             return self._build_fallback_menu(time_of_day, pending_reviews)
@@ -308,6 +315,7 @@ class CurriculumService:
 
         日次統計テーブルの該当フィールドを更新する。
         新しいDailyStatレコードが存在しない場合は作成する。
+        当日を含む週次・月次のロールアップ（StatRollup）も併せて更新する。
 
         Args:
             user_id: ユーザーID
@@ -387,6 +395,9 @@ class CurriculumService:
             existing.update(weak_patterns)
             daily_stat.weak_patterns = existing
 
+        # 週次・月次ロールアップを同じトランザクションで更新
+        await stat_rollup_service.apply_daily_stat(daily_stat, db)
+
         await db.commit()
 
     # --- プライベートヘルパーメソッド ---
@@ -69,6 +69,7 @@ class MogomogoService:
                 model="haiku",
                 max_tokens=4096,
                 system=system_prompt,
+                cache_namespace="mogomogo_exercises",
             )
 
             exercises_data = (
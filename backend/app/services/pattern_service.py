@@ -226,6 +226,7 @@ class PatternService:
             model="haiku",
             max_tokens=2048,
             system=system_prompt,
+            cache_namespace="pattern_exercises",
         )
 
         # リスト形式のレスポンスを処理
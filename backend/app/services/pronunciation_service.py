@@ -10,7 +10,7 @@ import uuid
 
 import httpx
 
-from app.config import settings
+from app.exceptions import AppError
 from app.prompts.pronunciation import (
     JAPANESE_L1_INTERFERENCE,
     build_pronunciation_exercise_prompt,
@@ -23,6 +23,7 @@ from app.schemas.pronunciation import (
     ProsodyExercise,
 )
 from app.services.claude_service import claude_service
+from app.services.speech_client import speech_client
 
 logger = logging.getLogger(__name__)
 
@@ -31,9 +32,7 @@ class PronunciationService:
     """発音トレーニングサービス - 音素練習と発音評価"""
 
     def __init__(self):
-        self.speech_key = settings.azure_speech_key
-        self.speech_region = settings.azure_speech_region
-        self.timeout = httpx.Timeout(30.0, connect=10.0)
+        self.timeout = 30.0
 
     async def generate_exercises(
         self,
@@ -84,6 +83,7 @@ class PronunciationService:
                 model="haiku",
                 max_tokens=4096,
                 system=system_prompt,
+                cache_namespace="pronunciation_exercises",
             )
 
             exercises_data = (
@@ -129,64 +129,35 @@ class PronunciationService:
         Returns:
             PhonemeResult: 音素評価結果
         """
-        if not self.speech_key or not self.speech_region:
+        if not speech_client.configured:
             logger.warning("Azure Speech APIキーが未設定。フォールバック評価を使用。")
             return self._fallback_evaluation(target_phoneme, reference_text)
 
-        # Azure Speech pronunciation assessment API
-        url = (
-            f"https://{self.speech_region}.stt.speech.microsoft.com/"
-            f"speech/recognition/conversation/cognitiveservices/v1"
-            f"?language=en-US"
-        )
-
-        # Pronunciation assessment設定
-        pronunciation_config = {
-            "referenceText": reference_text,
-            "gradingSystem": "HundredMark",
-            "granularity": "Phoneme",
-            "dimension": "Comprehensive",
-            "enableMiscue": True,
-        }
-
-        import base64
-        import json
-
-        config_json = json.dumps(pronunciation_config)
-        config_base64 = base64.b64encode(config_json.encode()).decode()
-
-        headers = {
-            "Ocp-Apim-Subscription-Key": self.speech_key,
-            "Content-Type": "audio/wav",
-            "Pronunciation-Assessment": config_base64,
-            "Accept": "application/json",
-        }
-
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    url,
-                    headers=headers,
-                    content=audio_data,
-                )
-
-                if response.status_code != 200:
-                    logger.error(
-                        "Azure Speech API エラー: status=%d body=%s",
-                        response.status_code,
-                        response.text,
-                    )
-                    return self._fallback_evaluation(target_phoneme, reference_text)
-
-                data = response.json()
-
-            # 発音評価結果をパース
-            return self._parse_pronunciation_result(data, target_phoneme)
-
+            data = await speech_client.assess_pronunciation(
+                audio_data,
+                reference_text,
+                granularity="Phoneme",
+                enable_prosody=False,
+                timeout=self.timeout,
+            )
+        except AppError:
+            # 音声サービスの遮断（503）はフォールバックせず呼び出し元に伝える
+            raise
+        except httpx.HTTPStatusError as e:
+            logger.error(
+                "Azure Speech API エラー: status=%d body=%s",
+                e.response.status_code,
+                e.response.text,
+            )
+            return self._fallback_evaluation(target_phoneme, reference_text)
         except Exception as e:
             logger.error("発音評価エラー: %s", e)
             return self._fallback_evaluation(target_phoneme, reference_text)
 
+        # 発音評価結果をパース
+        return self._parse_pronunciation_result(data, target_phoneme)
+
     def get_japanese_speaker_problems(self) -> list[JapaneseSpeakerPhoneme]:
         """
         日本語話者に共通するL1干渉パターンの一覧を返す
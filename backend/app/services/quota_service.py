@@ -0,0 +1,285 @@
+"""LLM利用クォータサービス - プラン別の月間上限をRedisカウンターで強制
+
+LLM呼び出しの前に reserve() で月間呼び出し回数を INCR して枠を確保し、
+プランの monthly_api_calls（stripe_service.get_plans）を超える場合は差し戻して拒否する。
+呼び出し失敗時は release() で枠を返却する。
+LLMService はリクエストの合流より前に枠を確保するため、合流したリクエストも
+呼び出し元ユーザーごとに1回として数える。
+
+制限するのは呼び出し回数のみ（プランにトークン数・コストの上限はない）。
+トークン数・推定コスト（マイクロUSD）は利用状況の表示と突き合わせのために
+呼び出し成功後に INCRBY で加算する。
+
+キーは月（UTC）単位のため、月替わりで自動的にリセットされる:
+    quota:{user_id}:{YYYYMM}:calls / :tokens / :cost_micros
+
+Redisのカウンターは定期的に api_usage_log の集計と突き合わせ（reconcile）、
+Redis再起動などで失われた分を復元する。Redis未接続時は制限しない（フェイルオープン）。
+"""
+
+import asyncio
+import logging
+import uuid
+from datetime import UTC, datetime
+
+from sqlalchemy import func, select, update
+
+from app.config import settings
+from app.database import async_session
+from app.exceptions import QuotaExceededError
+from app.llm.cost import estimate_cost
+from app.llm.usage import get_usage_plan, get_usage_user
+from app.models.api_usage import ApiUsageLog
+from app.models.user import User
+from app.redis_client import get_redis
+from app.services.stripe_service import stripe_service
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "quota"
+# 月キーの保持期間（翌月の突き合わせが終わるまで残す）
+KEY_TTL_SECONDS = 40 * 24 * 3600
+UNLIMITED = -1
+
+
+def _month_start(now: datetime | None = None) -> datetime:
+    now = now or datetime.now(UTC)
+    return now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def _month_key(now: datetime | None = None) -> str:
+    return (now or datetime.now(UTC)).strftime("%Y%m")
+
+
+def _counter_key(user_id: uuid.UUID, month: str, counter: str) -> str:
+    return f"{KEY_PREFIX}:{user_id}:{month}:{counter}"
+
+
+def _active_key(month: str) -> str:
+    """当月にLLMを利用したユーザーの集合（突き合わせ対象）"""
+    return f"{KEY_PREFIX}:active:{month}"
+
+
+class QuotaService:
+    """プラン別月間LLM利用クォータ"""
+
+    def __init__(self):
+        self._plan_limits = {
+            plan.id: plan.limits.monthly_api_calls
+            for plan in stripe_service.get_plans()
+        }
+
+    def get_monthly_limit(self, plan: str | None) -> int:
+        """プランの月間呼び出し上限（-1は無制限、不明なプランはfree扱い）"""
+        return self._plan_limits.get(plan or "free", self._plan_limits["free"])
+
+    async def reserve(self) -> str | None:
+        """現在のユーザーの月間呼び出し枠を1回分確保する
+
+        Returns:
+            確保したカウンターキー（release用）。対象外・無制限・Redis未接続時はNone
+
+        Raises:
+            QuotaExceededError: 月間上限に達している場合
+        """
+        user_id = get_usage_user()
+        redis_client = get_redis()
+        if user_id is None or redis_client is None or not settings.quota_enabled:
+            return None
+
+        plan = get_usage_plan()
+        limit = self.get_monthly_limit(plan)
+        if limit == UNLIMITED:
+            return None
+
+        month = _month_key()
+        key = _counter_key(user_id, month, "calls")
+        try:
+            pipe = redis_client.pipeline()
+            pipe.incrby(key, 1)
+            pipe.expire(key, KEY_TTL_SECONDS)
+            pipe.sadd(_active_key(month), str(user_id))
+            pipe.expire(_active_key(month), KEY_TTL_SECONDS)
+            used = (await pipe.execute())[0]
+        except Exception as e:
+            logger.warning("クォータ確認失敗（制限なしで続行）: %s", e)
+            return None
+
+        if used > limit:
+            await self._decrement(key)
+            logger.info("クォータ超過: user=%s plan=%s limit=%d", user_id, plan, limit)
+            raise QuotaExceededError(
+                details={
+                    "plan": plan or "free",
+                    "limit": limit,
+                    "used": used - 1,
+                    "resets_at": _next_month_start().isoformat(),
+                }
+            )
+        return key
+
+    async def release(self, key: str | None) -> None:
+        """確保した枠を返却（LLM呼び出しが失敗した場合）"""
+        if key is not None:
+            await self._decrement(key)
+
+    async def record_usage(
+        self,
+        user_id: uuid.UUID | None,
+        provider: str,
+        model: str,
+        input_tokens: int,
+        output_tokens: int,
+    ) -> None:
+        """成功した呼び出しのトークン数・推定コストを月間カウンターに加算"""
+        redis_client = get_redis()
+        if user_id is None or redis_client is None or not settings.quota_enabled:
+            return
+
+        cost = estimate_cost(provider, model, input_tokens, output_tokens)
+        month = _month_key()
+        tokens_key = _counter_key(user_id, month, "tokens")
+        cost_key = _counter_key(user_id, month, "cost_micros")
+        try:
+            pipe = redis_client.pipeline()
+            pipe.incrby(tokens_key, input_tokens + output_tokens)
+            pipe.incrby(cost_key, round(cost["total_cost_usd"] * 1_000_000))
+            pipe.expire(tokens_key, KEY_TTL_SECONDS)
+            pipe.expire(cost_key, KEY_TTL_SECONDS)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("クォータ使用量の加算失敗: %s", e)
+
+    async def get_usage(self, user_id: uuid.UUID) -> dict:
+        """当月の使用量カウンターを取得"""
+        redis_client = get_redis()
+        if redis_client is None:
+            return {"calls": 0, "tokens": 0, "cost_usd": 0.0}
+
+        month = _month_key()
+        pipe = redis_client.pipeline()
+        for counter in ("calls", "tokens", "cost_micros"):
+            pipe.get(_counter_key(user_id, month, counter))
+        calls, tokens, cost_micros = await pipe.execute()
+        return {
+            "calls": int(calls or 0),
+            "tokens": int(tokens or 0),
+            "cost_usd": int(cost_micros or 0) / 1_000_000,
+        }
+
+    async def reconcile(self) -> int:
+        """当月のRedisカウンターを api_usage_log の集計と突き合わせる
+
+        - Redisの値がDBより小さい（Redis再起動等で消失）場合はDBの値に引き上げる
+        - Redisの値がDBより大きい場合は、書き込み待ちのログがあり得るため維持する
+        - 月替わり後初回の対象ユーザーは users.api_usage_monthly を当月分にリセットする
+
+        Returns:
+            補正したユーザー数
+        """
+        redis_client = get_redis()
+        if redis_client is None:
+            return 0
+
+        month = _month_key()
+        month_start = _month_start()
+        user_ids = [
+            uuid.UUID(uid) for uid in await redis_client.smembers(_active_key(month))
+        ]
+        if not user_ids:
+            return 0
+
+        async with async_session() as db:
+            result = await db.execute(
+                select(
+                    ApiUsageLog.user_id,
+                    func.count(),
+                    func.sum(ApiUsageLog.input_tokens + ApiUsageLog.output_tokens),
+                    func.sum(ApiUsageLog.estimated_cost_usd),
+                )
+                .where(
+                    ApiUsageLog.user_id.in_(user_ids),
+                    ApiUsageLog.created_at >= month_start,
+                )
+                .group_by(ApiUsageLog.user_id)
+            )
+            db_usage = {
+                row[0]: (
+                    int(row[1]),
+                    int(row[2] or 0),
+                    round((row[3] or 0.0) * 1_000_000),
+                )
+                for row in result.all()
+            }
+
+            # 月替わり: 前月以前にリセットされたユーザーの月間利用回数を当月分に合わせる
+            for user_id in user_ids:
+                await db.execute(
+                    update(User)
+                    .where(
+                        User.id == user_id,
+                        (User.api_usage_reset_at.is_(None))
+                        | (User.api_usage_reset_at < month_start),
+                    )
+                    .values(
+                        api_usage_monthly=db_usage.get(user_id, (0, 0, 0))[0],
+                        api_usage_reset_at=month_start,
+                    )
+                )
+            await db.commit()
+
+        corrected = 0
+        for user_id, values in db_usage.items():
+            keys = [
+                _counter_key(user_id, month, counter)
+                for counter in ("calls", "tokens", "cost_micros")
+            ]
+            pipe = redis_client.pipeline()
+            for key in keys:
+                pipe.get(key)
+            current = await pipe.execute()
+
+            pipe = redis_client.pipeline()
+            changed = False
+            for key, redis_value, db_value in zip(keys, current, values, strict=True):
+                if int(redis_value or 0) < db_value:
+                    pipe.set(key, db_value, ex=KEY_TTL_SECONDS)
+                    changed = True
+            if changed:
+                await pipe.execute()
+                corrected += 1
+
+        if corrected:
+            logger.info("クォータカウンター補正: %d ユーザー", corrected)
+        return corrected
+
+    async def run_reconciler(self) -> None:
+        """突き合わせワーカー（lifespan でタスクとして起動し、終了時にキャンセルする）"""
+        interval = settings.quota_reconcile_interval_seconds
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error("クォータ突き合わせエラー: %s", e)
+
+    @staticmethod
+    async def _decrement(key: str) -> None:
+        redis_client = get_redis()
+        if redis_client is None:
+            return
+        try:
+            await redis_client.incrby(key, -1)
+        except Exception as e:
+            logger.warning("クォータ枠の返却失敗: %s", e)
+
+
+def _next_month_start() -> datetime:
+    start = _month_start()
+    if start.month == 12:
+        return start.replace(year=start.year + 1, month=1)
+    return start.replace(month=start.month + 1)
+
+
+# シングルトンインスタンス
+quota_service = QuotaService()
@@ -5,6 +5,7 @@ Azure TTSによる音声合成、Azure Speech SDKによる評価を統合。
 """
 
 import logging
+from collections.abc import AsyncIterator
 
 from app.prompts.shadowing import build_shadowing_material_prompt
 from app.schemas.listening import (
@@ -12,7 +13,7 @@ from app.schemas.listening import (
     ShadowingResult,
 )
 from app.services.claude_service import claude_service
-from app.services.speech_service import speech_service
+from app.services.speech_service import DEFAULT_TTS_FORMAT, speech_service
 
 logger = logging.getLogger(__name__)
 
@@ -69,18 +70,10 @@ class ShadowingService:
                 model="haiku",
                 max_tokens=1024,
                 system=system_prompt,
+                cache_namespace="shadowing_material",
             )
 
-            # 推奨速度を難易度に応じて調整
-            suggested_speeds = self._get_suggested_speeds(difficulty)
-
-            return ShadowingMaterial(
-                text=result.get("text", ""),
-                suggested_speeds=suggested_speeds,
-                key_phrases=result.get("key_phrases", []),
-                vocabulary_notes=result.get("vocabulary_notes", []),
-                difficulty=difficulty,
-            )
+            return self.build_material(result, difficulty)
 
         except (ValueError, KeyError) as e:
             logger.warning("シャドーイング教材生成でパースエラー: %s", e)
@@ -91,6 +84,16 @@ class ShadowingService:
             logger.error("シャドーイング教材生成で予期しないエラー: %s", e)
             return self._get_fallback_material(difficulty)
 
+    def build_material(self, result: dict, difficulty: str) -> ShadowingMaterial:
+        """LLMのJSON応答から教材を構築（推奨速度は難易度に応じて設定）"""
+        return ShadowingMaterial(
+            text=result.get("text", ""),
+            suggested_speeds=self._get_suggested_speeds(difficulty),
+            key_phrases=result.get("key_phrases", []),
+            vocabulary_notes=result.get("vocabulary_notes", []),
+            difficulty=difficulty,
+        )
+
     def _get_suggested_speeds(self, difficulty: str) -> list[float]:
         """難易度に応じた推奨速度リストを取得"""
         speed_configs = {
@@ -146,12 +149,13 @@ class ShadowingService:
         accent: str | None = None,
         gender: str = "female",
         environment: str = "clean",
+        audio_format: str = DEFAULT_TTS_FORMAT,
     ) -> bytes:
         """
         テキストを音声に変換（マルチアクセント・環境音対応）
 
         Azure TTSを使用して、指定された速度・アクセント・環境で
-        WAV形式の音声バイトを生成。
+        指定形式（WAV・MP3・Opus・WebM）の音声バイトを生成。
 
         Args:
             text: 変換対象テキスト
@@ -160,9 +164,10 @@ class ShadowingService:
             accent: アクセント (us, uk, india, singapore 等)
             gender: 性別 (female, male)
             environment: 環境設定 (clean, phone_call, video_call 等)
+            audio_format: 出力形式 (wav, mp3, opus, webm)
 
         Returns:
-            WAV形式の音声バイトデータ
+            音声バイトデータ
         """
         return await speech_service.text_to_speech(
             text=text,
@@ -171,6 +176,49 @@ class ShadowingService:
             accent=accent,
             gender=gender,
             environment=environment,
+            audio_format=audio_format,
+        )
+
+    def stream_audio(
+        self,
+        text: str,
+        speed: float = 1.0,
+        voice: str = "en-US-JennyMultilingualNeural",
+        accent: str | None = None,
+        gender: str = "female",
+        environment: str = "clean",
+        audio_format: str = DEFAULT_TTS_FORMAT,
+    ) -> AsyncIterator[bytes]:
+        """generate_audio() と同じ音声を Azure から届いた順に返す（ストリーミング）"""
+        return speech_service.text_to_speech_stream(
+            text=text,
+            voice=voice,
+            speed=speed,
+            accent=accent,
+            gender=gender,
+            environment=environment,
+            audio_format=audio_format,
+        )
+
+    def audio_cache_key(
+        self,
+        text: str,
+        speed: float = 1.0,
+        voice: str = "en-US-JennyMultilingualNeural",
+        accent: str | None = None,
+        gender: str = "female",
+        environment: str = "clean",
+        audio_format: str = DEFAULT_TTS_FORMAT,
+    ) -> str:
+        """generate_audio() が返す音声のキャッシュキー（ETag・音声URLに使う）"""
+        return speech_service.tts_cache_key(
+            text=text,
+            voice=voice,
+            speed=speed,
+            accent=accent,
+            gender=gender,
+            environment=environment,
+            audio_format=audio_format,
         )
 
     async def evaluate_shadowing(
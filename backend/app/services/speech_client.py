@@ -0,0 +1,339 @@
+"""Azure Speech REST API の共有クライアント
+
+TTS・発音評価（STT）の呼び出しを1つの keep-alive 対応 httpx.AsyncClient にまとめ、
+リクエストごとの TCP+TLS ハンドシェイクを省く。クライアントは main.lifespan で
+初期化・クローズされる（プロセス単位で共有、未初期化の場合は初回利用時に生成）。
+
+- 認証: サブスクリプションキーで発行したベアラートークン（有効期限約10分）を保持し、
+  期限前に更新する。各リクエストにサブスクリプションキーは送らない。
+- 同時実行数: リージョン単位のセマフォで Azure への同時リクエスト数を制限する。
+- サーキットブレーカー: 5xx・接続エラー・タイムアウトが続いた場合は一定時間
+  Azure を呼ばずに SpeechServiceUnavailableError を送出する（障害時に60秒の
+  タイムアウトを待たせない）。
+
+使用例:
+    from app.services.speech_client import speech_client
+
+    response = await speech_client.post(
+        speech_client.tts_endpoint, headers=headers, content=ssml.encode()
+    )
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from typing import Any
+
+import httpx
+
+from app.config import settings
+from app.exceptions import SpeechServiceUnavailableError
+from app.llm.resilience import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+
+def build_pronunciation_config(
+    reference_text: str,
+    granularity: str = "Word",
+    enable_prosody: bool = True,
+) -> str:
+    """発音評価の設定（Pronunciation-Assessment ヘッダーの Base64 JSON）を構築"""
+    config = {
+        "ReferenceText": reference_text,
+        "GradingSystem": "HundredMark",
+        "Granularity": granularity,
+        "Dimension": "Comprehensive",
+        "EnableMiscue": True,
+    }
+    if enable_prosody:
+        config["EnableProsodyAssessment"] = True
+    return base64.b64encode(json.dumps(config).encode("utf-8")).decode("utf-8")
+
+
+def _is_outage(exc: Exception) -> bool:
+    """サーキットブレーカーの失敗として数えるエラーか（障害を示すもののみ）"""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+class SpeechClient:
+    """Azure Speech REST API の共有クライアント（トークン認証・同時実行数制限・遮断）"""
+
+    def __init__(
+        self,
+        key: str,
+        region: str,
+        max_concurrency: int = 16,
+        timeout: float = 60.0,
+        token_refresh_seconds: float = 540.0,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        """
+        Args:
+            key: サブスクリプションキー（トークンの発行にのみ使う）
+            region: リージョン（エンドポイントのホスト名に使う）
+            max_concurrency: リージョンへの同時リクエスト数の上限
+            timeout: リクエストのタイムアウト秒数（接続は10秒）
+            token_refresh_seconds: 発行したトークンを使い続ける秒数（有効期限の10分より短くする）
+            failure_threshold: 遮断する連続失敗回数
+            recovery_timeout: 遮断してから再試行するまでの秒数
+            transport: httpx のトランスポート（テスト用）
+        """
+        self.key = key
+        self.region = region
+        self.max_concurrency = max_concurrency
+        self.timeout = httpx.Timeout(timeout, connect=10.0)
+        self.token_refresh_seconds = token_refresh_seconds
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=failure_threshold,
+            recovery_timeout=recovery_timeout,
+        )
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._in_flight = 0
+        self._token: str | None = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+        self.token_refreshes = 0
+        self.rejected = 0
+
+    # --- エンドポイント ---
+
+    @property
+    def configured(self) -> bool:
+        """キーとリージョンが設定されているか"""
+        return bool(self.key and self.region)
+
+    @property
+    def tts_endpoint(self) -> str:
+        """TTS APIエンドポイントURL"""
+        return f"https://{self.region}.tts.speech.microsoft.com/cognitiveservices/v1"
+
+    @property
+    def token_endpoint(self) -> str:
+        """トークン発行エンドポイントURL"""
+        return f"https://{self.region}.api.cognitive.microsoft.com/sts/v1.0/issueToken"
+
+    def stt_endpoint(self, language: str = "en-US") -> str:
+        """短い音声の認識（発音評価）エンドポイントURL"""
+        return (
+            f"https://{self.region}.stt.speech.microsoft.com/"
+            f"speech/recognition/conversation/cognitiveservices/v1"
+            f"?language={language}"
+        )
+
+    # --- ライフサイクル ---
+
+    def start(self) -> None:
+        """共有クライアントを生成（main.lifespan から呼ぶ）"""
+        self._get_client()
+        logger.info(
+            "Azure Speech クライアント初期化: region=%s max_concurrency=%d",
+            self.region,
+            self.max_concurrency,
+        )
+
+    async def close(self) -> None:
+        """共有クライアントをクローズ"""
+        client, self._client = self._client, None
+        self._token = None
+        self._token_expires_at = 0.0
+        if client is not None:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning("Azure Speech クライアントのクローズ失敗: %s", e)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """共有クライアントを取得（未作成・クローズ済みなら生成）"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=30.0,
+                ),
+                headers={"User-Agent": "FluentEdge-AI"},
+                transport=self._transport,
+            )
+        return self._client
+
+    # --- 認証 ---
+
+    async def _get_token(self) -> str:
+        """ベアラートークンを取得（期限が近い場合のみ発行し直す）"""
+        if self._token and time.monotonic() < self._token_expires_at:
+            return self._token
+        async with self._token_lock:
+            # ロック待ちの間に他のリクエストが更新している場合がある
+            if self._token and time.monotonic() < self._token_expires_at:
+                return self._token
+            response = await self._get_client().post(
+                self.token_endpoint,
+                headers={
+                    "Ocp-Apim-Subscription-Key": self.key,
+                    "Content-Type": "application/x-www-form-urlencoded",
+                },
+                content=b"",
+            )
+            response.raise_for_status()
+            self._token = response.text
+            self._token_expires_at = time.monotonic() + self.token_refresh_seconds
+            self.token_refreshes += 1
+            return self._token
+
+    def _invalidate_token(self, token: str) -> None:
+        """拒否されたトークンを破棄（他のリクエストが更新済みの場合はそのまま）"""
+        if self._token == token:
+            self._token = None
+            self._token_expires_at = 0.0
+
+    # --- リクエスト ---
+
+    @asynccontextmanager
+    async def _guard(self) -> AsyncIterator[None]:
+        """遮断中なら即座に失敗し、同時実行数の枠内でリクエストを実行する"""
+        if not await self.circuit_breaker.allow_request():
+            self.rejected += 1
+            raise SpeechServiceUnavailableError(self.region)
+        async with self._semaphore:
+            self._in_flight += 1
+            try:
+                yield
+            except Exception as e:
+                if _is_outage(e):
+                    await self.circuit_breaker.on_failure()
+                raise
+            else:
+                await self.circuit_breaker.on_success()
+            finally:
+                self._in_flight -= 1
+
+    async def _send(
+        self, request: httpx.Request, stream: bool = False
+    ) -> httpx.Response:
+        """トークンを付けて送信（トークン失効の 401 は1回だけ発行し直して再送）"""
+        token = await self._get_token()
+        request.headers["Authorization"] = f"Bearer {token}"
+        response = await self._get_client().send(request, stream=stream)
+        if response.status_code != 401:
+            return response
+
+        await response.aclose()
+        self._invalidate_token(token)
+        logger.info("Azure Speech トークンが拒否されたため再発行")
+        request.headers["Authorization"] = f"Bearer {await self._get_token()}"
+        return await self._get_client().send(request, stream=stream)
+
+    async def post(
+        self,
+        url: str,
+        headers: dict[str, str],
+        content: bytes,
+        timeout: float | None = None,
+    ) -> httpx.Response:
+        """POST して応答を返す（エラー応答は httpx.HTTPStatusError を送出）
+
+        Raises:
+            SpeechServiceUnavailableError: 連続障害で遮断中の場合
+        """
+        request = self._get_client().build_request(
+            "POST",
+            url,
+            headers=headers,
+            content=content,
+            timeout=self.timeout if timeout is None else timeout,
+        )
+        async with self._guard():
+            response = await self._send(request)
+            response.raise_for_status()
+            return response
+
+    @asynccontextmanager
+    async def stream(
+        self, url: str, headers: dict[str, str], content: bytes
+    ) -> AsyncIterator[httpx.Response]:
+        """POST してストリーミングで応答を受信する（受信中も同時実行数の枠を占有）
+
+        Raises:
+            SpeechServiceUnavailableError: 連続障害で遮断中の場合
+            httpx.HTTPStatusError: エラー応答の場合（本文は読み込み済み）
+        """
+        request = self._get_client().build_request(
+            "POST", url, headers=headers, content=content
+        )
+        async with self._guard():
+            response = await self._send(request, stream=True)
+            try:
+                if response.status_code != 200:
+                    await response.aread()
+                    response.raise_for_status()
+                yield response
+            finally:
+                await response.aclose()
+
+    async def assess_pronunciation(
+        self,
+        audio_data: bytes,
+        reference_text: str,
+        language: str = "en-US",
+        granularity: str = "Word",
+        enable_prosody: bool = True,
+        timeout: float | None = None,
+    ) -> dict[str, Any]:
+        """発音評価APIを呼び、応答のJSONを返す
+
+        Args:
+            audio_data: WAV形式の音声バイトデータ
+            reference_text: リファレンステキスト
+            language: 評価対象の言語コード
+            granularity: 評価の粒度（Word, Phoneme）
+            enable_prosody: 韻律も評価するか
+            timeout: タイムアウト秒数（None の場合はクライアントの既定値）
+        """
+        response = await self.post(
+            self.stt_endpoint(language),
+            headers={
+                "Content-Type": "audio/wav",
+                "Pronunciation-Assessment": build_pronunciation_config(
+                    reference_text, granularity, enable_prosody
+                ),
+                "Accept": "application/json",
+            },
+            content=audio_data,
+            timeout=timeout,
+        )
+        return response.json()
+
+    def get_stats(self) -> dict:
+        """同時実行数・遮断状態・トークン更新回数"""
+        return {
+            "region": self.region,
+            "in_flight": self._in_flight,
+            "max_concurrency": self.max_concurrency,
+            "circuit_state": self.circuit_breaker.state,
+            "rejected": self.rejected,
+            "token_refreshes": self.token_refreshes,
+        }
+
+
+# シングルトンインスタンス
+speech_client = SpeechClient(
+    key=settings.azure_speech_key,
+    region=settings.azure_speech_region,
+    max_concurrency=settings.azure_speech_max_concurrency,
+    timeout=settings.azure_speech_timeout_seconds,
+    token_refresh_seconds=settings.azure_speech_token_refresh_seconds,
+    failure_threshold=settings.azure_speech_circuit_breaker_threshold,
+    recovery_timeout=settings.azure_speech_circuit_breaker_timeout,
+)
@@ -2,12 +2,19 @@
 
 Azure Cognitive Services Speech SDK REST APIを使用して
 発音評価（Pronunciation Assessment）とテキスト読み上げ（TTS）を提供。
+Azure との通信は共有の speech_client（トークン認証・同時実行数制限・遮断）を経由する。
 マルチアクセント音声・環境音シミュレーション対応。
+TTSは WAV（非圧縮PCM）のほか MP3・Opus（Ogg / WebM）で出力でき、
+Azure のチャンク応答をそのまま転送するストリーミング合成にも対応する。
+WAV の話速（時間伸縮）と環境音（電話・ビデオ通話・オフィス等）は 1.0倍の
+クリーンな音声を1回だけ合成し、audio_effects の後処理で各音声を作る。
 """
 
-import base64
-import json
+import asyncio
+import functools
 import logging
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass
 from typing import Any
 
 import httpx
@@ -20,63 +27,79 @@ from app.prompts.accent_profiles import (
     get_voice_for_accent,
 )
 from app.schemas.listening import PronunciationResult, PronunciationWordScore
+from app.services.audio_effects import (
+    EFFECTS_VERSION,
+    apply_environment_wav,
+    supports_environment,
+    time_stretch_wav,
+)
+from app.services.speech_client import speech_client
+from app.services.tts_audio_cache import (
+    tts_audio_cache,
+    tts_cache_key,
+    variant_cache_key,
+)
 
 logger = logging.getLogger(__name__)
 
 
-class SpeechService:
-    """Azure Speech Servicesとの通信を管理するサービス"""
+@dataclass(frozen=True)
+class TTSFormat:
+    """TTSの出力形式"""
 
-    def __init__(self):
-        self.speech_key = settings.azure_speech_key
-        self.speech_region = settings.azure_speech_region
-        self.timeout = httpx.Timeout(60.0, connect=10.0)
+    # Azure の X-Microsoft-OutputFormat
+    output_format: str
+    media_type: str
+    extension: str
 
-    @property
-    def _tts_endpoint(self) -> str:
-        """TTS APIエンドポイントURL"""
-        return f"https://{self.speech_region}.tts.speech.microsoft.com/cognitiveservices/v1"
 
-    @property
-    def _token_endpoint(self) -> str:
-        """トークン取得エンドポイントURL"""
-        return f"https://{self.speech_region}.api.cognitive.microsoft.com/sts/v1.0/issueToken"
+# 出力形式（APIの format パラメータ → Azure の出力形式）
+TTS_FORMATS: dict[str, TTSFormat] = {
+    "wav": TTSFormat("riff-24khz-16bit-mono-pcm", "audio/wav", "wav"),
+    "mp3": TTSFormat("audio-24khz-48kbitrate-mono-mp3", "audio/mpeg", "mp3"),
+    "opus": TTSFormat("ogg-24khz-16bit-mono-opus", "audio/ogg", "ogg"),
+    "webm": TTSFormat("webm-24khz-16bit-mono-opus", "audio/webm", "webm"),
+}
+DEFAULT_TTS_FORMAT = "wav"
+TTS_OUTPUT_FORMAT = TTS_FORMATS[DEFAULT_TTS_FORMAT].output_format
 
-    @property
-    def _pronunciation_endpoint(self) -> str:
-        """発音評価エンドポイントURL"""
-        return (
-            f"https://{self.speech_region}.stt.speech.microsoft.com/"
-            f"speech/recognition/conversation/cognitiveservices/v1"
-            f"?language=en-US"
-        )
 
-    async def _get_auth_token(self) -> str:
-        """Azure Speech用の認証トークンを取得"""
-        async with httpx.AsyncClient(timeout=self.timeout) as client:
-            response = await client.post(
-                self._token_endpoint,
-                headers={
-                    "Ocp-Apim-Subscription-Key": self.speech_key,
-                    "Content-Type": "application/x-www-form-urlencoded",
-                },
-                content="",
-            )
-            response.raise_for_status()
-            return response.text
-
-    def _build_pronunciation_config(self, reference_text: str) -> str:
-        """発音評価の設定JSONを構築"""
-        config = {
-            "ReferenceText": reference_text,
-            "GradingSystem": "HundredMark",
-            "Granularity": "Word",
-            "Dimension": "Comprehensive",
-            "EnableMiscue": True,
-            "EnableProsodyAssessment": True,
-        }
-        config_json = json.dumps(config)
-        return base64.b64encode(config_json.encode("utf-8")).decode("utf-8")
+@dataclass(frozen=True)
+class _PostProcess:
+    """合成したWAVへの後処理（話速の変更・環境音）"""
+
+    # キャッシュキーの派生に使う処理内容（"speed=1.25" 等）
+    variant: str
+    process: Callable[[bytes], bytes]
+
+
+# キャッシュ済み音声をストリーミングで返す際のチャンクサイズ
+_STREAM_CHUNK_BYTES = 64 * 1024
+
+
+def detect_tts_format(header: bytes) -> str:
+    """音声データの先頭バイトから出力形式を判定（不明な場合は wav）"""
+    if header.startswith(b"OggS"):
+        return "opus"
+    if header.startswith(b"\x1a\x45\xdf\xa3"):
+        return "webm"
+    if header.startswith(b"ID3") or header[:1] == b"\xff":
+        return "mp3"
+    return DEFAULT_TTS_FORMAT
+
+
+def _iter_chunks(audio: bytes) -> AsyncIterator[bytes]:
+    """音声全体をストリーミング用のチャンクに分けて返す"""
+
+    async def _chunks() -> AsyncIterator[bytes]:
+        for offset in range(0, len(audio), _STREAM_CHUNK_BYTES):
+            yield audio[offset : offset + _STREAM_CHUNK_BYTES]
+
+    return _chunks()
+
+
+class SpeechService:
+    """Azure Speech Servicesとの通信を管理するサービス"""
 
     async def assess_pronunciation(
         self,
@@ -98,31 +121,10 @@ class SpeechService:
         Returns:
             PronunciationResult: 発音評価結果
         """
-        pronunciation_config = self._build_pronunciation_config(reference_text)
-
-        headers = {
-            "Ocp-Apim-Subscription-Key": self.speech_key,
-            "Content-Type": "audio/wav",
-            "Pronunciation-Assessment": pronunciation_config,
-            "Accept": "application/json",
-        }
-
-        endpoint = (
-            f"https://{self.speech_region}.stt.speech.microsoft.com/"
-            f"speech/recognition/conversation/cognitiveservices/v1"
-            f"?language={language}"
-        )
-
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    endpoint,
-                    headers=headers,
-                    content=audio_data,
-                )
-                response.raise_for_status()
-                result = response.json()
-
+            result = await speech_client.assess_pronunciation(
+                audio_data, reference_text, language=language
+            )
             return self._parse_pronunciation_result(result)
 
         except httpx.HTTPStatusError as e:
@@ -227,6 +229,102 @@ class SpeechService:
 
         return details
 
+    def _resolve_tts_ssml(
+        self,
+        text: str,
+        voice: str,
+        speed: float,
+        accent: str | None,
+        gender: str,
+        environment: str,
+    ) -> str:
+        """読み上げ条件からSSMLを構築（アクセントによる音声・言語の選択、速度の制限）"""
+        # アクセントが指定された場合、対応する音声を選択
+        if accent and accent in ACCENT_VOICES:
+            voice = get_voice_for_accent(accent, gender)
+            lang_code = get_language_code(accent)
+        else:
+            lang_code = "en-US"
+
+        # 速度を制限
+        speed = max(0.5, min(2.0, speed))
+
+        return self._build_ssml(text, voice, speed, lang_code, environment)
+
+    def _tts_source(
+        self,
+        text: str,
+        voice: str,
+        speed: float,
+        accent: str | None,
+        gender: str,
+        environment: str,
+        audio_format: str,
+    ) -> tuple[str, str, list[_PostProcess]]:
+        """合成するSSML・その音声のキャッシュキー・合成後に適用する後処理を決める
+
+        WAV では、対応範囲の話速と環境を後処理で再現し、SSML は 1.0倍・クリーンで
+        合成する（全速度・全環境で1回の合成を共有する）。それ以外は SSML に含めて合成する。
+        """
+        speed = max(0.5, min(2.0, speed))
+        steps: list[_PostProcess] = []
+        if audio_format == "wav":
+            if (
+                settings.tts_time_stretch_enabled
+                and speed != 1.0
+                and settings.tts_time_stretch_min_speed
+                <= speed
+                <= settings.tts_time_stretch_max_speed
+            ):
+                steps.append(
+                    _PostProcess(
+                        f"speed={speed:g}",
+                        functools.partial(time_stretch_wav, speed=speed),
+                    )
+                )
+                speed = 1.0
+            if settings.tts_environment_effects_enabled and supports_environment(
+                environment
+            ):
+                steps.append(
+                    _PostProcess(
+                        f"environment={environment}",
+                        functools.partial(
+                            apply_environment_wav, environment=environment
+                        ),
+                    )
+                )
+                environment = "clean"
+        ssml = self._resolve_tts_ssml(text, voice, speed, accent, gender, environment)
+        return (
+            ssml,
+            tts_cache_key(ssml, TTS_FORMATS[audio_format].output_format),
+            steps,
+        )
+
+    @staticmethod
+    def _processed_cache_key(key: str, steps: list[_PostProcess]) -> str:
+        """合成した音声（key）に steps の後処理を順に適用した音声のキャッシュキー"""
+        for step in steps:
+            key = variant_cache_key(key, f"{step.variant}:{EFFECTS_VERSION}")
+        return key
+
+    def tts_cache_key(
+        self,
+        text: str,
+        voice: str = "en-US-JennyMultilingualNeural",
+        speed: float = 1.0,
+        accent: str | None = None,
+        gender: str = "female",
+        environment: str = "clean",
+        audio_format: str = DEFAULT_TTS_FORMAT,
+    ) -> str:
+        """読み上げ条件に対応する合成済み音声のキャッシュキー（ETag にも使う）"""
+        _, key, steps = self._tts_source(
+            text, voice, speed, accent, gender, environment, audio_format
+        )
+        return self._processed_cache_key(key, steps)
+
     async def text_to_speech(
         self,
         text: str,
@@ -235,12 +333,16 @@ class SpeechService:
         accent: str | None = None,
         gender: str = "female",
         environment: str = "clean",
+        audio_format: str = DEFAULT_TTS_FORMAT,
     ) -> bytes:
         """
         テキストを音声に変換（Azure TTS）
 
-        SSML形式でリクエストを送信し、WAV形式の音声バイトを返す。
+        SSML形式でリクエストを送信し、指定形式の音声バイトを返す。
         アクセント選択・環境音シミュレーションに対応。
+        同じSSMLの音声は合成済みのものをキャッシュから返し、Azure を呼ばない。
+        WAV の話速・環境音は 1.0倍のクリーンな音声（キャッシュ済みならそれ）を
+        後処理して作る。
 
         Args:
             text: 変換対象テキスト
@@ -249,39 +351,103 @@ class SpeechService:
             accent: アクセント (us, uk, india, singapore, australia 等)
             gender: 性別 (female, male)
             environment: 環境設定 (clean, phone_call, video_call, office, cafe 等)
+            audio_format: 出力形式 (wav, mp3, opus, webm)
 
         Returns:
-            WAV形式の音声バイトデータ
+            音声バイトデータ
         """
-        # アクセントが指定された場合、対応する音声を選択
-        if accent and accent in ACCENT_VOICES:
-            voice = get_voice_for_accent(accent, gender)
-            lang_code = get_language_code(accent)
-        else:
-            lang_code = "en-US"
+        ssml, key, steps = self._tts_source(
+            text, voice, speed, accent, gender, environment, audio_format
+        )
+        output_format = TTS_FORMATS[audio_format].output_format
+        return await self._processed_audio(ssml, output_format, key, steps)
 
-        # 速度を制限
-        speed = max(0.5, min(2.0, speed))
+    async def _processed_audio(
+        self, ssml: str, output_format: str, key: str, steps: list[_PostProcess]
+    ) -> bytes:
+        """合成した音声に後処理を順に適用した音声（途中の加工結果もキャッシュする）
 
-        # SSMLを構築
-        ssml = self._build_ssml(text, voice, speed, lang_code, environment)
+        例えば 1.25倍・電話回線の音声は、1.0倍クリーン → 1.25倍クリーン → 1.25倍電話回線
+        の順に作り、それぞれをキャッシュする（他の速度・環境の組み合わせと共有できる）。
+        """
+        if not steps:
+            return await tts_audio_cache.get_or_synthesize(
+                key, lambda: self._synthesize(ssml, output_format)
+            )
+        *previous, last = steps
+
+        async def _render() -> bytes:
+            source = await self._processed_audio(ssml, output_format, key, previous)
+            # 数秒〜数十秒の音声の FFT 処理のため、イベントループを塞がないようスレッドで行う
+            return await asyncio.to_thread(last.process, source)
+
+        return await tts_audio_cache.get_or_synthesize(
+            self._processed_cache_key(key, steps), _render
+        )
 
-        headers = {
-            "Ocp-Apim-Subscription-Key": self.speech_key,
+    async def text_to_speech_stream(
+        self,
+        text: str,
+        voice: str = "en-US-JennyMultilingualNeural",
+        speed: float = 1.0,
+        accent: str | None = None,
+        gender: str = "female",
+        environment: str = "clean",
+        audio_format: str = DEFAULT_TTS_FORMAT,
+    ) -> AsyncIterator[bytes]:
+        """
+        テキストを音声に変換し、Azure から届いた順に音声データを返す（ストリーミング）
+
+        キャッシュ済みの音声はキャッシュから返す。未キャッシュの場合は Azure の
+        チャンク応答をそのまま転送し、最後まで受信できた音声をキャッシュに保存する
+        （途中で切断された場合は保存しない）。後処理で作る話速・環境音は音声全体を
+        加工してから返す。
+
+        Args:
+            text〜audio_format: text_to_speech() と同じ
+
+        Yields:
+            音声データの断片（到着順）
+        """
+        ssml, key, steps = self._tts_source(
+            text, voice, speed, accent, gender, environment, audio_format
+        )
+        output_format = TTS_FORMATS[audio_format].output_format
+
+        if steps:
+            audio = await self._processed_audio(ssml, output_format, key, steps)
+            async for chunk in _iter_chunks(audio):
+                yield chunk
+            return
+
+        cached = await tts_audio_cache.get(key)
+        if cached is not None:
+            async for chunk in _iter_chunks(cached):
+                yield chunk
+            return
+
+        chunks: list[bytes] = []
+        async for chunk in self._synthesize_stream(ssml, output_format):
+            chunks.append(chunk)
+            yield chunk
+        await tts_audio_cache.put(key, b"".join(chunks))
+
+    @staticmethod
+    def _tts_headers(output_format: str) -> dict[str, str]:
+        return {
             "Content-Type": "application/ssml+xml",
-            "X-Microsoft-OutputFormat": "riff-24khz-16bit-mono-pcm",
-            "User-Agent": "FluentEdge-AI",
+            "X-Microsoft-OutputFormat": output_format,
         }
 
+    async def _synthesize(self, ssml: str, output_format: str) -> bytes:
+        """Azure TTS でSSMLを音声に変換"""
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(
-                    self._tts_endpoint,
-                    headers=headers,
-                    content=ssml.encode("utf-8"),
-                )
-                response.raise_for_status()
-                return response.content
+            response = await speech_client.post(
+                speech_client.tts_endpoint,
+                headers=self._tts_headers(output_format),
+                content=ssml.encode("utf-8"),
+            )
+            return response.content
 
         except httpx.HTTPStatusError as e:
             logger.error(
@@ -294,6 +460,31 @@ class SpeechService:
             logger.error("TTS変換で予期しないエラー: %s", e)
             raise
 
+    async def _synthesize_stream(
+        self, ssml: str, output_format: str
+    ) -> AsyncIterator[bytes]:
+        """Azure TTS のチャンク応答を受信した順に返す"""
+        try:
+            async with speech_client.stream(
+                speech_client.tts_endpoint,
+                headers=self._tts_headers(output_format),
+                content=ssml.encode("utf-8"),
+            ) as response:
+                async for chunk in response.aiter_bytes():
+                    if chunk:
+                        yield chunk
+
+        except httpx.HTTPStatusError as e:
+            logger.error(
+                "TTS APIエラー: status=%d body=%s",
+                e.response.status_code,
+                e.response.text,
+            )
+            raise
+        except Exception as e:
+            logger.error("TTSストリーミングで予期しないエラー: %s", e)
+            raise
+
     def _build_ssml(
         self,
         text: str,
@@ -0,0 +1,283 @@
+"""学習統計ロールアップサービス - 日次統計の週次・月次集計を増分管理
+
+curriculum_service.update_curriculum が当日の DailyStat を更新するたびに、
+その日を含む週（月曜起点）と月のロールアップ行の日別スナップショットを差し替え、
+合計・平均などの集計列を再計算する（期間内は最大31日分のため書き込み時に計算しても軽量）。
+
+レポート側は get_rollups() で必要な期間の行を1クエリで取得する。
+ロールアップ行が存在しない期間（導入前のデータなど）は DailyStat から
+未保存の行を組み立てて返し、次回の書き込み時に永続化される。
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date, timedelta
+from uuid import UUID
+
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.stats import DailyStat, StatRollup
+
+logger = logging.getLogger(__name__)
+
+PERIOD_WEEK = "week"
+PERIOD_MONTH = "month"
+
+
+@dataclass
+class DaySummary:
+    """ロールアップ行に保持する1日分の統計（DailyStat と同名の属性を持つ）"""
+
+    date: date
+    practice_minutes: int = 0
+    sessions_completed: int = 0
+    reviews_completed: int = 0
+    new_expressions_learned: int = 0
+    grammar_accuracy: float | None = None
+    avg_response_time_ms: int | None = None
+    listening_speed_max: float | None = None
+    pronunciation_avg_score: float | None = None
+    weak_patterns: dict | None = None
+
+    @classmethod
+    def from_daily_stat(cls, stat: DailyStat) -> "DaySummary":
+        return cls(
+            date=stat.date,
+            practice_minutes=stat.practice_minutes,
+            sessions_completed=stat.sessions_completed,
+            reviews_completed=stat.reviews_completed,
+            new_expressions_learned=stat.new_expressions_learned,
+            grammar_accuracy=stat.grammar_accuracy,
+            avg_response_time_ms=stat.avg_response_time_ms,
+            listening_speed_max=stat.listening_speed_max,
+            pronunciation_avg_score=stat.pronunciation_avg_score,
+            weak_patterns=dict(stat.weak_patterns) if stat.weak_patterns else None,
+        )
+
+    @classmethod
+    def from_dict(cls, day: str, data: dict) -> "DaySummary":
+        return cls(date=date.fromisoformat(day), **data)
+
+    def to_dict(self) -> dict:
+        return {
+            "practice_minutes": self.practice_minutes,
+            "sessions_completed": self.sessions_completed,
+            "reviews_completed": self.reviews_completed,
+            "new_expressions_learned": self.new_expressions_learned,
+            "grammar_accuracy": self.grammar_accuracy,
+            "avg_response_time_ms": self.avg_response_time_ms,
+            "listening_speed_max": self.listening_speed_max,
+            "pronunciation_avg_score": self.pronunciation_avg_score,
+            "weak_patterns": self.weak_patterns,
+        }
+
+
+def period_start(period_type: str, day: date) -> date:
+    """日付を含む集計期間の初日（週は月曜、月は1日）"""
+    if period_type == PERIOD_WEEK:
+        return day - timedelta(days=day.weekday())
+    return day.replace(day=1)
+
+
+def period_end(period_type: str, start: date) -> date:
+    """集計期間の最終日"""
+    if period_type == PERIOD_WEEK:
+        return start + timedelta(days=6)
+    if start.month == 12:
+        return date(start.year + 1, 1, 1) - timedelta(days=1)
+    return date(start.year, start.month + 1, 1) - timedelta(days=1)
+
+
+def covering_periods(
+    period_type: str, start: date, end: date
+) -> list[tuple[str, date]]:
+    """日付範囲を覆う集計期間の (period_type, period_start) リスト"""
+    periods = []
+    current = period_start(period_type, start)
+    while current <= end:
+        periods.append((period_type, current))
+        current = period_end(period_type, current) + timedelta(days=1)
+    return periods
+
+
+def window_days(rollups: list[StatRollup], start: date, end: date) -> list[DaySummary]:
+    """複数のロールアップ行から日付範囲内の日別スナップショットを日付昇順で返す"""
+    days = [
+        day
+        for rollup in rollups
+        for day in rollup_days(rollup)
+        if start <= day.date <= end
+    ]
+    return sorted(days, key=lambda d: d.date)
+
+
+def rollup_days(rollup: StatRollup) -> list[DaySummary]:
+    """ロールアップ行の日別スナップショットを日付昇順で返す"""
+    return [
+        DaySummary.from_dict(day, data) for day, data in sorted(rollup.days.items())
+    ]
+
+
+def _mean(values: list[float]) -> float | None:
+    return sum(values) / len(values) if values else None
+
+
+def _recompute(rollup: StatRollup, days: list[DaySummary]) -> None:
+    """日別スナップショットから集計列を再計算"""
+    grammar = [d.grammar_accuracy for d in days if d.grammar_accuracy is not None]
+    pron = [
+        d.pronunciation_avg_score for d in days if d.pronunciation_avg_score is not None
+    ]
+    speeds = [d.listening_speed_max for d in days if d.listening_speed_max is not None]
+
+    rollup.days = {d.date.isoformat(): d.to_dict() for d in days}
+    rollup.practice_minutes = sum(d.practice_minutes for d in days)
+    rollup.sessions_completed = sum(d.sessions_completed for d in days)
+    rollup.reviews_completed = sum(d.reviews_completed for d in days)
+    rollup.new_expressions_learned = sum(d.new_expressions_learned for d in days)
+    rollup.active_days = len([d for d in days if d.practice_minutes > 0])
+    rollup.grammar_accuracy_avg = _mean(grammar)
+    rollup.grammar_accuracy_max = max(grammar) if grammar else None
+    rollup.pronunciation_avg = _mean(pron)
+    rollup.listening_speed_max = max(speeds) if speeds else None
+
+
+def _apply_day(rollup: StatRollup, day: DaySummary) -> None:
+    """ロールアップ行の日別スナップショットを1日分差し替えて集計列を再計算"""
+    days = [d for d in rollup_days(rollup) if d.date != day.date]
+    days.append(day)
+    days.sort(key=lambda d: d.date)
+    _recompute(rollup, days)
+
+
+class StatRollupService:
+    """週次・月次ロールアップの増分更新と取得"""
+
+    async def apply_daily_stat(self, daily_stat: DailyStat, db: AsyncSession) -> None:
+        """
+        更新された日次統計をその日を含む週次・月次ロールアップに反映
+
+        コミットは呼び出し元が日次統計と同じトランザクションで行う。
+        既存の行は行ロックを取って更新し、未作成の行はセーブポイント内で挿入する。
+        同じ期間の行を並行する書き込みが先に作成していた場合
+        （uq_stat_rollups_user_period 違反）はセーブポイントだけを巻き戻し、
+        作成済みの行に当日分を反映し直す（呼び出し元の日次統計の更新は失われない）。
+
+        Args:
+            daily_stat: 更新済みの日次統計
+            db: データベースセッション
+        """
+        periods = [
+            (period_type, period_start(period_type, daily_stat.date))
+            for period_type in (PERIOD_WEEK, PERIOD_MONTH)
+        ]
+        # 未保存のロールアップは DailyStat から組み立てるため、当日分を先に反映する
+        await db.flush()
+        rollups = await self.get_rollups(
+            daily_stat.user_id, periods, db, for_update=True
+        )
+
+        today = DaySummary.from_daily_stat(daily_stat)
+        for period_type, start in periods:
+            rollup = rollups[(period_type, start)]
+            _apply_day(rollup, today)
+            if rollup in db:
+                continue
+            try:
+                async with db.begin_nested():
+                    db.add(rollup)
+            except IntegrityError:
+                logger.info(
+                    "ロールアップ行の並行作成を検出、既存行に反映: user=%s period=%s/%s",
+                    daily_stat.user_id,
+                    period_type,
+                    start,
+                )
+                existing = await db.scalar(
+                    self._rollup_query(daily_stat.user_id, [(period_type, start)])
+                    .with_for_update()
+                    .execution_options(populate_existing=True)
+                )
+                _apply_day(existing, today)
+
+    @staticmethod
+    def _rollup_query(user_id: UUID, periods: list[tuple[str, date]]):
+        """指定期間のロールアップ行を取得するクエリ"""
+        return select(StatRollup).where(
+            StatRollup.user_id == user_id,
+            or_(
+                *(
+                    (StatRollup.period_type == period_type)
+                    & (StatRollup.period_start == start)
+                    for period_type, start in periods
+                )
+            ),
+        )
+
+    async def get_rollups(
+        self,
+        user_id: UUID,
+        periods: list[tuple[str, date]],
+        db: AsyncSession,
+        for_update: bool = False,
+    ) -> dict[tuple[str, date], StatRollup]:
+        """
+        指定期間のロールアップ行を取得（未作成の期間は DailyStat から組み立てる）
+
+        Args:
+            user_id: ユーザーID
+            periods: (period_type, period_start) のリスト
+            db: データベースセッション
+            for_update: 既存の行を更新用にロックするか（最新の値で読み直す）
+
+        Returns:
+            (period_type, period_start) -> StatRollup（未作成の期間は未保存の行）
+        """
+        query = self._rollup_query(user_id, periods)
+        if for_update:
+            query = query.with_for_update().execution_options(populate_existing=True)
+        result = await db.execute(query)
+        rollups = {(r.period_type, r.period_start): r for r in result.scalars().all()}
+
+        missing = [key for key in periods if key not in rollups]
+        if missing:
+            rollups.update(await self._build_from_daily_stats(user_id, missing, db))
+        return rollups
+
+    async def _build_from_daily_stats(
+        self,
+        user_id: UUID,
+        periods: list[tuple[str, date]],
+        db: AsyncSession,
+    ) -> dict[tuple[str, date], StatRollup]:
+        """DailyStat から未保存のロールアップ行を組み立てる（1クエリ）"""
+        range_start = min(start for _, start in periods)
+        range_end = max(
+            period_end(period_type, start) for period_type, start in periods
+        )
+        result = await db.execute(
+            select(DailyStat)
+            .where(
+                DailyStat.user_id == user_id,
+                DailyStat.date >= range_start,
+                DailyStat.date <= range_end,
+            )
+            .order_by(DailyStat.date.asc())
+        )
+        days = [DaySummary.from_daily_stat(s) for s in result.scalars().all()]
+
+        rollups = {}
+        for period_type, start in periods:
+            end = period_end(period_type, start)
+            rollup = StatRollup(
+                user_id=user_id, period_type=period_type, period_start=start
+            )
+            _recompute(rollup, [d for d in days if start <= d.date <= end])
+            rollups[(period_type, start)] = rollup
+        return rollups
+
+
+# シングルトンインスタンス
+stat_rollup_service = StatRollupService()
@@ -20,6 +20,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 from app.models.subscription import Subscription
 from app.models.user import User
+from app.principal_cache import principal_cache
 from app.schemas.subscription import (
     CheckoutSessionResponse,
     PlanFeature,
@@ -708,6 +709,7 @@ class StripeService:
             user.subscription_plan = plan
 
         await db.commit()
+        await principal_cache.invalidate_user(user_id)
         logger.info("チェックアウト完了: user=%s plan=%s", user_id, plan)
 
     async def _handle_subscription_updated(self, data: dict, db: AsyncSession) -> None:
@@ -773,6 +775,7 @@ class StripeService:
             user.subscription_plan = "free"
 
         await db.commit()
+        await principal_cache.invalidate_user(sub.user_id)
         logger.info("サブスクリプション削除: user=%s", sub.user_id)
 
 
@@ -0,0 +1,226 @@
+"""会話セッション状態キャッシュ - アクティブなTalkセッションの状態をRedisに保持
+
+/api/talk/message は毎ターン、セッション行と未要約メッセージの読み込み・シナリオの復元・
+システムプロンプトの構築を行っていた。アクティブなセッションではこれらをRedisに保持し、
+1ターンあたり「キャッシュ読み込み1回 + 追記1回」で済ませる。
+
+キー:
+    talk:session:{session_id}          Hash（所有ユーザー・モード・シナリオ・要約・
+                                        コンパイル済みシステムプロンプト）
+    talk:session:{session_id}:history  List（未要約メッセージのJSON、作成順）
+
+書き込みはDBへのコミット後にキャッシュへ追記する（DBが正、キャッシュは追記のみ）。
+どちらのキーも読み書きのたびにTTLを延長し、アイドル状態が続いたセッションは自動的に破棄される。
+要約の更新時は invalidate() で破棄し、次のターンでDBから再構築する。
+Hash が存在しない場合はミス扱いとし、put() で履歴リストごと作り直す。
+Redis未接続・エラー時はミスとして扱い、呼び出し側はDBから読み込む。
+"""
+
+import json
+import logging
+import uuid
+from dataclasses import dataclass, field
+
+from app.config import settings
+from app.llm.prompt_cache import SystemPrompt
+from app.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "talk:session"
+
+
+@dataclass
+class TalkSessionState:
+    """アクティブな会話セッションの状態"""
+
+    session_id: uuid.UUID
+    user_id: uuid.UUID
+    mode: str
+    scenario_description: str | None
+    scenario: dict | None
+    # 要約済み部分のローリング要約
+    summary: str | None
+    # 未要約のメッセージ（{"role", "content"}、作成順、user/assistant のみ）
+    history: list[dict] = field(default_factory=list)
+    # コンパイル済みシステムプロンプトと、その構築に使ったユーザー設定のキー
+    system_prompt: str = ""
+    prompt_key: str = ""
+
+
+class TalkSessionCache:
+    """アクティブな会話セッション状態のRedisキャッシュ"""
+
+    def __init__(self, enabled: bool = True, idle_ttl_seconds: int = 1800):
+        """
+        Args:
+            enabled: キャッシュを使用するか
+            idle_ttl_seconds: 最後のアクセスからセッション状態を破棄するまでの秒数
+        """
+        self.enabled = enabled
+        self.idle_ttl_seconds = idle_ttl_seconds
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _state_key(session_id: uuid.UUID) -> str:
+        return f"{KEY_PREFIX}:{session_id}"
+
+    @staticmethod
+    def _history_key(session_id: uuid.UUID) -> str:
+        return f"{KEY_PREFIX}:{session_id}:history"
+
+    async def get(self, session_id: uuid.UUID) -> TalkSessionState | None:
+        """セッション状態を取得し、アイドルTTLを延長（ミス時はNone）"""
+        redis_client = get_redis() if self.enabled else None
+        if redis_client is None:
+            return None
+
+        state_key = self._state_key(session_id)
+        history_key = self._history_key(session_id)
+        try:
+            pipe = redis_client.pipeline()
+            pipe.hgetall(state_key)
+            pipe.lrange(history_key, 0, -1)
+            pipe.expire(state_key, self.idle_ttl_seconds)
+            pipe.expire(history_key, self.idle_ttl_seconds)
+            fields, history, _, _ = await pipe.execute()
+            if not fields:
+                self.misses += 1
+                return None
+            state = self._deserialize(session_id, fields, history)
+        except Exception as e:
+            logger.warning("会話セッション状態の取得に失敗: %s", e)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return state
+
+    async def put(self, state: TalkSessionState) -> None:
+        """セッション状態を保存（既存の状態・履歴は置き換える）"""
+        redis_client = get_redis() if self.enabled else None
+        if redis_client is None:
+            return
+
+        state_key = self._state_key(state.session_id)
+        history_key = self._history_key(state.session_id)
+        try:
+            pipe = redis_client.pipeline()
+            pipe.delete(state_key, history_key)
+            pipe.hset(state_key, mapping=self._serialize(state))
+            if state.history:
+                pipe.rpush(history_key, *(json.dumps(m) for m in state.history))
+            pipe.expire(state_key, self.idle_ttl_seconds)
+            pipe.expire(history_key, self.idle_ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning("会話セッション状態の保存に失敗: %s", e)
+
+    async def append(self, session_id: uuid.UUID, *messages: dict) -> None:
+        """DBにコミット済みのメッセージを履歴に追記"""
+        redis_client = get_redis() if self.enabled else None
+        if redis_client is None or not messages:
+            return
+
+        history_key = self._history_key(session_id)
+        try:
+            pipe = redis_client.pipeline()
+            pipe.rpush(history_key, *(json.dumps(m) for m in messages))
+            pipe.expire(history_key, self.idle_ttl_seconds)
+            await pipe.execute()
+        except Exception as e:
+            # 追記に失敗した状態を残すと履歴が欠けるため破棄する
+            logger.warning("会話履歴の追記に失敗: %s", e)
+            await self.invalidate(session_id)
+
+    async def set_system_prompt(
+        self, session_id: uuid.UUID, prompt_key: str, system_prompt: str
+    ) -> None:
+        """ユーザー設定の変更で再構築したシステムプロンプトを保存"""
+        redis_client = get_redis() if self.enabled else None
+        if redis_client is None:
+            return
+
+        try:
+            await redis_client.hset(
+                self._state_key(session_id),
+                mapping={"prompt_key": prompt_key, **_dump_prompt(system_prompt)},
+            )
+        except Exception as e:
+            logger.warning("システムプロンプトの保存に失敗: %s", e)
+
+    async def invalidate(self, session_id: uuid.UUID) -> None:
+        """セッション状態を破棄（要約の更新時など）"""
+        redis_client = get_redis() if self.enabled else None
+        if redis_client is None:
+            return
+
+        try:
+            await redis_client.delete(
+                self._state_key(session_id), self._history_key(session_id)
+            )
+        except Exception as e:
+            logger.warning("会話セッション状態の破棄に失敗: %s", e)
+
+    def get_stats(self) -> dict:
+        """ヒット率の統計"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+    @staticmethod
+    def _serialize(state: TalkSessionState) -> dict:
+        return {
+            "user_id": str(state.user_id),
+            "mode": state.mode,
+            "scenario_description": state.scenario_description or "",
+            "scenario": json.dumps(state.scenario) if state.scenario else "",
+            "summary": state.summary or "",
+            "prompt_key": state.prompt_key,
+            **_dump_prompt(state.system_prompt),
+        }
+
+    @staticmethod
+    def _deserialize(
+        session_id: uuid.UUID, fields: dict, history: list[str]
+    ) -> TalkSessionState:
+        return TalkSessionState(
+            session_id=session_id,
+            user_id=uuid.UUID(fields["user_id"]),
+            mode=fields["mode"],
+            scenario_description=fields.get("scenario_description") or None,
+            scenario=json.loads(fields["scenario"]) if fields.get("scenario") else None,
+            summary=fields.get("summary") or None,
+            history=[json.loads(m) for m in history],
+            system_prompt=_load_prompt(fields),
+            prompt_key=fields.get("prompt_key", ""),
+        )
+
+
+def _dump_prompt(system_prompt: str) -> dict:
+    """システムプロンプトを静的部分・動的部分に分けてHashフィールド化"""
+    if isinstance(system_prompt, SystemPrompt):
+        return {
+            "system_static": system_prompt.static,
+            "system_dynamic": system_prompt.dynamic,
+        }
+    return {"system_static": system_prompt, "system_dynamic": ""}
+
+
+def _load_prompt(fields: dict) -> str:
+    """Hashフィールドからシステムプロンプトを復元（静的プレフィックスを保持）"""
+    return SystemPrompt(
+        fields.get("system_static", ""), fields.get("system_dynamic", "")
+    )
+
+
+# シングルトンインスタンス
+talk_session_cache = TalkSessionCache(
+    enabled=settings.talk_session_cache_enabled,
+    idle_ttl_seconds=settings.talk_session_cache_idle_seconds,
+)
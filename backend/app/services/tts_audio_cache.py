@@ -0,0 +1,334 @@
+"""TTS音声キャッシュ - 合成済み音声をコンテンツアドレスで保存
+
+Azure TTS の出力は SSML（テキスト・音声・速度・言語・環境エフェクト）と出力形式だけで
+決まるため、その組のハッシュをキーに合成済み音声を保存し、同じ読み上げ要求では
+Azure を呼ばずに保存済みの音声を返す。例文（SOUND_PATTERN_DATABASE・BUSINESS_PATTERNS・
+シナリオのキーフレーズ）のように繰り返し要求される音声は初回以降ディスクから配信される。
+
+キーは内容から決まるため HTTP の ETag としてそのまま使え、キーで参照する音声は不変
+（Cache-Control: immutable）として配信できる。同じキーの合成が同時に要求された場合は
+1回だけ Azure を呼び、他の要求はその結果を待つ（ワーカー内）。
+
+保存先は AudioStore で抽象化する。LocalDiskAudioStore はディレクトリに保存し、
+合計サイズが上限を超えると最終アクセスの古い順に削除する（LRU）。
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# キャッシュキーの形式を変えた場合に古い音声を参照しないためのバージョン
+CACHE_KEY_VERSION = "v1"
+
+
+def tts_cache_key(ssml: str, output_format: str) -> str:
+    """SSML と出力形式からキャッシュキー（SHA-256 の16進文字列）を求める"""
+    payload = f"{CACHE_KEY_VERSION}\n{output_format}\n{ssml}".encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def variant_cache_key(base_key: str, variant: str) -> str:
+    """キャッシュ済み音声を加工した音声（環境音の後処理等）のキャッシュキー"""
+    payload = f"{CACHE_KEY_VERSION}\n{base_key}\n{variant}".encode()
+    return hashlib.sha256(payload).hexdigest()
+
+
+def is_cache_key(value: str) -> bool:
+    """キャッシュキーの形式（SHA-256 の16進文字列）か"""
+    return len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+
+class AudioStore(ABC):
+    """合成済み音声の保存先（ローカルディスク・オブジェクトストレージ等）"""
+
+    @abstractmethod
+    async def size(self, key: str) -> int | None:
+        """保存済み音声のバイト数（未保存の場合は None）"""
+        ...
+
+    @abstractmethod
+    async def read(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> bytes | None:
+        """保存済み音声の start〜end バイト目（end を含む）を読み込む
+
+        Returns:
+            音声データ（end が None の場合は末尾まで）。未保存の場合は None
+        """
+        ...
+
+    @abstractmethod
+    async def write(self, key: str, data: bytes) -> None:
+        """音声を保存（同じキーの既存データは置き換える）"""
+        ...
+
+    def get_stats(self) -> dict:
+        """保存先の統計"""
+        return {}
+
+
+class LocalDiskAudioStore(AudioStore):
+    """ローカルディスクの音声保存先 - 合計サイズの上限を超えたら LRU で削除
+
+    ファイルの mtime を最終アクセス時刻として扱い、読み込みのたびに更新する。
+    書き込みは一時ファイルからの rename で行うため、読み込み側が書きかけの
+    ファイルを参照することはない（ワーカー間で同じディレクトリを共有できる）。
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        """
+        Args:
+            directory: 保存先ディレクトリ（存在しない場合は作成する）
+            max_bytes: 保存する音声の合計サイズの上限
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._total_bytes: int | None = None
+        self._lock = asyncio.Lock()
+
+    def _path(self, key: str) -> Path:
+        # キーの先頭2文字でディレクトリを分け、1ディレクトリのファイル数を抑える
+        return self.directory / key[:2] / key
+
+    async def size(self, key: str) -> int | None:
+        return await asyncio.to_thread(self._size_sync, key)
+
+    async def read(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> bytes | None:
+        return await asyncio.to_thread(self._read_sync, key, start, end)
+
+    async def write(self, key: str, data: bytes) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._write_sync, key, data)
+
+    def _size_sync(self, key: str) -> int | None:
+        try:
+            return self._path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def _read_sync(self, key: str, start: int, end: int | None) -> bytes | None:
+        path = self._path(key)
+        try:
+            with path.open("rb") as f:
+                f.seek(start)
+                data = f.read() if end is None else f.read(end - start + 1)
+            # 最終アクセス時刻（LRU の順序）を更新
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return data
+
+    def _write_sync(self, key: str, data: bytes) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        previous = self._size_sync(key) or 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            Path(tmp_path).unlink(missing_ok=True)
+            raise
+
+        if self._total_bytes is None:
+            self._total_bytes = self._scan_total()
+        else:
+            self._total_bytes += len(data) - previous
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries: list[tuple[float, int, Path]] = []
+        if not self.directory.exists():
+            return entries
+        for bucket in self.directory.iterdir():
+            if not bucket.is_dir():
+                continue
+            for path in bucket.iterdir():
+                if path.name.startswith(".tmp-"):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _scan_total(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        """最終アクセスの古い順に削除し、合計を上限の90%以下にする
+
+        他のワーカーも同じディレクトリに書き込むため、削除前にディレクトリを走査して
+        実際の合計サイズを求め直す。
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for _, size, path in entries:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.evictions += 1
+        self._total_bytes = total
+        logger.info("TTS音声キャッシュを削減: 合計=%dバイト", total)
+
+    def get_stats(self) -> dict:
+        return {
+            "total_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class TTSAudioCache:
+    """合成済みTTS音声のキャッシュ"""
+
+    def __init__(self, store: AudioStore, enabled: bool = True):
+        """
+        Args:
+            store: 音声の保存先
+            enabled: キャッシュを使用するか（無効時は毎回合成する）
+        """
+        self.store = store
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        # key -> (成功したか, 音声 / 合成時の例外 / 中断時は None)
+        self._inflight: dict[
+            str, asyncio.Future[tuple[bool, bytes | Exception | None]]
+        ] = {}
+
+    async def get_or_synthesize(
+        self, key: str, synthesize: Callable[[], Awaitable[bytes]]
+    ) -> bytes:
+        """キャッシュ済みの音声を返し、なければ合成して保存する
+
+        保存先の読み書きに失敗した場合は合成結果をそのまま返す（キャッシュは省略）。
+        同じ音声の合成を待っている間に合成した要求が中断（クライアント切断など）された
+        場合、待機していた要求は自身で合成し直す。
+
+        Args:
+            key: tts_cache_key() で求めたキャッシュキー
+            synthesize: 音声を合成する関数（キャッシュミス時のみ呼ぶ）
+        """
+        if not self.enabled:
+            return await synthesize()
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            cached = await self.read(key)
+            if cached is not None:
+                self.hits += 1
+                return cached
+            # 読み込み待ちの間に他の要求が合成を始めている場合がある
+            inflight = self._inflight.get(key)
+        if inflight is not None:
+            # 同じ音声を合成中: 結果を共有する
+            ok, result = await asyncio.shield(inflight)
+            if ok:
+                self.hits += 1
+                return result
+            if result is not None:
+                raise result
+            # 合成した要求が中断された: 待機していた要求の1つが合成し直す
+            return await self.get_or_synthesize(key, synthesize)
+
+        self.misses += 1
+        future: asyncio.Future[tuple[bool, bytes | Exception | None]] = (
+            asyncio.get_running_loop().create_future()
+        )
+        self._inflight[key] = future
+        try:
+            audio = await synthesize()
+            await self.put(key, audio)
+            future.set_result((True, audio))
+            return audio
+        except Exception as e:
+            future.set_result((False, e))
+            raise
+        except BaseException:
+            # 中断は待機中の要求には伝えない（待機者は自身で合成し直す）
+            future.set_result((False, None))
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def get(self, key: str) -> bytes | None:
+        """キャッシュ済みの音声を取得（ミス・無効時は None）"""
+        if not self.enabled:
+            return None
+        cached = await self.read(key)
+        if cached is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return cached
+
+    async def put(self, key: str, audio: bytes) -> None:
+        """合成した音声を保存（失敗しても例外は送出しない）"""
+        if not self.enabled or not audio:
+            return
+        try:
+            await self.store.write(key, audio)
+        except Exception as e:
+            logger.warning("TTS音声キャッシュの保存に失敗: %s", e)
+
+    async def size(self, key: str) -> int | None:
+        """キャッシュ済み音声のバイト数（未保存・無効時は None）"""
+        if not self.enabled:
+            return None
+        try:
+            return await self.store.size(key)
+        except Exception as e:
+            logger.warning("TTS音声キャッシュの参照に失敗: %s", e)
+            return None
+
+    async def read(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> bytes | None:
+        """キャッシュ済み音声の一部（end を含む）を読み込む（未保存・無効時は None）"""
+        if not self.enabled:
+            return None
+        try:
+            return await self.store.read(key, start, end)
+        except Exception as e:
+            logger.warning("TTS音声キャッシュの読み込みに失敗: %s", e)
+            return None
+
+    def get_stats(self) -> dict:
+        """ヒット率と保存先の統計"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            **self.store.get_stats(),
+        }
+
+
+# シングルトンインスタンス
+tts_audio_cache = TTSAudioCache(
+    store=LocalDiskAudioStore(
+        directory=settings.tts_cache_dir,
+        max_bytes=settings.tts_cache_max_bytes,
+    ),
+    enabled=settings.tts_cache_enabled,
+)
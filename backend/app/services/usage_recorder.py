@@ -0,0 +1,154 @@
+"""API利用ログの非同期記録 - バッチ書き込み（write-behind）キュー
+
+LLM呼び出しごとの使用量をメモリ上のキューに積み、バックグラウンドタスクが
+まとめて api_usage_log へ一括INSERTし、users.api_usage_monthly をユーザー単位で加算する。
+LLM呼び出しのレイテンシにDBラウンドトリップを追加しない。
+
+キューが満杯の場合は記録を破棄して警告を出す（LLM呼び出しはブロックしない）。
+"""
+
+import asyncio
+import contextlib
+import logging
+import uuid
+from collections import Counter
+
+from sqlalchemy import insert, update
+
+from app.config import settings
+from app.database import async_session
+from app.llm.cost import estimate_cost
+from app.models.api_usage import ApiUsageLog
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+class UsageRecorder:
+    """API利用ログのバッチ書き込みキュー"""
+
+    def __init__(
+        self,
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+        max_queue_size: int | None = None,
+    ):
+        """
+        Args:
+            batch_size: 1回のINSERTでまとめる最大件数
+            flush_interval: バッチが満たなくても書き込むまでの最大待機時間（秒）
+            max_queue_size: キューの最大長（超過分は破棄）
+        """
+        self.batch_size = batch_size or settings.usage_log_batch_size
+        self.flush_interval = flush_interval or settings.usage_log_flush_interval
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(
+            maxsize=max_queue_size or settings.usage_log_max_queue_size
+        )
+        self._task: asyncio.Task | None = None
+        self.dropped = 0
+
+    def record(
+        self,
+        user_id: uuid.UUID | None,
+        provider: str,
+        model: str,
+        model_name: str,
+        input_tokens: int,
+        output_tokens: int,
+    ) -> None:
+        """使用量をキューに追加（ノンブロッキング）
+
+        Args:
+            user_id: 利用ユーザー（Noneの場合はバックグラウンド処理として記録しない）
+            provider: 実際に応答したプロバイダー名
+            model: モデルエイリアス（コスト計算用）
+            model_name: 実際のモデルID
+            input_tokens: 入力トークン数
+            output_tokens: 出力トークン数
+        """
+        if user_id is None:
+            return
+
+        cost = estimate_cost(provider, model, input_tokens, output_tokens)
+        entry = {
+            "user_id": user_id,
+            "api_provider": provider,
+            "model_name": model_name[:100],
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "estimated_cost_usd": cost["total_cost_usd"],
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logger.warning(
+                "API利用ログキューが満杯のため破棄: dropped=%d", self.dropped
+            )
+
+    def start(self) -> None:
+        """書き込みタスクを開始"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """書き込みタスクを停止し、残りのログを書き込む"""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        while not self._queue.empty():
+            await self.flush()
+
+    async def flush(self) -> int:
+        """キュー内のログを最大 batch_size 件書き込む
+
+        Returns:
+            書き込んだ件数
+        """
+        batch: list[dict] = []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if batch:
+            await self._write(batch)
+        return len(batch)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            try:
+                while len(batch) < self.batch_size:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except TimeoutError:
+                        break
+            finally:
+                # 停止（キャンセル）時も取り出し済みのログは書き込む
+                await self._write(batch)
+
+    @staticmethod
+    async def _write(batch: list[dict]) -> None:
+        """一括INSERTと月間利用回数の加算を1トランザクションで実行"""
+        calls_per_user = Counter(entry["user_id"] for entry in batch)
+        try:
+            async with async_session() as db:
+                await db.execute(insert(ApiUsageLog), batch)
+                for user_id, calls in calls_per_user.items():
+                    await db.execute(
+                        update(User)
+                        .where(User.id == user_id)
+                        .values(api_usage_monthly=User.api_usage_monthly + calls)
+                    )
+                await db.commit()
+        except Exception as e:
+            logger.error("API利用ログの書き込み失敗 (%d件): %s", len(batch), e)
+
+
+# シングルトンインスタンス
+usage_recorder = UsageRecorder()
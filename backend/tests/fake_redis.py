@@ -0,0 +1,237 @@
+"""テスト用インメモリRedis - redis.asyncio.Redis のうちアプリが使用するコマンドのみ実装
+
+decode_responses=True 相当（値は文字列として保持）。TTLは保持するが期限切れ処理は行わない。
+Luaスクリプトは実行できないため、テストが scripts にスクリプト本文 -> Python実装
+（keys, args を受け取る非同期関数）を登録して register_script() の結果として使う。
+
+使用例:
+    fake = FakeRedis()
+    with patch("app.redis_client._redis_client", fake):
+        ...
+"""
+
+import asyncio
+
+
+class FakePipeline:
+    """コマンドをキューに溜め、execute() で順に実行する"""
+
+    def __init__(self, redis: "FakeRedis"):
+        self._redis = redis
+        self._calls: list[tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs):
+            self._calls.append((name, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self) -> list:
+        results = []
+        for name, args, kwargs in self._calls:
+            results.append(await getattr(self._redis, name)(*args, **kwargs))
+        self._calls.clear()
+        return results
+
+
+class FakePubSub:
+    """購読したチャネルへの publish をキューで受け取る"""
+
+    def __init__(self, redis: "FakeRedis"):
+        self._redis = redis
+        self._queue: asyncio.Queue[dict] = asyncio.Queue()
+        self.channels: set[str] = set()
+
+    async def subscribe(self, *channels: str) -> None:
+        self.channels.update(channels)
+        self._redis.subscribers.add(self)
+
+    async def unsubscribe(self, *channels: str) -> None:
+        self.channels.difference_update(channels or set(self.channels))
+
+    async def get_message(
+        self, ignore_subscribe_messages: bool = False, timeout: float | None = 0.0
+    ):
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except TimeoutError:
+            return None
+
+    async def aclose(self) -> None:
+        self._redis.subscribers.discard(self)
+
+
+class FakeRedis:
+    """インメモリRedis"""
+
+    def __init__(self):
+        self.data: dict = {}
+        self.ttls: dict[str, int] = {}
+        self.scripts: dict = {}
+        self.subscribers: set[FakePubSub] = set()
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def ping(self) -> bool:
+        return True
+
+    # === Pub/Sub ===
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self)
+
+    async def publish(self, channel: str, message) -> int:
+        receivers = [s for s in self.subscribers if channel in s.channels]
+        for subscriber in receivers:
+            subscriber._queue.put_nowait(
+                {"type": "message", "channel": channel, "data": str(message)}
+            )
+        return len(receivers)
+
+    def register_script(self, script: str):
+        impl = self.scripts[script]
+
+        async def run(keys=(), args=(), client=None):
+            return await impl(self, list(keys), list(args))
+
+        return run
+
+    # === String ===
+
+    async def get(self, key: str):
+        return self.data.get(key)
+
+    async def set(self, key: str, value, ex: int | None = None, nx: bool = False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        if ex is not None:
+            self.ttls[key] = ex
+        return True
+
+    async def incrby(self, key: str, amount: int = 1) -> int:
+        value = int(self.data.get(key, 0)) + amount
+        self.data[key] = str(value)
+        return value
+
+    async def delete(self, *keys: str) -> int:
+        removed = 0
+        for key in keys:
+            if self.data.pop(key, None) is not None:
+                removed += 1
+            self.ttls.pop(key, None)
+        return removed
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        if key not in self.data:
+            return False
+        self.ttls[key] = seconds
+        return True
+
+    # === List ===
+
+    async def rpush(self, key: str, *values) -> int:
+        items = self.data.setdefault(key, [])
+        items.extend(str(v) for v in values)
+        return len(items)
+
+    async def lpush(self, key: str, *values) -> int:
+        items = self.data.setdefault(key, [])
+        for value in values:
+            items.insert(0, str(value))
+        return len(items)
+
+    async def lpop(self, key: str, count: int | None = None):
+        items = self.data.get(key)
+        if not items:
+            return None
+        if count is None:
+            return items.pop(0)
+        popped, self.data[key] = items[:count], items[count:]
+        return popped
+
+    async def llen(self, key: str) -> int:
+        return len(self.data.get(key, []))
+
+    async def lrange(self, key: str, start: int, end: int) -> list:
+        items = self.data.get(key, [])
+        return items[start : None if end == -1 else end + 1]
+
+    # === Set ===
+
+    async def sadd(self, key: str, *members) -> int:
+        members_set = self.data.setdefault(key, set())
+        before = len(members_set)
+        members_set.update(str(m) for m in members)
+        return len(members_set) - before
+
+    async def srem(self, key: str, *members) -> int:
+        members_set = self.data.get(key, set())
+        before = len(members_set)
+        members_set.difference_update(str(m) for m in members)
+        return before - len(members_set)
+
+    async def smembers(self, key: str) -> set:
+        return set(self.data.get(key, set()))
+
+    async def smismember(self, key: str, members: list) -> list[int]:
+        members_set = self.data.get(key, set())
+        return [1 if str(m) in members_set else 0 for m in members]
+
+    async def scard(self, key: str) -> int:
+        return len(self.data.get(key, set()))
+
+    # === Sorted Set ===
+
+    async def zadd(self, key: str, mapping: dict) -> int:
+        scores = self.data.setdefault(key, {})
+        added = len([m for m in mapping if str(m) not in scores])
+        scores.update({str(m): float(score) for m, score in mapping.items()})
+        return added
+
+    async def zrem(self, key: str, *members) -> int:
+        scores = self.data.get(key, {})
+        return len([m for m in members if scores.pop(str(m), None) is not None])
+
+    async def zscore(self, key: str, member):
+        return self.data.get(key, {}).get(str(member))
+
+    async def zcard(self, key: str) -> int:
+        return len(self.data.get(key, {}))
+
+    async def zrange(self, key: str, start: int, end: int) -> list:
+        ordered = sorted(self.data.get(key, {}).items(), key=lambda i: (i[1], i[0]))
+        members = [m for m, _ in ordered]
+        end = len(members) + end if end < 0 else end
+        return members[start : end + 1] if end >= 0 else []
+
+    async def zrangebyscore(self, key: str, min, max) -> list:
+        low, high = float(min), float(max)
+        ordered = sorted(self.data.get(key, {}).items(), key=lambda i: (i[1], i[0]))
+        return [m for m, score in ordered if low <= score <= high]
+
+    # === Hash ===
+
+    async def hset(self, key: str, field=None, value=None, mapping=None) -> int:
+        fields = self.data.setdefault(key, {})
+        updates = dict(mapping or {})
+        if field is not None:
+            updates[field] = value
+        added = len([f for f in updates if f not in fields])
+        fields.update({f: str(v) for f, v in updates.items()})
+        return added
+
+    async def hgetall(self, key: str) -> dict:
+        return dict(self.data.get(key, {}))
+
+    async def hmget(self, key: str, *fields) -> list:
+        values = self.data.get(key, {})
+        return [values.get(f) for f in fields]
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        fields = self.data.setdefault(key, {})
+        value = int(fields.get(field, 0)) + amount
+        fields[field] = str(value)
+        return value
@@ -0,0 +1,137 @@
+"""会話コンテキストの回帰ベンチマーク - 長いセッションでのターンごとの入力トークン
+
+100ターンの会話で、毎ターンLLMに送信する入力トークン（システムプロンプト + 履歴）が
+ターン数に関係なくほぼ一定に保たれることを確認する。
+要約は Haiku をモックし、各ターンの応答保存後に完了するものとして計測する。
+比較用に全履歴を送信する旧実装相当のトークン数も計測する。
+`pytest -s` で計測結果の表を出力する。
+"""
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from sqlalchemy import select
+
+from app.models.conversation import ConversationMessage, ConversationSession
+from app.prompts.conversation import build_conversation_system_prompt
+from app.services.conversation_context import (
+    ConversationContextManager,
+    estimate_message_tokens,
+    estimate_tokens,
+)
+from tests.conftest import TestSessionLocal
+
+TURNS = 100
+REPORT_TURNS = [1, 10, 20, 40, 60, 80, 100]
+USER_TEXT = "I think we should revisit the budget before the next quarterly review. "
+AI_TEXT = (
+    "That makes sense. Could you walk me through which line items you would "
+    "like to adjust first, and what impact you expect on the delivery timeline? "
+)
+
+
+async def _load_tail(session_id) -> tuple[ConversationSession, list[dict]]:
+    """ルーターと同じく未要約のメッセージだけを読み込む"""
+    async with TestSessionLocal() as db:
+        session = await db.get(ConversationSession, session_id)
+        result = await db.execute(
+            select(ConversationMessage.role, ConversationMessage.content)
+            .where(
+                ConversationMessage.session_id == session_id,
+                ConversationMessage.role.in_(("user", "assistant")),
+            )
+            .order_by(ConversationMessage.created_at)
+            .offset(session.summarized_message_count)
+        )
+        return session, [{"role": r, "content": c} for r, c in result]
+
+
+async def _fake_haiku(**kwargs) -> str:
+    """要約モデルのモック: 要約は一定の長さに収まる"""
+    request = kwargs["messages"][0]["content"]
+    return "- " + request[-kwargs["max_tokens"] * 3 :]
+
+
+class TestConversationContextBenchmark:
+    """ターン数ごとの入力トークン計測"""
+
+    @pytest.mark.asyncio
+    async def test_input_tokens_flat_over_long_session(self, test_user):
+        """100ターンでもターンごとの入力トークンが予算内で一定に保たれる"""
+        manager = ConversationContextManager()
+        system = build_conversation_system_prompt("meeting", "B2")
+        base = datetime(2026, 1, 1, tzinfo=UTC)
+
+        async with TestSessionLocal() as db:
+            session = ConversationSession(user_id=test_user.id, mode="meeting")
+            db.add(session)
+            await db.commit()
+            session_id = session.id
+
+        managed: dict[int, int] = {}
+        naive: dict[int, int] = {}
+        naive_history = 0
+        summaries = 0
+
+        with (
+            patch("app.services.conversation_context.async_session", TestSessionLocal),
+            patch("app.services.conversation_context.claude_service") as mock_llm,
+        ):
+            mock_llm.chat = AsyncMock(side_effect=_fake_haiku)
+
+            for turn in range(1, TURNS + 1):
+                user_message = {"role": "user", "content": f"({turn}) {USER_TEXT}"}
+                ai_message = {"role": "assistant", "content": f"({turn}) {AI_TEXT}"}
+                async with TestSessionLocal() as db:
+                    db.add(
+                        ConversationMessage(
+                            session_id=session_id,
+                            created_at=base + timedelta(seconds=turn * 2),
+                            **user_message,
+                        )
+                    )
+                    await db.commit()
+
+                stored, tail = await _load_tail(session_id)
+                context = manager.build(system, stored.context_summary, tail)
+                managed[turn] = (
+                    estimate_tokens(context.system) + context.estimated_tokens
+                )
+                naive_history += estimate_message_tokens(user_message)
+                naive[turn] = estimate_tokens(system) + naive_history
+
+                async with TestSessionLocal() as db:
+                    db.add(
+                        ConversationMessage(
+                            session_id=session_id,
+                            created_at=base + timedelta(seconds=turn * 2 + 1),
+                            **ai_message,
+                        )
+                    )
+                    await db.commit()
+                naive_history += estimate_message_tokens(ai_message)
+
+                if context.needs_summary:
+                    summaries += await manager.summarize(session_id)
+
+        print(
+            f"\nturn | managed input tokens | full history tokens  (summaries={summaries})"
+        )
+        for turn in REPORT_TURNS:
+            print(f"{turn:4d} | {managed[turn]:20d} | {naive[turn]:19d}")
+
+        budget = (
+            estimate_tokens(system) + manager.max_tokens + manager.summary_max_tokens
+        )
+        assert max(managed.values()) <= budget
+        assert summaries > 0
+
+        # 20ターン目以降はほぼ一定（ターン数に比例して増えない）
+        steady = [managed[t] for t in range(20, TURNS + 1)]
+        assert max(steady) <= min(steady) * 1.5
+        assert managed[TURNS] <= managed[20] * 1.5
+
+        # 全履歴を送る旧実装相当はターン数に比例して増え続ける
+        assert naive[TURNS] > naive[20] * 3
+        assert naive[TURNS] > managed[TURNS] * 3
@@ -0,0 +1,139 @@
+"""認証プリンシパル読み込みの回帰ベンチマーク - 履歴量に対するクエリ数・メモリ
+
+学習履歴（会話セッション・メッセージ）が増えても、get_current_user の
+クエリ数とメモリ使用量が増えないことを確認する。
+比較用に旧実装相当（User の全リレーションを selectin で読み込む）も計測する。
+`pytest -s` で計測結果の表を出力する。
+"""
+
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import event, select
+from sqlalchemy.orm import selectinload
+from starlette.requests import Request
+
+from app.dependencies import get_current_user
+from app.models.conversation import ConversationMessage, ConversationSession
+from app.models.user import User
+from app.principal_cache import principal_cache
+from app.routers.auth import create_access_token
+from tests.conftest import TestSessionLocal, test_engine
+
+HISTORY_SIZES = [0, 10, 50]  # 会話セッション数
+MESSAGES_PER_SESSION = 20
+
+
+@contextmanager
+def _count_queries():
+    """ブロック内で発行されたSQL文の数を数える"""
+    counter = {"queries": 0}
+
+    def _on_execute(*args, **kwargs):
+        counter["queries"] += 1
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", _on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", _on_execute)
+
+
+async def _seed_history(user_id: uuid.UUID, sessions: int) -> None:
+    """指定数の会話セッションとメッセージを作成"""
+    async with TestSessionLocal() as db:
+        for _ in range(sessions):
+            session = ConversationSession(user_id=user_id, mode="meeting")
+            db.add(session)
+            await db.flush()
+            db.add_all(
+                ConversationMessage(
+                    session_id=session.id,
+                    role="user" if i % 2 == 0 else "assistant",
+                    content="Let's review the quarterly budget in detail. " * 5,
+                )
+                for i in range(MESSAGES_PER_SESSION)
+            )
+        await db.commit()
+
+
+async def _measure(load) -> tuple[int, int]:
+    """(クエリ数, ピークメモリ[bytes]) を計測"""
+    async with TestSessionLocal() as db:
+        tracemalloc.start()
+        with _count_queries() as counter:
+            await load(db)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return counter["queries"], peak
+
+
+async def _load_principal(db, token: str):
+    """キャッシュを経由せずにプリンシパルを読み込む"""
+    principal_cache.clear_local()
+    request = Request({"type": "http", "headers": []})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return await get_current_user(request=request, credentials=credentials, db=db)
+
+
+async def _load_full_graph(db, user_id: uuid.UUID):
+    """旧実装相当: User の全リレーションと全メッセージを読み込む"""
+    result = await db.execute(
+        select(User)
+        .where(User.id == user_id)
+        .options(
+            selectinload(User.conversation_sessions).selectinload(
+                ConversationSession.messages
+            ),
+            selectinload(User.review_items),
+            selectinload(User.daily_stats),
+            selectinload(User.api_usage_logs),
+            selectinload(User.subscription),
+        )
+    )
+    return result.scalar_one()
+
+
+class TestPrincipalLoadingBenchmark:
+    """履歴量ごとの get_current_user のコスト計測"""
+
+    @pytest.mark.asyncio
+    async def test_principal_cost_independent_of_history(self, test_user):
+        """プリンシパル読み込みは履歴量に関係なく1クエリ・一定メモリ"""
+        token = create_access_token(str(test_user.id))
+        rows = []
+        seeded = 0
+
+        for sessions in HISTORY_SIZES:
+            await _seed_history(test_user.id, sessions - seeded)
+            seeded = sessions
+
+            principal_queries, principal_peak = await _measure(
+                lambda db: _load_principal(db, token)
+            )
+            graph_queries, graph_peak = await _measure(
+                lambda db: _load_full_graph(db, test_user.id)
+            )
+            rows.append(
+                (sessions, principal_queries, principal_peak, graph_queries, graph_peak)
+            )
+
+        print("\nsessions | principal q / peak KiB | full graph q / peak KiB")
+        for sessions, pq, pp, gq, gp in rows:
+            print(
+                f"{sessions:8d} | {pq:11d} / {pp / 1024:8.1f} | {gq:10d} / {gp / 1024:8.1f}"
+            )
+
+        # クエリ数は履歴量に依存しない
+        assert all(r[1] == 1 for r in rows)
+
+        # 最大履歴でもプリンシパルのメモリは空履歴時から大きく増えない
+        empty_peak = rows[0][2]
+        largest_peak = rows[-1][2]
+        assert largest_peak < empty_peak * 2 + 64 * 1024
+
+        # 旧実装相当の全グラフ読み込みは履歴量に比例して増える
+        assert rows[-1][4] > largest_peak * 5
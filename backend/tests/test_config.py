@@ -77,6 +77,24 @@ class TestSettings:
         s = self._make(backend_cors_origins="")
         assert s.cors_origins_list == []
 
+    def test_request_deadline_overrides_map(self):
+        """エンドポイント別の期限の辞書変換"""
+        s = self._make(
+            request_deadline_overrides="/api/talk/message=45, /api/review = 20,broken"
+        )
+        assert s.request_deadline_overrides_map == {
+            "/api/talk/message": 45.0,
+            "/api/review": 20.0,
+        }
+
+    def test_request_deadline_stream_has_own_default(self):
+        """ストリーミング応答は /api/talk/message の短い期限を接頭辞一致で継承しない"""
+        from app.middleware.deadline import default_deadline_for
+
+        with patch("app.middleware.deadline.settings", self._make()):
+            assert default_deadline_for("/api/talk/message") == 45.0
+            assert default_deadline_for("/api/talk/message/stream") == 90.0
+
     def test_custom_settings(self):
         """カスタム設定値が反映される"""
         s = self._make(
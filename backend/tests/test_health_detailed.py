@@ -101,3 +101,22 @@ async def test_health_detailed_llm_degraded(client: AsyncClient):
         response = await client.get("/health/detailed")
         data = response.json()
         assert data["status"] == "degraded"
+
+
+@pytest.mark.asyncio
+async def test_health_detailed_exposes_llm_routing_scores(client: AsyncClient):
+    """詳細ヘルスチェックにプロバイダースコアが含まれる"""
+    with (
+        patch("app.routers.health._check_database") as mock_db,
+        patch("app.routers.health._check_redis") as mock_redis,
+        patch("app.routers.health._check_llm_provider") as mock_llm,
+    ):
+        mock_db.return_value = {"status": "healthy", "response_time_ms": 1.0}
+        mock_redis.return_value = {"status": "healthy", "response_time_ms": 0.5}
+        mock_llm.return_value = {"status": "healthy", "response_time_ms": 2.0}
+
+        response = await client.get("/health/detailed")
+
+    routing = response.json()["metrics"]["llm_routing"]
+    assert routing["scores"]["objective"] == "priority"
+    assert "circuit_breakers" in routing
@@ -0,0 +1,242 @@
+"""LLMアドミッション制御のテスト - 同時実行数・優先度順・打ち切り・フォールバック"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.exceptions import LLMOverloadedError
+from app.llm.admission import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_STANDARD,
+    AdmissionController,
+    PriorityClass,
+    get_llm_priority,
+    llm_priority,
+)
+from app.llm.resilience import RateLimiter
+from app.llm.service import LLMService
+from app.services.analytics_service import AnalyticsService
+
+
+def _controller(
+    max_concurrency: int = 1,
+    background_wait: float | None = None,
+) -> AdmissionController:
+    return AdmissionController(
+        max_concurrency=max_concurrency,
+        classes=[
+            PriorityClass(PRIORITY_INTERACTIVE, max_concurrency),
+            PriorityClass(PRIORITY_STANDARD, max_concurrency),
+            PriorityClass(
+                PRIORITY_BACKGROUND, max_concurrency, max_wait_seconds=background_wait
+            ),
+        ],
+    )
+
+
+async def _hold(controller: AdmissionController, priority: str, release, order):
+    async with controller.admit(priority):
+        order.append(priority)
+        await release.wait()
+
+
+class TestAdmissionController:
+    """AdmissionControllerのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrency_and_queues(self):
+        """上限を超えたリクエストは待ち行列に入り、枠が空くと受け付けられる"""
+        controller = _controller(max_concurrency=2)
+        release = asyncio.Event()
+        order: list[str] = []
+        tasks = [
+            asyncio.create_task(_hold(controller, PRIORITY_STANDARD, release, order))
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+
+        stats = controller.get_stats()
+        assert stats["in_flight"] == 2
+        assert stats["classes"][PRIORITY_STANDARD]["queued"] == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+        stats = controller.get_stats()
+        assert stats["in_flight"] == 0
+        assert stats["classes"][PRIORITY_STANDARD]["admitted"] == 3
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_is_admitted_first(self):
+        """先に並んだ background より後から来た interactive を先に受け付ける"""
+        controller = _controller(max_concurrency=1)
+        first_release = asyncio.Event()
+        rest_release = asyncio.Event()
+        order: list[str] = []
+
+        holder = asyncio.create_task(
+            _hold(controller, PRIORITY_STANDARD, first_release, order)
+        )
+        await asyncio.sleep(0)
+        waiters = [
+            asyncio.create_task(_hold(controller, priority, rest_release, order))
+            for priority in (
+                PRIORITY_BACKGROUND,
+                PRIORITY_STANDARD,
+                PRIORITY_INTERACTIVE,
+            )
+        ]
+        await asyncio.sleep(0)
+
+        rest_release.set()
+        first_release.set()
+        await asyncio.gather(holder, *waiters)
+
+        assert order == [
+            PRIORITY_STANDARD,
+            PRIORITY_INTERACTIVE,
+            PRIORITY_STANDARD,
+            PRIORITY_BACKGROUND,
+        ]
+
+    @pytest.mark.asyncio
+    async def test_per_class_cap(self):
+        """クラスの上限に達したクラスは全体に空きがあっても待つ"""
+        controller = AdmissionController(
+            max_concurrency=4,
+            classes=[
+                PriorityClass(PRIORITY_STANDARD, 4),
+                PriorityClass(PRIORITY_BACKGROUND, 1),
+            ],
+        )
+        release = asyncio.Event()
+        order: list[str] = []
+        tasks = [
+            asyncio.create_task(_hold(controller, PRIORITY_BACKGROUND, release, order))
+            for _ in range(2)
+        ]
+        tasks.append(
+            asyncio.create_task(_hold(controller, PRIORITY_STANDARD, release, order))
+        )
+        await asyncio.sleep(0)
+
+        stats = controller.get_stats()["classes"]
+        assert stats[PRIORITY_BACKGROUND]["in_flight"] == 1
+        assert stats[PRIORITY_BACKGROUND]["queued"] == 1
+        assert stats[PRIORITY_STANDARD]["in_flight"] == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+
+    @pytest.mark.asyncio
+    async def test_background_is_shed_after_deadline(self):
+        """background は待ち時間が期限を超えると LLMOverloadedError で打ち切る"""
+        controller = _controller(max_concurrency=1, background_wait=0.05)
+        release = asyncio.Event()
+        holder = asyncio.create_task(
+            _hold(controller, PRIORITY_INTERACTIVE, release, [])
+        )
+        await asyncio.sleep(0)
+
+        with pytest.raises(LLMOverloadedError) as exc_info:
+            async with controller.admit(PRIORITY_BACKGROUND):
+                pass
+
+        assert exc_info.value.status_code == 503
+        stats = controller.get_stats()["classes"][PRIORITY_BACKGROUND]
+        assert stats["shed"] == 1
+        assert stats["queued"] == 0
+
+        release.set()
+        await holder
+        assert controller.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """待機中にキャンセルされたリクエストは待ち行列から外れ、枠を消費しない"""
+        controller = _controller(max_concurrency=1)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, PRIORITY_STANDARD, release, []))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(_hold(controller, PRIORITY_STANDARD, release, []))
+        await asyncio.sleep(0)
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.get_stats()["classes"][PRIORITY_STANDARD]["queued"] == 0
+
+        release.set()
+        await holder
+        assert controller.get_stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_priority_from_context(self):
+        """優先度未指定時は llm_priority() の設定値を使う"""
+        controller = _controller(max_concurrency=2)
+        assert get_llm_priority() == PRIORITY_STANDARD
+
+        with llm_priority(PRIORITY_BACKGROUND):
+            async with controller.admit():
+                pass
+
+        stats = controller.get_stats()["classes"]
+        assert stats[PRIORITY_BACKGROUND]["admitted"] == 1
+        assert stats[PRIORITY_STANDARD]["admitted"] == 0
+        assert get_llm_priority() == PRIORITY_STANDARD
+
+    def test_unknown_priority_raises(self):
+        with pytest.raises(ValueError), llm_priority("urgent"):
+            pass
+
+
+class TestRateLimiterNonBlocking:
+    """RateLimiterが待機中にロックを保持しないことのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_lock_released_while_waiting(self):
+        limiter = RateLimiter(requests_per_minute=60)
+        limiter.tokens = 0.0
+
+        waiting = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0.01)
+
+        assert not waiting.done()
+        assert not limiter._lock.locked()
+        # 後続の呼び出しは次の枠を予約する（待機時間が積み上がる）
+        assert limiter.tokens < 0
+        waiting.cancel()
+
+
+class TestLoadShedding:
+    """混雑時に低優先度の生成がフォールバックへ切り替わることのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_recommendations_fall_back_when_shed(self, db_session, test_user):
+        controller = _controller(max_concurrency=1, background_wait=0.05)
+        router = MagicMock()
+        router.chat_json = AsyncMock(return_value={"recommendations": []})
+        service = LLMService.__new__(LLMService)
+        service.router = router
+
+        release = asyncio.Event()
+        holder = asyncio.create_task(
+            _hold(controller, PRIORITY_INTERACTIVE, release, [])
+        )
+        await asyncio.sleep(0)
+        try:
+            with (
+                patch("app.llm.service.admission_controller", controller),
+                patch("app.services.analytics_service.claude_service", service),
+            ):
+                recommendations = await AnalyticsService().get_learning_recommendations(
+                    user_id=test_user.id, db=db_session
+                )
+        finally:
+            release.set()
+            await holder
+
+        router.chat_json.assert_not_called()
+        assert len(recommendations) >= 1
+        assert controller.get_stats()["classes"][PRIORITY_BACKGROUND]["shed"] == 1
@@ -0,0 +1,197 @@
+"""LLMリクエスト合流（single-flight）のテスト - ワーカー内・ワーカー間の共有と失敗時の動作"""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.llm.coalescing import KEY_PREFIX, RequestCoalescer
+from app.llm.service import LLMService
+from tests.fake_redis import FakeRedis
+
+KEY = RequestCoalescer.make_key(
+    "chat_json", [{"role": "user", "content": "hi"}], "haiku", 256, None
+)
+
+
+@pytest.fixture
+def no_redis():
+    with patch("app.llm.coalescing.get_redis", return_value=None):
+        yield
+
+
+@pytest.fixture
+def fake_redis():
+    fake = FakeRedis()
+    with patch("app.llm.coalescing.get_redis", return_value=fake):
+        yield fake
+
+
+def _gated_call(gate: asyncio.Event, result, calls: list):
+    async def call():
+        calls.append(1)
+        await gate.wait()
+        return result
+
+    return call
+
+
+class TestLocalCoalescing:
+    """ワーカー内の合流"""
+
+    @pytest.mark.asyncio
+    async def test_identical_inflight_calls_share_one_request(self, no_redis):
+        coalescer = RequestCoalescer(enabled=True)
+        gate = asyncio.Event()
+        calls: list = []
+        call = _gated_call(gate, {"items": [1, 2]}, calls)
+
+        tasks = [asyncio.create_task(coalescer.run(KEY, call)) for _ in range(5)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*tasks)
+
+        assert len(calls) == 1
+        assert all(r == {"items": [1, 2]} for r in results)
+        # 呼び出し元ごとに独立したオブジェクトを返す
+        assert len({id(r) for r in results}) == 5
+        stats = coalescer.get_stats()
+        assert stats["leaders"] == 1
+        assert stats["local_followers"] == 4
+        assert stats["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_different_keys_and_sequential_calls_are_not_shared(self, no_redis):
+        """キーが異なる呼び出しや完了後の呼び出しは共有しない（キャッシュではない）"""
+        coalescer = RequestCoalescer(enabled=True)
+        call = AsyncMock(return_value="ok")
+        other_key = RequestCoalescer.make_key("chat", [], "haiku", 256, None)
+
+        await asyncio.gather(coalescer.run(KEY, call), coalescer.run(other_key, call))
+        await coalescer.run(KEY, call)
+
+        assert call.await_count == 3
+
+    @pytest.mark.asyncio
+    async def test_followers_call_themselves_when_leader_fails(self, no_redis):
+        coalescer = RequestCoalescer(enabled=True)
+        gate = asyncio.Event()
+
+        async def failing():
+            await gate.wait()
+            raise RuntimeError("quota exceeded")
+
+        follower_call = AsyncMock(return_value="own result")
+        leader = asyncio.create_task(coalescer.run(KEY, failing))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(coalescer.run(KEY, follower_call))
+        await asyncio.sleep(0)
+        gate.set()
+
+        with pytest.raises(RuntimeError):
+            await leader
+        assert await follower == "own result"
+        assert coalescer.get_stats()["fallbacks"] == 1
+
+
+class TestCrossWorkerCoalescing:
+    """Redisを介したワーカー間の合流"""
+
+    @pytest.mark.asyncio
+    async def test_remote_follower_receives_leader_result(self, fake_redis):
+        worker_a = RequestCoalescer(enabled=True)
+        worker_b = RequestCoalescer(enabled=True)
+        gate = asyncio.Event()
+        calls: list = []
+        follower_call = AsyncMock(return_value={"items": []})
+
+        leader = asyncio.create_task(
+            worker_a.run(KEY, _gated_call(gate, {"items": ["shared"]}, calls))
+        )
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(worker_b.run(KEY, follower_call))
+        await asyncio.sleep(0.01)
+        gate.set()
+
+        assert await leader == {"items": ["shared"]}
+        assert await follower == {"items": ["shared"]}
+        follower_call.assert_not_called()
+        assert worker_b.get_stats()["remote_followers"] == 1
+        # ロックは解放され、購読も解除される
+        assert f"{KEY_PREFIX}:lock:{KEY}" not in fake_redis.data
+        assert not fake_redis.subscribers
+
+    @pytest.mark.asyncio
+    async def test_result_published_before_subscribe(self, fake_redis):
+        """購読前にリーダーが完了していた場合は結果キーから受け取る"""
+        await fake_redis.set(f"{KEY_PREFIX}:lock:{KEY}", "other-worker")
+        await fake_redis.set(
+            f"{KEY_PREFIX}:result:{KEY}", json.dumps({"value": "done"})
+        )
+        call = AsyncMock(return_value="own")
+
+        assert await RequestCoalescer(enabled=True).run(KEY, call) == "done"
+        call.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_remote_failure_falls_back_to_own_call(self, fake_redis):
+        worker_a = RequestCoalescer(enabled=True)
+        worker_b = RequestCoalescer(enabled=True)
+        gate = asyncio.Event()
+
+        async def failing():
+            await gate.wait()
+            raise RuntimeError("provider down")
+
+        follower_call = AsyncMock(return_value="own result")
+        leader = asyncio.create_task(worker_a.run(KEY, failing))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(worker_b.run(KEY, follower_call))
+        await asyncio.sleep(0.01)
+        gate.set()
+
+        with pytest.raises(RuntimeError):
+            await leader
+        assert await follower == "own result"
+        assert worker_b.get_stats()["fallbacks"] == 1
+
+    @pytest.mark.asyncio
+    async def test_remote_wait_times_out(self, fake_redis):
+        """ロックの期限内に結果が届かなければ自身で呼び出す"""
+        await fake_redis.set(f"{KEY_PREFIX}:lock:{KEY}", "stuck-worker")
+        coalescer = RequestCoalescer(enabled=True)
+        coalescer.lock_ttl_seconds = 0.05
+        call = AsyncMock(return_value="own")
+
+        assert await coalescer.run(KEY, call) == "own"
+
+
+class TestLLMServiceCoalescing:
+    """LLMServiceの合流連携"""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_chat_calls_hit_router_once(self, no_redis):
+        gate = asyncio.Event()
+        router = MagicMock()
+
+        async def chat(*args):
+            await gate.wait()
+            return "hello"
+
+        router.chat = AsyncMock(side_effect=chat)
+        service = LLMService.__new__(LLMService)
+        service.router = router
+        messages = [{"role": "user", "content": "same prompt"}]
+
+        with patch("app.llm.service.request_coalescer", RequestCoalescer(enabled=True)):
+            tasks = [
+                asyncio.create_task(service.chat(messages, system="tutor"))
+                for _ in range(3)
+            ]
+            await asyncio.sleep(0)
+            gate.set()
+            results = await asyncio.gather(*tasks)
+
+        assert results == ["hello"] * 3
+        assert router.chat.await_count == 1
@@ -0,0 +1,253 @@
+"""リクエスト期限の伝播テスト - ContextVar・リトライ・フォールバック・受付待ち・HTTPタイムアウト"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from app.exceptions import DeadlineExceededError
+from app.llm.admission import PRIORITY_STANDARD, AdmissionController, PriorityClass
+from app.llm.deadline import (
+    bound_httpx_timeout,
+    bound_timeout,
+    check_deadline,
+    deadline_scope,
+    detached_from_deadline,
+    parse_deadline_header,
+    remaining_time,
+    request_deadline,
+)
+from app.llm.resilience import RateLimiter, RetryPolicy
+from app.llm.router import LLMRouter
+
+
+def _make_provider(name: str, chat=None):
+    provider = MagicMock()
+    provider.name = name
+    provider.chat = chat or AsyncMock(return_value=f"{name} response")
+    return provider
+
+
+class TestDeadlineContext:
+    """期限の設定・参照のテスト"""
+
+    def test_no_deadline_by_default(self):
+        assert remaining_time() is None
+        assert bound_timeout(30.0) == 30.0
+        check_deadline()
+
+    def test_nested_deadline_never_extends(self):
+        with request_deadline(5):
+            with request_deadline(60):
+                assert remaining_time() <= 5
+            with request_deadline(1):
+                assert remaining_time() <= 1
+            with request_deadline(None):
+                assert 4 < remaining_time() <= 5
+        assert remaining_time() is None
+
+    def test_detached_from_deadline(self):
+        with request_deadline(1), detached_from_deadline():
+            assert remaining_time() is None
+
+    def test_bound_timeouts(self):
+        with request_deadline(2):
+            assert bound_timeout(30.0) <= 2
+            assert bound_timeout(0.5) == 0.5
+            assert bound_timeout(None) <= 2
+
+            timeout = bound_httpx_timeout(httpx.Timeout(60.0, connect=10.0))
+            assert timeout.read <= 2
+            assert timeout.connect <= 2
+
+        original = httpx.Timeout(60.0, connect=10.0)
+        assert bound_httpx_timeout(original) is original
+
+    def test_check_deadline_after_expiry(self):
+        with request_deadline(-1), pytest.raises(DeadlineExceededError) as exc_info:
+            check_deadline("chat")
+        assert exc_info.value.status_code == 504
+        assert exc_info.value.details["operation"] == "chat"
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            ("1700000030000", 30.0),
+            ("1699999999000", -1.0),
+            (None, None),
+            ("", None),
+            ("soon", None),
+            ("nan", None),
+        ],
+    )
+    def test_parse_deadline_header(self, value, expected):
+        assert parse_deadline_header(value, now=1_700_000_000.0) == expected
+
+
+class TestDeadlineScope:
+    """deadline_scope のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_cancels_block_at_deadline(self):
+        with request_deadline(0.05), pytest.raises(DeadlineExceededError):
+            async with deadline_scope("slow"):
+                await asyncio.sleep(1)
+
+    @pytest.mark.asyncio
+    async def test_inner_timeout_is_not_deadline(self):
+        with request_deadline(5), pytest.raises(TimeoutError):
+            async with deadline_scope("inner"):
+                raise TimeoutError("provider timeout")
+
+    @pytest.mark.asyncio
+    async def test_no_deadline_is_passthrough(self):
+        async with deadline_scope("free"):
+            await asyncio.sleep(0)
+
+
+class TestRetryPolicyDeadline:
+    """リトライが期限内でのみ行われることのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_skips_backoff_longer_than_remaining_time(self):
+        func = AsyncMock(side_effect=ConnectionError("upstream down"))
+        policy = RetryPolicy(max_retries=3, base_delay=10.0)
+
+        with (
+            patch("app.llm.resilience.asyncio.sleep", AsyncMock()) as mock_sleep,
+            request_deadline(2),
+            pytest.raises(ConnectionError),
+        ):
+            await policy.execute(func)
+
+        assert func.await_count == 1
+        mock_sleep.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_retries_within_remaining_time(self):
+        func = AsyncMock(side_effect=[ConnectionError("blip"), "ok"])
+        policy = RetryPolicy(max_retries=3, base_delay=0.01)
+
+        with request_deadline(5):
+            assert await policy.execute(func) == "ok"
+        assert func.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_deadline_error_is_not_retried(self):
+        func = AsyncMock(side_effect=DeadlineExceededError("chat"))
+        policy = RetryPolicy(max_retries=3, base_delay=0.01)
+
+        with pytest.raises(DeadlineExceededError):
+            await policy.execute(func)
+        assert func.await_count == 1
+
+
+class TestRouterDeadline:
+    """フォールバックが期限内でのみ行われることのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_slow_primary_is_abandoned_without_fallback(self):
+        async def _hang(**kwargs):
+            await asyncio.sleep(5)
+
+        primary = _make_provider("primary", chat=AsyncMock(side_effect=_hang))
+        fallback = _make_provider("fallback")
+        router = LLMRouter(
+            primary=primary,
+            fallbacks=[fallback],
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+        )
+
+        with request_deadline(0.05), pytest.raises(DeadlineExceededError):
+            await router.chat(messages=[{"role": "user", "content": "hi"}])
+
+        fallback.chat.assert_not_awaited()
+        # 期限切れはプロバイダー障害として記録しない
+        assert router.circuit_breakers["primary"].failure_count == 0
+
+    @pytest.mark.asyncio
+    async def test_fallback_used_while_time_remains(self):
+        primary = _make_provider(
+            "primary", chat=AsyncMock(side_effect=ConnectionError("down"))
+        )
+        fallback = _make_provider("fallback")
+        router = LLMRouter(
+            primary=primary,
+            fallbacks=[fallback],
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+        )
+
+        with request_deadline(5):
+            result = await router.chat(messages=[{"role": "user", "content": "hi"}])
+
+        assert result == "fallback response"
+
+    @pytest.mark.asyncio
+    async def test_expired_deadline_skips_all_providers(self):
+        primary = _make_provider("primary")
+        router = LLMRouter(
+            primary=primary,
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+        )
+
+        with request_deadline(-1), pytest.raises(DeadlineExceededError):
+            await router.chat(messages=[{"role": "user", "content": "hi"}])
+
+        primary.chat.assert_not_awaited()
+
+
+class TestAdmissionDeadline:
+    """受付待ちが期限で打ち切られることのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_queue_wait_bounded_by_deadline(self):
+        controller = AdmissionController(
+            max_concurrency=1,
+            classes=[PriorityClass(PRIORITY_STANDARD, max_concurrency=1)],
+        )
+
+        async with controller.admit(PRIORITY_STANDARD):
+            with request_deadline(0.05), pytest.raises(DeadlineExceededError):
+                async with controller.admit(PRIORITY_STANDARD):
+                    pass
+
+        assert controller.get_stats()["in_flight"] == 0
+
+
+class TestProviderTimeout:
+    """プロバイダーのHTTPタイムアウトが残り時間で切り詰められることのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_anthropic_timeout_bounded(self):
+        from app.llm.providers.anthropic_direct import AnthropicDirectProvider
+
+        response = httpx.Response(
+            200,
+            json={
+                "content": [{"type": "text", "text": "ok"}],
+                "usage": {"input_tokens": 1, "output_tokens": 1},
+            },
+            request=httpx.Request("POST", "https://api.anthropic.com/v1/messages"),
+        )
+        client = MagicMock()
+        client.post = AsyncMock(return_value=response)
+
+        with (
+            patch("app.llm.providers.anthropic_direct.settings") as mock_settings,
+            patch(
+                "app.llm.providers.anthropic_direct.get_http_client",
+                return_value=client,
+            ),
+        ):
+            mock_settings.anthropic_api_key = "sk-ant-test"
+            provider = AnthropicDirectProvider()
+            with request_deadline(3):
+                await provider.chat(messages=[{"role": "user", "content": "hi"}])
+
+        timeout = client.post.call_args.kwargs["timeout"]
+        assert timeout.read <= 3
+        assert timeout.connect <= 3
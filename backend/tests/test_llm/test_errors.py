@@ -0,0 +1,355 @@
+"""エラー分類のテスト - 再試行可否・Retry-After・適応的同時実行数"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from app.exceptions import DeadlineExceededError, LLMRateLimitError
+from app.llm.base import LLMProvider
+from app.llm.errors import (
+    NON_RETRYABLE,
+    RATE_LIMITED,
+    RETRYABLE,
+    LLMResponseParseError,
+    LLMStreamError,
+    classify_error,
+    parse_retry_after,
+)
+from app.llm.resilience import AdaptiveConcurrencyLimiter, RateLimiter, RetryPolicy
+from app.llm.router import LLMRouter
+
+
+def _status_error(status: int, headers: dict | None = None) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://example.com/v1/messages")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError(
+        f"returned {status}", request=request, response=response
+    )
+
+
+class _ClientError(Exception):
+    """botocore.exceptions.ClientError と同じ response 属性を持つ例外"""
+
+    def __init__(self, code: str, status: int, headers: dict | None = None):
+        super().__init__(code)
+        self.response = {
+            "Error": {"Code": code, "Message": code},
+            "ResponseMetadata": {
+                "HTTPStatusCode": status,
+                "HTTPHeaders": headers or {},
+            },
+        }
+
+
+class TestClassifyError:
+    """classify_error のテスト"""
+
+    @pytest.mark.parametrize(
+        ("status", "kind"),
+        [
+            (400, NON_RETRYABLE),
+            (401, NON_RETRYABLE),
+            (403, NON_RETRYABLE),
+            (404, NON_RETRYABLE),
+            (422, NON_RETRYABLE),
+            (408, RETRYABLE),
+            (429, RATE_LIMITED),
+            (500, RETRYABLE),
+            (503, RETRYABLE),
+            (529, RETRYABLE),
+        ],
+    )
+    def test_http_status(self, status, kind):
+        assert classify_error(_status_error(status)).kind == kind
+
+    def test_rate_limit_carries_retry_after(self):
+        error = classify_error(_status_error(429, {"Retry-After": "7"}))
+
+        assert error.rate_limited
+        assert error.retry_after == 7.0
+        assert error.status_code == 429
+
+    def test_client_error_ignores_retry_after(self):
+        error = classify_error(_status_error(400, {"Retry-After": "7"}))
+
+        assert not error.retryable
+        assert error.retry_after is None
+
+    @pytest.mark.parametrize(
+        ("exc", "kind"),
+        [
+            (httpx.ConnectError("refused"), RETRYABLE),
+            (httpx.ReadTimeout("slow"), RETRYABLE),
+            (LLMResponseParseError("bad json"), NON_RETRYABLE),
+            (LLMStreamError("overloaded", "overloaded_error"), RETRYABLE),
+            (LLMStreamError("limited", "rate_limit_error"), RATE_LIMITED),
+            (LLMStreamError("invalid", "invalid_request_error"), NON_RETRYABLE),
+            (LLMRateLimitError("azure_foundry"), RATE_LIMITED),
+            (DeadlineExceededError("chat"), NON_RETRYABLE),
+            (ValueError("unknown"), RETRYABLE),
+            (RuntimeError("unknown"), RETRYABLE),
+        ],
+    )
+    def test_non_http_errors(self, exc, kind):
+        assert classify_error(exc).kind == kind
+
+    @pytest.mark.parametrize(
+        ("code", "status", "kind"),
+        [
+            ("ThrottlingException", 429, RATE_LIMITED),
+            ("ValidationException", 400, NON_RETRYABLE),
+            ("AccessDeniedException", 403, NON_RETRYABLE),
+            ("ServiceUnavailableException", 503, RETRYABLE),
+            ("ModelTimeoutException", 408, RETRYABLE),
+        ],
+    )
+    def test_bedrock_client_error(self, code, status, kind):
+        assert classify_error(_ClientError(code, status)).kind == kind
+
+    @pytest.mark.parametrize(
+        ("exc", "request_error"),
+        [
+            (_status_error(400), True),
+            (_status_error(422), True),
+            (_status_error(401), False),
+            (_status_error(403), False),
+            (_status_error(404), False),
+            (_status_error(503), False),
+            (LLMResponseParseError("bad json"), True),
+            (LLMStreamError("invalid", "invalid_request_error"), True),
+            (LLMStreamError("denied", "authentication_error"), False),
+            (_ClientError("ValidationException", 400), True),
+            (_ClientError("AccessDeniedException", 403), False),
+        ],
+    )
+    def test_request_error_excludes_provider_faults(self, exc, request_error):
+        """認証・権限・デプロイ未検出はプロバイダー固有の問題として区別する"""
+        assert classify_error(exc).request_error is request_error
+
+    def test_parse_json_response_is_not_retryable(self):
+        with pytest.raises(LLMResponseParseError) as exc_info:
+            LLMProvider._parse_json_response("not json at all")
+
+        assert isinstance(exc_info.value, ValueError)
+        assert not classify_error(exc_info.value).retryable
+
+
+class TestParseRetryAfter:
+    """parse_retry_after のテスト"""
+
+    @pytest.mark.parametrize(
+        ("headers", "expected"),
+        [
+            ({"retry-after": "12"}, 12.0),
+            ({"retry-after": "1.5"}, 1.5),
+            ({"retry-after-ms": "250", "retry-after": "1"}, 0.25),
+            ({"retry-after": "Tue, 14 Nov 2023 22:13:40 GMT"}, 20.0),
+            ({"retry-after": "Tue, 14 Nov 2023 22:12:00 GMT"}, 0.0),
+            ({"retry-after": "soon"}, None),
+            ({"retry-after": "-3"}, None),
+            ({}, None),
+        ],
+    )
+    def test_values(self, headers, expected):
+        # 1700000000 = Tue, 14 Nov 2023 22:13:20 GMT
+        assert parse_retry_after(headers, now=1_700_000_000.0) == expected
+
+    def test_httpx_headers_are_case_insensitive(self):
+        headers = httpx.Headers({"Retry-After-Ms": "500"})
+        assert parse_retry_after(headers) == 0.5
+
+
+class TestRetryPolicyClassification:
+    """リトライポリシーがエラー分類に従うことのテスト"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "exc",
+        [_status_error(400), _status_error(401), LLMResponseParseError("bad json")],
+    )
+    async def test_non_retryable_is_raised_immediately(self, exc):
+        func = AsyncMock(side_effect=exc)
+        policy = RetryPolicy(max_retries=3, base_delay=0.01)
+
+        with pytest.raises(type(exc)):
+            await policy.execute(func)
+        assert func.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_waits_for_retry_after(self):
+        func = AsyncMock(side_effect=[_status_error(429, {"Retry-After": "2"}), "ok"])
+        policy = RetryPolicy(max_retries=3, base_delay=0.01)
+
+        with patch("app.llm.resilience.asyncio.sleep", AsyncMock()) as mock_sleep:
+            assert await policy.execute(func) == "ok"
+
+        mock_sleep.assert_awaited_once_with(2.0)
+
+    @pytest.mark.asyncio
+    async def test_retry_after_beyond_max_delay_gives_up(self):
+        func = AsyncMock(side_effect=_status_error(429, {"Retry-After": "120"}))
+        policy = RetryPolicy(max_retries=3, base_delay=0.01, max_delay=30.0)
+
+        with (
+            patch("app.llm.resilience.asyncio.sleep", AsyncMock()) as mock_sleep,
+            pytest.raises(httpx.HTTPStatusError),
+        ):
+            await policy.execute(func)
+
+        assert func.await_count == 1
+        mock_sleep.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_server_error_is_retried(self):
+        func = AsyncMock(side_effect=[_status_error(503), "ok"])
+        policy = RetryPolicy(max_retries=3, base_delay=0.01)
+
+        assert await policy.execute(func) == "ok"
+        assert func.await_count == 2
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """AdaptiveConcurrencyLimiter のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_halves_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            async with limiter.slot():
+                raise _status_error(429)
+
+        assert limiter.limit == 4.0
+        assert limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_success_grows_limit_additively(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=5)
+        for _ in range(4):
+            async with limiter.slot():
+                pass
+
+        assert 4.9 < limiter.limit <= 5.0
+
+        for _ in range(20):
+            async with limiter.slot():
+                pass
+        assert limiter.limit == 5.0
+
+    @pytest.mark.asyncio
+    async def test_other_errors_leave_limit_unchanged(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+        with pytest.raises(httpx.HTTPStatusError):
+            async with limiter.slot():
+                raise _status_error(500)
+
+        assert limiter.limit == 8.0
+
+    @pytest.mark.asyncio
+    async def test_never_below_min_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=1)
+        for _ in range(5):
+            with pytest.raises(httpx.HTTPStatusError):
+                async with limiter.slot():
+                    raise _status_error(429)
+
+        assert limiter.limit == 1.0
+        assert limiter.rate_limited_count == 5
+
+    @pytest.mark.asyncio
+    async def test_concurrent_rate_limits_shrink_once(self):
+        """同じ上限で送信したリクエストが揃って429を受けても縮小は1回"""
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+        release = asyncio.Event()
+
+        async def _limited_call():
+            async with limiter.slot():
+                await release.wait()
+                raise _status_error(429)
+
+        tasks = [asyncio.create_task(_limited_call()) for _ in range(4)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert all(isinstance(r, httpx.HTTPStatusError) for r in results)
+        assert limiter.limit == 4.0
+
+    @pytest.mark.asyncio
+    async def test_waits_for_free_slot(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=1, max_limit=1)
+        release = asyncio.Event()
+        peak = 0
+
+        async def _call():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await release.wait()
+
+        tasks = [asyncio.create_task(_call()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert limiter.in_flight == 1
+        release.set()
+        await asyncio.gather(*tasks)
+
+        assert peak == 1
+        assert limiter.get_stats() == {"limit": 1, "in_flight": 0, "rate_limited": 0}
+
+
+class TestRouterErrorHandling:
+    """ルーターでのエラー分類・同時実行数制御のテスト"""
+
+    @staticmethod
+    def _make_provider(name: str, chat=None):
+        provider = MagicMock()
+        provider.name = name
+        provider.chat = chat or AsyncMock(return_value=f"{name} response")
+        return provider
+
+    @pytest.mark.asyncio
+    async def test_non_retryable_falls_back_without_retrying(self):
+        """プロバイダー固有の再試行不可エラー（認証失敗）は再試行せずフォールバック"""
+        primary = self._make_provider(
+            "primary", chat=AsyncMock(side_effect=_status_error(401))
+        )
+        fallback = self._make_provider("fallback")
+        router = LLMRouter(
+            primary=primary,
+            fallbacks=[fallback],
+            retry_policy=RetryPolicy(max_retries=3, base_delay=0.01),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+        )
+
+        result = await router.chat(messages=[{"role": "user", "content": "hi"}])
+
+        assert result == "fallback response"
+        assert primary.chat.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_shrinks_provider_limit(self):
+        primary = self._make_provider(
+            "primary", chat=AsyncMock(side_effect=_status_error(429))
+        )
+        fallback = self._make_provider("fallback")
+        router = LLMRouter(
+            primary=primary,
+            fallbacks=[fallback],
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+            concurrency_limiter_factory=lambda _name: AdaptiveConcurrencyLimiter(
+                initial_limit=8
+            ),
+        )
+
+        result = await router.chat(messages=[{"role": "user", "content": "hi"}])
+
+        assert result == "fallback response"
+        stats = router.get_concurrency_stats()
+        assert stats["primary"]["limit"] == 4
+        assert stats["primary"]["rate_limited"] == 1
+        assert stats["fallback"]["limit"] == 8
+        assert stats["fallback"]["in_flight"] == 0
@@ -0,0 +1,90 @@
+"""LLM共有HTTPプールのテスト - ベースURL単位のクライアント共有・クローズ"""
+
+from unittest.mock import patch
+
+import httpx
+import pytest
+import respx
+
+from app.llm import http_pool
+from app.llm.http_pool import close_http_clients, get_http_client, init_http_clients
+from app.llm.providers.anthropic_direct import AnthropicDirectProvider
+
+
+@pytest.fixture(autouse=True)
+async def _reset_pool():
+    """各テスト前後でプールを空にする"""
+    await close_http_clients()
+    yield
+    await close_http_clients()
+
+
+class TestHttpPool:
+    """共有HTTPクライアントプールのテスト"""
+
+    def test_same_base_url_shares_client(self):
+        """同じホストへのURLは同一クライアントを共有する"""
+        a = get_http_client("https://api.anthropic.com/v1/messages")
+        b = get_http_client("https://api.anthropic.com")
+
+        assert a is b
+
+    def test_different_hosts_get_separate_clients(self):
+        """異なるホストは別々のクライアントになる"""
+        a = get_http_client("https://api.anthropic.com")
+        b = get_http_client("http://localhost:11434/v1")
+
+        assert a is not b
+        assert len(http_pool._clients) == 2
+
+    @pytest.mark.asyncio
+    async def test_close_http_clients(self):
+        """クローズ後は全クライアントが閉じられ、次回取得で再生成される"""
+        client = get_http_client("https://api.anthropic.com")
+
+        await close_http_clients()
+
+        assert client.is_closed
+        assert http_pool._clients == {}
+        assert get_http_client("https://api.anthropic.com") is not client
+
+    def test_init_http_clients_resets_registry(self):
+        """初期化でレジストリが空になる"""
+        get_http_client("https://api.anthropic.com")
+
+        init_http_clients()
+
+        assert http_pool._clients == {}
+
+    def test_pool_limits_from_settings(self):
+        """プール上限が設定値から構築される"""
+        with patch("app.llm.http_pool.settings") as mock_settings:
+            mock_settings.llm_http_max_connections = 7
+            mock_settings.llm_http_max_keepalive_connections = 3
+            mock_settings.llm_http_keepalive_expiry = 12.0
+
+            limits = http_pool._build_limits()
+
+        assert limits.max_connections == 7
+        assert limits.max_keepalive_connections == 3
+        assert limits.keepalive_expiry == 12.0
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_provider_reuses_pooled_client(self):
+        """プロバイダーの連続呼び出しで同じ共有クライアントが使われる"""
+        with patch("app.llm.providers.anthropic_direct.settings") as mock_settings:
+            mock_settings.anthropic_api_key = "sk-ant-test"
+            provider = AnthropicDirectProvider()
+
+            respx.post("https://api.anthropic.com/v1/messages").mock(
+                return_value=httpx.Response(
+                    200, json={"content": [{"type": "text", "text": "ok"}]}
+                )
+            )
+
+            await provider.chat(messages=[{"role": "user", "content": "a"}])
+            await provider.chat(messages=[{"role": "user", "content": "b"}])
+
+            assert len(http_pool._clients) == 1
+            assert not get_http_client("https://api.anthropic.com").is_closed
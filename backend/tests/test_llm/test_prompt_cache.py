@@ -0,0 +1,164 @@
+"""プロバイダー側プロンプトキャッシュのテスト - SystemPrompt・cache_control・キャッシュ使用量"""
+
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+import respx
+
+from app.llm.base import LLMProvider
+from app.llm.prompt_cache import SystemPrompt
+from app.llm.providers.anthropic_direct import AnthropicDirectProvider
+from app.llm.providers.openai_compat import OpenAICompatibleProvider
+from app.prompts.conversation import build_conversation_system_prompt
+from app.prompts.feedback import build_feedback_prompt
+from app.prompts.mogomogo import build_mogomogo_generation_prompt
+from app.prompts.pattern_practice import build_pattern_generation_prompt
+
+ANTHROPIC_URL = "https://api.anthropic.com/v1/messages"
+
+
+class TestSystemPrompt:
+    """SystemPromptのテスト"""
+
+    def test_behaves_as_concatenated_string(self):
+        prompt = SystemPrompt("static rules", "user level B2")
+
+        assert prompt == "static rules\n\nuser level B2"
+        assert isinstance(prompt, str)
+        assert prompt.static == "static rules"
+        assert prompt.dynamic == "user level B2"
+        assert json.loads(json.dumps({"system": prompt}))["system"] == prompt
+
+    def test_static_only(self):
+        prompt = SystemPrompt("static rules")
+        assert prompt == "static rules"
+        assert prompt.dynamic == ""
+
+    def test_anthropic_system_blocks(self):
+        """静的部分の末尾に cache_control ブレークポイントを付ける"""
+        blocks = LLMProvider._build_anthropic_system(SystemPrompt("rules", "level"))
+
+        assert blocks == [
+            {"type": "text", "text": "rules", "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": "level"},
+        ]
+
+    def test_plain_string_and_disabled_are_unchanged(self):
+        assert LLMProvider._build_anthropic_system("plain") == "plain"
+        with patch("app.llm.base.settings") as mock_settings:
+            mock_settings.llm_prompt_cache_enabled = False
+            prompt = SystemPrompt("rules", "level")
+            assert LLMProvider._build_anthropic_system(prompt) == prompt
+
+
+class TestPromptBuilders:
+    """ビルダーが静的プレフィックスを共有することのテスト"""
+
+    @pytest.mark.parametrize(
+        ("first", "second"),
+        [
+            (
+                build_conversation_system_prompt("meeting", "B1"),
+                build_conversation_system_prompt(
+                    "negotiation", "C1", native_language="en"
+                ),
+            ),
+            (
+                build_feedback_prompt("A2", "meeting"),
+                build_feedback_prompt("C1", "interview", ["articles"], "Finance"),
+            ),
+            (
+                build_mogomogo_generation_prompt(["linking"], "B1"),
+                build_mogomogo_generation_prompt(["reduction", "flapping"], "C1"),
+            ),
+            (
+                build_pattern_generation_prompt("meeting", "B1"),
+                build_pattern_generation_prompt("email", "C1", ["follow-ups"]),
+            ),
+        ],
+    )
+    def test_static_prefix_is_shared(self, first, second):
+        assert isinstance(first, SystemPrompt)
+        assert first.static == second.static
+        assert first.dynamic != second.dynamic
+        assert first.startswith(first.static)
+
+    def test_dynamic_suffix_carries_request_details(self):
+        prompt = build_feedback_prompt("C1", "interview", ["articles"], "Finance")
+        assert "C1" in prompt.dynamic
+        assert "articles" in prompt.dynamic
+        assert "Finance" in prompt.dynamic
+        assert "Finance" not in prompt.static
+
+
+class TestProviderPromptCache:
+    """プロバイダーのリクエストとキャッシュ使用量"""
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_anthropic_sends_cache_control_and_reports_cached_tokens(self):
+        with patch("app.llm.providers.anthropic_direct.settings") as mock_settings:
+            mock_settings.anthropic_api_key = "sk-ant-test"
+            provider = AnthropicDirectProvider()
+
+            route = respx.post(ANTHROPIC_URL).mock(
+                return_value=httpx.Response(
+                    200,
+                    json={
+                        "content": [{"type": "text", "text": "ok"}],
+                        "usage": {
+                            "input_tokens": 20,
+                            "output_tokens": 5,
+                            "cache_read_input_tokens": 1800,
+                            "cache_creation_input_tokens": 0,
+                        },
+                    },
+                )
+            )
+
+            result = await provider.get_usage_info(
+                messages=[{"role": "user", "content": "Hi"}],
+                system=SystemPrompt("long static instructions", "level B2"),
+            )
+
+        body = json.loads(route.calls.last.request.content)
+        assert body["system"][0]["cache_control"] == {"type": "ephemeral"}
+        assert body["system"][1] == {"type": "text", "text": "level B2"}
+        assert result["cached_input_tokens"] == 1800
+        assert result["cache_creation_input_tokens"] == 0
+        assert result["input_tokens"] == 20
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_openai_prefix_order_and_cached_tokens(self):
+        """OpenAI形式は静的部分を先頭にした system メッセージで送信し、cached_tokens を返す"""
+        with patch("app.llm.providers.openai_compat.settings") as mock_settings:
+            mock_settings.local_llm_base_url = "http://localhost:11434"
+            mock_settings.local_llm_api_key = "ollama"
+            provider = OpenAICompatibleProvider()
+
+        route = respx.post("http://localhost:11434/v1/chat/completions").mock(
+            return_value=httpx.Response(
+                200,
+                json={
+                    "choices": [{"message": {"content": "ok"}}],
+                    "usage": {
+                        "prompt_tokens": 1500,
+                        "completion_tokens": 5,
+                        "prompt_tokens_details": {"cached_tokens": 1280},
+                    },
+                },
+            )
+        )
+
+        result = await provider.get_usage_info(
+            messages=[{"role": "user", "content": "Hi"}],
+            system=SystemPrompt("static", "dynamic"),
+        )
+
+        body = json.loads(route.calls.last.request.content)
+        assert body["messages"][0] == {"role": "system", "content": "static\n\ndynamic"}
+        assert result["cached_input_tokens"] == 1280
+        assert result["input_tokens"] == 1500
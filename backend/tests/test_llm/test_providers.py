@@ -11,6 +11,7 @@ from app.llm.base import LLMProvider
 from app.llm.providers.anthropic_direct import AnthropicDirectProvider
 from app.llm.providers.azure_foundry import AzureFoundryProvider
 from app.llm.providers.openai_compat import OpenAICompatibleProvider
+from app.llm.usage import capture_usage
 
 
 # ============================================================
@@ -335,6 +336,29 @@ class TestAnthropicDirectProvider:
             assert result["input_tokens"] == 200
             assert result["output_tokens"] == 100
 
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_anthropic_direct_chat_reports_usage(self):
+        """chat呼び出しのトークン使用量が使用量キャプチャへ報告される"""
+        with patch("app.llm.providers.anthropic_direct.settings") as mock_settings:
+            mock_settings.anthropic_api_key = "sk-ant-test"
+
+            provider = AnthropicDirectProvider()
+
+            respx.post("https://api.anthropic.com/v1/messages").mock(
+                return_value=httpx.Response(
+                    200,
+                    json=_anthropic_response("ok", input_tokens=30, output_tokens=7),
+                )
+            )
+
+            with capture_usage() as usage:
+                await provider.chat(messages=[{"role": "user", "content": "Test"}])
+
+            assert usage.input_tokens == 30
+            assert usage.output_tokens == 7
+            assert usage.model == "claude-haiku-4-5-20251001"
+
 
 # ============================================================
 # OpenAI Compatible Provider テスト
@@ -464,3 +488,225 @@ class TestParseJsonResponse:
         """不正なJSONでValueErrorが発生する"""
         with pytest.raises(ValueError, match="JSONパース"):
             LLMProvider._parse_json_response("this is not json at all")
+
+
+# ============================================================
+# ストリーミング (chat_stream) テスト
+# ============================================================
+def _sse_body(events: list[dict], done_marker: bool = False) -> bytes:
+    """SSE形式のレスポンスボディを生成"""
+    lines = [f"data: {json.dumps(e)}\n\n" for e in events]
+    if done_marker:
+        lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode()
+
+
+class TestChatStream:
+    """各プロバイダーのchat_streamのテスト"""
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_anthropic_direct_chat_stream(self):
+        """Anthropic SSEのtext_deltaのみが順に返され、最終イベントの使用量が報告される"""
+        with patch("app.llm.providers.anthropic_direct.settings") as mock_settings:
+            mock_settings.anthropic_api_key = "sk-ant-test"
+            provider = AnthropicDirectProvider()
+
+            route = respx.post("https://api.anthropic.com/v1/messages").mock(
+                return_value=httpx.Response(
+                    200,
+                    content=_sse_body(
+                        [
+                            {
+                                "type": "message_start",
+                                "message": {
+                                    "usage": {"input_tokens": 25, "output_tokens": 1}
+                                },
+                            },
+                            {
+                                "type": "content_block_delta",
+                                "delta": {"type": "text_delta", "text": "Hel"},
+                            },
+                            {
+                                "type": "content_block_delta",
+                                "delta": {"type": "text_delta", "text": "lo"},
+                            },
+                            {
+                                "type": "message_delta",
+                                "delta": {"stop_reason": "end_turn"},
+                                "usage": {"output_tokens": 12},
+                            },
+                            {"type": "message_stop"},
+                        ]
+                    ),
+                    headers={"Content-Type": "text/event-stream"},
+                )
+            )
+
+            with capture_usage() as usage:
+                chunks = [
+                    c
+                    async for c in provider.chat_stream(
+                        messages=[{"role": "user", "content": "Hi"}]
+                    )
+                ]
+
+            assert chunks == ["Hel", "lo"]
+            assert json.loads(route.calls[0].request.content)["stream"] is True
+            assert usage.input_tokens == 25
+            assert usage.output_tokens == 12
+            assert usage.model == "claude-haiku-4-5-20251001"
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_anthropic_stream_closed_early_reports_received_usage(self):
+        """読み出しを途中で打ち切った場合も受信済みの使用量を報告する"""
+        with patch("app.llm.providers.anthropic_direct.settings") as mock_settings:
+            mock_settings.anthropic_api_key = "sk-ant-test"
+            provider = AnthropicDirectProvider()
+
+            respx.post("https://api.anthropic.com/v1/messages").mock(
+                return_value=httpx.Response(
+                    200,
+                    content=_sse_body(
+                        [
+                            {
+                                "type": "message_start",
+                                "message": {"usage": {"input_tokens": 25}},
+                            },
+                            {
+                                "type": "content_block_delta",
+                                "delta": {"type": "text_delta", "text": "Hel"},
+                            },
+                            {
+                                "type": "content_block_delta",
+                                "delta": {"type": "text_delta", "text": "lo"},
+                            },
+                        ]
+                    ),
+                )
+            )
+
+            with capture_usage() as usage:
+                stream = provider.chat_stream(
+                    messages=[{"role": "user", "content": "Hi"}]
+                )
+                assert await anext(stream) == "Hel"
+                await stream.aclose()
+
+            assert usage.input_tokens == 25
+            assert usage.output_tokens == 0
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_anthropic_stream_error_event_raises(self):
+        """ストリーム中のerrorイベントでValueErrorが発生する"""
+        with patch("app.llm.providers.anthropic_direct.settings") as mock_settings:
+            mock_settings.anthropic_api_key = "sk-ant-test"
+            provider = AnthropicDirectProvider()
+
+            respx.post("https://api.anthropic.com/v1/messages").mock(
+                return_value=httpx.Response(
+                    200,
+                    content=_sse_body(
+                        [{"type": "error", "error": {"type": "overloaded_error"}}]
+                    ),
+                )
+            )
+
+            with pytest.raises(ValueError, match="overloaded_error"):
+                async for _ in provider.chat_stream(
+                    messages=[{"role": "user", "content": "Hi"}]
+                ):
+                    pass
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_openai_compat_chat_stream(self):
+        """OpenAI形式のdeltaが順に返され、[DONE]で終了する（最終チャンクの使用量を報告）"""
+        with patch("app.llm.providers.openai_compat.settings") as mock_settings:
+            mock_settings.local_llm_base_url = "http://localhost:11434"
+            mock_settings.local_llm_api_key = "ollama"
+            mock_settings.local_model_fast = "llama3.1:8b"
+            mock_settings.local_model_smart = "llama3.1:70b"
+            provider = OpenAICompatibleProvider()
+
+            route = respx.post("http://localhost:11434/v1/chat/completions").mock(
+                return_value=httpx.Response(
+                    200,
+                    content=_sse_body(
+                        [
+                            {"choices": [{"delta": {"role": "assistant"}}]},
+                            {"choices": [{"delta": {"content": "Good "}}]},
+                            {"choices": [{"delta": {"content": "morning"}}]},
+                            {
+                                "choices": [],
+                                "usage": {"prompt_tokens": 14, "completion_tokens": 2},
+                            },
+                        ],
+                        done_marker=True,
+                    ),
+                )
+            )
+
+            with capture_usage() as usage:
+                chunks = [
+                    c
+                    async for c in provider.chat_stream(
+                        messages=[{"role": "user", "content": "Hi"}]
+                    )
+                ]
+
+            assert chunks == ["Good ", "morning"]
+            body = json.loads(route.calls[0].request.content)
+            assert body["stream_options"] == {"include_usage": True}
+            assert usage.input_tokens == 14
+            assert usage.output_tokens == 2
+            assert usage.model == "llama3.1:8b"
+
+    @pytest.mark.asyncio
+    @respx.mock
+    async def test_azure_foundry_chat_stream_error(self):
+        """ストリーミングでもAPIエラー時にHTTPStatusErrorが発生する"""
+        with patch(
+            "app.llm.providers.azure_foundry.settings",
+            azure_ai_foundry_endpoint="https://test-openai.openai.azure.com",
+            azure_ai_foundry_api_key="key",
+            azure_openai_api_version="2024-10-21",
+        ):
+            provider = AzureFoundryProvider()
+
+            respx.post(url__startswith="https://test-openai.openai.azure.com").mock(
+                return_value=httpx.Response(500, json={"error": "boom"})
+            )
+
+            with pytest.raises(httpx.HTTPStatusError):
+                async for _ in provider.chat_stream(
+                    messages=[{"role": "user", "content": "Hi"}]
+                ):
+                    pass
+
+    @pytest.mark.asyncio
+    async def test_default_chat_stream_uses_chat(self):
+        """chat_stream未実装のプロバイダーはchat結果を1チャンクで返す"""
+
+        class _NonStreamingProvider(LLMProvider):
+            name = "dummy"
+
+            async def chat(self, messages, model="haiku", max_tokens=2048, system=None):
+                return "whole response"
+
+            async def chat_json(self, *args, **kwargs):
+                return {}
+
+            async def get_usage_info(self, *args, **kwargs):
+                return {}
+
+        chunks = [
+            c
+            async for c in _NonStreamingProvider().chat_stream(
+                [{"role": "user", "content": "Hi"}]
+            )
+        ]
+
+        assert chunks == ["whole response"]
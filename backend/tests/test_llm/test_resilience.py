@@ -1,11 +1,11 @@
-"""レジリエンス機能のテスト - サーキットブレーカー・リトライ・レートリミッター"""
+"""レジリエンス機能のテスト - サーキットブレーカー・リトライ・レートリミッター・ヘッジ"""
 
 import time
 from unittest.mock import AsyncMock
 
 import pytest
 
-from app.llm.resilience import CircuitBreaker, RateLimiter, RetryPolicy
+from app.llm.resilience import CircuitBreaker, HedgePolicy, RateLimiter, RetryPolicy
 
 
 # ============================================================
@@ -191,3 +191,47 @@ class TestRateLimiter:
 
         assert "RateLimiter" in repr_str
         assert "rpm=100" in repr_str
+
+
+# ============================================================
+# HedgePolicy テスト
+# ============================================================
+class TestHedgePolicy:
+    """HedgePolicyのテスト"""
+
+    def test_no_delay_until_min_samples(self):
+        """サンプル不足の間はヘッジしない"""
+        policy = HedgePolicy(min_samples=5)
+        for _ in range(4):
+            policy.record_latency("primary", 1.0)
+
+        assert policy.hedge_delay("primary") is None
+        assert policy.hedge_delay("unknown") is None
+
+    def test_delay_is_latency_percentile(self):
+        """待機時間は直近レイテンシのパーセンタイル"""
+        policy = HedgePolicy(percentile=0.9, min_samples=10)
+        for i in range(1, 11):
+            policy.record_latency("primary", i / 10)
+
+        assert policy.hedge_delay("primary") == pytest.approx(0.9)
+
+    def test_budget_caps_extra_calls(self):
+        """ヘッジ数はリクエスト数の max_extra_ratio 倍以下"""
+        policy = HedgePolicy(max_extra_ratio=0.1)
+        granted = 0
+        for _ in range(100):
+            policy.record_request()
+            if policy.try_acquire():
+                granted += 1
+
+        assert granted == 10
+        assert policy.hedges_sent == 10
+
+    def test_budget_burst_is_capped(self):
+        """予算トークンは max_burst を超えて蓄積しない"""
+        policy = HedgePolicy(max_extra_ratio=0.5, max_burst=2.0)
+        for _ in range(100):
+            policy.record_request()
+
+        assert policy.tokens == 2.0
@@ -0,0 +1,187 @@
+"""LLM応答キャッシュのテスト - キー正規化・バックエンド・LLMService連携"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.llm.response_cache import (
+    INDEX_KEY,
+    LocalCacheBackend,
+    RedisCacheBackend,
+    ResponseCache,
+)
+from app.llm.service import LLMService
+
+MESSAGES = [{"role": "user", "content": "Generate 3 exercises"}]
+
+
+def _make_service(result) -> LLMService:
+    service = LLMService.__new__(LLMService)
+    service.router = MagicMock()
+    service.router.chat_json = AsyncMock(return_value=result)
+    service.response_cache = ResponseCache(
+        backend=LocalCacheBackend(), ttl_seconds=60, max_value_bytes=10_000
+    )
+    return service
+
+
+class TestCacheKey:
+    """キャッシュキー生成のテスト"""
+
+    def test_whitespace_and_key_order_normalized(self):
+        """空白・辞書キー順の差異は同一キーになる"""
+        a = ResponseCache.make_key(
+            [{"role": "user", "content": "Generate  3\nexercises "}],
+            "haiku",
+            1024,
+            "  system prompt",
+        )
+        b = ResponseCache.make_key(
+            [{"content": "Generate 3 exercises", "role": "user"}],
+            "haiku",
+            1024,
+            "system prompt",
+        )
+
+        assert a == b
+
+    def test_model_and_max_tokens_affect_key(self):
+        """モデル・max_tokensが異なれば別キーになる"""
+        base = ResponseCache.make_key(MESSAGES, "haiku", 1024, "s")
+
+        assert base != ResponseCache.make_key(MESSAGES, "sonnet", 1024, "s")
+        assert base != ResponseCache.make_key(MESSAGES, "haiku", 2048, "s")
+        assert base != ResponseCache.make_key(MESSAGES, "haiku", 1024, "t")
+
+
+class TestLocalCacheBackend:
+    """プロセス内バックエンドのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_ttl_expiry(self):
+        """TTL経過後はNoneを返す"""
+        backend = LocalCacheBackend()
+        with patch("app.llm.response_cache.time.monotonic", return_value=0.0):
+            await backend.set("k", "v", ttl_seconds=10)
+        with patch("app.llm.response_cache.time.monotonic", return_value=5.0):
+            assert await backend.get("k") == "v"
+        with patch("app.llm.response_cache.time.monotonic", return_value=11.0):
+            assert await backend.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_size_eviction(self):
+        """上限超過時は最も古いエントリが追い出される"""
+        backend = LocalCacheBackend(max_entries=2)
+        await backend.set("a", "1", 60)
+        await backend.set("b", "2", 60)
+        await backend.set("c", "3", 60)
+
+        assert await backend.get("a") is None
+        assert await backend.get("c") == "3"
+
+
+class TestRedisCacheBackend:
+    """Redisバックエンドのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_no_redis_is_noop(self):
+        """Redis未接続時はミス扱いで保存もしない"""
+        backend = RedisCacheBackend(max_entries=10)
+        with patch("app.llm.response_cache.get_redis", return_value=None):
+            await backend.set("k", "v", 60)
+            assert await backend.get("k") is None
+
+    @pytest.mark.asyncio
+    async def test_evicts_oldest_over_limit(self):
+        """インデックスが上限を超えると古いキーを削除する"""
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=[True, 1, 12])
+        mock_redis = MagicMock()
+        mock_redis.pipeline.return_value = pipe
+        mock_redis.zpopmin = AsyncMock(return_value=[("old1", 1.0), ("old2", 2.0)])
+        mock_redis.delete = AsyncMock()
+
+        backend = RedisCacheBackend(max_entries=10)
+        with patch("app.llm.response_cache.get_redis", return_value=mock_redis):
+            await backend.set("k", "v", 60)
+
+        pipe.set.assert_called_once_with("k", "v", ex=60)
+        mock_redis.zpopmin.assert_awaited_once_with(INDEX_KEY, 2)
+        mock_redis.delete.assert_awaited_once_with("old1", "old2")
+
+
+class TestResponseCache:
+    """ResponseCacheのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_oversized_value_not_stored(self):
+        """上限サイズを超える応答は保存しない"""
+        cache = ResponseCache(backend=LocalCacheBackend(), max_value_bytes=10)
+        await cache.set("k", {"text": "x" * 100})
+
+        assert await cache.get("k", "ns") is None
+
+    @pytest.mark.asyncio
+    async def test_backend_error_fails_open(self):
+        """バックエンドエラー時はミスとして扱いエラー数を記録する"""
+        backend = MagicMock()
+        backend.get = AsyncMock(side_effect=ConnectionError("down"))
+        cache = ResponseCache(backend=backend)
+
+        assert await cache.get("k", "ns") is None
+        assert cache.get_stats()["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_disabled(self):
+        """無効化時は読み書きしない"""
+        cache = ResponseCache(backend=LocalCacheBackend(), enabled=False)
+        await cache.set("k", {"a": 1})
+
+        assert await cache.get("k", "ns") is None
+        assert cache.get_stats()["misses"] == 0
+
+
+class TestLLMServiceCaching:
+    """LLMService.chat_json のキャッシュ連携テスト"""
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_skips_router(self):
+        """2回目の同一リクエストはルーターを呼ばずキャッシュから返す"""
+        service = _make_service({"exercises": [1, 2, 3]})
+
+        first = await service.chat_json(
+            MESSAGES, system="s", cache_namespace="mogomogo_exercises"
+        )
+        second = await service.chat_json(
+            MESSAGES, system="s", cache_namespace="mogomogo_exercises"
+        )
+
+        assert first == second == {"exercises": [1, 2, 3]}
+        service.router.chat_json.assert_called_once()
+        stats = service.response_cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["namespaces"]["mogomogo_exercises"] == {"hits": 1, "misses": 1}
+
+    @pytest.mark.asyncio
+    async def test_list_response_cached(self):
+        """リスト形式のJSON応答もキャッシュされる"""
+        service = _make_service([{"id": 1}])
+
+        await service.chat_json(MESSAGES, cache_namespace="ns")
+        result = await service.chat_json(MESSAGES, cache_namespace="ns")
+
+        assert result == [{"id": 1}]
+        service.router.chat_json.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_without_namespace_not_cached(self):
+        """cache_namespace未指定の呼び出しはキャッシュしない"""
+        service = _make_service({"k": "v"})
+
+        await service.chat_json(MESSAGES)
+        await service.chat_json(MESSAGES)
+
+        assert service.router.chat_json.call_count == 2
+        assert service.response_cache.get_stats()["misses"] == 0
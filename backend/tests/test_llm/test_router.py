@@ -1,11 +1,17 @@
-"""LLMルーターのテスト - フォールバック・プライマリ成功・全失敗"""
+"""LLMルーターのテスト - フォールバック・プライマリ成功・全失敗・ヘッジ"""
 
+import asyncio
+import uuid
 from unittest.mock import AsyncMock, MagicMock
 
+import httpx
 import pytest
 
-from app.llm.resilience import RateLimiter, RetryPolicy
+from app.llm.errors import LLMResponseParseError, LLMStreamError
+from app.llm.resilience import HedgePolicy, RateLimiter, RetryPolicy
 from app.llm.router import LLMRouter
+from app.llm.scoring import ProviderScorer
+from app.llm.usage import report_usage, set_usage_user
 
 
 # ============================================================
@@ -135,3 +141,426 @@ class TestLLMRouter:
 
         assert result["text"] == "ok"
         assert result["model"] == "fallback"
+
+
+def _http_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://llm.example.com/v1/messages")
+    return httpx.HTTPStatusError(
+        f"HTTP {status_code}",
+        request=request,
+        response=httpx.Response(status_code, request=request),
+    )
+
+
+class TestLLMRouterRequestErrors:
+    """リクエスト起因の失敗（入力不正・パース失敗）の扱い"""
+
+    @staticmethod
+    def _router(primary, fallback):
+        return LLMRouter(
+            primary=primary,
+            fallbacks=[fallback],
+            retry_policy=RetryPolicy(max_retries=2, base_delay=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+            circuit_breaker_threshold=2,
+            scorer=ProviderScorer(min_samples=2),
+        )
+
+    @pytest.mark.asyncio
+    async def test_parse_error_does_not_fall_back_or_open_breaker(self):
+        """パース失敗は再送・フォールバックせず、ブレーカー・スコアにも反映しない"""
+        primary = _make_provider("primary")
+        primary.chat_json = AsyncMock(side_effect=LLMResponseParseError("bad json"))
+        fallback = _make_provider("fallback")
+        router = self._router(primary, fallback)
+
+        for _ in range(6):
+            with pytest.raises(LLMResponseParseError):
+                await router.chat_json(messages=[{"role": "user", "content": "t"}])
+
+        assert primary.chat_json.call_count == 6
+        assert fallback.chat_json.call_count == 0
+        assert router.circuit_breakers["primary"].state == "closed"
+        assert router.circuit_breakers["primary"].failure_count == 0
+        assert not router.scorer.is_degraded("primary", "haiku")
+
+    @pytest.mark.asyncio
+    async def test_bad_request_raises_value_error_without_fallback(self):
+        """400（プロンプト超過など）は ValueError として送出し、他のプロバイダーへ送らない"""
+        primary = _make_provider("primary")
+        primary.chat = AsyncMock(side_effect=_http_error(400))
+        fallback = _make_provider("fallback")
+        router = self._router(primary, fallback)
+
+        for _ in range(3):
+            with pytest.raises(ValueError, match="リクエストが拒否"):
+                await router.chat(messages=[{"role": "user", "content": "t"}])
+
+        assert primary.chat.call_count == 3
+        assert fallback.chat.call_count == 0
+        assert router.circuit_breakers["primary"].state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_auth_error_falls_back(self):
+        """認証エラーはプロバイダー固有の問題としてフォールバックし、失敗に数える"""
+        primary = _make_provider("primary")
+        primary.chat = AsyncMock(side_effect=_http_error(401))
+        fallback = _make_provider("fallback", chat_return="fallback response")
+        router = self._router(primary, fallback)
+
+        result = await router.chat(messages=[{"role": "user", "content": "t"}])
+
+        assert result == "fallback response"
+        assert primary.chat.call_count == 1
+        assert router.circuit_breakers["primary"].failure_count == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_invalid_request_does_not_fall_back(self):
+        """ストリームの invalid_request_error はフォールバックしない"""
+        primary = _make_provider("primary")
+        fallback = _make_stream_provider("fallback", ["x"])
+
+        async def _chat_stream(**kwargs):
+            raise LLMStreamError("prompt is too long", "invalid_request_error")
+            yield
+
+        primary.chat_stream = _chat_stream
+        router = self._router(primary, fallback)
+
+        with pytest.raises(LLMStreamError):
+            async for _ in router.chat_stream([{"role": "user", "content": "t"}]):
+                pass
+
+        assert fallback.stream_calls == 0
+        assert router.circuit_breakers["primary"].failure_count == 0
+
+
+def _make_stream_provider(name: str, chunks: list[str], fail_at: int | None = None):
+    """chat_streamを持つモックプロバイダーを生成（fail_at番目のチャンクで例外）"""
+    provider = _make_provider(name)
+    provider.stream_calls = 0
+
+    async def _chat_stream(**kwargs):
+        provider.stream_calls += 1
+        for i, chunk in enumerate(chunks):
+            if fail_at is not None and i == fail_at:
+                raise Exception(f"{name} stream failed")
+            yield chunk
+        if fail_at is not None and fail_at >= len(chunks):
+            raise Exception(f"{name} stream failed")
+
+    provider.chat_stream = _chat_stream
+    return provider
+
+
+class TestLLMRouterStream:
+    """LLMRouter.chat_streamのテスト"""
+
+    @staticmethod
+    def _router(primary, fallbacks=None):
+        return LLMRouter(
+            primary=primary,
+            fallbacks=fallbacks or [],
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+        )
+
+    @pytest.mark.asyncio
+    async def test_stream_primary_success(self):
+        """プライマリのチャンクがそのまま順に返される"""
+        primary = _make_stream_provider("primary", ["a", "b", "c"])
+        fallback = _make_stream_provider("fallback", ["x"])
+        router = self._router(primary, [fallback])
+
+        chunks = [
+            c async for c in router.chat_stream([{"role": "user", "content": "t"}])
+        ]
+
+        assert chunks == ["a", "b", "c"]
+        assert fallback.stream_calls == 0
+        assert router.circuit_breakers["primary"].failure_count == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_fallback_before_first_chunk(self):
+        """最初のチャンク前に失敗した場合はフォールバックに切り替わる"""
+        primary = _make_stream_provider("primary", ["a"], fail_at=0)
+        fallback = _make_stream_provider("fallback", ["x", "y"])
+        router = self._router(primary, [fallback])
+
+        chunks = [
+            c async for c in router.chat_stream([{"role": "user", "content": "t"}])
+        ]
+
+        assert chunks == ["x", "y"]
+        assert router.circuit_breakers["primary"].failure_count == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_no_fallback_after_first_chunk(self):
+        """最初のチャンク送出後の失敗はフォールバックせずに例外を送出する"""
+        primary = _make_stream_provider("primary", ["a", "b"], fail_at=1)
+        fallback = _make_stream_provider("fallback", ["x"])
+        router = self._router(primary, [fallback])
+
+        received = []
+        with pytest.raises(Exception, match="primary stream failed"):
+            async for chunk in router.chat_stream([{"role": "user", "content": "t"}]):
+                received.append(chunk)
+
+        assert received == ["a"]
+        assert fallback.stream_calls == 0
+        assert router.circuit_breakers["primary"].failure_count == 1
+
+    @pytest.mark.asyncio
+    async def test_stream_all_providers_fail(self):
+        """全プロバイダーが最初のチャンク前に失敗した場合はValueError"""
+        primary = _make_stream_provider("primary", [], fail_at=0)
+        fallback = _make_stream_provider("fallback", [], fail_at=0)
+        router = self._router(primary, [fallback])
+
+        with pytest.raises(ValueError, match="全LLMプロバイダーが失敗"):
+            async for _ in router.chat_stream([{"role": "user", "content": "t"}]):
+                pass
+
+
+class TestLLMRouterUsage:
+    """ルーターの使用量記録のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_usage_recorded_for_serving_provider(self):
+        """フォールバック時は実際に応答したプロバイダーの使用量を記録する"""
+        primary = _make_provider("anthropic", should_fail=True)
+        fallback = _make_provider("bedrock")
+
+        async def _chat_json(**kwargs):
+            report_usage(120, 40, "anthropic.claude-haiku")
+            return {"result": "ok"}
+
+        fallback.chat_json = AsyncMock(side_effect=_chat_json)
+        callback = MagicMock()
+        user_id = uuid.uuid4()
+
+        router = LLMRouter(
+            primary=primary,
+            fallbacks=[fallback],
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+            usage_callback=callback,
+        )
+
+        set_usage_user(user_id)
+        try:
+            result = await router.chat_json(
+                messages=[{"role": "user", "content": "test"}], model="haiku"
+            )
+        finally:
+            set_usage_user(None)
+
+        assert result == {"result": "ok"}
+        callback.assert_called_once_with(
+            user_id=user_id,
+            provider="bedrock",
+            model="haiku",
+            model_name="anthropic.claude-haiku",
+            input_tokens=120,
+            output_tokens=40,
+        )
+
+    @pytest.mark.asyncio
+    async def test_usage_callback_error_does_not_fail_call(self):
+        """使用量コールバックの例外は呼び出し結果に影響しない"""
+        router = LLMRouter(
+            primary=_make_provider("primary", chat_return="hello"),
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+            usage_callback=MagicMock(side_effect=RuntimeError("queue broken")),
+        )
+
+        result = await router.chat(messages=[{"role": "user", "content": "test"}])
+
+        assert result == "hello"
+
+    @staticmethod
+    def _usage_stream_provider(name: str, chunks: list[str]):
+        """終了時（途中で閉じられた場合を含む）に送出済みチャンク数を出力トークンとして報告"""
+        provider = _make_provider(name)
+
+        async def _chat_stream(**kwargs):
+            sent = 0
+            try:
+                for chunk in chunks:
+                    yield chunk
+                    sent += 1
+            finally:
+                report_usage(50, sent, f"{name}-model")
+
+        provider.chat_stream = _chat_stream
+        return provider
+
+    @pytest.mark.asyncio
+    async def test_stream_usage_recorded_after_completion(self):
+        """ストリーム完了時に最終イベントの使用量を記録する"""
+        callback = MagicMock()
+        user_id = uuid.uuid4()
+        router = LLMRouter(
+            primary=self._usage_stream_provider("anthropic", ["a", "b", "c"]),
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+            usage_callback=callback,
+        )
+
+        set_usage_user(user_id)
+        try:
+            chunks = [
+                c async for c in router.chat_stream([{"role": "user", "content": "t"}])
+            ]
+        finally:
+            set_usage_user(None)
+
+        assert chunks == ["a", "b", "c"]
+        callback.assert_called_once_with(
+            user_id=user_id,
+            provider="anthropic",
+            model="haiku",
+            model_name="anthropic-model",
+            input_tokens=50,
+            output_tokens=3,
+        )
+
+    @pytest.mark.asyncio
+    async def test_stream_usage_recorded_when_closed_early(self):
+        """読み出しを途中で打ち切られたストリームも、開始時のユーザーで使用量を記録する"""
+        callback = MagicMock()
+        user_id = uuid.uuid4()
+        router = LLMRouter(
+            primary=self._usage_stream_provider("anthropic", ["a", "b", "c"]),
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+            usage_callback=callback,
+        )
+
+        set_usage_user(user_id)
+        stream = router.chat_stream([{"role": "user", "content": "t"}])
+        try:
+            assert await anext(stream) == "a"
+            assert await anext(stream) == "b"
+        finally:
+            set_usage_user(None)
+        # 切断時のように、利用ユーザーが設定されていないコンテキストで閉じる
+        await stream.aclose()
+
+        callback.assert_called_once()
+        assert callback.call_args.kwargs["user_id"] == user_id
+        assert callback.call_args.kwargs["input_tokens"] == 50
+        assert callback.call_args.kwargs["output_tokens"] == 1
+
+
+class TestLLMRouterHedging:
+    """ヘッジリクエストのテスト"""
+
+    @staticmethod
+    def _slow_provider(name: str, delay: float, result: str = "slow"):
+        provider = _make_provider(name)
+        cancelled = asyncio.Event()
+
+        async def _chat(**kwargs):
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return result
+
+        provider.chat = AsyncMock(side_effect=_chat)
+        provider.cancelled = cancelled
+        return provider
+
+    @staticmethod
+    def _router(primary, fallbacks, policy: HedgePolicy) -> LLMRouter:
+        return LLMRouter(
+            primary=primary,
+            fallbacks=fallbacks,
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+            hedge_policy=policy,
+        )
+
+    @staticmethod
+    def _warm_policy(max_extra_ratio: float = 1.0) -> HedgePolicy:
+        """primary のp95が10msになるよう学習済みのポリシー"""
+        policy = HedgePolicy(min_samples=5, max_extra_ratio=max_extra_ratio)
+        for _ in range(5):
+            policy.record_latency("primary", 0.01)
+        return policy
+
+    @pytest.mark.asyncio
+    async def test_hedge_wins_and_cancels_slow_primary(self):
+        """プライマリが遅い場合はヘッジの応答を採用し、プライマリをキャンセルする"""
+        primary = self._slow_provider("primary", delay=5.0)
+        fallback = _make_provider("fallback", chat_return="hedged")
+        policy = self._warm_policy()
+        router = self._router(primary, [fallback], policy)
+
+        result = await asyncio.wait_for(
+            router.chat(messages=[{"role": "user", "content": "test"}]), timeout=1.0
+        )
+
+        assert result == "hedged"
+        assert primary.cancelled.is_set()
+        assert policy.hedges_sent == 1
+        assert policy.hedges_won == 1
+        # キャンセルはプロバイダー障害として扱わない
+        assert router.circuit_breakers["primary"].failure_count == 0
+
+    @pytest.mark.asyncio
+    async def test_fast_primary_is_not_hedged(self):
+        """パーセンタイル内に応答すればヘッジしない"""
+        primary = _make_provider("primary", chat_return="fast")
+        fallback = _make_provider("fallback")
+        policy = self._warm_policy()
+        router = self._router(primary, [fallback], policy)
+
+        result = await router.chat(messages=[{"role": "user", "content": "test"}])
+
+        assert result == "fast"
+        fallback.chat.assert_not_called()
+        assert policy.hedges_sent == 0
+
+    @pytest.mark.asyncio
+    async def test_no_hedge_without_budget(self):
+        """ヘッジ予算がない場合はプライマリの応答を待つ"""
+        primary = self._slow_provider("primary", delay=0.05, result="primary")
+        fallback = _make_provider("fallback")
+        router = self._router(primary, [fallback], self._warm_policy(0.01))
+
+        result = await router.chat(messages=[{"role": "user", "content": "test"}])
+
+        assert result == "primary"
+        fallback.chat.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_primary_wins_when_hedge_fails(self):
+        """ヘッジ先が失敗した場合はプライマリの応答を待って返す"""
+        primary = self._slow_provider("primary", delay=0.05, result="primary")
+        fallback = _make_provider("fallback", should_fail=True)
+        policy = self._warm_policy()
+        router = self._router(primary, [fallback], policy)
+
+        result = await router.chat(messages=[{"role": "user", "content": "test"}])
+
+        assert result == "primary"
+        fallback.chat.assert_called_once()
+        assert policy.hedges_won == 0
+
+    @pytest.mark.asyncio
+    async def test_falls_back_past_hedged_providers(self):
+        """ヘッジした2つが両方失敗した場合は残りのフォールバックへ進む"""
+        primary = _make_provider("primary", should_fail=True)
+        second = _make_provider("second", should_fail=True)
+        third = _make_provider("third", chat_return="third")
+        router = self._router(primary, [second, third], self._warm_policy())
+
+        result = await router.chat(messages=[{"role": "user", "content": "test"}])
+
+        assert result == "third"
+        primary.chat.assert_called_once()
+        second.chat.assert_called_once()
@@ -0,0 +1,167 @@
+"""プロバイダースコアリングのテスト - EWMA・劣化判定・目的関数別の順序"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.llm.resilience import RateLimiter, RetryPolicy
+from app.llm.router import LLMRouter
+from app.llm.scoring import ProviderScorer
+
+
+def _provider(name: str) -> MagicMock:
+    provider = MagicMock()
+    provider.name = name
+    return provider
+
+
+def _names(providers) -> list[str]:
+    return [p.name for p in providers]
+
+
+class TestProviderScorer:
+    """ProviderScorerのテスト"""
+
+    def test_unknown_objective_rejected(self):
+        with pytest.raises(ValueError):
+            ProviderScorer(objective="random")
+
+    def test_ewma_latency_and_error_rate(self):
+        """レイテンシ・エラー率はEWMAで更新される"""
+        scorer = ProviderScorer(alpha=0.5)
+        scorer.record_success("anthropic", "haiku", 1.0)
+        scorer.record_success("anthropic", "haiku", 3.0)
+        scorer.record_failure("anthropic", "haiku")
+
+        stats = scorer.get_scores()["providers"]["anthropic"]["haiku"]
+        assert stats["latency_ewma_ms"] == pytest.approx(2000.0)
+        assert stats["latency_p95_ms"] > stats["latency_ewma_ms"]
+        assert stats["error_rate"] == pytest.approx(0.5)
+        assert stats["samples"] == 3
+        assert stats["price_per_m_tokens"] == pytest.approx(4.8)
+
+    def test_priority_demotes_degraded_provider(self):
+        """priority: エラー率が閾値を超えたプロバイダーは後ろに回す"""
+        scorer = ProviderScorer(min_samples=3, max_error_rate=0.5)
+        providers = [_provider("azure_foundry"), _provider("anthropic")]
+        assert _names(scorer.order(providers, "haiku")) == [
+            "azure_foundry",
+            "anthropic",
+        ]
+
+        for _ in range(5):
+            scorer.record_failure("azure_foundry", "haiku")
+
+        assert _names(scorer.order(providers, "haiku")) == [
+            "anthropic",
+            "azure_foundry",
+        ]
+        # 劣化はモデルエイリアスごとに判定
+        assert _names(scorer.order(providers, "sonnet"))[0] == "azure_foundry"
+
+    def test_degraded_provider_recovers_after_decay(self):
+        """劣化したプロバイダーも時間経過で再試行され、成功が続けば元の順序に戻る"""
+        scorer = ProviderScorer(
+            min_samples=3, max_error_rate=0.5, recovery_half_life_seconds=60.0
+        )
+        providers = [_provider("azure_foundry"), _provider("anthropic")]
+        now = 1000.0
+
+        with patch("app.llm.scoring.time.monotonic", side_effect=lambda: now):
+            for _ in range(5):
+                scorer.record_failure("azure_foundry", "haiku")
+            assert _names(scorer.order(providers, "haiku"))[0] == "anthropic"
+
+            # 半減期より短い間は劣化扱いのまま
+            now += 10.0
+            assert scorer.is_degraded("azure_foundry", "haiku")
+
+            # 観測の重みが min_samples を下回ると再び先頭で試行される
+            now += 60.0
+            assert not scorer.is_degraded("azure_foundry", "haiku")
+            assert _names(scorer.order(providers, "haiku"))[0] == "azure_foundry"
+
+            # 再試行が成功し続ければ、十分な観測が溜まっても劣化扱いされない
+            for _ in range(3):
+                scorer.record_success("azure_foundry", "haiku", 0.5)
+            assert not scorer.is_degraded("azure_foundry", "haiku")
+            assert _names(scorer.order(providers, "haiku"))[0] == "azure_foundry"
+
+    def test_failed_probe_demotes_again(self):
+        """再試行でも失敗が続けば再び後ろに回す"""
+        scorer = ProviderScorer(min_samples=3, recovery_half_life_seconds=60.0)
+        providers = [_provider("azure_foundry"), _provider("anthropic")]
+        now = 1000.0
+
+        with patch("app.llm.scoring.time.monotonic", side_effect=lambda: now):
+            for _ in range(5):
+                scorer.record_failure("azure_foundry", "haiku")
+            now += 120.0
+            assert _names(scorer.order(providers, "haiku"))[0] == "azure_foundry"
+
+            for _ in range(3):
+                scorer.record_failure("azure_foundry", "haiku")
+            assert _names(scorer.order(providers, "haiku"))[0] == "anthropic"
+
+    def test_cheapest_within_slo(self):
+        """cheapest_within_slo: SLO内で最安、SLO超過は最安でも後ろ"""
+        scorer = ProviderScorer(
+            objective="cheapest_within_slo", latency_slo_seconds=2.0, min_samples=3
+        )
+        providers = [_provider("anthropic"), _provider("azure_foundry")]
+
+        # 観測前は料金順（azure_foundry の haiku が最安）
+        assert _names(scorer.order(providers, "haiku"))[0] == "azure_foundry"
+
+        for _ in range(5):
+            scorer.record_success("azure_foundry", "haiku", 6.0)
+            scorer.record_success("anthropic", "haiku", 0.5)
+
+        assert _names(scorer.order(providers, "haiku")) == [
+            "anthropic",
+            "azure_foundry",
+        ]
+
+    def test_fastest(self):
+        """fastest: p95推定の小さい順"""
+        scorer = ProviderScorer(objective="fastest")
+        providers = [_provider("anthropic"), _provider("bedrock")]
+        for _ in range(5):
+            scorer.record_success("anthropic", "sonnet", 2.0)
+            scorer.record_success("bedrock", "sonnet", 1.0)
+
+        assert _names(scorer.order(providers, "sonnet")) == ["bedrock", "anthropic"]
+
+
+class TestRouterWithScorer:
+    """LLMRouterとスコアラーの連携テスト"""
+
+    @pytest.mark.asyncio
+    async def test_router_shifts_to_healthy_provider(self):
+        """劣化したプライマリはブレーカーが開く前でも後回しにされる"""
+        primary = _provider("azure_foundry")
+        primary.chat = AsyncMock(side_effect=Exception("timeout"))
+        fallback = _provider("anthropic")
+        fallback.chat = AsyncMock(return_value="ok")
+        scorer = ProviderScorer(min_samples=2, max_error_rate=0.3)
+        router = LLMRouter(
+            primary=primary,
+            fallbacks=[fallback],
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+            circuit_breaker_threshold=100,
+            scorer=scorer,
+        )
+        messages = [{"role": "user", "content": "test"}]
+
+        for _ in range(2):
+            assert await router.chat(messages=messages) == "ok"
+        assert primary.chat.call_count == 2
+
+        assert await router.chat(messages=messages) == "ok"
+        # プライマリは劣化判定で後回しになり、呼ばれない
+        assert primary.chat.call_count == 2
+
+        scores = router.get_provider_scores()
+        assert scores["scores"]["providers"]["azure_foundry"]["haiku"]["degraded"]
+        assert scores["circuit_breakers"]["azure_foundry"] == "closed"
@@ -0,0 +1,153 @@
+"""共有レジリエンス機能のテスト - Redis共有ブレーカー・token bucket・フォールバック"""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.llm.shared_resilience import (
+    TOKEN_BUCKET_LUA,
+    SharedCircuitBreaker,
+    SharedRateLimiter,
+)
+from tests.fake_redis import FakeRedis
+
+
+async def _token_bucket(fake: FakeRedis, keys: list, args: list) -> str:
+    """TOKEN_BUCKET_LUA のPython実装（FakeRedis用、時刻は fake.now）"""
+    capacity, rate = float(args[0]), float(args[1])
+    state = fake.data.get(keys[0], {})
+    tokens = float(state.get("tokens", capacity))
+    ts = float(state.get("ts", fake.now))
+    tokens = min(capacity, tokens + max(0.0, fake.now - ts) * rate) - 1
+    fake.data[keys[0]] = {"tokens": str(tokens), "ts": str(fake.now)}
+    return "0" if tokens >= 0 else str(-tokens / rate)
+
+
+@pytest.fixture
+def fake_redis():
+    fake = FakeRedis()
+    fake.now = 1000.0
+    fake.scripts[TOKEN_BUCKET_LUA] = _token_bucket
+    with patch("app.llm.shared_resilience.get_redis", return_value=fake):
+        yield fake
+
+
+class TestSharedCircuitBreaker:
+    """SharedCircuitBreakerのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_failures_open_breaker_for_all_workers(self, fake_redis):
+        """あるワーカーの連続失敗で他のワーカーのブレーカーも開く"""
+        worker_a = SharedCircuitBreaker("azure_foundry", failure_threshold=3)
+        worker_b = SharedCircuitBreaker("azure_foundry", failure_threshold=3)
+
+        for _ in range(3):
+            assert await worker_a.allow_request() is True
+            await worker_a.on_failure()
+
+        assert worker_a.state == "open"
+        assert await worker_b.allow_request() is False
+        assert worker_b.state == "open"
+        assert worker_b.failure_count == 3
+
+    @pytest.mark.asyncio
+    async def test_single_probe_after_recovery_timeout(self, fake_redis):
+        """回復待ち経過後は1ワーカーだけが試行し、成功で全体が閉じる"""
+        worker_a = SharedCircuitBreaker("anthropic", 1, recovery_timeout=30.0)
+        worker_b = SharedCircuitBreaker("anthropic", 1, recovery_timeout=30.0)
+
+        with patch("app.llm.shared_resilience.time.time", return_value=1000.0):
+            await worker_a.on_failure()
+        with patch("app.llm.shared_resilience.time.time", return_value=1031.0):
+            assert await worker_a.allow_request() is True
+            assert worker_a.state == "half_open"
+            assert await worker_b.allow_request() is False
+
+        await worker_a.on_success()
+
+        assert await worker_b.allow_request() is True
+        assert worker_b.state == "closed"
+
+    @pytest.mark.asyncio
+    async def test_probe_failure_reopens(self, fake_redis):
+        """ハーフオープンの試行が失敗すると再びオープンになる"""
+        breaker = SharedCircuitBreaker("bedrock", 1, recovery_timeout=30.0)
+        with patch("app.llm.shared_resilience.time.time", return_value=1000.0):
+            await breaker.on_failure()
+        with patch("app.llm.shared_resilience.time.time", return_value=1031.0):
+            assert await breaker.allow_request() is True
+            await breaker.on_failure()
+            assert await breaker.allow_request() is False
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_local_state_without_redis(self):
+        """Redis未接続時はインメモリのブレーカーとして動作する"""
+        with patch("app.llm.shared_resilience.get_redis", return_value=None):
+            breaker = SharedCircuitBreaker("vertex", failure_threshold=2)
+            await breaker.on_failure()
+            await breaker.on_failure()
+
+            assert breaker.state == "open"
+            assert await breaker.allow_request() is False
+
+    @pytest.mark.asyncio
+    async def test_redis_error_falls_back_to_local(self):
+        """Redisエラー時はローカル状態で判定する"""
+        broken = MagicMock()
+        broken.hmget = AsyncMock(side_effect=ConnectionError("down"))
+        broken.pipeline.side_effect = ConnectionError("down")
+        with patch("app.llm.shared_resilience.get_redis", return_value=broken):
+            breaker = SharedCircuitBreaker("vertex", failure_threshold=1)
+            await breaker.on_failure()
+
+            assert breaker.failure_count == 1
+            assert await breaker.allow_request() is False
+
+
+class TestSharedRateLimiter:
+    """SharedRateLimiterのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_bucket_is_shared_between_workers(self, fake_redis):
+        """ワーカー間でトークンを共有し、合計で rpm を超えると待機する"""
+        worker_a = SharedRateLimiter(requests_per_minute=2)
+        worker_b = SharedRateLimiter(requests_per_minute=2)
+
+        with patch(
+            "app.llm.shared_resilience.asyncio.sleep", new_callable=AsyncMock
+        ) as mock_sleep:
+            await worker_a.acquire()
+            await worker_a.acquire()
+            mock_sleep.assert_not_called()
+
+            await worker_b.acquire()
+
+        # 2 rpm = 30秒に1トークン
+        mock_sleep.assert_awaited_once()
+        assert mock_sleep.await_args.args[0] == pytest.approx(30.0)
+
+    @pytest.mark.asyncio
+    async def test_bucket_refills_over_time(self, fake_redis):
+        """時間経過でトークンが補充される"""
+        limiter = SharedRateLimiter(requests_per_minute=60)
+        with patch(
+            "app.llm.shared_resilience.asyncio.sleep", new_callable=AsyncMock
+        ) as mock_sleep:
+            for _ in range(60):
+                await limiter.acquire()
+            fake_redis.now += 1.0
+            await limiter.acquire()
+
+        mock_sleep.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_local_bucket(self):
+        """Redis未接続・スクリプトエラー時はインメモリの token bucket を使う"""
+        broken = MagicMock()
+        broken.register_script.side_effect = ConnectionError("down")
+        for client in (None, broken):
+            with patch("app.llm.shared_resilience.get_redis", return_value=client):
+                limiter = SharedRateLimiter(requests_per_minute=60)
+                await limiter.acquire()
+
+                assert limiter.tokens == pytest.approx(59.0, abs=0.1)
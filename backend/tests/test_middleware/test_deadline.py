@@ -0,0 +1,86 @@
+"""リクエスト期限ミドルウェアのテスト - ヘッダー・エンドポイント既定値・期限切れ"""
+
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.llm.deadline import remaining_time
+from app.middleware.deadline import DeadlineMiddleware, default_deadline_for
+
+
+@pytest.fixture
+async def deadline_client():
+    """期限の残り時間を返すだけのアプリ"""
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware)
+
+    @app.get("/api/talk/message")
+    async def talk():
+        return {"remaining": remaining_time()}
+
+    @app.get("/api/other")
+    async def other():
+        return {"remaining": remaining_time()}
+
+    with patch("app.middleware.deadline.settings") as mock_settings:
+        mock_settings.request_deadline_seconds = 90.0
+        mock_settings.request_deadline_overrides_map = {"/api/talk": 45.0}
+        async with AsyncClient(
+            transport=ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            yield client
+
+
+class TestDeadlineMiddleware:
+    """DeadlineMiddleware のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_endpoint_defaults(self, deadline_client):
+        talk = (await deadline_client.get("/api/talk/message")).json()
+        other = (await deadline_client.get("/api/other")).json()
+
+        assert 44 < talk["remaining"] <= 45
+        assert 89 < other["remaining"] <= 90
+
+    @pytest.mark.asyncio
+    async def test_header_shortens_deadline(self, deadline_client):
+        deadline_ms = (time.time() + 10) * 1000
+        response = await deadline_client.get(
+            "/api/talk/message", headers={"X-Request-Deadline": str(deadline_ms)}
+        )
+
+        assert 8 < response.json()["remaining"] <= 10
+
+    @pytest.mark.asyncio
+    async def test_header_cannot_extend_default(self, deadline_client):
+        deadline_ms = (time.time() + 600) * 1000
+        response = await deadline_client.get(
+            "/api/talk/message", headers={"X-Request-Deadline": str(deadline_ms)}
+        )
+
+        assert response.json()["remaining"] <= 45
+
+    @pytest.mark.asyncio
+    async def test_expired_header_returns_504(self, deadline_client):
+        deadline_ms = (time.time() - 5) * 1000
+        response = await deadline_client.get(
+            "/api/talk/message", headers={"X-Request-Deadline": str(deadline_ms)}
+        )
+
+        assert response.status_code == 504
+        assert response.json()["error"]["code"] == "DEADLINE_EXCEEDED"
+
+
+def test_default_deadline_longest_prefix():
+    with patch("app.middleware.deadline.settings") as mock_settings:
+        mock_settings.request_deadline_seconds = 0
+        mock_settings.request_deadline_overrides_map = {
+            "/api/talk": 45.0,
+            "/api/talk/message/stream": 20.0,
+        }
+        assert default_deadline_for("/api/talk/message/stream") == 20.0
+        assert default_deadline_for("/api/talk/start") == 45.0
+        assert default_deadline_for("/health") is None
@@ -0,0 +1,201 @@
+"""認証プリンシパルキャッシュのテスト - プロセス内LRU・Redis・JWTクレーム共有"""
+
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from starlette.requests import Request
+
+from app.dependencies import get_current_user, get_token_claims, peek_token_claims
+from app.principal_cache import PrincipalCache
+from app.routers.auth import create_access_token
+from app.schemas.auth import CurrentUser
+
+
+def _principal(user_id: uuid.UUID | None = None, plan: str = "free") -> CurrentUser:
+    return CurrentUser(
+        id=user_id or uuid.uuid4(),
+        target_level="B2",
+        native_language="ja",
+        subscription_plan=plan,
+    )
+
+
+def _request(token: str | None = None) -> Request:
+    headers = []
+    if token:
+        headers.append((b"authorization", f"Bearer {token}".encode()))
+    return Request({"type": "http", "headers": headers})
+
+
+class TestPrincipalCacheLocal:
+    """Redis未接続時（プロセス内LRUのみ）のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_set_and_get(self):
+        """保存したプリンシパルを (sub, iat) で取得できる"""
+        cache = PrincipalCache(
+            ttl_seconds=60, local_ttl_seconds=5, local_max_entries=10
+        )
+        principal = _principal()
+
+        with patch("app.principal_cache.get_redis", return_value=None):
+            await cache.set(principal.id, 1000, principal)
+
+            assert await cache.get(principal.id, 1000) == principal
+            assert await cache.get(principal.id, 2000) is None
+
+    @pytest.mark.asyncio
+    async def test_local_ttl_expiry(self):
+        """TTL経過後のエントリはミスになる"""
+        cache = PrincipalCache(
+            ttl_seconds=60, local_ttl_seconds=5, local_max_entries=10
+        )
+        principal = _principal()
+
+        with (
+            patch("app.principal_cache.get_redis", return_value=None),
+            patch("app.principal_cache.time.monotonic", return_value=100.0),
+        ):
+            await cache.set(principal.id, 1, principal)
+
+        with (
+            patch("app.principal_cache.get_redis", return_value=None),
+            patch("app.principal_cache.time.monotonic", return_value=106.0),
+        ):
+            assert await cache.get(principal.id, 1) is None
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """最大エントリ数を超えると最も古いエントリが追い出される"""
+        cache = PrincipalCache(ttl_seconds=60, local_ttl_seconds=5, local_max_entries=2)
+        a, b, c = _principal(), _principal(), _principal()
+
+        with patch("app.principal_cache.get_redis", return_value=None):
+            await cache.set(a.id, 1, a)
+            await cache.set(b.id, 1, b)
+            await cache.get(a.id, 1)  # a を最近使用に
+            await cache.set(c.id, 1, c)
+
+            assert await cache.get(a.id, 1) == a
+            assert await cache.get(b.id, 1) is None
+            assert await cache.get(c.id, 1) == c
+
+    @pytest.mark.asyncio
+    async def test_invalidate_user_local(self):
+        """invalidate_userでユーザーの全iatのエントリが削除される"""
+        cache = PrincipalCache(
+            ttl_seconds=60, local_ttl_seconds=5, local_max_entries=10
+        )
+        principal = _principal()
+        other = _principal()
+
+        with patch("app.principal_cache.get_redis", return_value=None):
+            await cache.set(principal.id, 1, principal)
+            await cache.set(principal.id, 2, principal)
+            await cache.set(other.id, 1, other)
+
+            await cache.invalidate_user(principal.id)
+
+            assert await cache.get(principal.id, 1) is None
+            assert await cache.get(principal.id, 2) is None
+            assert await cache.get(other.id, 1) == other
+
+
+class TestPrincipalCacheRedis:
+    """Redis連携のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_redis_hit_populates_local(self):
+        """ローカルミス時はRedisから復元し、ローカルにも保存する"""
+        cache = PrincipalCache(
+            ttl_seconds=60, local_ttl_seconds=5, local_max_entries=10
+        )
+        principal = _principal(plan="premium")
+        mock_redis = MagicMock()
+        mock_redis.get = AsyncMock(return_value=principal.model_dump_json())
+
+        with patch("app.principal_cache.get_redis", return_value=mock_redis):
+            assert await cache.get(principal.id, 42) == principal
+            assert await cache.get(principal.id, 42) == principal
+
+        mock_redis.get.assert_awaited_once_with(f"principal:{principal.id}:42")
+
+    @pytest.mark.asyncio
+    async def test_invalidate_user_deletes_indexed_keys(self):
+        """無効化でインデックスに登録された全キーが削除される"""
+        cache = PrincipalCache(
+            ttl_seconds=60, local_ttl_seconds=5, local_max_entries=10
+        )
+        user_id = uuid.uuid4()
+        keys = {f"principal:{user_id}:1", f"principal:{user_id}:2"}
+        mock_redis = MagicMock()
+        mock_redis.smembers = AsyncMock(return_value=keys)
+        mock_redis.delete = AsyncMock()
+
+        with patch("app.principal_cache.get_redis", return_value=mock_redis):
+            await cache.invalidate_user(user_id)
+
+        args = mock_redis.delete.await_args.args
+        assert args[0] == f"principal:index:{user_id}"
+        assert set(args[1:]) == keys
+
+    @pytest.mark.asyncio
+    async def test_redis_error_is_cache_miss(self):
+        """Redisエラー時はキャッシュミスとして扱う"""
+        cache = PrincipalCache(
+            ttl_seconds=60, local_ttl_seconds=5, local_max_entries=10
+        )
+        mock_redis = MagicMock()
+        mock_redis.get = AsyncMock(side_effect=ConnectionError("down"))
+
+        with patch("app.principal_cache.get_redis", return_value=mock_redis):
+            assert await cache.get(uuid.uuid4(), 1) is None
+
+
+class TestTokenClaimsSharing:
+    """JWTクレームのリクエスト内共有のテスト"""
+
+    def test_claims_decoded_once_per_request(self):
+        """同一リクエストでの2回目以降はデコードしない"""
+        token = create_access_token(str(uuid.uuid4()))
+        request = _request(token)
+
+        with patch(
+            "app.dependencies.decode_access_token", return_value={"sub": "x"}
+        ) as mock_decode:
+            assert peek_token_claims(request) == {"sub": "x"}
+            assert get_token_claims(request, token) == {"sub": "x"}
+
+        mock_decode.assert_called_once_with(token)
+
+    def test_peek_invalid_token_returns_none(self):
+        """無効なトークンではNoneを返す"""
+        assert peek_token_claims(_request("invalid-token")) is None
+        assert peek_token_claims(_request()) is None
+
+
+class TestGetCurrentUserCache:
+    """get_current_userのキャッシュ利用テスト"""
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_skips_db(self, db_session, test_user):
+        """2回目の呼び出しはDBを参照しない"""
+        token = create_access_token(str(test_user.id))
+        credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+        with patch("app.principal_cache.get_redis", return_value=None):
+            first = await get_current_user(
+                request=_request(token), credentials=credentials, db=db_session
+            )
+
+            mock_db = MagicMock()
+            mock_db.execute = AsyncMock()
+            second = await get_current_user(
+                request=_request(token), credentials=credentials, db=mock_db
+            )
+
+        assert first == second
+        assert first.subscription_plan == "free"
+        mock_db.execute.assert_not_called()
@@ -1,9 +1,10 @@
 """リスニング・シャドーイングルーターのテスト"""
 
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from app.exceptions import SpeechServiceUnavailableError
 from app.schemas.listening import ShadowingMaterial
 
 
@@ -157,3 +158,213 @@ class TestListeningRouter:
         """未認証ユーザーは401/403エラー（HTTPBearer）"""
         response = await client.get("/api/listening/shadowing/material")
         assert response.status_code in (401, 403)
+
+
+class TestTTSAudioServing:
+    """合成済みTTS音声の配信（ETag・Range）のテスト"""
+
+    KEY = "ab" * 32
+
+    @pytest.fixture
+    def audio_cache(self, tmp_path):
+        from app.services.tts_audio_cache import LocalDiskAudioStore, TTSAudioCache
+
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=1024))
+        with patch("app.routers.listening.tts_audio_cache", cache):
+            yield cache
+
+    @pytest.mark.asyncio
+    async def test_tts_returns_etag_and_audio_location(self, auth_client):
+        with patch("app.routers.listening.shadowing_service") as mock_svc:
+            mock_svc.generate_audio = AsyncMock(return_value=b"0123456789")
+            mock_svc.audio_cache_key.return_value = self.KEY
+
+            response = await auth_client.post(
+                "/api/listening/tts", json={"text": "Hello"}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == f'"{self.KEY}"'
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.headers["content-location"] == (
+            f"/api/listening/tts/audio/{self.KEY}"
+        )
+
+    @pytest.mark.asyncio
+    async def test_tts_range_request(self, auth_client):
+        with patch("app.routers.listening.shadowing_service") as mock_svc:
+            mock_svc.generate_audio = AsyncMock(return_value=b"0123456789")
+            mock_svc.audio_cache_key.return_value = self.KEY
+
+            response = await auth_client.post(
+                "/api/listening/tts",
+                json={"text": "Hello"},
+                headers={"Range": "bytes=-3"},
+            )
+
+        assert response.status_code == 206
+        assert response.content == b"789"
+        assert response.headers["content-range"] == "bytes 7-9/10"
+
+    @pytest.mark.asyncio
+    async def test_get_cached_audio(self, auth_client, audio_cache):
+        await audio_cache.store.write(self.KEY, b"0123456789")
+
+        response = await auth_client.get(f"/api/listening/tts/audio/{self.KEY}")
+
+        assert response.status_code == 200
+        assert response.content == b"0123456789"
+        assert response.headers["content-type"] == "audio/wav"
+        assert "immutable" in response.headers["cache-control"]
+
+    @pytest.mark.asyncio
+    async def test_get_cached_audio_range(self, auth_client, audio_cache):
+        await audio_cache.store.write(self.KEY, b"0123456789")
+
+        response = await auth_client.get(
+            f"/api/listening/tts/audio/{self.KEY}", headers={"Range": "bytes=2-5"}
+        )
+
+        assert response.status_code == 206
+        assert response.content == b"2345"
+        assert response.headers["content-range"] == "bytes 2-5/10"
+
+    @pytest.mark.asyncio
+    async def test_get_cached_audio_range_not_satisfiable(
+        self, auth_client, audio_cache
+    ):
+        await audio_cache.store.write(self.KEY, b"0123456789")
+
+        response = await auth_client.get(
+            f"/api/listening/tts/audio/{self.KEY}", headers={"Range": "bytes=20-"}
+        )
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == "bytes */10"
+
+    @pytest.mark.asyncio
+    async def test_get_cached_audio_not_modified(self, auth_client, audio_cache):
+        await audio_cache.store.write(self.KEY, b"0123456789")
+
+        response = await auth_client.get(
+            f"/api/listening/tts/audio/{self.KEY}",
+            headers={"If-None-Match": f'W/"{self.KEY}"'},
+        )
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    @pytest.mark.asyncio
+    async def test_stale_if_range_returns_full_audio(self, auth_client, audio_cache):
+        await audio_cache.store.write(self.KEY, b"0123456789")
+
+        response = await auth_client.get(
+            f"/api/listening/tts/audio/{self.KEY}",
+            headers={"Range": "bytes=2-5", "If-Range": '"other"'},
+        )
+
+        assert response.status_code == 200
+        assert response.content == b"0123456789"
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("key", ["cd" * 32, "not-a-key"])
+    async def test_get_unknown_audio(self, auth_client, audio_cache, key):
+        response = await auth_client.get(f"/api/listening/tts/audio/{key}")
+
+        assert response.status_code == 404
+
+
+class TestTTSStreaming:
+    """TTSストリーミング・出力形式選択のテスト"""
+
+    @staticmethod
+    def _stream(*chunks, error: Exception | None = None):
+        async def _gen(**kwargs):
+            if error is not None:
+                raise error
+            for chunk in chunks:
+                yield chunk
+
+        return _gen
+
+    @pytest.mark.asyncio
+    async def test_stream_returns_chunks_in_requested_format(self, auth_client):
+        with patch("app.routers.listening.shadowing_service") as mock_svc:
+            mock_svc.stream_audio = MagicMock(
+                side_effect=self._stream(b"ID3", b"frame1", b"frame2")
+            )
+
+            response = await auth_client.post(
+                "/api/listening/tts/stream", json={"text": "Hello", "format": "mp3"}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "audio/mpeg"
+        assert response.content == b"ID3frame1frame2"
+        assert mock_svc.stream_audio.call_args.kwargs["audio_format"] == "mp3"
+
+    @pytest.mark.asyncio
+    async def test_stream_negotiates_format_from_accept(self, auth_client):
+        with patch("app.routers.listening.shadowing_service") as mock_svc:
+            mock_svc.stream_audio = MagicMock(side_effect=self._stream(b"OggS"))
+
+            response = await auth_client.post(
+                "/api/listening/tts/stream",
+                json={"text": "Hello"},
+                headers={"Accept": "audio/mpeg;q=0.5, audio/ogg, */*;q=0.1"},
+            )
+
+        assert response.headers["content-type"] == "audio/ogg"
+        assert mock_svc.stream_audio.call_args.kwargs["audio_format"] == "opus"
+
+    @pytest.mark.asyncio
+    async def test_stream_failure_before_first_chunk(self, auth_client):
+        with patch("app.routers.listening.shadowing_service") as mock_svc:
+            mock_svc.stream_audio = MagicMock(
+                side_effect=self._stream(error=RuntimeError("Speech API unavailable"))
+            )
+
+            response = await auth_client.post(
+                "/api/listening/tts/stream", json={"text": "Hello"}
+            )
+
+        assert response.status_code == 500
+
+    @pytest.mark.asyncio
+    async def test_speech_outage_is_returned_as_503(self, auth_client):
+        error = SpeechServiceUnavailableError("eastus2")
+        with patch("app.routers.listening.shadowing_service") as mock_svc:
+            mock_svc.generate_audio = AsyncMock(side_effect=error)
+            mock_svc.stream_audio = MagicMock(side_effect=self._stream(error=error))
+
+            responses = [
+                await auth_client.post(path, json={"text": "Hello"})
+                for path in ("/api/listening/tts", "/api/listening/tts/stream")
+            ]
+
+        for response in responses:
+            assert response.status_code == 503
+            assert response.json()["error"]["code"] == "SPEECH_SERVICE_UNAVAILABLE"
+
+    @pytest.mark.asyncio
+    async def test_tts_compressed_format(self, auth_client):
+        with patch("app.routers.listening.shadowing_service") as mock_svc:
+            mock_svc.generate_audio = AsyncMock(return_value=b"\x1a\x45\xdf\xa3")
+            mock_svc.audio_cache_key.return_value = "ef" * 32
+
+            response = await auth_client.post(
+                "/api/listening/tts", json={"text": "Hello", "format": "webm"}
+            )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "audio/webm"
+        assert "tts_output.webm" in response.headers["content-disposition"]
+        assert mock_svc.generate_audio.call_args.kwargs["audio_format"] == "webm"
+
+    @pytest.mark.asyncio
+    async def test_tts_rejects_unknown_format(self, auth_client):
+        response = await auth_client.post(
+            "/api/listening/tts", json={"text": "Hello", "format": "flac"}
+        )
+
+        assert response.status_code == 422
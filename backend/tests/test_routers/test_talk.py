@@ -5,6 +5,8 @@ from unittest.mock import AsyncMock, patch
 
 import pytest
 
+from tests.conftest import TestSessionLocal
+
 
 class TestTalkRouter:
     """Talkルーターのテスト"""
@@ -46,7 +48,10 @@ class TestTalkRouter:
             session_id = start_response.json()["id"]
 
             # feedback_serviceもモック
-            with patch("app.routers.talk.feedback_service") as mock_feedback:
+            with (
+                patch("app.routers.talk.feedback_service") as mock_feedback,
+                patch("app.routers.talk.async_session", TestSessionLocal),
+            ):
                 from app.schemas.talk import FeedbackData
 
                 mock_feedback.generate_feedback = AsyncMock(
@@ -176,3 +181,389 @@ class TestTalkRouter:
             data = response.json()
             assert data["mode"] == "meeting"
             assert len(data["messages"]) >= 1
+
+    @pytest.mark.asyncio
+    async def test_send_message_stream(self, auth_client):
+        """SSEでAI応答の断片とフィードバック付きの完了イベントが返される"""
+        import json
+
+        from app.llm.admission import PRIORITY_INTERACTIVE, get_llm_priority
+        from app.schemas.talk import FeedbackData
+
+        priorities = []
+
+        async def _chat_stream(**kwargs):
+            for chunk in ["Sounds ", "good."]:
+                priorities.append(get_llm_priority())
+                yield chunk
+
+        with patch("app.routers.talk.claude_service") as mock_llm:
+            mock_llm.chat = AsyncMock(return_value="Mock AI response")
+            mock_llm.chat_stream = _chat_stream
+
+            start_response = await auth_client.post(
+                "/api/talk/start",
+                json={"mode": "meeting"},
+            )
+            session_id = start_response.json()["id"]
+
+            with (
+                patch("app.routers.talk.feedback_service") as mock_feedback,
+                patch("app.routers.talk.async_session", TestSessionLocal),
+            ):
+                mock_feedback.generate_feedback = AsyncMock(
+                    return_value=FeedbackData(positive_feedback="Nice!")
+                )
+
+                response = await auth_client.post(
+                    "/api/talk/message/stream",
+                    json={"session_id": session_id, "content": "Let's begin."},
+                )
+
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("text/event-stream")
+
+            events = []
+            for block in response.text.strip().split("\n\n"):
+                event_line, data_line = block.split("\n")
+                events.append((event_line[7:], json.loads(data_line[6:])))
+
+            assert events[0] == ("delta", {"text": "Sounds "})
+            assert events[1] == ("delta", {"text": "good."})
+            assert events[-1][0] == "done"
+            assert events[-1][1]["content"] == "Sounds good."
+            assert events[-1][1]["feedback"]["positive_feedback"] == "Nice!"
+            assert priorities == [PRIORITY_INTERACTIVE, PRIORITY_INTERACTIVE]
+
+            detail = await auth_client.get(f"/api/talk/sessions/{session_id}")
+            messages = {m["content"]: m for m in detail.json()["messages"]}
+            assert messages["Sounds good."]["role"] == "assistant"
+            assert messages["Let's begin."]["feedback"]["positive_feedback"] == "Nice!"
+
+    @pytest.mark.asyncio
+    async def test_send_message_stream_failure_keeps_no_orphan_turn(self, auth_client):
+        """ストリームが失敗したターンはユーザーメッセージも保存せず、再送で重複しない"""
+        from app.schemas.talk import FeedbackData
+        from tests.fake_redis import FakeRedis
+
+        attempts = 0
+        sent_messages = []
+
+        async def _chat_stream(**kwargs):
+            nonlocal attempts
+            attempts += 1
+            sent_messages.append([m["content"] for m in kwargs["messages"]])
+            yield "Sounds "
+            if attempts == 1:
+                raise ValueError("全LLMプロバイダーが失敗しました")
+            yield "good."
+
+        fake = FakeRedis()
+        with (
+            patch("app.services.talk_session_cache.get_redis", return_value=fake),
+            patch("app.routers.talk.claude_service") as mock_llm,
+            patch("app.routers.talk.feedback_service") as mock_feedback,
+            patch("app.routers.talk.async_session", TestSessionLocal),
+            patch("app.routers.talk._get_weakness_history", AsyncMock(return_value=[])),
+        ):
+            mock_llm.chat = AsyncMock(return_value="Welcome!")
+            mock_llm.chat_stream = _chat_stream
+            mock_feedback.generate_feedback = AsyncMock(
+                return_value=FeedbackData(positive_feedback="Nice!")
+            )
+            start_response = await auth_client.post(
+                "/api/talk/start", json={"mode": "meeting"}
+            )
+            session_id = start_response.json()["id"]
+
+            event_names = []
+            for _ in range(2):
+                response = await auth_client.post(
+                    "/api/talk/message/stream",
+                    json={"session_id": session_id, "content": "Let's begin."},
+                )
+                assert response.status_code == 200
+                blocks = response.text.strip().split("\n\n")
+                event_names.append([block.split("\n")[0][7:] for block in blocks])
+            detail = await auth_client.get(f"/api/talk/sessions/{session_id}")
+
+        assert event_names[0][-1] == "error"
+        assert event_names[1][-1] == "done"
+        # 再送時のプロンプトにも失敗したターンのユーザーメッセージは重複しない
+        assert sent_messages[1] == ["Welcome!", "Let's begin."]
+        contents = [m["content"] for m in detail.json()["messages"]]
+        assert contents == ["Welcome!", "Let's begin.", "Sounds good."]
+        history = fake.data[f"talk:session:{session_id}:history"]
+        assert len(history) == 3
+
+    @pytest.mark.asyncio
+    async def test_send_message_runs_reply_and_feedback_concurrently(self, auth_client):
+        """AI応答とフィードバック生成が並行して実行される"""
+        import asyncio
+
+        from app.schemas.talk import FeedbackData
+
+        feedback_started = asyncio.Event()
+
+        async def _reply(**kwargs):
+            # フィードバックが逐次実行ならここでタイムアウトする
+            await asyncio.wait_for(feedback_started.wait(), timeout=2.0)
+            return "Concurrent reply"
+
+        async def _feedback(**kwargs):
+            feedback_started.set()
+            return FeedbackData(positive_feedback="Parallel!")
+
+        with patch("app.routers.talk.claude_service") as mock_llm:
+            mock_llm.chat = AsyncMock(return_value="Mock AI response")
+            start_response = await auth_client.post(
+                "/api/talk/start", json={"mode": "meeting"}
+            )
+            session_id = start_response.json()["id"]
+
+            mock_llm.chat = AsyncMock(side_effect=_reply)
+            with (
+                patch("app.routers.talk.feedback_service") as mock_feedback,
+                patch("app.routers.talk.async_session", TestSessionLocal),
+            ):
+                mock_feedback.generate_feedback = AsyncMock(side_effect=_feedback)
+
+                response = await auth_client.post(
+                    "/api/talk/message",
+                    json={"session_id": session_id, "content": "Shall we start?"},
+                )
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["content"] == "Concurrent reply"
+        assert data["feedback"]["positive_feedback"] == "Parallel!"
+
+    @pytest.mark.asyncio
+    async def test_send_message_failure_cancels_and_awaits_feedback(self, auth_client):
+        """応答生成に失敗した場合、フィードバック生成は中断され終了まで待たれる"""
+        import asyncio
+
+        from app.exceptions import LLMProviderError
+
+        feedback_started = asyncio.Event()
+        feedback_finished = asyncio.Event()
+
+        async def _reply(**kwargs):
+            await feedback_started.wait()
+            raise LLMProviderError(provider="anthropic")
+
+        async def _feedback(**kwargs):
+            feedback_started.set()
+            try:
+                await asyncio.sleep(10)
+            finally:
+                # キャンセル後の後始末に時間がかかる場合を模擬
+                await asyncio.sleep(0.1)
+                feedback_finished.set()
+
+        with patch("app.routers.talk.claude_service") as mock_llm:
+            mock_llm.chat = AsyncMock(return_value="Mock AI response")
+            start_response = await auth_client.post(
+                "/api/talk/start", json={"mode": "meeting"}
+            )
+            session_id = start_response.json()["id"]
+
+            mock_llm.chat = AsyncMock(side_effect=_reply)
+            with (
+                patch("app.routers.talk.feedback_service") as mock_feedback,
+                patch("app.routers.talk.async_session", TestSessionLocal),
+            ):
+                mock_feedback.generate_feedback = AsyncMock(side_effect=_feedback)
+
+                response = await auth_client.post(
+                    "/api/talk/message",
+                    json={"session_id": session_id, "content": "Are you there?"},
+                )
+
+        assert response.status_code == 502
+        # レスポンス返却時点でキャンセル済みのタスクが後始末まで完了している
+        assert feedback_finished.is_set()
+
+    @pytest.mark.asyncio
+    async def test_send_message_weakness_history_failure_isolated(self, auth_client):
+        """弱点履歴の取得に失敗しても応答とフィードバックは返される"""
+        from app.schemas.talk import FeedbackData
+
+        def _broken_session():
+            raise RuntimeError("db unavailable")
+
+        with patch("app.routers.talk.claude_service") as mock_llm:
+            mock_llm.chat = AsyncMock(return_value="Mock AI response")
+            start_response = await auth_client.post(
+                "/api/talk/start", json={"mode": "meeting"}
+            )
+            session_id = start_response.json()["id"]
+
+            with (
+                patch("app.routers.talk.feedback_service") as mock_feedback,
+                patch("app.routers.talk.async_session", _broken_session),
+            ):
+                mock_feedback.generate_feedback = AsyncMock(
+                    return_value=FeedbackData(positive_feedback="Still here")
+                )
+
+                response = await auth_client.post(
+                    "/api/talk/message",
+                    json={"session_id": session_id, "content": "Hello again."},
+                )
+
+                kwargs = mock_feedback.generate_feedback.call_args.kwargs
+
+        assert response.status_code == 200
+        assert response.json()["feedback"]["positive_feedback"] == "Still here"
+        assert kwargs["weakness_history"] == []
+
+    @pytest.mark.asyncio
+    async def test_send_message_uses_summary_and_unsummarized_tail(
+        self, auth_client, test_user
+    ):
+        """要約済みのメッセージは送信せず、要約をシステムプロンプトに含める"""
+        from datetime import UTC, datetime, timedelta
+
+        from app.models.conversation import ConversationMessage, ConversationSession
+        from app.schemas.talk import FeedbackData
+
+        base = datetime(2026, 1, 1, tzinfo=UTC)
+        async with TestSessionLocal() as db:
+            session = ConversationSession(
+                user_id=test_user.id,
+                mode="meeting",
+                context_summary="- Agreed to ship in March",
+                summarized_message_count=4,
+            )
+            db.add(session)
+            await db.flush()
+            for i in range(24):
+                db.add(
+                    ConversationMessage(
+                        session_id=session.id,
+                        role="user" if i % 2 == 0 else "assistant",
+                        content=f"message {i}",
+                        created_at=base + timedelta(seconds=i),
+                    )
+                )
+            await db.commit()
+            session_id = session.id
+
+        with (
+            patch("app.routers.talk.claude_service") as mock_llm,
+            patch("app.routers.talk.feedback_service") as mock_feedback,
+            patch("app.routers.talk.async_session", TestSessionLocal),
+            patch("app.routers.talk.conversation_context_manager") as mock_manager,
+        ):
+            from app.services.conversation_context import ConversationContextManager
+
+            manager = ConversationContextManager(recent_turns=6, max_tokens=3000)
+            mock_manager.build = manager.build
+            mock_llm.chat = AsyncMock(return_value="Reply")
+            mock_feedback.generate_feedback = AsyncMock(
+                return_value=FeedbackData(positive_feedback="Good")
+            )
+
+            response = await auth_client.post(
+                "/api/talk/message",
+                json={"session_id": str(session_id), "content": "Next topic."},
+            )
+
+        assert response.status_code == 200
+        kwargs = mock_llm.chat.call_args.kwargs
+        contents = [m["content"] for m in kwargs["messages"]]
+        assert contents[0] == "message 4"
+        assert contents[-1] == "Next topic."
+        assert (
+            "## Earlier in This Conversation\n- Agreed to ship in March"
+            in (kwargs["system"])
+        )
+        # 未要約の古いターンがしきい値を超えているため要約が予約される
+        mock_manager.schedule_summary.assert_called_once_with(session_id)
+
+    @pytest.mark.asyncio
+    async def test_active_session_state_served_from_cache(self, auth_client):
+        """アクティブなセッションではセッション行・メッセージを毎ターン読み込まない"""
+        from sqlalchemy import event
+
+        from app.schemas.talk import FeedbackData
+        from tests.conftest import test_engine
+        from tests.fake_redis import FakeRedis
+
+        selects: list[str] = []
+
+        def _on_execute(conn, cursor, statement, *args):
+            if statement.lstrip().upper().startswith("SELECT") and (
+                "FROM conversation_" in statement
+            ):
+                selects.append(statement)
+
+        fake = FakeRedis()
+        with (
+            patch("app.services.talk_session_cache.get_redis", return_value=fake),
+            patch("app.routers.talk.claude_service") as mock_llm,
+            patch("app.routers.talk.feedback_service") as mock_feedback,
+            patch("app.routers.talk._get_weakness_history", AsyncMock(return_value=[])),
+        ):
+            mock_llm.chat = AsyncMock(return_value="Welcome!")
+            mock_feedback.generate_feedback = AsyncMock(
+                return_value=FeedbackData(positive_feedback="Good")
+            )
+            start_response = await auth_client.post(
+                "/api/talk/start", json={"mode": "meeting"}
+            )
+            session_id = start_response.json()["id"]
+
+            event.listen(test_engine.sync_engine, "before_cursor_execute", _on_execute)
+            try:
+                for content in ["First point.", "Second point."]:
+                    mock_llm.chat = AsyncMock(return_value=f"Reply to {content}")
+                    response = await auth_client.post(
+                        "/api/talk/message",
+                        json={"session_id": session_id, "content": content},
+                    )
+                    assert response.status_code == 200
+            finally:
+                event.remove(
+                    test_engine.sync_engine, "before_cursor_execute", _on_execute
+                )
+
+        # 保存したAIメッセージの refresh（主キー1行）以外は読み込まない
+        assert not any("FROM conversation_sessions" in q for q in selects)
+        assert not any("conversation_messages.session_id = " in q for q in selects)
+        sent = [m["content"] for m in mock_llm.chat.call_args.kwargs["messages"]]
+        assert sent == [
+            "Welcome!",
+            "First point.",
+            "Reply to First point.",
+            "Second point.",
+        ]
+        history = fake.data[f"talk:session:{session_id}:history"]
+        assert len(history) == 5
+
+    @pytest.mark.asyncio
+    async def test_cached_session_of_other_user_is_not_found(self, auth_client):
+        """キャッシュ上の所有ユーザーが異なる場合はDBで検証し404を返す"""
+        from app.services.talk_session_cache import TalkSessionState, talk_session_cache
+        from tests.fake_redis import FakeRedis
+
+        fake = FakeRedis()
+        session_id = uuid.uuid4()
+        with patch("app.services.talk_session_cache.get_redis", return_value=fake):
+            await talk_session_cache.put(
+                TalkSessionState(
+                    session_id=session_id,
+                    user_id=uuid.uuid4(),
+                    mode="meeting",
+                    scenario_description=None,
+                    scenario=None,
+                    summary=None,
+                )
+            )
+            response = await auth_client.post(
+                "/api/talk/message",
+                json={"session_id": str(session_id), "content": "Hello"},
+            )
+
+        assert response.status_code == 404
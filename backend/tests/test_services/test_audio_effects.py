@@ -0,0 +1,364 @@
+"""TTS音声の後処理のテスト - 環境音（帯域制限・SNR・コーデック歪み）・時間伸縮・合成の共有"""
+
+import time
+from unittest.mock import AsyncMock, patch
+
+import numpy as np
+import pytest
+
+from app.services.audio_effects import (
+    ENVIRONMENT_EFFECTS,
+    apply_environment,
+    apply_environment_wav,
+    band_limit,
+    decode_wav,
+    encode_wav,
+    mix_at_snr,
+    mu_law,
+    speech_power,
+    supports_environment,
+    time_stretch,
+    time_stretch_wav,
+    to_float,
+)
+from app.services.speech_service import SpeechService
+from app.services.tts_audio_cache import LocalDiskAudioStore, TTSAudioCache
+
+RATE = 24000
+
+
+def _tone(freqs: list[float], seconds: float = 1.0, amplitude: float = 0.2):
+    """指定周波数の正弦波の和（int16）"""
+    t = np.arange(int(RATE * seconds)) / RATE
+    signal = sum(np.sin(2 * np.pi * f * t) for f in freqs) * amplitude
+    return np.round(signal * 32767).astype(np.int16)
+
+
+def _band_power(samples: np.ndarray, low: float, high: float) -> float:
+    spectrum = np.abs(np.fft.rfft(to_float(samples))) ** 2
+    freqs = np.fft.rfftfreq(samples.size, d=1.0 / RATE)
+    return float(spectrum[(freqs >= low) & (freqs <= high)].sum())
+
+
+class TestWav:
+    """WAV 入出力のテスト"""
+
+    def test_round_trip(self):
+        samples = _tone([440.0])
+        decoded, rate = decode_wav(encode_wav(samples, RATE))
+
+        assert rate == RATE
+        assert decoded.dtype == np.int16
+        np.testing.assert_array_equal(decoded, samples)
+
+    def test_rejects_non_wav(self):
+        with pytest.raises(ValueError):
+            decode_wav(b"ID3\x04\x00not a wav")
+
+
+class TestPrimitives:
+    """基本処理のテスト"""
+
+    def test_band_limit_removes_out_of_band_tones(self):
+        signal = to_float(_tone([100.0, 1000.0, 6000.0]))
+        filtered = band_limit(signal, RATE, 300.0, 3400.0)
+        result = np.round(filtered * 32767).astype(np.int16)
+        original = _tone([100.0, 1000.0, 6000.0])
+
+        assert _band_power(result, 50, 150) < _band_power(original, 50, 150) * 1e-3
+        assert (
+            _band_power(result, 5900, 6100) < _band_power(original, 5900, 6100) * 1e-3
+        )
+        assert _band_power(result, 950, 1050) == pytest.approx(
+            _band_power(original, 950, 1050), rel=0.01
+        )
+
+    def test_mu_law_quantizes_to_8_bits(self):
+        signal = np.linspace(-1.0, 1.0, 10000)
+        assert np.unique(mu_law(signal)).size <= 255
+        # 量子化誤差は最大振幅付近でも小さい
+        assert np.max(np.abs(mu_law(signal) - signal)) < 0.05
+
+    @pytest.mark.parametrize("snr_db", [0.0, 12.0, 20.0])
+    def test_mix_at_snr(self, snr_db):
+        signal = to_float(_tone([500.0]))
+        noise = np.random.default_rng(0).standard_normal(signal.size)
+
+        mixed = mix_at_snr(signal, noise, RATE, snr_db)
+        added = mixed - signal
+        measured = 10 * np.log10(speech_power(signal, RATE) / np.mean(added**2))
+
+        assert measured == pytest.approx(snr_db, abs=0.01)
+
+    def test_speech_power_ignores_silence(self):
+        speech = to_float(_tone([500.0]))
+        padded = np.concatenate([np.zeros(RATE), speech, np.zeros(RATE)])
+
+        assert speech_power(padded, RATE) == pytest.approx(
+            speech_power(speech, RATE), rel=1e-6
+        )
+
+
+class TestEnvironments:
+    """環境ごとの処理のテスト"""
+
+    @pytest.mark.parametrize("environment", sorted(ENVIRONMENT_EFFECTS))
+    def test_output_is_deterministic_int16_of_same_length(self, environment):
+        samples = _tone([220.0, 1000.0])
+
+        first = apply_environment(samples, RATE, environment)
+        second = apply_environment(samples, RATE, environment)
+
+        assert first.dtype == np.int16
+        assert first.shape == samples.shape
+        np.testing.assert_array_equal(first, second)
+        assert not np.array_equal(first, samples)
+
+    def test_clean_and_unknown_are_unchanged(self):
+        samples = _tone([440.0])
+
+        assert not supports_environment("clean")
+        np.testing.assert_array_equal(
+            apply_environment(samples, RATE, "clean"), samples
+        )
+        np.testing.assert_array_equal(apply_environment(samples, RATE, "moon"), samples)
+
+    def test_phone_call_is_band_limited(self):
+        samples = _tone([100.0, 1000.0, 6000.0])
+        result = apply_environment(samples, RATE, "phone_call")
+
+        in_band = _band_power(result, 950, 1050)
+        assert _band_power(result, 50, 150) < in_band * 1e-2
+        assert _band_power(result, 5900, 6100) < in_band * 1e-2
+
+    def test_video_call_removes_content_above_7khz(self):
+        samples = _tone([1000.0, 9000.0])
+        result = apply_environment(samples, RATE, "video_call")
+
+        assert _band_power(result, 8900, 9100) < _band_power(result, 950, 1050) * 1e-2
+
+    @pytest.mark.parametrize(("environment", "snr_db"), [("office", 20), ("cafe", 12)])
+    def test_noise_bed_snr(self, environment, snr_db):
+        samples = _tone([500.0], seconds=3.0)
+        result = apply_environment(samples, RATE, environment)
+        clean = to_float(samples)
+        noise = to_float(result) - clean
+        measured = 10 * np.log10(speech_power(clean, RATE) / np.mean(noise**2))
+
+        assert measured == pytest.approx(snr_db, abs=0.5)
+
+    def test_never_clips(self):
+        loud = _tone([300.0, 700.0], amplitude=0.49)
+        result = apply_environment(loud, RATE, "cafe")
+
+        assert np.max(np.abs(result.astype(np.int32))) < 32767
+
+    def test_processes_long_audio_quickly(self):
+        """サンプルごとのループがなく、30秒の音声を全環境で短時間に処理できる"""
+        samples = _tone([220.0, 880.0], seconds=30.0)
+        start = time.perf_counter()
+        for environment in ENVIRONMENT_EFFECTS:
+            apply_environment(samples, RATE, environment)
+
+        assert time.perf_counter() - start < 5.0
+
+
+class TestTimeStretch:
+    """time_stretch のテスト"""
+
+    @staticmethod
+    def _dominant_hz(samples: np.ndarray) -> float:
+        spectrum = np.abs(np.fft.rfft(to_float(samples)))
+        return float(np.fft.rfftfreq(samples.size, d=1.0 / RATE)[np.argmax(spectrum)])
+
+    @pytest.mark.parametrize("speed", [0.5, 0.75, 1.25, 1.5, 2.0])
+    def test_changes_duration_but_not_pitch(self, speed):
+        samples = _tone([220.0], seconds=2.0)
+        result = time_stretch(samples, RATE, speed)
+
+        assert result.dtype == np.int16
+        assert result.size == round(samples.size / speed)
+        # 先頭・末尾を除いた1秒間で比較する
+        middle = result[RATE // 4 : RATE // 4 + RATE]
+        assert self._dominant_hz(middle) == pytest.approx(220.0, abs=1.0)
+
+    def test_preserves_level_without_phase_cancellation(self):
+        samples = _tone([220.0, 330.0], seconds=2.0)
+        result = time_stretch(samples, RATE, 1.25)
+        middle = result[RATE // 4 : RATE // 4 + RATE]
+
+        assert speech_power(to_float(middle), RATE) == pytest.approx(
+            speech_power(to_float(samples), RATE), rel=0.1
+        )
+
+    def test_normal_speed_is_unchanged(self):
+        samples = _tone([440.0])
+        np.testing.assert_array_equal(time_stretch(samples, RATE, 1.0), samples)
+
+    def test_wav(self):
+        data = encode_wav(_tone([440.0], seconds=1.5), RATE)
+        samples, rate = decode_wav(time_stretch_wav(data, 1.5))
+
+        assert rate == RATE
+        assert samples.size == RATE
+
+
+class TestSpeechServiceEnvironments:
+    """SpeechService が1回の合成で全環境の音声を作ることのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_one_synthesis_serves_every_environment(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=10**8))
+        service = SpeechService()
+        clean_wav = encode_wav(_tone([440.0], seconds=0.5), RATE)
+
+        with (
+            patch("app.services.speech_service.tts_audio_cache", cache),
+            patch.object(
+                service, "_synthesize", AsyncMock(return_value=clean_wav)
+            ) as mock_synthesize,
+        ):
+            results = {
+                environment: await service.text_to_speech(
+                    "Let's get started.", environment=environment
+                )
+                for environment in ["clean", *ENVIRONMENT_EFFECTS]
+            }
+
+        mock_synthesize.assert_awaited_once()
+        ssml = mock_synthesize.call_args.args[0]
+        assert "telephone" not in ssml
+        assert results["clean"] == clean_wav
+        for environment in ENVIRONMENT_EFFECTS:
+            assert results[environment] == apply_environment_wav(clean_wav, environment)
+            key = service.tts_cache_key("Let's get started.", environment=environment)
+            assert await cache.size(key) == len(results[environment])
+
+    @pytest.mark.asyncio
+    async def test_compressed_formats_keep_ssml_effects(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=4096))
+        service = SpeechService()
+
+        with (
+            patch("app.services.speech_service.tts_audio_cache", cache),
+            patch.object(
+                service, "_synthesize", AsyncMock(return_value=b"ID3mp3")
+            ) as mock_synthesize,
+        ):
+            audio = await service.text_to_speech(
+                "Hello", environment="phone_call", audio_format="mp3"
+            )
+
+        assert audio == b"ID3mp3"
+        assert "telephone" in mock_synthesize.call_args.args[0]
+
+    @pytest.mark.asyncio
+    async def test_disabled_synthesizes_environment_with_ssml(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=4096))
+        service = SpeechService()
+
+        with (
+            patch("app.services.speech_service.tts_audio_cache", cache),
+            patch(
+                "app.services.speech_service.settings.tts_environment_effects_enabled",
+                False,
+            ),
+            patch.object(
+                service, "_synthesize", AsyncMock(return_value=b"RIFF-audio")
+            ) as mock_synthesize,
+        ):
+            audio = await service.text_to_speech("Hello", environment="phone_call")
+
+        assert audio == b"RIFF-audio"
+        assert "telephone" in mock_synthesize.call_args.args[0]
+
+
+class TestSpeechServiceSpeeds:
+    """SpeechService が1.0倍の音声から各話速の音声を作ることのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_stepping_through_speeds_synthesizes_once(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=10**8))
+        service = SpeechService()
+        normal = encode_wav(_tone([440.0], seconds=1.5), RATE)
+
+        with (
+            patch("app.services.speech_service.tts_audio_cache", cache),
+            patch.object(
+                service, "_synthesize", AsyncMock(return_value=normal)
+            ) as mock_synthesize,
+        ):
+            results = {
+                speed: await service.text_to_speech("Hello", speed=speed)
+                for speed in [1.0, 0.75, 1.25, 1.5]
+            }
+            # 加工済みの音声は2回目以降キャッシュから返す
+            again = await service.text_to_speech("Hello", speed=1.25)
+
+        mock_synthesize.assert_awaited_once()
+        assert "rate='default'" in mock_synthesize.call_args.args[0]
+        assert results[1.0] == normal
+        assert again == results[1.25]
+        for speed in [0.75, 1.25, 1.5]:
+            samples, _ = decode_wav(results[speed])
+            assert samples.size == round(RATE * 1.5 / speed)
+            key = service.tts_cache_key("Hello", speed=speed)
+            assert await cache.size(key) == len(results[speed])
+
+    @pytest.mark.asyncio
+    async def test_speed_and_environment_share_stretched_audio(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=10**8))
+        service = SpeechService()
+        normal = encode_wav(_tone([440.0], seconds=1.0), RATE)
+
+        with (
+            patch("app.services.speech_service.tts_audio_cache", cache),
+            patch.object(
+                service, "_synthesize", AsyncMock(return_value=normal)
+            ) as mock_synthesize,
+            patch(
+                "app.services.speech_service.time_stretch_wav",
+                wraps=time_stretch_wav,
+            ) as mock_stretch,
+        ):
+            phone = await service.text_to_speech(
+                "Hello", speed=0.75, environment="phone_call"
+            )
+            cafe = await service.text_to_speech("Hello", speed=0.75, environment="cafe")
+
+        mock_synthesize.assert_awaited_once()
+        mock_stretch.assert_called_once()
+        stretched = time_stretch_wav(normal, 0.75)
+        assert phone == apply_environment_wav(stretched, "phone_call")
+        assert cafe == apply_environment_wav(stretched, "cafe")
+
+    @pytest.mark.asyncio
+    async def test_out_of_range_speed_uses_ssml_rate(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=4096))
+        service = SpeechService()
+
+        with (
+            patch("app.services.speech_service.tts_audio_cache", cache),
+            patch.object(
+                service, "_synthesize", AsyncMock(return_value=b"RIFF-audio")
+            ) as mock_synthesize,
+        ):
+            audio = await service.text_to_speech("Hello", speed=2.0)
+
+        assert audio == b"RIFF-audio"
+        assert "rate='+100%'" in mock_synthesize.call_args.args[0]
+
+    @pytest.mark.asyncio
+    async def test_compressed_formats_use_ssml_rate(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=4096))
+        service = SpeechService()
+
+        with (
+            patch("app.services.speech_service.tts_audio_cache", cache),
+            patch.object(
+                service, "_synthesize", AsyncMock(return_value=b"ID3mp3")
+            ) as mock_synthesize,
+        ):
+            await service.text_to_speech("Hello", speed=0.75, audio_format="mp3")
+
+        assert "rate='-25%'" in mock_synthesize.call_args.args[0]
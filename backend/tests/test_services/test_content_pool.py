@@ -0,0 +1,358 @@
+"""コンテンツプールサービスのテスト - 提供・既出除外・補充・フォールバック"""
+
+import json
+import time
+import uuid
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.llm.admission import PRIORITY_BACKGROUND, get_llm_priority
+from app.schemas.speaking import FlashExercise
+from app.services.content_pool import (
+    REGISTRY_KEY,
+    RELEASE_LOCK_LUA,
+    ContentPoolService,
+    content_hash,
+    make_category,
+    pool_key,
+    split_category,
+)
+from tests.fake_redis import FakeRedis
+
+
+def _flash_item(n: int) -> dict:
+    return {
+        "exercise_id": f"ex-{n}",
+        "japanese": f"日本語{n}",
+        "english_target": f"English {n}",
+        "key_pattern": "general",
+        "difficulty": "B2",
+    }
+
+
+async def _release_lock(redis, keys, args):
+    """RELEASE_LOCK_LUA の Python 実装"""
+    if redis.data.get(keys[0]) == args[0]:
+        return await redis.delete(keys[0])
+    return 0
+
+
+@pytest.fixture
+def fake_redis():
+    fake = FakeRedis()
+    fake.scripts[RELEASE_LOCK_LUA] = _release_lock
+    with patch("app.services.content_pool.get_redis", return_value=fake):
+        yield fake
+
+
+@pytest.fixture
+def pool():
+    return ContentPoolService(low_water=2, high_water=4, batch_size=2)
+
+
+class TestCategory:
+    """カテゴリ文字列のテスト"""
+
+    def test_roundtrip(self):
+        """None を含むカテゴリが往復変換できる"""
+        category = make_category("business_meeting", "advanced", None, "clean")
+
+        assert split_category(category) == [
+            "business_meeting",
+            "advanced",
+            None,
+            "clean",
+        ]
+
+    def test_content_hash_ignores_exercise_id(self):
+        """exercise_id のみ異なるアイテムは同一ハッシュ"""
+        a = _flash_item(1)
+        b = {**a, "exercise_id": "other"}
+
+        assert content_hash(a) == content_hash(b)
+
+
+class TestTake:
+    """プールからの提供のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_take_pops_items_and_registers_pool(self, pool, fake_redis):
+        """プールから要求数を取り出し、プールを登録する"""
+        key = pool_key("flash", "B2", make_category(None))
+        await fake_redis.rpush(key, *(json.dumps(_flash_item(i)) for i in range(5)))
+
+        exercises = await pool.take("flash", "B2", make_category(None), 2, uuid.uuid4())
+
+        assert [e.exercise_id for e in exercises] == ["ex-0", "ex-1"]
+        assert all(isinstance(e, FlashExercise) for e in exercises)
+        assert await fake_redis.llen(key) == 3
+        assert await fake_redis.zscore(REGISTRY_KEY, key) is not None
+
+    @pytest.mark.asyncio
+    async def test_take_skips_seen_items(self, pool, fake_redis):
+        """ユーザーが既に受け取ったコンテンツは除外し、プールに戻す"""
+        category = make_category(None)
+        key = pool_key("flash", "B2", category)
+        user_id = uuid.uuid4()
+        await fake_redis.rpush(key, json.dumps(_flash_item(1)))
+        first = await pool.take("flash", "B2", category, 1, user_id)
+
+        # 同一内容のアイテムが再度プールに入った場合
+        await fake_redis.rpush(
+            key,
+            json.dumps({**_flash_item(1), "exercise_id": "dup"}),
+            json.dumps(_flash_item(2)),
+        )
+        second = await pool.take("flash", "B2", category, 2, user_id)
+
+        assert [e.exercise_id for e in first] == ["ex-1"]
+        assert [e.exercise_id for e in second] == ["ex-2"]
+        # 既出アイテムは他ユーザー向けに残る
+        assert await fake_redis.llen(key) == 1
+        other = await pool.take("flash", "B2", category, 1, uuid.uuid4())
+        assert [e.exercise_id for e in other] == ["dup"]
+
+    @pytest.mark.asyncio
+    async def test_take_error_returns_popped_items_to_pool(self, pool, fake_redis):
+        """取り出し後にエラーが発生した場合、取り出したアイテムはプールへ戻す"""
+        category = make_category(None)
+        key = pool_key("flash", "B2", category)
+        await fake_redis.rpush(key, *(json.dumps(_flash_item(i)) for i in range(3)))
+
+        with patch.object(
+            fake_redis, "smismember", AsyncMock(side_effect=ConnectionError("reset"))
+        ):
+            result = await pool.take("flash", "B2", category, 2, uuid.uuid4())
+
+        assert result == []
+        assert await fake_redis.llen(key) == 3
+        served = await pool.take("flash", "B2", category, 3, uuid.uuid4())
+        assert sorted(e.exercise_id for e in served) == ["ex-0", "ex-1", "ex-2"]
+
+    @pytest.mark.asyncio
+    async def test_take_drops_invalid_items(self, pool, fake_redis):
+        """スキーマ検証に失敗したアイテムは破棄し、残りを提供する"""
+        category = make_category(None)
+        key = pool_key("flash", "B2", category)
+        await fake_redis.rpush(
+            key,
+            "not json",
+            json.dumps({"exercise_id": "broken"}),
+            json.dumps(_flash_item(1)),
+        )
+
+        exercises = await pool.take("flash", "B2", category, 2, uuid.uuid4())
+
+        assert [e.exercise_id for e in exercises] == ["ex-1"]
+        assert await fake_redis.llen(key) == 0
+
+    @pytest.mark.asyncio
+    async def test_take_without_redis_returns_empty(self, pool):
+        """Redis未接続時は空リスト"""
+        with patch("app.services.content_pool.get_redis", return_value=None):
+            result = await pool.take("flash", "B2", "-", 3, uuid.uuid4())
+
+        assert result == []
+
+    @pytest.mark.asyncio
+    async def test_take_ignores_unknown_level(self, pool, fake_redis):
+        """CEFR以外のレベルはプール化しない"""
+        result = await pool.take("flash", "expert", "-", 3, uuid.uuid4())
+
+        assert result == []
+        assert await fake_redis.zcard(REGISTRY_KEY) == 0
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        ("feature", "category"),
+        [
+            ("mogomogo", "linking,not_a_pattern"),
+            ("flash", make_category("free text focus")),
+            ("pronunciation", make_category("/x/-/y/", None)),
+            ("pronunciation", make_category("/r/-/l/", "essay")),
+            ("shadowing", make_category("karaoke", "advanced", None, "clean")),
+            ("shadowing", make_category("business_meeting", "advanced", "mars", None)),
+            ("shadowing", "business_meeting"),
+        ],
+    )
+    async def test_take_ignores_unknown_category(
+        self, pool, fake_redis, feature, category
+    ):
+        """既知の値以外を含むカテゴリはプール化しない（登録もしない）"""
+        result = await pool.take(feature, "B2", category, 3, uuid.uuid4())
+
+        assert result == []
+        assert await fake_redis.zcard(REGISTRY_KEY) == 0
+
+    @pytest.mark.asyncio
+    async def test_take_normalizes_category(self, pool, fake_redis):
+        """順序・重複・空白の違うカテゴリは同じプールを共有する"""
+        await pool.take("mogomogo", "B2", "reduction, linking,linking", 1, uuid.uuid4())
+        await pool.take("mogomogo", "B2", "linking,reduction", 1, uuid.uuid4())
+
+        assert await fake_redis.zrange(REGISTRY_KEY, 0, -1) == [
+            pool_key("mogomogo", "B2", "linking,reduction")
+        ]
+
+
+class TestRefill:
+    """補充ワーカーのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_refill_until_high_water(self, pool, fake_redis):
+        """低水位を下回ったプールを高水位に達するまで補充し、不正アイテムは除外する"""
+        key = pool_key("flash", "B2", make_category(None))
+        await fake_redis.zadd(REGISTRY_KEY, {key: time.time()})
+        responses = [
+            [_flash_item(1), {"japanese": "必須項目欠落"}],
+            [_flash_item(2), _flash_item(3)],
+            [_flash_item(4), _flash_item(5)],
+        ]
+
+        with patch("app.services.content_pool.claude_service") as mock_claude:
+            mock_claude.chat_json = AsyncMock(side_effect=responses)
+            added = await pool.refill_all()
+
+        assert added == 5
+        assert mock_claude.chat_json.call_count == 3
+        stored = [json.loads(raw) for raw in await fake_redis.lrange(key, 0, -1)]
+        assert [s["japanese"] for s in stored] == [f"日本語{i}" for i in range(1, 6)]
+        # exercise_id はプール投入時に一意なIDへ置換される
+        assert len({s["exercise_id"] for s in stored}) == 5
+        assert "ex-1" not in {s["exercise_id"] for s in stored}
+
+    @pytest.mark.asyncio
+    async def test_refill_skips_above_low_water(self, pool, fake_redis):
+        """低水位以上のプールは補充しない"""
+        key = pool_key("flash", "B2", make_category(None))
+        await fake_redis.zadd(REGISTRY_KEY, {key: time.time()})
+        await fake_redis.rpush(key, *(json.dumps(_flash_item(i)) for i in range(3)))
+
+        with patch("app.services.content_pool.claude_service") as mock_claude:
+            mock_claude.chat_json = AsyncMock()
+            added = await pool.refill_all()
+
+        assert added == 0
+        mock_claude.chat_json.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_refill_skipped_when_locked(self, pool, fake_redis):
+        """他プロセスが補充中（ロック取得済み）の場合はスキップする"""
+        key = pool_key("flash", "B2", make_category(None))
+        await fake_redis.set(f"content_pool:lock:{key}", "1")
+
+        with patch("app.services.content_pool.claude_service") as mock_claude:
+            mock_claude.chat_json = AsyncMock()
+            added = await pool.refill_pool(key)
+
+        assert added == 0
+        mock_claude.chat_json.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_refill_generation_error_releases_lock(self, pool, fake_redis):
+        """生成エラー時もロックを解放する"""
+        key = pool_key(
+            "shadowing", "B2", make_category("earnings_call", None, None, None)
+        )
+
+        with patch("app.services.content_pool.claude_service") as mock_claude:
+            mock_claude.chat_json = AsyncMock(side_effect=RuntimeError("LLM down"))
+            added = await pool.refill_pool(key)
+
+        assert added == 0
+        assert await fake_redis.get(f"content_pool:lock:{key}") is None
+
+    @pytest.mark.asyncio
+    async def test_refill_keeps_lock_taken_over_by_other_process(
+        self, pool, fake_redis
+    ):
+        """補充中にロックが期限切れで他プロセスに渡った場合、そのロックは消さない"""
+        key = pool_key("flash", "B2", make_category(None))
+        lock_key = f"content_pool:lock:{key}"
+
+        async def _generate(**kwargs):
+            await fake_redis.set(lock_key, "other-process")
+            return []
+
+        with patch("app.services.content_pool.claude_service") as mock_claude:
+            mock_claude.chat_json = AsyncMock(side_effect=_generate)
+            await pool.refill_pool(key)
+
+        assert await fake_redis.get(lock_key) == "other-process"
+
+    @pytest.mark.asyncio
+    async def test_refill_runs_at_background_priority(self, pool, fake_redis):
+        """補充のLLM呼び出しはバックグラウンド優先度で行う"""
+        key = pool_key("flash", "B2", make_category(None))
+        priorities = []
+
+        async def _generate(**kwargs):
+            priorities.append(get_llm_priority())
+            return []
+
+        with patch("app.services.content_pool.claude_service") as mock_claude:
+            mock_claude.chat_json = AsyncMock(side_effect=_generate)
+            await pool.refill_pool(key)
+
+        assert priorities == [PRIORITY_BACKGROUND]
+
+    @pytest.mark.asyncio
+    async def test_idle_pools_are_evicted(self, pool, fake_redis):
+        """一定期間使われていないプールは登録解除され、中身も破棄される"""
+        idle = pool_key("flash", "B1", make_category(None))
+        active = pool_key("flash", "B2", make_category(None))
+        now = time.time()
+        await fake_redis.zadd(REGISTRY_KEY, {idle: now - 8 * 24 * 3600, active: now})
+        await fake_redis.rpush(idle, json.dumps(_flash_item(1)))
+
+        with patch("app.services.content_pool.settings") as mock_settings:
+            mock_settings.content_pool_idle_seconds = 7 * 24 * 3600
+            mock_settings.content_pool_max_pools = 500
+            evicted = await pool.evict_idle_pools()
+
+        assert evicted == 1
+        assert await fake_redis.zrange(REGISTRY_KEY, 0, -1) == [active]
+        assert await fake_redis.llen(idle) == 0
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_pools_evicted_over_limit(self, pool, fake_redis):
+        """上限を超えた分は最終利用時刻の古い順に破棄する"""
+        now = time.time()
+        keys = [pool_key("flash", level, "-") for level in ("A1", "A2", "B1")]
+        await fake_redis.zadd(
+            REGISTRY_KEY, {key: now - i for i, key in enumerate(reversed(keys))}
+        )
+
+        with patch("app.services.content_pool.settings") as mock_settings:
+            mock_settings.content_pool_idle_seconds = 3600
+            mock_settings.content_pool_max_pools = 2
+            evicted = await pool.evict_idle_pools()
+
+        assert evicted == 1
+        assert await fake_redis.zrange(REGISTRY_KEY, 0, -1) == keys[1:]
+
+
+class TestRouterIntegration:
+    """ルーターからのプール利用テスト"""
+
+    @pytest.mark.asyncio
+    async def test_flash_served_from_pool_then_generated(
+        self, auth_client, mock_claude
+    ):
+        """プール分を提供し、不足分のみ生成する"""
+        pooled = [FlashExercise(**_flash_item(1))]
+        generated = [FlashExercise(**_flash_item(2))]
+
+        with (
+            patch("app.routers.speaking.content_pool_service") as mock_pool,
+            patch("app.routers.speaking.flash_service") as mock_flash,
+        ):
+            mock_pool.take = AsyncMock(return_value=pooled)
+            mock_flash.generate_exercises = AsyncMock(return_value=generated)
+
+            response = await auth_client.get("/api/speaking/flash", params={"count": 2})
+
+        assert response.status_code == 200
+        assert [e["exercise_id"] for e in response.json()] == ["ex-1", "ex-2"]
+        assert mock_flash.generate_exercises.await_args.kwargs["count"] == 1
@@ -0,0 +1,253 @@
+"""会話コンテキスト管理のテスト - トークン予算・直近ターン保持・ローリング要約"""
+
+from datetime import UTC, datetime, timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.llm.admission import PRIORITY_BACKGROUND, get_llm_priority
+from app.llm.prompt_cache import SystemPrompt
+from app.models.conversation import ConversationMessage, ConversationSession
+from app.services.conversation_context import (
+    SUMMARY_HEADING,
+    ConversationContextManager,
+    estimate_message_tokens,
+    estimate_tokens,
+)
+from tests.conftest import TestSessionLocal
+
+
+def _turns(count: int, words: int = 5) -> list[dict]:
+    """user/assistant を交互に count ターン分生成"""
+    messages = []
+    for i in range(count):
+        messages.append({"role": "user", "content": f"user {i} " + "word " * words})
+        messages.append({"role": "assistant", "content": f"ai {i} " + "word " * words})
+    return messages
+
+
+async def _seed_session(user_id, turns: int) -> ConversationSession:
+    """作成順が確定するよう created_at を明示してメッセージを作成"""
+    base = datetime(2026, 1, 1, tzinfo=UTC)
+    async with TestSessionLocal() as db:
+        session = ConversationSession(user_id=user_id, mode="meeting")
+        db.add(session)
+        await db.flush()
+        for i, message in enumerate(_turns(turns)):
+            db.add(
+                ConversationMessage(
+                    session_id=session.id,
+                    created_at=base + timedelta(seconds=i),
+                    **message,
+                )
+            )
+        await db.commit()
+        await db.refresh(session)
+        return session
+
+
+class TestEstimateTokens:
+    """トークン数推定のテスト"""
+
+    def test_ascii_is_about_four_chars_per_token(self):
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("abcd") == 1
+        assert estimate_tokens("abcde") == 2
+
+    def test_multibyte_counts_bytes(self):
+        # 日本語は1文字3バイト
+        assert estimate_tokens("会議") == 2
+
+    def test_message_overhead(self):
+        assert estimate_message_tokens({"role": "user", "content": "abcd"}) == 5
+
+
+class TestBuild:
+    """会話コンテキスト構築のテスト"""
+
+    def test_short_conversation_is_sent_verbatim(self):
+        manager = ConversationContextManager(recent_turns=6, max_tokens=3000)
+        messages = _turns(3)
+
+        context = manager.build("system", None, messages)
+
+        assert context.messages == messages
+        assert context.system == "system"
+        assert context.needs_summary is False
+        assert context.estimated_tokens == sum(
+            estimate_message_tokens(m) for m in messages
+        )
+
+    def test_older_turns_fill_remaining_budget(self):
+        """直近ターンに加え、予算内に収まる古いターンを新しい順に追加する"""
+        messages = _turns(10)
+        per_turn = sum(estimate_message_tokens(m) for m in messages[:2])
+        manager = ConversationContextManager(
+            recent_turns=3, max_tokens=per_turn * 5, summary_trigger_turns=20
+        )
+
+        context = manager.build("system", None, messages)
+
+        assert context.messages == messages[-10:]
+        assert context.messages[0]["role"] == "user"
+        assert context.estimated_tokens <= per_turn * 5
+        assert context.needs_summary is False
+
+    def test_needs_summary_when_older_turns_reach_trigger(self):
+        manager = ConversationContextManager(recent_turns=3, summary_trigger_turns=4)
+
+        assert manager.build("s", None, _turns(6)).needs_summary is False
+        assert manager.build("s", None, _turns(7)).needs_summary is True
+
+    def test_recent_turns_trimmed_to_budget_keeps_latest_user_message(self):
+        messages = _turns(4, words=100)
+        manager = ConversationContextManager(recent_turns=4, max_tokens=50)
+
+        context = manager.build("system", None, messages)
+
+        assert context.messages == messages[-2:]
+        assert context.messages[0]["role"] == "user"
+
+    def test_leading_assistant_greeting_is_kept(self):
+        messages = [{"role": "assistant", "content": "Hello!"}, *_turns(2)]
+        manager = ConversationContextManager(recent_turns=6)
+
+        assert manager.build("s", None, messages).messages == messages
+
+    def test_summary_is_appended_to_dynamic_part(self):
+        manager = ConversationContextManager()
+        system = SystemPrompt("static rules", "## Session\n- Level: B2")
+
+        context = manager.build(system, "- Agreed on a March launch", _turns(1))
+
+        assert isinstance(context.system, SystemPrompt)
+        assert context.system.static == "static rules"
+        assert context.system.dynamic.endswith(
+            f"{SUMMARY_HEADING}\n- Agreed on a March launch"
+        )
+        assert manager.with_summary("plain", "notes") == (
+            f"plain\n\n{SUMMARY_HEADING}\nnotes"
+        )
+
+
+class TestSummarize:
+    """ローリング要約のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_folds_older_turns_into_summary(self, test_user):
+        session = await _seed_session(test_user.id, turns=10)
+        manager = ConversationContextManager(recent_turns=6)
+        priorities = []
+
+        async def _chat(**kwargs):
+            priorities.append(get_llm_priority())
+            return "  - Discussed the budget  "
+
+        with (
+            patch("app.services.conversation_context.async_session", TestSessionLocal),
+            patch("app.services.conversation_context.claude_service") as mock_llm,
+            patch("app.services.conversation_context.talk_session_cache") as mock_cache,
+        ):
+            mock_llm.chat = AsyncMock(side_effect=_chat)
+            mock_cache.invalidate = AsyncMock()
+            assert await manager.summarize(session.id) is True
+
+        # キャッシュ中の履歴は古くなるため破棄される
+        mock_cache.invalidate.assert_awaited_once_with(session.id)
+
+        kwargs = mock_llm.chat.call_args.kwargs
+        assert kwargs["model"] == "haiku"
+        request = kwargs["messages"][0]["content"]
+        assert "User: user 0" in request
+        assert "Assistant: ai 3" in request
+        assert "user 4" not in request
+        assert priorities == [PRIORITY_BACKGROUND]
+
+        async with TestSessionLocal() as db:
+            updated = await db.get(ConversationSession, session.id)
+            assert updated.context_summary == "- Discussed the budget"
+            assert updated.summarized_message_count == 8
+
+    @pytest.mark.asyncio
+    async def test_next_summary_includes_previous_summary(self, test_user):
+        session = await _seed_session(test_user.id, turns=10)
+        async with TestSessionLocal() as db:
+            stored = await db.get(ConversationSession, session.id)
+            stored.context_summary = "- Earlier notes"
+            stored.summarized_message_count = 4
+            await db.commit()
+        manager = ConversationContextManager(recent_turns=6)
+
+        with (
+            patch("app.services.conversation_context.async_session", TestSessionLocal),
+            patch("app.services.conversation_context.claude_service") as mock_llm,
+        ):
+            mock_llm.chat = AsyncMock(return_value="- Merged notes")
+            assert await manager.summarize(session.id) is True
+
+        request = mock_llm.chat.call_args.kwargs["messages"][0]["content"]
+        assert "- Earlier notes" in request
+        assert "user 1" not in request
+        assert "User: user 2" in request
+
+        async with TestSessionLocal() as db:
+            updated = await db.get(ConversationSession, session.id)
+            assert updated.summarized_message_count == 8
+
+    @pytest.mark.asyncio
+    async def test_concurrent_update_is_discarded(self, test_user):
+        """要約中に他のリクエストが要約を更新した場合は結果を破棄する"""
+        session = await _seed_session(test_user.id, turns=10)
+        manager = ConversationContextManager(recent_turns=6)
+
+        async def _chat(**kwargs):
+            async with TestSessionLocal() as db:
+                stored = await db.get(ConversationSession, session.id)
+                stored.context_summary = "- Other worker"
+                stored.summarized_message_count = 8
+                await db.commit()
+            return "- Stale summary"
+
+        with (
+            patch("app.services.conversation_context.async_session", TestSessionLocal),
+            patch("app.services.conversation_context.claude_service") as mock_llm,
+        ):
+            mock_llm.chat = AsyncMock(side_effect=_chat)
+            assert await manager.summarize(session.id) is False
+
+        async with TestSessionLocal() as db:
+            updated = await db.get(ConversationSession, session.id)
+            assert updated.context_summary == "- Other worker"
+
+    @pytest.mark.asyncio
+    async def test_llm_failure_keeps_session_unchanged(self, test_user):
+        session = await _seed_session(test_user.id, turns=10)
+        manager = ConversationContextManager(recent_turns=6)
+
+        with (
+            patch("app.services.conversation_context.async_session", TestSessionLocal),
+            patch("app.services.conversation_context.claude_service") as mock_llm,
+        ):
+            mock_llm.chat = AsyncMock(side_effect=RuntimeError("API down"))
+            assert await manager.summarize(session.id) is False
+
+        async with TestSessionLocal() as db:
+            updated = await db.get(ConversationSession, session.id)
+            assert updated.context_summary is None
+            assert updated.summarized_message_count == 0
+
+    @pytest.mark.asyncio
+    async def test_schedule_summary_deduplicates_per_session(self, test_user):
+        session = await _seed_session(test_user.id, turns=10)
+        manager = ConversationContextManager(recent_turns=6)
+
+        with (
+            patch("app.services.conversation_context.async_session", TestSessionLocal),
+            patch("app.services.conversation_context.claude_service") as mock_llm,
+        ):
+            mock_llm.chat = AsyncMock(return_value="- Notes")
+            manager.schedule_summary(session.id)
+            manager.schedule_summary(session.id)
+            await manager.wait_idle()
+
+        assert mock_llm.chat.await_count == 1
@@ -0,0 +1,278 @@
+"""LLM利用クォータのテスト - 枠の確保・返却・超過・使用量加算・突き合わせ"""
+
+import asyncio
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.exceptions import QuotaExceededError
+from app.llm.coalescing import RequestCoalescer
+from app.llm.service import LLMService
+from app.llm.usage import set_usage_user
+from app.models.api_usage import ApiUsageLog
+from app.services.quota_service import (
+    QuotaService,
+    _counter_key,
+    _month_key,
+)
+from tests.conftest import TestSessionLocal
+from tests.fake_redis import FakeRedis
+
+
+@pytest.fixture
+def fake_redis():
+    fake = FakeRedis()
+    with (
+        patch("app.services.quota_service.get_redis", return_value=fake),
+        patch("app.services.quota_service.async_session", TestSessionLocal),
+    ):
+        yield fake
+
+
+@pytest.fixture
+def user_id():
+    uid = uuid.uuid4()
+    set_usage_user(uid, "free")
+    yield uid
+    set_usage_user(None)
+
+
+def _calls(fake: FakeRedis, user_id: uuid.UUID) -> int:
+    return int(fake.data.get(_counter_key(user_id, _month_key(), "calls"), 0))
+
+
+class TestQuotaReserve:
+    """reserve / release のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_reserve_within_limit(self, fake_redis, user_id):
+        """上限内なら枠を確保してカウンターを加算する"""
+        service = QuotaService()
+        key = await service.reserve()
+
+        assert key == _counter_key(user_id, _month_key(), "calls")
+        assert _calls(fake_redis, user_id) == 1
+        assert str(user_id) in fake_redis.data[f"quota:active:{_month_key()}"]
+
+    @pytest.mark.asyncio
+    async def test_reserve_over_limit_raises(self, fake_redis, user_id):
+        """上限到達後はQuotaExceededErrorを送出し、カウンターは差し戻す"""
+        service = QuotaService()
+        limit = service.get_monthly_limit("free")
+        fake_redis.data[_counter_key(user_id, _month_key(), "calls")] = str(limit)
+
+        with pytest.raises(QuotaExceededError) as exc_info:
+            await service.reserve()
+
+        assert exc_info.value.status_code == 429
+        assert exc_info.value.details["limit"] == limit
+        assert exc_info.value.details["used"] == limit
+        assert _calls(fake_redis, user_id) == limit
+
+    @pytest.mark.asyncio
+    async def test_unlimited_plan_is_not_counted(self, fake_redis):
+        """無制限プランはカウンターを使わない"""
+        uid = uuid.uuid4()
+        set_usage_user(uid, "enterprise")
+        try:
+            assert await QuotaService().reserve() is None
+        finally:
+            set_usage_user(None)
+        assert _calls(fake_redis, uid) == 0
+
+    @pytest.mark.asyncio
+    async def test_no_user_or_redis_fails_open(self, fake_redis):
+        """ユーザー未設定・Redis未接続時は制限しない"""
+        service = QuotaService()
+        assert await service.reserve() is None
+
+        set_usage_user(uuid.uuid4(), "free")
+        try:
+            with patch("app.services.quota_service.get_redis", return_value=None):
+                assert await service.reserve() is None
+        finally:
+            set_usage_user(None)
+
+    @pytest.mark.asyncio
+    async def test_release_refunds(self, fake_redis, user_id):
+        """release で確保した枠を返却する"""
+        service = QuotaService()
+        key = await service.reserve()
+        await service.release(key)
+
+        assert _calls(fake_redis, user_id) == 0
+
+    def test_unknown_plan_uses_free_limit(self):
+        """不明なプランはfreeの上限"""
+        service = QuotaService()
+        assert service.get_monthly_limit("unknown") == service.get_monthly_limit("free")
+
+
+class TestQuotaUsage:
+    """record_usage / reconcile のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_record_usage_adds_tokens_and_cost(self, fake_redis, user_id):
+        """成功した呼び出しのトークン数とコストを加算する"""
+        service = QuotaService()
+        await service.record_usage(user_id, "anthropic", "haiku", 1_000_000, 0)
+        await service.record_usage(user_id, "anthropic", "haiku", 500, 500)
+
+        usage = await service.get_usage(user_id)
+        assert usage["tokens"] == 1_001_000
+        # haiku (anthropic): $0.80/M input + $4.0/M output
+        assert usage["cost_usd"] == pytest.approx(0.80 + 0.0004 + 0.002)
+
+    @pytest.mark.asyncio
+    async def test_reconcile_raises_lost_counters(self, fake_redis, test_user):
+        """Redisのカウンターがログより小さい場合はログの値に引き上げる"""
+        async with TestSessionLocal() as db:
+            for _ in range(3):
+                db.add(
+                    ApiUsageLog(
+                        user_id=test_user.id,
+                        api_provider="anthropic",
+                        model_name="claude-haiku-4-5-20251001",
+                        input_tokens=100,
+                        output_tokens=50,
+                        estimated_cost_usd=0.001,
+                    )
+                )
+            await db.commit()
+        month = _month_key()
+        await fake_redis.sadd(f"quota:active:{month}", str(test_user.id))
+        await fake_redis.set(_counter_key(test_user.id, month, "calls"), 1)
+
+        corrected = await QuotaService().reconcile()
+
+        assert corrected == 1
+        assert _calls(fake_redis, test_user.id) == 3
+        usage = await QuotaService().get_usage(test_user.id)
+        assert usage["tokens"] == 450
+        assert usage["cost_usd"] == pytest.approx(0.003)
+
+    @pytest.mark.asyncio
+    async def test_reconcile_keeps_higher_counters(self, fake_redis, test_user):
+        """Redisのカウンターがログより大きい場合（書き込み待ち）は維持する"""
+        month = _month_key()
+        await fake_redis.sadd(f"quota:active:{month}", str(test_user.id))
+        await fake_redis.set(_counter_key(test_user.id, month, "calls"), 5)
+
+        assert await QuotaService().reconcile() == 0
+        assert _calls(fake_redis, test_user.id) == 5
+
+
+class TestLLMServiceQuota:
+    """LLMServiceのクォータ連携テスト"""
+
+    @staticmethod
+    def _service(router: MagicMock) -> LLMService:
+        service = LLMService.__new__(LLMService)
+        service.router = router
+        return service
+
+    @pytest.mark.asyncio
+    async def test_chat_rejected_when_quota_exceeded(self, fake_redis, user_id):
+        """上限到達時はプロバイダーを呼ばずに拒否する"""
+        router = MagicMock()
+        router.chat = AsyncMock(return_value="hello")
+        service = self._service(router)
+        limit = QuotaService().get_monthly_limit("free")
+        fake_redis.data[_counter_key(user_id, _month_key(), "calls")] = str(limit)
+
+        with pytest.raises(QuotaExceededError):
+            await service.chat([{"role": "user", "content": "hi"}])
+
+        router.chat.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_call_releases_reservation(self, fake_redis, user_id):
+        """呼び出し失敗時は確保した枠を返却する"""
+        router = MagicMock()
+        router.chat = AsyncMock(side_effect=RuntimeError("provider down"))
+        service = self._service(router)
+
+        with pytest.raises(RuntimeError):
+            await service.chat([{"role": "user", "content": "hi"}])
+
+        assert _calls(fake_redis, user_id) == 0
+
+    @pytest.mark.asyncio
+    async def test_successful_call_consumes_reservation(self, fake_redis, user_id):
+        """成功した呼び出しは枠を1回分消費する"""
+        router = MagicMock()
+        router.chat = AsyncMock(return_value="hello")
+        service = self._service(router)
+
+        assert await service.chat([{"role": "user", "content": "hi"}]) == "hello"
+        assert _calls(fake_redis, user_id) == 1
+
+    @pytest.mark.asyncio
+    async def test_coalesced_followers_consume_own_quota(self, fake_redis):
+        """合流したリクエストも呼び出し元ユーザーごとに枠を消費し、上限到達時は拒否する"""
+        gate = asyncio.Event()
+
+        async def _chat(*args):
+            await gate.wait()
+            return "shared"
+
+        router = MagicMock()
+        router.chat = AsyncMock(side_effect=_chat)
+        service = self._service(router)
+        limit = QuotaService().get_monthly_limit("free")
+        leader, follower, exhausted = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        fake_redis.data[_counter_key(exhausted, _month_key(), "calls")] = str(limit)
+
+        async def _chat_as(uid):
+            set_usage_user(uid, "free")
+            return await service.chat([{"role": "user", "content": "hi"}])
+
+        with (
+            patch("app.llm.service.request_coalescer", RequestCoalescer(enabled=True)),
+            patch("app.llm.coalescing.get_redis", return_value=None),
+        ):
+            tasks = [
+                asyncio.create_task(_chat_as(uid))
+                for uid in (leader, follower, exhausted)
+            ]
+            await asyncio.sleep(0.01)
+            gate.set()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert results[:2] == ["shared", "shared"]
+        assert isinstance(results[2], QuotaExceededError)
+        assert router.chat.call_count == 1
+        assert _calls(fake_redis, leader) == 1
+        assert _calls(fake_redis, follower) == 1
+        assert _calls(fake_redis, exhausted) == limit
+
+    @pytest.mark.asyncio
+    async def test_coalesced_follower_refunds_when_leader_fails(self, fake_redis):
+        """合流先と自分の呼び出しが失敗した場合、フォロワーの枠も返却される"""
+        gate = asyncio.Event()
+
+        async def _chat(*args):
+            await gate.wait()
+            raise RuntimeError("provider down")
+
+        router = MagicMock()
+        router.chat = AsyncMock(side_effect=_chat)
+        service = self._service(router)
+        users = [uuid.uuid4(), uuid.uuid4()]
+
+        async def _chat_as(uid):
+            set_usage_user(uid, "free")
+            return await service.chat([{"role": "user", "content": "hi"}])
+
+        with (
+            patch("app.llm.service.request_coalescer", RequestCoalescer(enabled=True)),
+            patch("app.llm.coalescing.get_redis", return_value=None),
+        ):
+            tasks = [asyncio.create_task(_chat_as(uid)) for uid in users]
+            await asyncio.sleep(0.01)
+            gate.set()
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert [_calls(fake_redis, uid) for uid in users] == [0, 0]
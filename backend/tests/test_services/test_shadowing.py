@@ -129,6 +129,7 @@ class TestShadowingService:
                 accent=None,
                 gender="female",
                 environment="clean",
+                audio_format="wav",
             )
 
     def test_suggested_speeds_by_difficulty(self):
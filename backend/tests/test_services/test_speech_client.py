@@ -0,0 +1,279 @@
+"""Azure Speech 共有クライアントのテスト - トークン認証・同時実行数・遮断・発音評価"""
+
+import asyncio
+import base64
+import json
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from app.exceptions import SpeechServiceUnavailableError
+from app.services.pronunciation_service import PronunciationService
+from app.services.speech_client import SpeechClient
+from app.services.speech_service import SpeechService
+
+ASSESSMENT = {
+    "RecognitionStatus": "Success",
+    "NBest": [
+        {
+            "PronunciationAssessment": {
+                "AccuracyScore": 92.0,
+                "FluencyScore": 88.0,
+                "ProsodyScore": 80.0,
+                "CompletenessScore": 100.0,
+                "PronScore": 90.0,
+            },
+            "Words": [
+                {
+                    "Word": "really",
+                    "PronunciationAssessment": {
+                        "AccuracyScore": 70.0,
+                        "ErrorType": "Mispronunciation",
+                    },
+                    "Phonemes": [
+                        {
+                            "Phoneme": "r",
+                            "PronunciationAssessment": {"AccuracyScore": 60},
+                        }
+                    ],
+                }
+            ],
+        }
+    ],
+}
+
+
+class _FakeAzure:
+    """トークン発行と API 呼び出しを記録する MockTransport のハンドラー"""
+
+    def __init__(self, respond=None):
+        self.requests: list[httpx.Request] = []
+        self.tokens_issued = 0
+        self.respond = respond or (lambda request: httpx.Response(200, content=b"ok"))
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/issueToken"):
+            self.tokens_issued += 1
+            assert request.headers["Ocp-Apim-Subscription-Key"] == "secret-key"
+            return httpx.Response(200, text=f"token-{self.tokens_issued}")
+        self.requests.append(request)
+        response = self.respond(request)
+        if asyncio.iscoroutine(response):
+            response = await response
+        return response
+
+    def client(self, **kwargs) -> SpeechClient:
+        return SpeechClient(
+            key="secret-key",
+            region="eastus2",
+            transport=httpx.MockTransport(self),
+            **kwargs,
+        )
+
+
+class TestTokenAuth:
+    """ベアラートークン認証のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_token_is_reused_and_key_is_not_sent(self):
+        azure = _FakeAzure()
+        client = azure.client()
+
+        for _ in range(3):
+            await client.post(client.tts_endpoint, headers={}, content=b"<speak/>")
+
+        assert azure.tokens_issued == 1
+        for request in azure.requests:
+            assert request.headers["Authorization"] == "Bearer token-1"
+            assert "Ocp-Apim-Subscription-Key" not in request.headers
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_token_is_refreshed_before_expiry(self):
+        azure = _FakeAzure()
+        client = azure.client(token_refresh_seconds=540.0)
+
+        with patch("app.services.speech_client.time.monotonic", return_value=1000.0):
+            await client.post(client.tts_endpoint, headers={}, content=b"")
+        with patch("app.services.speech_client.time.monotonic", return_value=1539.0):
+            await client.post(client.tts_endpoint, headers={}, content=b"")
+        with patch("app.services.speech_client.time.monotonic", return_value=1541.0):
+            await client.post(client.tts_endpoint, headers={}, content=b"")
+
+        assert azure.tokens_issued == 2
+        assert azure.requests[-1].headers["Authorization"] == "Bearer token-2"
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_rejected_token_is_reissued_once(self):
+        def _respond(request):
+            if request.headers["Authorization"] == "Bearer token-1":
+                return httpx.Response(401)
+            return httpx.Response(200, content=b"ok")
+
+        azure = _FakeAzure(_respond)
+        client = azure.client()
+
+        response = await client.post(client.tts_endpoint, headers={}, content=b"")
+
+        assert response.content == b"ok"
+        assert azure.tokens_issued == 2
+        assert len(azure.requests) == 2
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_share_one_token_refresh(self):
+        azure = _FakeAzure()
+        client = azure.client()
+
+        await asyncio.gather(
+            *(
+                client.post(client.tts_endpoint, headers={}, content=b"")
+                for _ in range(5)
+            )
+        )
+
+        assert azure.tokens_issued == 1
+        await client.close()
+
+
+class TestConcurrencyAndBreaker:
+    """同時実行数制限とサーキットブレーカーのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_limits_concurrent_requests(self):
+        release = asyncio.Event()
+        active = 0
+        peak = 0
+
+        async def _respond(request):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await release.wait()
+            active -= 1
+            return httpx.Response(200, content=b"ok")
+
+        client = _FakeAzure(_respond).client(max_concurrency=2)
+        tasks = [
+            asyncio.create_task(
+                client.post(client.tts_endpoint, headers={}, content=b"")
+            )
+            for _ in range(5)
+        ]
+        await asyncio.sleep(0.05)
+
+        assert client.get_stats()["in_flight"] == 2
+        release.set()
+        await asyncio.gather(*tasks)
+        assert peak == 2
+        assert client.get_stats()["in_flight"] == 0
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_outage_opens_circuit_and_fails_fast(self):
+        azure = _FakeAzure(lambda request: httpx.Response(503))
+        client = azure.client(failure_threshold=3, recovery_timeout=60.0)
+
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.post(client.tts_endpoint, headers={}, content=b"")
+        with pytest.raises(SpeechServiceUnavailableError) as exc_info:
+            await client.post(client.tts_endpoint, headers={}, content=b"")
+
+        assert exc_info.value.status_code == 503
+        assert len(azure.requests) == 3
+        assert client.get_stats()["circuit_state"] == "open"
+        assert client.get_stats()["rejected"] == 1
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_connection_errors_count_as_outage(self):
+        def _respond(request):
+            raise httpx.ConnectError("unreachable")
+
+        client = _FakeAzure(_respond).client(failure_threshold=2)
+
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await client.post(client.tts_endpoint, headers={}, content=b"")
+
+        assert client.circuit_breaker.state == "open"
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_client_errors_do_not_open_circuit(self):
+        client = _FakeAzure(lambda request: httpx.Response(400)).client(
+            failure_threshold=2
+        )
+
+        for _ in range(3):
+            with pytest.raises(httpx.HTTPStatusError):
+                await client.post(client.tts_endpoint, headers={}, content=b"")
+
+        assert client.circuit_breaker.state == "closed"
+        await client.close()
+
+
+class TestPronunciationAssessment:
+    """発音評価（SpeechService・PronunciationService 共通）のテスト"""
+
+    @staticmethod
+    def _config(request: httpx.Request) -> dict:
+        return json.loads(base64.b64decode(request.headers["Pronunciation-Assessment"]))
+
+    @pytest.mark.asyncio
+    async def test_speech_service_uses_shared_client(self):
+        azure = _FakeAzure(lambda request: httpx.Response(200, json=ASSESSMENT))
+        client = azure.client()
+
+        with patch("app.services.speech_service.speech_client", client):
+            result = await SpeechService().assess_pronunciation(
+                b"RIFF", "Really good", language="en-GB"
+            )
+
+        assert result.accuracy_score == 92.0
+        assert result.word_scores[0].error_type == "Mispronunciation"
+        request = azure.requests[0]
+        assert request.url.params["language"] == "en-GB"
+        assert request.headers["Content-Type"] == "audio/wav"
+        config = self._config(request)
+        assert config["ReferenceText"] == "Really good"
+        assert config["Granularity"] == "Word"
+        assert config["EnableProsodyAssessment"] is True
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_phoneme_evaluation_uses_shared_client(self):
+        azure = _FakeAzure(lambda request: httpx.Response(200, json=ASSESSMENT))
+        client = azure.client()
+
+        with patch("app.services.pronunciation_service.speech_client", client):
+            result = await PronunciationService().evaluate_phoneme(
+                b"RIFF", "/r/-/l/", "Really"
+            )
+
+        assert result.accuracy == pytest.approx(0.92)
+        assert result.is_correct
+        config = self._config(azure.requests[0])
+        assert config["Granularity"] == "Phoneme"
+        assert "EnableProsodyAssessment" not in config
+        assert azure.requests[0].headers["Authorization"] == "Bearer token-1"
+        await client.close()
+
+    @pytest.mark.asyncio
+    async def test_phoneme_evaluation_reports_open_circuit(self):
+        """API エラーはフォールバック評価、遮断中は 503 を呼び出し元に伝える"""
+        azure = _FakeAzure(lambda request: httpx.Response(503))
+        client = azure.client(failure_threshold=1, recovery_timeout=60.0)
+        service = PronunciationService()
+
+        with patch("app.services.pronunciation_service.speech_client", client):
+            first = await service.evaluate_phoneme(b"RIFF", "/r/-/l/", "Really")
+            with pytest.raises(SpeechServiceUnavailableError):
+                await service.evaluate_phoneme(b"RIFF", "/r/-/l/", "Really")
+
+        assert first == service._fallback_evaluation("/r/-/l/", "Really")
+        assert len(azure.requests) == 1
+        await client.close()
@@ -0,0 +1,272 @@
+"""学習統計ロールアップのテスト - 増分更新・未作成期間の組み立て・レポートのクエリ数"""
+
+from contextlib import contextmanager
+from datetime import date, timedelta
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import event, func, insert, select
+
+from app.models.stats import DailyStat, StatRollup
+from app.services.analytics_service import AnalyticsService
+from app.services.curriculum_service import CurriculumService
+from app.services.stat_rollup_service import (
+    PERIOD_MONTH,
+    PERIOD_WEEK,
+    covering_periods,
+    period_end,
+    period_start,
+    stat_rollup_service,
+)
+from tests.conftest import test_engine
+
+MAX_REPORT_QUERIES = 9
+
+
+@contextmanager
+def _count_queries():
+    """ブロック内で発行されたSQL文の数を数える"""
+    counter = {"queries": 0}
+
+    def _on_execute(*args, **kwargs):
+        counter["queries"] += 1
+
+    event.listen(test_engine.sync_engine, "before_cursor_execute", _on_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(test_engine.sync_engine, "before_cursor_execute", _on_execute)
+
+
+async def _record_session(db, user_id, **overrides) -> None:
+    session_result = {
+        "session_type": "conversation",
+        "duration_minutes": 10,
+        "grammar_accuracy": 0.8,
+        "pronunciation_score": 0.7,
+        "new_expressions": 2,
+        **overrides,
+    }
+    await CurriculumService().update_curriculum(user_id, session_result, db)
+
+
+class TestPeriods:
+    """集計期間ヘルパーのテスト"""
+
+    def test_week_and_month_bounds(self):
+        day = date(2026, 2, 18)  # 水曜日
+        assert period_start(PERIOD_WEEK, day) == date(2026, 2, 16)
+        assert period_end(PERIOD_WEEK, date(2026, 2, 16)) == date(2026, 2, 22)
+        assert period_start(PERIOD_MONTH, day) == date(2026, 2, 1)
+        assert period_end(PERIOD_MONTH, date(2026, 2, 1)) == date(2026, 2, 28)
+        assert period_end(PERIOD_MONTH, date(2026, 12, 1)) == date(2026, 12, 31)
+
+    def test_covering_periods_spans_months(self):
+        """30日の範囲が3か月にまたがる場合も全ての月を返す"""
+        periods = covering_periods(PERIOD_MONTH, date(2026, 1, 30), date(2026, 3, 1))
+        assert [start for _, start in periods] == [
+            date(2026, 1, 1),
+            date(2026, 2, 1),
+            date(2026, 3, 1),
+        ]
+
+
+class TestStatRollupService:
+    """StatRollupServiceのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_update_curriculum_maintains_rollups(self, db_session, test_user):
+        """日次統計の更新で週次・月次ロールアップが増分更新される"""
+        await _record_session(db_session, test_user.id, grammar_accuracy=0.6)
+        await _record_session(db_session, test_user.id, grammar_accuracy=1.0)
+
+        rollups = (
+            (
+                await db_session.execute(
+                    select(StatRollup).where(StatRollup.user_id == test_user.id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        assert {r.period_type for r in rollups} == {PERIOD_WEEK, PERIOD_MONTH}
+        for rollup in rollups:
+            assert rollup.practice_minutes == 20
+            assert rollup.sessions_completed == 2
+            assert rollup.new_expressions_learned == 4
+            assert rollup.active_days == 1
+            # 日次統計の加重平均 (0.6 + 1.0) / 2
+            assert rollup.grammar_accuracy_avg == pytest.approx(0.8)
+            assert list(rollup.days) == [date.today().isoformat()]
+
+    @pytest.mark.asyncio
+    async def test_missing_rollup_is_built_from_daily_stats(
+        self, db_session, test_user
+    ):
+        """ロールアップ未作成の期間は DailyStat から組み立て、保存はしない"""
+        today = date.today()
+        db_session.add(
+            DailyStat(
+                user_id=test_user.id,
+                date=today,
+                practice_minutes=15,
+                sessions_completed=1,
+                reviews_completed=4,
+                new_expressions_learned=0,
+                grammar_accuracy=0.9,
+            )
+        )
+        await db_session.commit()
+
+        key = (PERIOD_MONTH, period_start(PERIOD_MONTH, today))
+        rollups = await stat_rollup_service.get_rollups(test_user.id, [key], db_session)
+
+        assert rollups[key].practice_minutes == 15
+        assert rollups[key].reviews_completed == 4
+        assert rollups[key].grammar_accuracy_max == pytest.approx(0.9)
+        stored = await db_session.scalar(select(func.count(StatRollup.id)))
+        assert stored == 0
+
+    @pytest.mark.asyncio
+    async def test_first_write_backfills_existing_days(self, db_session, test_user):
+        """ロールアップ導入前の日次統計も初回の書き込みで取り込まれる"""
+        today = date.today()
+        earlier = period_start(PERIOD_MONTH, today)
+        if earlier == today:
+            pytest.skip("月初は同月の過去日がない")
+        db_session.add(
+            DailyStat(
+                user_id=test_user.id,
+                date=earlier,
+                practice_minutes=30,
+                sessions_completed=2,
+                reviews_completed=0,
+                new_expressions_learned=0,
+            )
+        )
+        await db_session.commit()
+
+        await _record_session(db_session, test_user.id)
+
+        month = await db_session.scalar(
+            select(StatRollup).where(
+                StatRollup.user_id == test_user.id,
+                StatRollup.period_type == PERIOD_MONTH,
+            )
+        )
+        assert month.practice_minutes == 40
+        assert month.sessions_completed == 3
+        assert month.active_days == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_rollup_insert_is_merged(self, db_session, test_user):
+        """行の作成が並行する書き込みと衝突しても、当日分を既存行に反映して続行する"""
+        today = date.today()
+        get_rollups = stat_rollup_service.get_rollups
+
+        async def _get_rollups_then_race(user_id, periods, db, **kwargs):
+            rollups = await get_rollups(user_id, periods, db, **kwargs)
+            # 取得後・挿入前に別のリクエストが同じ期間の行を作成した状態を再現
+            for period_type, start in periods:
+                await db.execute(
+                    insert(StatRollup).values(
+                        id=uuid4(),
+                        user_id=user_id,
+                        period_type=period_type,
+                        period_start=start,
+                        practice_minutes=5,
+                        sessions_completed=1,
+                        reviews_completed=0,
+                        new_expressions_learned=0,
+                        active_days=1,
+                        days={
+                            today.isoformat(): {
+                                "practice_minutes": 5,
+                                "sessions_completed": 1,
+                                "reviews_completed": 0,
+                                "new_expressions_learned": 0,
+                            }
+                        },
+                    )
+                )
+            return rollups
+
+        with patch.object(
+            stat_rollup_service, "get_rollups", side_effect=_get_rollups_then_race
+        ):
+            await _record_session(db_session, test_user.id, duration_minutes=10)
+
+        rollups = (
+            (
+                await db_session.execute(
+                    select(StatRollup).where(StatRollup.user_id == test_user.id)
+                )
+            )
+            .scalars()
+            .all()
+        )
+        assert sorted(r.period_type for r in rollups) == [PERIOD_MONTH, PERIOD_WEEK]
+        for rollup in rollups:
+            # 当日のスナップショットが最新の日次統計で置き換えられている
+            assert rollup.practice_minutes == 10
+            assert rollup.sessions_completed == 1
+            assert rollup.days[today.isoformat()]["new_expressions_learned"] == 2
+        # 呼び出し元の日次統計の更新は巻き戻されずにコミットされている
+        stat = await db_session.scalar(
+            select(DailyStat).where(DailyStat.user_id == test_user.id)
+        )
+        assert stat.practice_minutes == 10
+
+
+class TestAnalyticsReportsFromRollups:
+    """レポートがロールアップを読むことのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_reports_reflect_rollups(self, db_session, test_user):
+        """更新後の月次・週次レポートがロールアップの値を返す"""
+        await _record_session(db_session, test_user.id, pronunciation_score=0.5)
+        service = AnalyticsService()
+
+        monthly = await service.get_monthly_report(test_user.id, db_session)
+        weekly = await service.get_weekly_report(test_user.id, db_session)
+
+        assert monthly.total_minutes == 10
+        assert monthly.avg_grammar_accuracy == pytest.approx(0.8)
+        assert monthly.skill_radar_data["pronunciation"] == pytest.approx(0.5)
+        assert "Pronunciation" in monthly.weaknesses
+        assert weekly.total_sessions == 1
+        assert weekly.streak_days == 1
+        assert len(weekly.daily_breakdown) == 1
+
+    @pytest.mark.asyncio
+    async def test_reports_use_single_digit_queries(self, db_session, test_user):
+        """各レポートのクエリ数は履歴の日数に依存せず一桁に収まる"""
+        today = date.today()
+        for offset in range(60):
+            db_session.add(
+                DailyStat(
+                    user_id=test_user.id,
+                    date=today - timedelta(days=offset + 1),
+                    practice_minutes=10,
+                    sessions_completed=1,
+                    reviews_completed=1,
+                    new_expressions_learned=1,
+                    grammar_accuracy=0.75,
+                    pronunciation_avg_score=0.65,
+                )
+            )
+        await db_session.commit()
+        await _record_session(db_session, test_user.id)
+
+        service = AnalyticsService()
+        reports = {
+            "weekly": service.get_weekly_report,
+            "monthly": service.get_monthly_report,
+            "skills": service.get_skill_breakdown,
+            "pronunciation": service.get_pronunciation_progress,
+        }
+        for name, report in reports.items():
+            with _count_queries() as counter:
+                await report(test_user.id, db_session)
+            assert counter["queries"] <= MAX_REPORT_QUERIES, name
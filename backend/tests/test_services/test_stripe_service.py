@@ -3,6 +3,7 @@
 import hashlib
 import hmac
 import time
+from unittest.mock import AsyncMock, patch
 from uuid import uuid4
 
 import pytest
@@ -239,3 +240,56 @@ class TestCheckoutValidation:
                 success_url="http://localhost/success",
                 cancel_url="http://localhost/cancel",
             )
+
+
+class TestPrincipalInvalidation:
+    """プラン変更時の認証プリンシパルキャッシュ無効化テスト"""
+
+    @pytest.mark.asyncio
+    async def test_checkout_completed_invalidates_principal(
+        self, db_session, test_user
+    ):
+        """チェックアウト完了でプランが更新され、キャッシュが無効化される"""
+        service = StripeService()
+        with patch("app.services.stripe_service.principal_cache") as mock_cache:
+            mock_cache.invalidate_user = AsyncMock()
+
+            await service._handle_checkout_completed(
+                {
+                    "metadata": {"user_id": str(test_user.id), "plan": "premium"},
+                    "customer": "cus_test",
+                    "subscription": "sub_test",
+                },
+                db_session,
+            )
+
+            mock_cache.invalidate_user.assert_awaited_once_with(test_user.id)
+
+        await db_session.refresh(test_user)
+        assert test_user.subscription_plan == "premium"
+
+    @pytest.mark.asyncio
+    async def test_subscription_deleted_invalidates_principal(
+        self, db_session, test_user
+    ):
+        """サブスクリプション削除でfreeに戻り、キャッシュが無効化される"""
+        service = StripeService()
+        with patch("app.services.stripe_service.principal_cache") as mock_cache:
+            mock_cache.invalidate_user = AsyncMock()
+
+            await service._handle_checkout_completed(
+                {
+                    "metadata": {"user_id": str(test_user.id), "plan": "standard"},
+                    "subscription": "sub_to_delete",
+                },
+                db_session,
+            )
+            await service._handle_subscription_deleted(
+                {"id": "sub_to_delete"}, db_session
+            )
+
+            assert mock_cache.invalidate_user.await_count == 2
+            mock_cache.invalidate_user.assert_awaited_with(test_user.id)
+
+        await db_session.refresh(test_user)
+        assert test_user.subscription_plan == "free"
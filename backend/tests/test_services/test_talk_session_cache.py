@@ -0,0 +1,142 @@
+"""会話セッション状態キャッシュのテスト - 保存・追記・TTL延長・破棄・フォールバック"""
+
+import json
+import uuid
+from unittest.mock import patch
+
+import pytest
+
+from app.llm.prompt_cache import SystemPrompt
+from app.services.talk_session_cache import TalkSessionCache, TalkSessionState
+from tests.fake_redis import FakeRedis
+
+
+def _state(**overrides) -> TalkSessionState:
+    values = {
+        "session_id": uuid.uuid4(),
+        "user_id": uuid.uuid4(),
+        "mode": "meeting",
+        "scenario_description": "[standup] Weekly standup",
+        "scenario": {"id": "standup", "title": "Weekly standup"},
+        "summary": None,
+        "history": [{"role": "assistant", "content": "Hi, shall we start?"}],
+        "system_prompt": SystemPrompt("static rules", "## Session\n- Level: B2"),
+        "prompt_key": "B2:ja",
+    }
+    values.update(overrides)
+    return TalkSessionState(**values)
+
+
+@pytest.fixture
+def fake_redis():
+    fake = FakeRedis()
+    with patch("app.services.talk_session_cache.get_redis", return_value=fake):
+        yield fake
+
+
+class TestTalkSessionCache:
+    """TalkSessionCache のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_put_and_get_round_trip(self, fake_redis):
+        cache = TalkSessionCache(idle_ttl_seconds=600)
+        state = _state(summary="- Agreed on March")
+
+        await cache.put(state)
+        cached = await cache.get(state.session_id)
+
+        assert cached == state
+        assert isinstance(cached.system_prompt, SystemPrompt)
+        assert cached.system_prompt.static == "static rules"
+        assert cache.get_stats()["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_append_and_idle_ttl_refresh(self, fake_redis):
+        cache = TalkSessionCache(idle_ttl_seconds=600)
+        state = _state()
+        await cache.put(state)
+
+        await cache.append(
+            state.session_id,
+            {"role": "user", "content": "Let's begin."},
+            {"role": "assistant", "content": "Sure."},
+        )
+        fake_redis.ttls.clear()
+        cached = await cache.get(state.session_id)
+
+        assert [m["content"] for m in cached.history] == [
+            "Hi, shall we start?",
+            "Let's begin.",
+            "Sure.",
+        ]
+        assert fake_redis.ttls == {
+            f"talk:session:{state.session_id}": 600,
+            f"talk:session:{state.session_id}:history": 600,
+        }
+
+    @pytest.mark.asyncio
+    async def test_missing_state_is_miss_and_put_replaces_orphan_history(
+        self, fake_redis
+    ):
+        """破棄後に追記された履歴だけが残っていてもミスとなり、put() で作り直される"""
+        cache = TalkSessionCache()
+        state = _state()
+        await cache.put(state)
+        await cache.invalidate(state.session_id)
+        await cache.append(state.session_id, {"role": "user", "content": "late"})
+
+        assert await cache.get(state.session_id) is None
+
+        await cache.put(state)
+        assert (await cache.get(state.session_id)).history == state.history
+
+    @pytest.mark.asyncio
+    async def test_set_system_prompt(self, fake_redis):
+        cache = TalkSessionCache()
+        state = _state()
+        await cache.put(state)
+
+        await cache.set_system_prompt(
+            state.session_id, "C1:en", SystemPrompt("static rules", "- Level: C1")
+        )
+        cached = await cache.get(state.session_id)
+
+        assert cached.prompt_key == "C1:en"
+        assert cached.system_prompt.dynamic == "- Level: C1"
+
+    @pytest.mark.asyncio
+    async def test_history_is_stored_as_json_lines(self, fake_redis):
+        cache = TalkSessionCache()
+        state = _state()
+        await cache.put(state)
+
+        raw = fake_redis.data[f"talk:session:{state.session_id}:history"]
+        assert [json.loads(m) for m in raw] == state.history
+
+    @pytest.mark.asyncio
+    async def test_redis_unavailable_or_disabled_is_miss(self):
+        state = _state()
+        with patch("app.services.talk_session_cache.get_redis", return_value=None):
+            cache = TalkSessionCache()
+            await cache.put(state)
+            assert await cache.get(state.session_id) is None
+
+        fake = FakeRedis()
+        with patch("app.services.talk_session_cache.get_redis", return_value=fake):
+            cache = TalkSessionCache(enabled=False)
+            await cache.put(state)
+            assert await cache.get(state.session_id) is None
+            assert fake.data == {}
+
+    @pytest.mark.asyncio
+    async def test_redis_error_is_miss(self, fake_redis):
+        cache = TalkSessionCache()
+        state = _state()
+        await cache.put(state)
+
+        async def _broken(*args, **kwargs):
+            raise ConnectionError("redis down")
+
+        fake_redis.hgetall = _broken
+        assert await cache.get(state.session_id) is None
+        assert cache.get_stats()["misses"] == 1
@@ -0,0 +1,337 @@
+"""TTS音声キャッシュのテスト - キー・ディスク保存・LRU削除・合成の共有・ストリーミング"""
+
+import asyncio
+import os
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import pytest
+
+from app.services.speech_client import SpeechClient
+from app.services.speech_service import (
+    TTS_FORMATS,
+    TTS_OUTPUT_FORMAT,
+    SpeechService,
+    detect_tts_format,
+)
+from app.services.tts_audio_cache import (
+    AudioStore,
+    LocalDiskAudioStore,
+    TTSAudioCache,
+    is_cache_key,
+    tts_cache_key,
+)
+
+
+class _BrokenStore(AudioStore):
+    """読み書きが常に失敗する保存先"""
+
+    async def size(self, key):
+        raise OSError("disk unavailable")
+
+    async def read(self, key, start=0, end=None):
+        raise OSError("disk unavailable")
+
+    async def write(self, key, data):
+        raise OSError("disk unavailable")
+
+
+class TestCacheKey:
+    """キャッシュキーのテスト"""
+
+    def test_key_depends_on_ssml_and_format(self):
+        key = tts_cache_key("<speak>hi</speak>", TTS_OUTPUT_FORMAT)
+
+        assert key == tts_cache_key("<speak>hi</speak>", TTS_OUTPUT_FORMAT)
+        assert key != tts_cache_key("<speak>hello</speak>", TTS_OUTPUT_FORMAT)
+        assert key != tts_cache_key(
+            "<speak>hi</speak>", "audio-24khz-48kbitrate-mono-mp3"
+        )
+        assert is_cache_key(key)
+
+    def test_speech_service_key_reflects_voice_speed_and_environment(self):
+        service = SpeechService()
+        base = service.tts_cache_key("Let's get started.")
+
+        assert base == service.tts_cache_key("Let's get started.")
+        assert base != service.tts_cache_key("Let's get started.", speed=0.8)
+        assert base != service.tts_cache_key("Let's get started.", accent="uk")
+        assert base != service.tts_cache_key(
+            "Let's get started.", environment="phone_call"
+        )
+        # 範囲外の速度は制限後の値でキーを求める
+        assert service.tts_cache_key("Hi", speed=5.0) == service.tts_cache_key(
+            "Hi", speed=2.0
+        )
+
+    @pytest.mark.parametrize("value", ["../etc/passwd", "abc", "G" * 64, "A" * 64])
+    def test_rejects_non_keys(self, value):
+        assert not is_cache_key(value)
+
+
+class TestLocalDiskAudioStore:
+    """LocalDiskAudioStore のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_write_read_and_range(self, tmp_path):
+        store = LocalDiskAudioStore(str(tmp_path), max_bytes=1024)
+        key = tts_cache_key("a", TTS_OUTPUT_FORMAT)
+
+        assert await store.read(key) is None
+        await store.write(key, b"0123456789")
+
+        assert await store.size(key) == 10
+        assert await store.read(key) == b"0123456789"
+        assert await store.read(key, 2, 5) == b"2345"
+        assert await store.read(key, 7) == b"789"
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self, tmp_path):
+        store = LocalDiskAudioStore(str(tmp_path), max_bytes=250)
+        keys = [tts_cache_key(str(i), TTS_OUTPUT_FORMAT) for i in range(3)]
+        for i, key in enumerate(keys[:2]):
+            await store.write(key, b"x" * 100)
+            os.utime(store._path(key), (1000 + i, 1000 + i))
+        # 古い方を読み込むと最終アクセスが更新される
+        await store.read(keys[0])
+
+        await store.write(keys[2], b"x" * 100)
+
+        assert await store.size(keys[0]) == 100
+        assert await store.size(keys[1]) is None
+        assert await store.size(keys[2]) == 100
+        assert store.get_stats()["evictions"] == 1
+        assert store.get_stats()["total_bytes"] == 200
+
+
+class TestTTSAudioCache:
+    """TTSAudioCache のテスト"""
+
+    @pytest.mark.asyncio
+    async def test_second_request_is_served_from_store(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=1024))
+        synthesize = AsyncMock(return_value=b"RIFF-audio")
+        key = tts_cache_key("a", TTS_OUTPUT_FORMAT)
+
+        assert await cache.get_or_synthesize(key, synthesize) == b"RIFF-audio"
+        assert await cache.get_or_synthesize(key, synthesize) == b"RIFF-audio"
+
+        synthesize.assert_awaited_once()
+        assert cache.get_stats()["hits"] == 1
+        assert cache.get_stats()["misses"] == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_synthesize_once(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=1024))
+        calls = 0
+
+        async def _synthesize():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return b"RIFF-audio"
+
+        key = tts_cache_key("a", TTS_OUTPUT_FORMAT)
+        results = await asyncio.gather(
+            *(cache.get_or_synthesize(key, _synthesize) for _ in range(5))
+        )
+
+        assert results == [b"RIFF-audio"] * 5
+        assert calls == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_leader_does_not_cancel_waiters(self, tmp_path):
+        """合成した要求が切断されても、待機していた要求は自身で合成して応答する"""
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=1024))
+        key = tts_cache_key("a", TTS_OUTPUT_FORMAT)
+        started = asyncio.Event()
+
+        async def _slow_synthesize():
+            started.set()
+            await asyncio.sleep(10)
+            return b"never"
+
+        leader = asyncio.create_task(cache.get_or_synthesize(key, _slow_synthesize))
+        await started.wait()
+        waiters = [
+            asyncio.create_task(
+                cache.get_or_synthesize(key, AsyncMock(return_value=b"RIFF-audio"))
+            )
+            for _ in range(2)
+        ]
+        await asyncio.sleep(0.01)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+        assert await asyncio.gather(*waiters) == [b"RIFF-audio"] * 2
+        assert await cache.read(key) == b"RIFF-audio"
+
+    @pytest.mark.asyncio
+    async def test_synthesis_failure_is_not_cached(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=1024))
+        key = tts_cache_key("a", TTS_OUTPUT_FORMAT)
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_synthesize(
+                key, AsyncMock(side_effect=RuntimeError("Azure down"))
+            )
+
+        assert await cache.size(key) is None
+        assert (
+            await cache.get_or_synthesize(key, AsyncMock(return_value=b"ok")) == b"ok"
+        )
+
+    @pytest.mark.asyncio
+    async def test_store_failure_falls_back_to_synthesis(self):
+        cache = TTSAudioCache(_BrokenStore())
+        synthesize = AsyncMock(return_value=b"RIFF-audio")
+
+        assert await cache.get_or_synthesize("k", synthesize) == b"RIFF-audio"
+        assert await cache.size("k") is None
+
+    @pytest.mark.asyncio
+    async def test_disabled_always_synthesizes(self, tmp_path):
+        cache = TTSAudioCache(
+            LocalDiskAudioStore(str(tmp_path), max_bytes=1024), enabled=False
+        )
+        synthesize = AsyncMock(return_value=b"RIFF-audio")
+
+        await cache.get_or_synthesize("k", synthesize)
+        await cache.get_or_synthesize("k", synthesize)
+
+        assert synthesize.await_count == 2
+
+
+class TestSpeechServiceCache:
+    """SpeechService.text_to_speech がキャッシュを使うことのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_repeat_request_does_not_call_azure(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=1024))
+        service = SpeechService()
+
+        with (
+            patch("app.services.speech_service.tts_audio_cache", cache),
+            patch.object(
+                service, "_synthesize", AsyncMock(return_value=b"RIFF-audio")
+            ) as mock_synthesize,
+        ):
+            first = await service.text_to_speech("Let's get started.", accent="uk")
+            second = await service.text_to_speech("Let's get started.", accent="uk")
+
+        assert first == second == b"RIFF-audio"
+        mock_synthesize.assert_awaited_once()
+        ssml = mock_synthesize.call_args.args[0]
+        assert "en-GB" in ssml
+        assert (
+            await cache.size(service.tts_cache_key("Let's get started.", accent="uk"))
+            == 10
+        )
+
+
+class TestStreamingTTS:
+    """ストリーミング合成・圧縮形式のテスト"""
+
+    @staticmethod
+    def _mock_speech_client(handler):
+        """トークン発行に応答し、それ以外を handler に渡す SpeechClient"""
+
+        def _route(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/issueToken"):
+                return httpx.Response(200, text="token")
+            return handler(request)
+
+        return SpeechClient(
+            key="key", region="eastus2", transport=httpx.MockTransport(_route)
+        )
+
+    @pytest.mark.asyncio
+    async def test_streams_azure_chunks_and_caches_result(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=4096))
+        service = SpeechService()
+        requests: list[httpx.Request] = []
+
+        async def _chunks():
+            for chunk in (b"ID3", b"frame1", b"frame2"):
+                yield chunk
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, content=_chunks())
+
+        with (
+            patch("app.services.speech_service.tts_audio_cache", cache),
+            patch(
+                "app.services.speech_service.speech_client",
+                self._mock_speech_client(_handler),
+            ),
+        ):
+            first = [
+                chunk
+                async for chunk in service.text_to_speech_stream(
+                    "Hello", audio_format="mp3"
+                )
+            ]
+            second = [
+                chunk
+                async for chunk in service.text_to_speech_stream(
+                    "Hello", audio_format="mp3"
+                )
+            ]
+
+        assert b"".join(first) == b"ID3frame1frame2"
+        assert first == [b"ID3", b"frame1", b"frame2"]
+        assert b"".join(second) == b"ID3frame1frame2"
+        assert len(requests) == 1
+        assert requests[0].headers["X-Microsoft-OutputFormat"] == (
+            TTS_FORMATS["mp3"].output_format
+        )
+
+    @pytest.mark.asyncio
+    async def test_stream_error_is_not_cached(self, tmp_path):
+        cache = TTSAudioCache(LocalDiskAudioStore(str(tmp_path), max_bytes=4096))
+        service = SpeechService()
+
+        def _handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(429, text="Too many requests")
+
+        with (
+            patch("app.services.speech_service.tts_audio_cache", cache),
+            patch(
+                "app.services.speech_service.speech_client",
+                self._mock_speech_client(_handler),
+            ),
+            pytest.raises(httpx.HTTPStatusError),
+        ):
+            async for _ in service.text_to_speech_stream("Hello", audio_format="opus"):
+                pass
+
+        key = service.tts_cache_key("Hello", audio_format="opus")
+        assert await cache.size(key) is None
+
+    def test_formats_have_distinct_cache_keys(self):
+        service = SpeechService()
+        keys = {
+            service.tts_cache_key("Hello", audio_format=name) for name in TTS_FORMATS
+        }
+
+        assert len(keys) == len(TTS_FORMATS)
+        assert service.tts_cache_key("Hello") == service.tts_cache_key(
+            "Hello", audio_format="wav"
+        )
+
+    @pytest.mark.parametrize(
+        ("header", "expected"),
+        [
+            (b"RIFF\x00\x00\x00\x00WAVE", "wav"),
+            (b"ID3\x04\x00", "mp3"),
+            (b"\xff\xf3\x44\xc4", "mp3"),
+            (b"OggS\x00\x02", "opus"),
+            (b"\x1a\x45\xdf\xa3\x9f", "webm"),
+            (b"", "wav"),
+        ],
+    )
+    def test_detect_format(self, header, expected):
+        assert detect_tts_format(header) == expected
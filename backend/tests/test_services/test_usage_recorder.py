@@ -0,0 +1,150 @@
+"""API利用ログ記録のテスト - バッチINSERT・月間利用回数加算・キュー制御"""
+
+import asyncio
+import uuid
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import func, select
+
+from app.llm.resilience import RateLimiter, RetryPolicy
+from app.llm.router import LLMRouter
+from app.llm.service import LLMService
+from app.llm.usage import report_usage, set_usage_user
+from app.models.api_usage import ApiUsageLog
+from app.models.user import User
+from app.services.usage_recorder import UsageRecorder
+from tests.conftest import TestSessionLocal
+
+
+def _record(recorder: UsageRecorder, user_id, tokens: int = 100) -> None:
+    recorder.record(
+        user_id=user_id,
+        provider="anthropic",
+        model="haiku",
+        model_name="claude-haiku-4-5-20251001",
+        input_tokens=tokens,
+        output_tokens=tokens // 2,
+    )
+
+
+@pytest.fixture(autouse=True)
+def _patch_session():
+    with patch("app.services.usage_recorder.async_session", TestSessionLocal):
+        yield
+
+
+class TestUsageRecorder:
+    """UsageRecorderのテスト"""
+
+    @pytest.mark.asyncio
+    async def test_flush_inserts_rows_and_increments_usage(self, test_user):
+        """バッチ書き込みでログが挿入され、月間利用回数が加算される"""
+        recorder = UsageRecorder(batch_size=10, flush_interval=1.0)
+        for _ in range(3):
+            _record(recorder, test_user.id, tokens=1_000_000)
+
+        assert await recorder.flush() == 3
+
+        async with TestSessionLocal() as db:
+            rows = (await db.execute(select(ApiUsageLog))).scalars().all()
+            usage = await db.scalar(
+                select(User.api_usage_monthly).where(User.id == test_user.id)
+            )
+
+        assert len(rows) == 3
+        assert rows[0].api_provider == "anthropic"
+        assert rows[0].input_tokens == 1_000_000
+        # haiku (anthropic): $0.80/M input + $4.0/M output
+        assert rows[0].estimated_cost_usd == pytest.approx(0.80 + 2.0)
+        assert usage == 3
+
+    @pytest.mark.asyncio
+    async def test_flush_respects_batch_size(self, test_user):
+        """1回のflushはbatch_size件まで"""
+        recorder = UsageRecorder(batch_size=2, flush_interval=1.0)
+        for _ in range(5):
+            _record(recorder, test_user.id)
+
+        assert await recorder.flush() == 2
+        assert await recorder.flush() == 2
+        assert await recorder.flush() == 1
+        assert await recorder.flush() == 0
+
+    def test_record_without_user_is_skipped(self):
+        """ユーザー不明（バックグラウンド処理）の呼び出しは記録しない"""
+        recorder = UsageRecorder()
+        _record(recorder, None)
+
+        assert recorder._queue.empty()
+
+    def test_full_queue_drops_entry(self):
+        """キュー満杯時は破棄し、ブロックしない"""
+        recorder = UsageRecorder(max_queue_size=1)
+        _record(recorder, uuid.uuid4())
+        _record(recorder, uuid.uuid4())
+
+        assert recorder._queue.qsize() == 1
+        assert recorder.dropped == 1
+
+    @pytest.mark.asyncio
+    async def test_background_task_writes_and_stop_drains(self, test_user):
+        """バックグラウンドタスクが書き込み、停止時に残りを書き込む"""
+        recorder = UsageRecorder(batch_size=100, flush_interval=0.01)
+        recorder.start()
+        _record(recorder, test_user.id)
+        await asyncio.sleep(0.1)
+        _record(recorder, test_user.id)
+        await recorder.stop()
+
+        async with TestSessionLocal() as db:
+            count = await db.scalar(select(func.count()).select_from(ApiUsageLog))
+            usage = await db.scalar(
+                select(User.api_usage_monthly).where(User.id == test_user.id)
+            )
+
+        assert count == 2
+        assert usage == 2
+
+    @pytest.mark.asyncio
+    async def test_streamed_chat_writes_usage_row(self, test_user):
+        """ストリーミング応答の使用量もAPI利用ログに書き込まれる"""
+
+        async def _chat_stream(**kwargs):
+            yield "Sounds "
+            yield "good."
+            report_usage(40, 6, "claude-haiku-4-5-20251001")
+
+        provider = MagicMock()
+        provider.name = "anthropic"
+        provider.chat_stream = _chat_stream
+        service = LLMService.__new__(LLMService)
+        service.router = LLMRouter(
+            primary=provider,
+            retry_policy=RetryPolicy(max_retries=0),
+            rate_limiter=RateLimiter(requests_per_minute=1000),
+            usage_callback=LLMService._record_usage,
+        )
+        recorder = UsageRecorder(batch_size=10, flush_interval=1.0)
+
+        set_usage_user(test_user.id, "free")
+        try:
+            with patch("app.llm.service.usage_recorder", recorder):
+                chunks = [
+                    c
+                    async for c in service.chat_stream(
+                        [{"role": "user", "content": "hi"}]
+                    )
+                ]
+        finally:
+            set_usage_user(None)
+
+        assert chunks == ["Sounds ", "good."]
+        assert await recorder.flush() == 1
+        async with TestSessionLocal() as db:
+            row = await db.scalar(select(ApiUsageLog))
+
+        assert row.user_id == test_user.id
+        assert row.api_provider == "anthropic"
+        assert row.input_tokens == 40
+        assert row.output_tokens == 6